@@ -9,11 +9,20 @@ Description:                PING API路由控制器，提供PING监控相关的A
 Changed history:            
                             2025/05/23: 初始创建;
                             2025/05/24: 添加start和stop路由;
+                            2026/10/19: 添加PING结果流式导出接口;
+                            2026/10/19: PING结果接口支持游标分页与状态、时间窗口过滤;
+                            2026/10/19: 任务状态与结果改由任务管理器保存;
+                            2026/10/19: 连续PING在后台运行，停止时终止进行中的探测并返回部分统计;
+                            2026/10/19: 新任务入口接入进程级资源预算准入检查;
+                            2026/10/19: 已落盘结果的分页在线程中读取文件;
 ----
 """
 
-from fastapi import APIRouter, HTTPException, status
-from typing import List, Dict, Any
+from fastapi import APIRouter, HTTPException, status, Query
+from fastapi.responses import StreamingResponse
+from typing import List, Dict, Any, Optional
+from dataclasses import asdict, is_dataclass
+import asyncio
 import uuid
 import time
 
@@ -24,12 +33,75 @@ from ...schemas.ping import (
 )
 from ...schemas.common import SuccessResponse, ErrorResponse, Pagination
 from ...core.ping_tool import PingEngine
+from ...core.result_export import EXPORT_FORMATS, available_formats, iter_export
+from ...core.cursor import encode_cursor, decode_cursor, page_sequence
+from ...core.job_manager import JobQueueFullError, SpilledResults, job_manager
+from ...core.resource_governor import resource_governor
 
 router = APIRouter()
 
-# 全局存储（生产环境中应使用Redis或数据库）
-_ping_tasks: Dict[str, Dict] = {}
-_ping_results: Dict[str, List] = {}
+# 任务状态与结果由任务管理器保存（有数量上限，已结束任务按TTL淘汰）
+_ping_tasks = job_manager.tasks("ping")
+_ping_results = job_manager.results("ping")
+
+
+def _ping_result_dict(result: Any) -> Dict[str, Any]:
+    """PING结果转换为字典（引擎返回PingResult数据类）"""
+    return asdict(result) if is_dataclass(result) else result
+
+
+def _ping_summary(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """根据已完成的PING结果计算统计"""
+    received = [r for r in results if r.get("success")]
+    times = [r["response_time"] for r in received if r.get("response_time") is not None]
+    return {
+        "packets_sent": len(results),
+        "packets_received": len(received),
+        "packet_loss": round((1 - len(received) / len(results)) * 100, 2) if results else 0.0,
+        "avg_time": round(sum(times) / len(times), 2) if times else None
+    }
+
+
+async def _run_continuous_ping(task_id: str, request: ContinuousPingRequest):
+    """后台执行连续PING，取消时记录已完成部分的统计"""
+    engine = PingEngine(
+        packet_size=request.packet_size,
+        timeout=request.timeout,
+        interval=request.interval
+    )
+    results = _ping_results.setdefault(task_id, [])
+    _ping_tasks[task_id]["status"] = "running"
+    
+    try:
+        async for result in engine.continuous_ping(request.target, duration=request.duration):
+            results.append(result)
+            if request.max_count and len(results) >= request.max_count:
+                break
+        _ping_tasks[task_id]["status"] = "completed"
+    except asyncio.CancelledError:
+        _ping_tasks[task_id]["status"] = "stopped"
+        raise
+    except Exception as e:
+        _ping_tasks[task_id]["status"] = "failed"
+        _ping_tasks[task_id]["error"] = str(e)
+    finally:
+        _ping_tasks[task_id]["end_time"] = time.strftime("%Y-%m-%dT%H:%M:%SZ")
+        _ping_tasks[task_id]["statistics"] = _ping_summary(results)
+
+
+def _ping_result_matches(result: Dict[str, Any],
+                         result_status: Optional[str],
+                         since: Optional[float],
+                         until: Optional[float]) -> bool:
+    """PING结果是否满足过滤条件"""
+    if result_status is not None and ("success" if result.get("success") else "failed") != result_status:
+        return False
+    timestamp = result.get("timestamp")
+    if since is not None and (timestamp is None or timestamp < since):
+        return False
+    if until is not None and (timestamp is None or timestamp >= until):
+        return False
+    return True
 
 
 @router.post("/start", response_model=SuccessResponse)
@@ -42,6 +114,9 @@ async def start_ping(request: PingRequest):
     Returns:
         SuccessResponse: PING任务信息
     """
+    # 系统资源繁忙时快速拒绝新任务（503 + Retry-After）
+    resource_governor.admit()
+    
     try:
         ping_tool = PingEngine()
         task_id = str(uuid.uuid4())
@@ -70,6 +145,12 @@ async def start_ping(request: PingRequest):
             message="PING测试已启动",
             data=task
         )
+    except JobQueueFullError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers=resource_governor.retry_after_header
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -93,9 +174,12 @@ async def stop_ping(ping_id: str):
             detail="PING任务不存在"
         )
     
-    # 更新任务状态
-    _ping_tasks[ping_id]["status"] = "stopped"
-    _ping_tasks[ping_id]["end_time"] = time.strftime("%Y-%m-%dT%H:%M:%SZ")
+    # 取消后台任务（等待进行中的探测结束），再更新任务状态
+    await job_manager.cancel(ping_id)
+    if _ping_tasks[ping_id].get("status") not in ("completed", "failed"):
+        _ping_tasks[ping_id]["status"] = "stopped"
+        _ping_tasks[ping_id]["end_time"] = time.strftime("%Y-%m-%dT%H:%M:%SZ")
+        _ping_tasks[ping_id]["statistics"] = _ping_summary(_ping_results.get(ping_id, []))
     
     return SuccessResponse(
         message="PING测试已停止",
@@ -126,12 +210,24 @@ async def get_ping_stats(ping_id: str):
 
 
 @router.get("/results/{ping_id}", response_model=SuccessResponse)
-async def get_ping_results(ping_id: str, limit: int = 100):
+async def get_ping_results(ping_id: str,
+                           limit: int = Query(default=100, ge=1, le=1000),
+                           cursor: Optional[str] = None,
+                           result_status: Optional[str] = Query(default=None, alias="status"),
+                           since: Optional[float] = None,
+                           until: Optional[float] = None):
     """获取PING结果列表
     
+    结果按产生顺序游标分页，续读位置编码在next_cursor中，
+    每页只扫描本页跨越的结果，代价与总结果数无关。
+    
     Args:
         ping_id: PING任务ID
-        limit: 结果数量限制
+        limit: 每页结果数量
+        cursor: 上一页返回的next_cursor，None表示第一页
+        result_status: 按结果过滤 success/failed
+        since: 时间下限（时间戳，含）
+        until: 时间上限（时间戳，不含）
         
     Returns:
         SuccessResponse: PING结果列表
@@ -142,11 +238,66 @@ async def get_ping_results(ping_id: str, limit: int = 100):
             detail="PING结果不存在"
         )
     
-    results = _ping_results[ping_id][:limit]
+    scope = {"ping_id": ping_id, "status": result_status, "since": since, "until": until}
+    try:
+        position = decode_cursor(cursor, scope)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    items = _ping_results[ping_id]
+    page_args = (
+        items, position, limit,
+        lambda r: _ping_result_matches(_ping_result_dict(r), result_status, since, until)
+    )
+    # 已落盘的结果要读取文件，放到线程中执行
+    if isinstance(items, SpilledResults):
+        results, next_position = await asyncio.to_thread(page_sequence, *page_args)
+    else:
+        results, next_position = page_sequence(*page_args)
     
     return SuccessResponse(
         message="PING结果获取成功",
-        data=results
+        data={
+            "results": [_ping_result_dict(r) for r in results],
+            "next_cursor": encode_cursor(next_position, scope) if next_position is not None else None,
+            "has_more": next_position is not None
+        }
+    )
+
+
+@router.get("/results/{ping_id}/export")
+async def export_ping_results(ping_id: str,
+                              export_format: str = Query(default="ndjson", alias="format")):
+    """流式导出PING结果
+    
+    Args:
+        ping_id: PING任务ID
+        export_format: 导出格式 ndjson/csv/msgpack
+        
+    Returns:
+        StreamingResponse: 导出内容
+    """
+    if ping_id not in _ping_results:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="PING结果不存在"
+        )
+    
+    if export_format not in available_formats():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"不支持的导出格式: {export_format}，可用格式: {', '.join(available_formats())}"
+        )
+    
+    results = _ping_results[ping_id]
+    media_type, extension = EXPORT_FORMATS[export_format]
+    return StreamingResponse(
+        iter_export((_ping_result_dict(r) for r in results), export_format),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="ping-{ping_id}.{extension}"'}
     )
 
 
@@ -160,6 +311,8 @@ async def ping_single(request: PingRequest):
     Returns:
         SuccessResponse: PING结果
     """
+    resource_governor.admit()
+    
     try:
         ping_tool = PingEngine(
             packet_size=request.packet_size,
@@ -193,16 +346,26 @@ async def start_continuous_ping(request: ContinuousPingRequest):
     Returns:
         SuccessResponse: 任务信息
     """
+    resource_governor.admit()
+    
     task_id = str(uuid.uuid4())
     
-    _ping_tasks[task_id] = {
-        "task_id": task_id,
-        "target": request.target,
-        "status": "running",
-        "created_at": time.time(),
-        "duration": request.duration,
-        "interval": request.interval
-    }
+    try:
+        _ping_tasks[task_id] = {
+            "task_id": task_id,
+            "target": request.target,
+            "status": "pending",
+            "created_at": time.time(),
+            "duration": request.duration,
+            "interval": request.interval
+        }
+        job_manager.submit(task_id, lambda: _run_continuous_ping(task_id, request))
+    except JobQueueFullError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers=resource_governor.retry_after_header
+        )
     
     return SuccessResponse(
         message="连续PING监控已启动",
@@ -220,6 +383,8 @@ async def ping_batch(request: BatchPingRequest):
     Returns:
         SuccessResponse: 批量PING结果
     """
+    resource_governor.admit()
+    
     try:
         ping_tool = PingEngine(
             packet_size=request.packet_size,
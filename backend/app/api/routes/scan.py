@@ -10,29 +10,358 @@ Changed history:
                             2025/05/23: 初始创建;
                             2025/05/23: 修复核心模块导入;
                             2025/05/24: 添加start和status路由;
+                            2026/10/19: 统一扫描引擎创建，接入速率限制配置;
+                            2026/10/19: 支持top_ports和按开放频率排序探测;
+                            2026/10/19: 支持扫描截止时间，返回覆盖率信息;
+                            2026/10/19: 扫描接入结果缓存，添加缓存管理接口;
+                            2026/10/19: 后台扫描写入检查点，支持断点续扫;
+                            2026/10/19: 端口解析改用PortSet;
+                            2026/10/19: 批量扫描目标按TargetSpec延迟展开;
+                            2026/10/19: 扫描结果持久化，结果接口支持过滤与分页;
+                            2026/10/19: 添加资产清单查询接口;
+                            2026/10/19: 添加扫描差异比较与资产清单快照接口;
+                            2026/10/19: 添加周期扫描任务接口;
+                            2026/10/19: 添加扫描结果流式导出接口;
+                            2026/10/19: 结果接口支持游标分页、端口范围与时间窗口过滤;
+                            2026/10/19: 后台任务改由任务管理器排队运行，已结束任务按TTL淘汰;
+                            2026/10/19: 取消任务时终止进行中的探测并返回部分统计;
+                            2026/10/19: 新任务入口接入进程级资源预算准入检查;
+                            2026/10/19: 扫描并发数限制在文件描述符预算推导的上限内;
+                            2026/10/19: 扫描引擎使用源地址池并按配置在关闭时发送RST;
+                            2026/10/19: 扫描引擎按发起请求的客户端公平分配探测额度，单端口扫描走交互式通道;
+                            2026/10/19: 后台扫描任务提供开始前的耗时估计和运行中的预计剩余时间;
+                            2026/10/19: 启用结果持久化时分页与导出不再加载内存或落盘的结果;
+                            2026/10/19: 周期扫描任务记录创建它的客户端;
+                            2026/10/19: 扫描失败时同样写入缓冲中的结果;
+                            2026/10/19: 资产清单、快照和周期扫描只保存在本进程，多工作进程时拒绝请求;
+                            2026/10/19: 已落盘结果的分页、统计和差异比较在线程中读取文件;
+                            2026/10/19: 等待检查点在线程中刷盘;
+                            2026/10/19: 因截止时间未扫完的任务结束为partial状态，保留实际进度;
 ----
 """
 
-from fastapi import APIRouter, HTTPException, status, Depends, BackgroundTasks
-from fastapi.responses import JSONResponse
-from typing import List, Dict, Any, Optional
+from fastapi import APIRouter, HTTPException, status, Depends, Query
+from fastapi.responses import JSONResponse, StreamingResponse
+from typing import List, Dict, Any, Optional, Union, Iterable
 import asyncio
 import uuid
 import time
+import logging
 
 from ...schemas.scan import (
     ScanRequest, PortRangeRequest, BatchScanRequest, ScanResult,
-    ScanStatistics, ScanTaskStatus, ScanConfigUpdate, ScanProfile
+    ScanStatistics, ScanTaskStatus, ScanConfigUpdate, ScanProfile, ScanScheduleRequest
 )
 from ...schemas.common import SuccessResponse, ErrorResponse, Pagination
 from ...core.port_scanner import PortScannerEngine
+from ...core.port_ranking import get_top_ports
+from ...core.port_set import PortSet
+from ...core.scan_cache import scan_result_cache
+from ...core.scan_checkpoint import ScanCheckpoint, scan_checkpoint_store
+from ...core.result_store import RESULT_COLUMNS, normalize_result, scan_result_store
+from ...core.result_export import EXPORT_FORMATS, available_formats, iter_export
+from ...core.cursor import encode_cursor, decode_cursor, page_sequence
+from ...core.inventory_index import inventory_index
+from ...core.scan_diff import diff_entries, sorted_entries
+from ...core.scan_scheduler import ScanSchedule, scan_scheduler
+from ...core.job_manager import JobQueueFullError, SpilledResults, job_manager
+from ...core.resource_governor import SOCKETS, resource_governor
+from ...core.fd_limits import clamp_concurrency, get_fd_budget
+from ...core.source_pool import scan_source_pool
+from ...core.probe_scheduler import current_client
+from ...core.scan_estimator import ScanEstimate, ScanProgress, estimate_scan
 from ...config import settings
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
 
-# 全局任务存储（生产环境中应使用Redis或数据库）
-_active_tasks: Dict[str, Dict] = {}
-_scan_results: Dict[str, List[ScanResult]] = {}
+# 任务状态与结果由任务管理器保存（有数量上限，已结束任务按TTL淘汰）
+_active_tasks = job_manager.tasks("scan")
+_scan_results = job_manager.results("scan")
+
+# 可以读取结果的任务状态（partial为截止时间已到、部分端口未探测）
+RESULT_STATUSES = ("completed", "partial")
+
+# 资产清单快照（只保留最近若干个）
+_MAX_INVENTORY_SNAPSHOTS = 10
+_inventory_snapshots: Dict[str, Dict[str, Any]] = {}
+
+
+def _require_single_worker(feature: str):
+    """资产清单、快照和周期扫描只保存在本进程内，多工作进程时各进程数据不一致
+    
+    Raises:
+        HTTPException: 配置了多个工作进程
+    """
+    if settings.workers > 1:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"{feature}只保存在单个工作进程中，多工作进程(WORKERS>1)运行时不可用"
+        )
+
+
+def _result_time(result: Dict[str, Any]) -> Optional[float]:
+    """内存结果的扫描时间（引擎结果为时间戳，后台任务结果为本地时间字符串）"""
+    value = result.get("scanned_at") or result.get("detected_at") or result.get("timestamp")
+    if isinstance(value, str):
+        try:
+            return time.mktime(time.strptime(value, "%Y-%m-%dT%H:%M:%SZ"))
+        except ValueError:
+            return None
+    return value
+
+
+def _result_matches(result: Dict[str, Any], filters: Dict[str, Any]) -> bool:
+    """内存结果是否满足过滤条件（字段名兼容引擎结果与后台任务结果）"""
+    values = {
+        "host": result.get("host") or result.get("target"),
+        "port": result.get("port"),
+        "status": result.get("status"),
+        "service": result.get("service_name") or result.get("service")
+    }
+    for key, value in filters.items():
+        if value is None:
+            continue
+        if key == "port_min":
+            if values["port"] < value:
+                return False
+        elif key == "port_max":
+            if values["port"] > value:
+                return False
+        elif key in ("since", "until"):
+            scanned_at = _result_time(result)
+            if scanned_at is None or (scanned_at < value if key == "since" else scanned_at >= value):
+                return False
+        elif values[key] != value:
+            return False
+    return True
+
+
+def _page_results(scan_id: str,
+                  results: List[Dict[str, Any]],
+                  page: int,
+                  page_size: int,
+                  cursor: Optional[str] = None,
+                  **filters) -> Dict[str, Any]:
+    """过滤并分页扫描结果，启用持久化时在SQLite中完成
+    
+    指定cursor（空字符串表示第一页）时使用游标分页：启用持久化时按主键续读，
+    否则按内存结果列表的位置续读，每页代价与页大小成正比，不计算总数；
+    否则使用页码分页并返回总数。
+    
+    Args:
+        scan_id: 扫描任务ID
+        results: 内存中的结果（未启用持久化时使用）
+        page: 页码
+        page_size: 每页大小
+        cursor: 上一页返回的next_cursor
+        filters: host/port/status/service等值条件，port_min/port_max/since/until范围条件
+        
+    Returns:
+        包含results和pagination（或next_cursor）的字典
+    """
+    if cursor is not None:
+        scope = {"scan_id": scan_id, "store": scan_result_store.enabled, **filters}
+        try:
+            position = decode_cursor(cursor, scope)
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
+        
+        if scan_result_store.enabled:
+            items, next_position = scan_result_store.query_after(
+                scan_id, after_id=position, limit=page_size, **filters
+            )
+        else:
+            items, next_position = page_sequence(
+                results, position, page_size, lambda r: _result_matches(r, filters)
+            )
+        
+        return {
+            "results": items,
+            "next_cursor": encode_cursor(next_position, scope) if next_position is not None else None,
+            "has_more": next_position is not None
+        }
+    
+    offset = (page - 1) * page_size
+    if scan_result_store.enabled:
+        items, total = scan_result_store.query(
+            scan_id=scan_id, offset=offset, limit=page_size, **filters
+        )
+    else:
+        matched = [r for r in results if _result_matches(r, filters)]
+        total = len(matched)
+        items = matched[offset:offset + page_size]
+    
+    return {
+        "results": items,
+        "pagination": Pagination(page=page, size=page_size, total=total).model_dump()
+    }
+
+
+def _memory_results(scan_id: str) -> List[Dict[str, Any]]:
+    """内存（或已落盘）的任务结果，启用持久化时分页和导出从SQLite读取，不加载"""
+    if scan_result_store.enabled:
+        return []
+    return _scan_results.get(scan_id, [])
+
+
+async def _read_results(results, func, *args, **kwargs):
+    """对任务结果执行func，已落盘的结果要读取文件，放到线程中执行"""
+    if isinstance(results, SpilledResults):
+        return await asyncio.to_thread(func, *args, **kwargs)
+    return func(*args, **kwargs)
+
+
+def _export_results(scan_id: str,
+                    results: List[Dict[str, Any]],
+                    export_format: str,
+                    **filters) -> StreamingResponse:
+    """流式导出扫描结果，启用持久化时从SQLite分块读取
+    
+    Args:
+        scan_id: 扫描任务ID
+        results: 内存中的结果（未启用持久化时使用）
+        export_format: 导出格式
+        filters: host/port/status/service过滤条件
+        
+    Returns:
+        StreamingResponse: 导出响应
+    """
+    if export_format not in available_formats():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"不支持的导出格式: {export_format}，可用格式: {', '.join(available_formats())}"
+        )
+    
+    if scan_result_store.enabled:
+        rows = scan_result_store.iter_results(scan_id, **filters)
+    else:
+        # 内存结果逐条转换为与结果表相同的字段，导出格式与存储方式无关
+        rows = (
+            dict(zip(RESULT_COLUMNS, normalize_result(scan_id, r)))
+            for r in results if _result_matches(r, filters)
+        )
+    
+    media_type, extension = EXPORT_FORMATS[export_format]
+    return StreamingResponse(
+        iter_export(rows, export_format, columns=RESULT_COLUMNS),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="scan-{scan_id}.{extension}"'}
+    )
+
+
+def _register_job(job_id: str, state: Dict[str, Any], priority: int = 0):
+    """登记后台扫描任务，任务数已满时返回503"""
+    try:
+        job_manager.create("scan", state, job_id=job_id, priority=priority)
+    except JobQueueFullError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers=resource_governor.retry_after_header
+        )
+
+
+async def _finish_cancelled(task_id: str,
+                            scanner: Optional[PortScannerEngine],
+                            writer=None):
+    """后台扫描被取消时中止扫描引擎，保存已写入的结果并记录部分统计
+    
+    Args:
+        task_id: 任务ID
+        scanner: 扫描引擎（任务启动前被取消时为None）
+        writer: 结果写入器
+    """
+    if scanner is not None:
+        await scanner.abort()
+    if writer is not None:
+        await writer.close()
+    
+    task = _active_tasks.get(task_id)
+    if task is None:
+        return
+    task["status"] = "cancelled"
+    task["cancelled_at"] = time.time()
+    task["end_time"] = time.strftime("%Y-%m-%dT%H:%M:%SZ")
+    if scanner is not None:
+        task["statistics"] = scanner.get_statistics()
+        task["coverage"] = scanner.get_coverage()
+
+
+def _create_scanner(rate_limit: Optional[float] = None, **kwargs) -> PortScannerEngine:
+    """按全局配置创建扫描引擎
+    
+    Args:
+        rate_limit: 请求指定的单任务速率(包/秒)，不能超过配置上限
+        **kwargs: 传递给PortScannerEngine的其他参数，None值忽略
+        
+    Returns:
+        PortScannerEngine: 扫描引擎实例
+    """
+    options = {
+        "rate_limit": _job_rate(rate_limit),
+        "target_rate_limit": settings.scan_target_pps,
+        "rate_limit_burst": settings.scan_rate_burst,
+        "result_cache": scan_result_cache,
+        "inventory": inventory_index,
+        "source_pool": scan_source_pool,
+        "reset_on_close": settings.scan_reset_on_close,
+        "client": current_client.get(),
+    }
+    options.update({k: v for k, v in kwargs.items() if v is not None})
+    
+    # 请求的并发数不能超过文件描述符预算推导的单任务上限
+    budget = get_fd_budget()
+    if "max_concurrent" in options:
+        options["max_concurrent"] = clamp_concurrency(options["max_concurrent"], budget.scan_concurrency)
+    if "banner_concurrency" in options:
+        options["banner_concurrency"] = clamp_concurrency(options["banner_concurrency"], budget.banner_concurrency)
+    return PortScannerEngine(**options)
+
+
+def _job_rate(rate_limit: Optional[float] = None) -> float:
+    """单任务速率上限：请求指定的速率不能超过配置上限"""
+    job_pps = settings.scan_job_pps
+    if rate_limit:
+        job_pps = min(job_pps, rate_limit) if job_pps > 0 else rate_limit
+    return job_pps
+
+
+def _estimate_scan(hosts: Iterable[str],
+                   host_count: int,
+                   port_count: int,
+                   timeout: Optional[float],
+                   concurrency: int,
+                   rate_limit: Optional[float] = None,
+                   deadline_seconds: Optional[float] = None) -> ScanEstimate:
+    """按与_create_scanner相同的限速配置估计扫描耗时
+    
+    Args:
+        hosts: 扫描目标
+        host_count: 目标数
+        port_count: 每个目标的端口数
+        timeout: 单次探测超时（秒），None表示默认超时
+        concurrency: 同时进行的探测数（不超过进程级套接字预算）
+        rate_limit: 请求指定的单任务速率(包/秒)
+        deadline_seconds: 扫描时间预算（秒）
+        
+    Returns:
+        ScanEstimate: 耗时估计
+    """
+    return estimate_scan(
+        probes=host_count * port_count,
+        hosts=hosts,
+        timeout=timeout or settings.default_scan_timeout,
+        concurrency=min(concurrency, resource_governor.limit(SOCKETS)),
+        job_rate=_job_rate(rate_limit),
+        target_rate=settings.scan_target_pps,
+        global_rate=settings.scan_global_pps,
+        host_count=host_count,
+        deadline=deadline_seconds
+    )
 
 
 @router.post("/single", response_model=SuccessResponse)
@@ -45,8 +374,17 @@ async def scan_single_port(request: ScanRequest):
     Returns:
         SuccessResponse: 扫描结果
     """
+    # 等待资源的探测过多时快速拒绝新任务（503 + Retry-After）
+    resource_governor.admit()
+    
     try:
-        scanner = PortScannerEngine()
+        # 单端口检查走交互式通道，不在批量任务之后排队
+        scanner = _create_scanner(
+            timeout=request.timeout,
+            use_cache=request.use_cache,
+            cache_max_age=request.max_age,
+            interactive=True
+        )
         result = await scanner.scan_port(
             host=request.target,
             port=request.port,
@@ -74,20 +412,32 @@ async def scan_port_range(request: PortRangeRequest):
     Returns:
         SuccessResponse: 扫描结果列表
     """
+    resource_governor.admit()
+    
     try:
-        scanner = PortScannerEngine()
-        results = await scanner.scan_range(
-            target=request.target,
+        scanner = _create_scanner(
+            timeout=request.timeout,
+            max_concurrent=request.max_concurrent,
+            rate_limit=request.rate_limit,
+            deadline_seconds=request.deadline_seconds,
+            use_cache=request.use_cache,
+            cache_max_age=request.max_age
+        )
+        results = await scanner.scan_port_range(
+            host=request.target,
             start_port=request.start_port,
             end_port=request.end_port,
-            timeout=request.timeout,
             protocol=request.protocol,
-            max_concurrent=request.max_concurrent
+            port_order=request.port_order
         )
         
         return SuccessResponse(
             message=f"端口范围扫描完成，共扫描 {len(results)} 个端口",
-            data=results
+            data={
+                "results": results,
+                "statistics": scanner.get_statistics(),
+                "coverage": scanner.get_coverage()
+            }
         )
     except Exception as e:
         raise HTTPException(
@@ -106,19 +456,35 @@ async def scan_batch(request: BatchScanRequest):
     Returns:
         SuccessResponse: 扫描结果
     """
+    resource_governor.admit()
+    
     try:
-        scanner = PortScannerEngine()
-        results = await scanner.scan_batch(
-            targets=request.targets,
-            ports=request.ports,
+        scanner = _create_scanner(
             timeout=request.timeout,
-            protocol=request.protocol,
-            max_concurrent=request.max_concurrent
+            max_concurrent=request.max_concurrent,
+            rate_limit=request.rate_limit,
+            deadline_seconds=request.deadline_seconds,
+            use_cache=request.use_cache,
+            cache_max_age=request.max_age
         )
+        targets = request.target_spec()
+        results = await scanner.batch_scan([
+            {
+                "host": target,
+                "ports": request.port_set,
+                "protocol": request.protocol,
+                "port_order": request.port_order
+            }
+            for target in targets.iterate(request.randomize_targets)
+        ])
         
         return SuccessResponse(
-            message=f"批量扫描完成，共扫描 {len(request.targets)} 个目标",
-            data=results
+            message=f"批量扫描完成，共扫描 {len(targets)} 个目标",
+            data={
+                "results": results,
+                "statistics": scanner.get_statistics(),
+                "coverage": scanner.get_coverage()
+            }
         )
     except Exception as e:
         raise HTTPException(
@@ -128,41 +494,48 @@ async def scan_batch(request: BatchScanRequest):
 
 
 @router.post("/async", response_model=SuccessResponse)
-async def start_async_scan(request: BatchScanRequest, background_tasks: BackgroundTasks):
+async def start_async_scan(request: BatchScanRequest):
     """启动异步扫描任务
     
+    任务进入任务管理器的优先级队列，运行中的任务数达到上限时排队等待。
+    
     Args:
         request: 扫描请求
-        background_tasks: 后台任务管理器
         
     Returns:
         SuccessResponse: 任务信息
     """
+    resource_governor.admit()
+    
     task_id = str(uuid.uuid4())
+    targets = request.target_spec()
+    
+    # 开始前估计耗时（任务逐个端口顺序探测，并发窗口为1）
+    estimate = _estimate_scan(
+        targets.iterate(False), len(targets), len(request.port_set), request.timeout, 1,
+        request.rate_limit, request.deadline_seconds
+    )
     
     # 创建任务状态
     task_status = ScanTaskStatus(
         task_id=task_id,
         status="pending",
         progress=0.0,
-        total_targets=len(request.targets),
+        total_targets=len(targets),
         completed_targets=0,
-        total_ports=len(request.ports),
-        completed_ports=0
+        total_ports=len(request.port_set),
+        completed_ports=0,
+        estimated_time_remaining=estimate.duration
     )
     
-    _active_tasks[task_id] = task_status.dict()
-    
-    # 添加后台任务
-    background_tasks.add_task(
-        _run_async_scan,
-        task_id,
-        request
-    )
+    state = task_status.dict()
+    state["estimate"] = estimate.as_dict()
+    _register_job(task_id, state, request.priority)
+    job_manager.submit(task_id, lambda: _run_async_scan(task_id, request))
     
     return SuccessResponse(
         message="异步扫描任务已启动",
-        data={"task_id": task_id, "status": "pending"}
+        data={"task_id": task_id, "status": "pending", "estimate": estimate.as_dict()}
     )
 
 
@@ -173,19 +546,46 @@ async def _run_async_scan(task_id: str, request: BatchScanRequest):
         task_id: 任务ID
         request: 扫描请求
     """
+    scanner = None
+    writer = None
+    results = []
     try:
         # 更新任务状态
         _active_tasks[task_id]["status"] = "running"
         _active_tasks[task_id]["started_at"] = time.time()
         
-        scanner = PortScannerEngine()
-        results = []
+        scanner = _create_scanner(
+            timeout=request.timeout,
+            max_concurrent=request.max_concurrent,
+            rate_limit=request.rate_limit,
+            deadline_seconds=request.deadline_seconds,
+            use_cache=request.use_cache,
+            cache_max_age=request.max_age
+        )
+        writer = scan_result_store.open_writer(task_id) if scan_result_store.enabled else None
         
-        total_scans = len(request.targets) * len(request.ports)
+        ports = scanner.order_scan_ports(request.port_set, request.protocol, request.port_order)
+        
+        targets = request.target_spec()
+        total_scans = len(targets) * len(ports)
         completed_scans = 0
         
-        for target in request.targets:
-            for port in request.ports:
+        # 按本次解析的端口重新估计（模型可能已在排队期间更新）
+        progress_eta = ScanProgress(total_scans, _estimate_scan(
+            targets.iterate(False), len(targets), len(ports), request.timeout, 1,
+            request.rate_limit, request.deadline_seconds
+        ))
+        _active_tasks[task_id]["estimate"] = progress_eta.estimate.as_dict()
+        
+        scanner.start_deadline()
+        for target in targets:
+            scanner.coverage.add_requested(target, ports)
+        
+        for target in targets.iterate(request.randomize_targets):
+            for port in ports:
+                # 截止时间已到，剩余端口记为未探测
+                if scanner.deadline_expired():
+                    break
                 try:
                     result = await scanner.scan_port(
                         host=target,
@@ -193,6 +593,8 @@ async def _run_async_scan(task_id: str, request: BatchScanRequest):
                         protocol=request.protocol
                     )
                     results.append(result)
+                    if writer:
+                        writer.add(result)
                     
                     completed_scans += 1
                     progress = (completed_scans / total_scans) * 100
@@ -200,6 +602,7 @@ async def _run_async_scan(task_id: str, request: BatchScanRequest):
                     # 更新进度
                     _active_tasks[task_id]["progress"] = progress
                     _active_tasks[task_id]["completed_ports"] = completed_scans
+                    _active_tasks[task_id]["estimated_time_remaining"] = progress_eta.update(completed_scans)
                     
                 except Exception as e:
                     # 记录错误但继续扫描
@@ -207,15 +610,31 @@ async def _run_async_scan(task_id: str, request: BatchScanRequest):
         
         # 保存结果
         _scan_results[task_id] = results
+        if writer:
+            await writer.close()
         
-        # 完成任务
-        _active_tasks[task_id]["status"] = "completed"
-        _active_tasks[task_id]["progress"] = 100.0
+        # 完成任务，截止时间内未扫完时标记为部分完成并保留实际进度
+        deadline_reached = completed_scans < total_scans and scanner.deadline_expired()
+        _active_tasks[task_id]["status"] = "partial" if deadline_reached else "completed"
+        _active_tasks[task_id]["deadline_reached"] = deadline_reached
+        _active_tasks[task_id]["progress"] = (completed_scans / total_scans) * 100 if deadline_reached else 100.0
+        _active_tasks[task_id]["estimated_time_remaining"] = 0.0
         _active_tasks[task_id]["completed_at"] = time.time()
+        _active_tasks[task_id]["statistics"] = scanner.get_statistics()
+        _active_tasks[task_id]["coverage"] = scanner.get_coverage()
         
+    except asyncio.CancelledError:
+        # 保留取消前已完成的结果
+        _scan_results[task_id] = results
+        await _finish_cancelled(task_id, scanner, writer)
+        raise
     except Exception as e:
         _active_tasks[task_id]["status"] = "failed"
         _active_tasks[task_id]["error"] = str(e)
+    finally:
+        # 失败时也写入缓冲中的结果并等待后台写入结束
+        if writer is not None:
+            await writer.close()
 
 
 @router.get("/task/{task_id}", response_model=SuccessResponse)
@@ -241,11 +660,33 @@ async def get_task_status(task_id: str):
 
 
 @router.get("/task/{task_id}/results", response_model=SuccessResponse)
-async def get_task_results(task_id: str):
+async def get_task_results(task_id: str,
+                           host: Optional[str] = None,
+                           port: Optional[int] = Query(default=None, ge=1, le=65535),
+                           port_status: Optional[str] = Query(default=None, alias="status"),
+                           service: Optional[str] = None,
+                           port_min: Optional[int] = None,
+                           port_max: Optional[int] = None,
+                           since: Optional[float] = None,
+                           until: Optional[float] = None,
+                           page: int = Query(default=1, ge=1),
+                           page_size: int = Query(default=100, ge=1, le=100),
+                           cursor: Optional[str] = None):
     """获取扫描任务结果
     
     Args:
         task_id: 任务ID
+        host: 按主机过滤
+        port: 按端口过滤
+        port_status: 按端口状态过滤
+        service: 按服务过滤
+        port_min: 端口范围下限
+        port_max: 端口范围上限
+        since: 扫描时间下限（时间戳，含）
+        until: 扫描时间上限（时间戳，不含）
+        page: 页码
+        page_size: 每页大小
+        cursor: 游标分页令牌，空字符串表示第一页，之后传入上一页的next_cursor
         
     Returns:
         SuccessResponse: 扫描结果
@@ -256,17 +697,57 @@ async def get_task_results(task_id: str):
             detail="任务不存在"
         )
     
-    if _active_tasks[task_id]["status"] != "completed":
+    if _active_tasks[task_id]["status"] not in RESULT_STATUSES:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="任务尚未完成"
         )
     
-    results = _scan_results.get(task_id, [])
-    
     return SuccessResponse(
         message="结果获取成功",
-        data=results
+        data=_page_results(
+            task_id, _memory_results(task_id), page, page_size, cursor,
+            host=host, port=port, status=port_status, service=service,
+            port_min=port_min, port_max=port_max, since=since, until=until
+        )
+    )
+
+
+@router.get("/task/{task_id}/export")
+async def export_task_results(task_id: str,
+                              export_format: str = Query(default="ndjson", alias="format"),
+                              host: Optional[str] = None,
+                              port: Optional[int] = Query(default=None, ge=1, le=65535),
+                              port_status: Optional[str] = Query(default=None, alias="status"),
+                              service: Optional[str] = None):
+    """流式导出扫描任务结果
+    
+    Args:
+        task_id: 任务ID
+        export_format: 导出格式 ndjson/csv/msgpack
+        host: 按主机过滤
+        port: 按端口过滤
+        port_status: 按端口状态过滤
+        service: 按服务过滤
+        
+    Returns:
+        StreamingResponse: 导出内容
+    """
+    if task_id not in _active_tasks:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="任务不存在"
+        )
+    
+    if _active_tasks[task_id]["status"] not in RESULT_STATUSES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="任务尚未完成"
+        )
+    
+    return _export_results(
+        task_id, _memory_results(task_id), export_format,
+        host=host, port=port, status=port_status, service=service
     )
 
 
@@ -286,16 +767,19 @@ async def cancel_task(task_id: str):
             detail="任务不存在"
         )
     
-    if _active_tasks[task_id]["status"] in ["completed", "failed"]:
+    if _active_tasks[task_id]["status"] in ["completed", "partial", "failed"]:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="任务已结束，无法取消"
         )
     
+    # 取消后台协程并等待进行中的探测退出，返回取消时的部分统计
+    await job_manager.cancel(task_id)
     _active_tasks[task_id]["status"] = "cancelled"
     
     return SuccessResponse(
-        message="任务已取消"
+        message="任务已取消",
+        data=_active_tasks[task_id]
     )
 
 
@@ -320,19 +804,28 @@ async def list_tasks(page: int = 1, page_size: int = 20):
     
     pagination = Pagination(
         page=page,
-        page_size=page_size,
-        total_items=total_items
+        size=page_size,
+        total=total_items
     )
     
     return SuccessResponse(
         message="任务列表获取成功",
         data={
             "tasks": page_tasks,
-            "pagination": pagination.dict()
+            "pagination": pagination.dict(),
+            "jobs": job_manager.get_statistics()
         }
     )
 
 
+def _count_by_status(results: Iterable[Dict[str, Any]]) -> Dict[str, int]:
+    """按端口状态统计内存（或已落盘）结果"""
+    counts: Dict[str, int] = {}
+    for result in results:
+        counts[result.get("status")] = counts.get(result.get("status"), 0) + 1
+    return counts
+
+
 @router.get("/statistics/{task_id}", response_model=SuccessResponse)
 async def get_scan_statistics(task_id: str):
     """获取扫描统计信息
@@ -343,29 +836,27 @@ async def get_scan_statistics(task_id: str):
     Returns:
         SuccessResponse: 统计信息
     """
-    if task_id not in _scan_results:
+    stored = scan_result_store.enabled and scan_result_store.has_scan(task_id)
+    if task_id not in _scan_results and not stored:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="扫描结果不存在"
         )
     
-    results = _scan_results[task_id]
-    
-    # 计算统计信息
-    total_scans = len(results)
-    open_ports = len([r for r in results if r.get("status") == "open"])
-    closed_ports = len([r for r in results if r.get("status") == "closed"])
-    filtered_ports = len([r for r in results if r.get("status") == "filtered"])
-    timeout_ports = len([r for r in results if r.get("status") == "timeout"])
-    error_ports = len([r for r in results if r.get("status") == "error"])
+    # 计算统计信息（启用持久化时由SQLite按状态聚合）
+    if stored:
+        counts = scan_result_store.count_by_status(task_id)
+    else:
+        results = _scan_results[task_id]
+        counts = await _read_results(results, _count_by_status, results)
     
     statistics = ScanStatistics(
-        total_scans=total_scans,
-        open_ports=open_ports,
-        closed_ports=closed_ports,
-        filtered_ports=filtered_ports,
-        timeout_ports=timeout_ports,
-        error_ports=error_ports
+        total_scans=sum(counts.values()),
+        open_ports=counts.get("open", 0),
+        closed_ports=counts.get("closed", 0),
+        filtered_ports=counts.get("filtered", 0),
+        timeout_ports=counts.get("timeout", 0),
+        error_ports=counts.get("error", 0)
     )
     
     return SuccessResponse(
@@ -408,6 +899,317 @@ async def get_scan_config():
     )
 
 
+@router.get("/cache", response_model=SuccessResponse)
+async def get_scan_cache_statistics():
+    """获取扫描结果缓存统计
+    
+    Returns:
+        SuccessResponse: 缓存统计信息
+    """
+    return SuccessResponse(
+        message="缓存统计获取成功",
+        data=scan_result_cache.get_statistics()
+    )
+
+
+@router.delete("/cache", response_model=SuccessResponse)
+async def clear_scan_cache():
+    """清空扫描结果缓存
+    
+    Returns:
+        SuccessResponse: 操作结果
+    """
+    scan_result_cache.clear()
+    
+    return SuccessResponse(
+        message="扫描结果缓存已清空",
+        data=scan_result_cache.get_statistics()
+    )
+
+
+@router.get("/inventory", response_model=SuccessResponse)
+async def query_inventory(port: Optional[List[int]] = Query(default=None),
+                          service: Optional[List[str]] = Query(default=None),
+                          match: str = Query(default="all", pattern="^(all|any)$"),
+                          page: int = Query(default=1, ge=1),
+                          page_size: int = Query(default=100, ge=1, le=100)):
+    """查询开放指定端口/服务的主机（基于最新已知状态）
+    
+    Args:
+        port: 端口，可重复指定
+        service: 服务名称，可重复指定
+        match: all表示同时满足全部条件，any表示满足任一条件
+        page: 页码
+        page_size: 每页大小
+    
+    Returns:
+        SuccessResponse: 主机列表；未指定条件时返回索引概况
+    """
+    _require_single_worker("资产清单")
+    if not port and not service:
+        return SuccessResponse(
+            message="资产清单概况获取成功",
+            data={
+                "statistics": inventory_index.get_statistics(),
+                "top_ports": inventory_index.top_ports()
+            }
+        )
+    
+    start_time = time.perf_counter()
+    hosts, total = inventory_index.query(
+        ports=port, services=service, match_all=(match == "all"),
+        offset=(page - 1) * page_size, limit=page_size
+    )
+    
+    return SuccessResponse(
+        message="资产清单查询成功",
+        data={
+            "hosts": hosts,
+            "pagination": Pagination(page=page, size=page_size, total=total).model_dump(),
+            "query_time_ms": (time.perf_counter() - start_time) * 1000
+        }
+    )
+
+
+@router.get("/inventory/hosts/{host}", response_model=SuccessResponse)
+async def get_inventory_host(host: str):
+    """获取主机最新已知的端口状态
+    
+    Args:
+        host: 主机地址
+    
+    Returns:
+        SuccessResponse: 端口状态列表
+    """
+    _require_single_worker("资产清单")
+    ports = inventory_index.host_ports(host)
+    if ports is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="资产清单中没有该主机"
+        )
+    
+    return SuccessResponse(
+        message="主机端口状态获取成功",
+        data={"host": host, "ports": ports}
+    )
+
+
+@router.post("/inventory/snapshots", response_model=SuccessResponse)
+async def create_inventory_snapshot():
+    """保存资产清单当前状态的快照，用于之后的差异比较
+    
+    Returns:
+        SuccessResponse: 快照ID
+    """
+    _require_single_worker("资产清单快照")
+    snapshot_id = str(uuid.uuid4())
+    entries = inventory_index.snapshot()
+    _inventory_snapshots[snapshot_id] = {"created_at": time.time(), "entries": entries}
+    while len(_inventory_snapshots) > _MAX_INVENTORY_SNAPSHOTS:
+        _inventory_snapshots.pop(next(iter(_inventory_snapshots)))
+    
+    return SuccessResponse(
+        message="资产清单快照已保存",
+        data={"snapshot_id": snapshot_id, "entries": len(entries)}
+    )
+
+
+async def _diff_source(source: str, source_id: str):
+    """获取差异比较的有序条目来源"""
+    if source == "snapshot":
+        _require_single_worker("资产清单快照")
+        snapshot = _inventory_snapshots.get(source_id)
+        if snapshot is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"资产清单快照不存在: {source_id}"
+            )
+        return snapshot["entries"]
+    
+    if scan_result_store.enabled and scan_result_store.has_scan(source_id):
+        return scan_result_store.iter_sorted(source_id)
+    if source_id in _scan_results:
+        results = _scan_results[source_id]
+        return await _read_results(results, sorted_entries, results)
+    raise HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail=f"扫描结果不存在: {source_id}"
+    )
+
+
+@router.get("/diff", response_model=SuccessResponse)
+async def diff_scans(base: str,
+                     target: str,
+                     source: str = Query(default="scan", pattern="^(scan|snapshot)$"),
+                     limit: int = Query(default=1000, ge=0, le=100000)):
+    """比较两次扫描（或两个资产清单快照）的差异
+    
+    Args:
+        base: 基准扫描ID或快照ID
+        target: 对比扫描ID或快照ID
+        source: 比较对象类型 (scan/snapshot)
+        limit: 每类变化最多返回的明细条数
+        
+    Returns:
+        SuccessResponse: 新开放、已关闭、服务变化及无法确认的端口
+    """
+    base_entries = await _diff_source(source, base)
+    target_entries = await _diff_source(source, target)
+    
+    # 启用持久化时从SQLite流式读取，放到线程中执行避免阻塞事件循环
+    diff = await asyncio.to_thread(diff_entries, base_entries, target_entries, limit)
+    
+    return SuccessResponse(
+        message="扫描差异比较完成",
+        data={"base": base, "target": target, "source": source, **diff}
+    )
+
+
+@router.post("/schedules", response_model=SuccessResponse)
+async def create_scan_schedule(request: ScanScheduleRequest):
+    """创建周期扫描任务
+    
+    每轮按主机历史增量扫描：开放端口和近期变化的端口每轮探测，
+    稳定关闭的端口区间逐步降低探测频率。
+    
+    Args:
+        request: 周期扫描任务请求
+        
+    Returns:
+        SuccessResponse: 任务信息
+    """
+    _require_single_worker("周期扫描")
+    schedule = ScanSchedule(
+        target=request.target,
+        ports=request.ports,
+        interval_seconds=request.interval_seconds,
+        cron=request.cron,
+        protocol=request.protocol,
+        name=request.name,
+        max_backoff_runs=request.max_backoff_runs,
+        volatile_runs=request.volatile_runs,
+        scan_options={
+            "timeout": request.timeout,
+            "max_concurrent": request.max_concurrent,
+            "rate_limit": request.rate_limit
+        },
+        client=current_client.get()
+    )
+    scan_scheduler.add(schedule)
+    scan_scheduler.start(_create_scanner)
+    
+    return SuccessResponse(
+        message="周期扫描任务已创建",
+        data=schedule.to_dict()
+    )
+
+
+@router.get("/schedules", response_model=SuccessResponse)
+async def list_scan_schedules():
+    """获取周期扫描任务列表
+    
+    Returns:
+        SuccessResponse: 任务列表
+    """
+    _require_single_worker("周期扫描")
+    return SuccessResponse(
+        message="周期扫描任务获取成功",
+        data={"schedules": [s.to_dict() for s in scan_scheduler.schedules.values()]}
+    )
+
+
+def _get_schedule(schedule_id: str) -> ScanSchedule:
+    """获取周期扫描任务，不存在时返回404"""
+    _require_single_worker("周期扫描")
+    schedule = scan_scheduler.schedules.get(schedule_id)
+    if schedule is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="周期扫描任务不存在"
+        )
+    return schedule
+
+
+@router.get("/schedules/{schedule_id}", response_model=SuccessResponse)
+async def get_scan_schedule(schedule_id: str):
+    """获取周期扫描任务详情及最近的执行记录
+    
+    Args:
+        schedule_id: 任务ID
+        
+    Returns:
+        SuccessResponse: 任务详情
+    """
+    schedule = _get_schedule(schedule_id)
+    
+    return SuccessResponse(
+        message="周期扫描任务获取成功",
+        data={**schedule.to_dict(), "runs": list(schedule.runs)}
+    )
+
+
+@router.get("/schedules/{schedule_id}/hosts/{host}", response_model=SuccessResponse)
+async def get_scan_schedule_host(schedule_id: str, host: str):
+    """获取周期扫描任务中单个主机的历史
+    
+    Args:
+        schedule_id: 任务ID
+        host: 主机地址
+        
+    Returns:
+        SuccessResponse: 主机历史
+    """
+    history = _get_schedule(schedule_id).hosts.get(host)
+    if history is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="该主机尚未被扫描"
+        )
+    
+    return SuccessResponse(
+        message="主机扫描历史获取成功",
+        data={"host": host, **history.to_dict()}
+    )
+
+
+@router.post("/schedules/{schedule_id}/run", response_model=SuccessResponse)
+async def trigger_scan_schedule(schedule_id: str):
+    """立即执行一次周期扫描任务
+    
+    Args:
+        schedule_id: 任务ID
+        
+    Returns:
+        SuccessResponse: 操作结果
+    """
+    _get_schedule(schedule_id)
+    scan_scheduler.start(_create_scanner)
+    if not scan_scheduler.trigger(schedule_id):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="周期扫描任务正在运行"
+        )
+    
+    return SuccessResponse(message="周期扫描任务已触发")
+
+
+@router.delete("/schedules/{schedule_id}", response_model=SuccessResponse)
+async def delete_scan_schedule(schedule_id: str):
+    """删除周期扫描任务
+    
+    Args:
+        schedule_id: 任务ID
+        
+    Returns:
+        SuccessResponse: 操作结果
+    """
+    _get_schedule(schedule_id)
+    scan_scheduler.remove(schedule_id)
+    
+    return SuccessResponse(message="周期扫描任务已删除")
+
+
 @router.post("/profiles", response_model=SuccessResponse)
 async def create_scan_profile(profile: ScanProfile):
     """创建扫描配置模板
@@ -444,67 +1246,86 @@ async def list_scan_profiles():
 
 
 @router.post("/start", response_model=SuccessResponse)
-async def start_scan(request: dict, background_tasks: BackgroundTasks):
+async def start_scan(request: dict):
     """启动端口扫描
     
     Args:
-        request: 扫描配置
-        background_tasks: 后台任务
+        request: 扫描配置，可选priority指定任务优先级
         
     Returns:
         SuccessResponse: 扫描任务信息
     """
+    resource_governor.admit()
+    
     try:
         scan_id = str(uuid.uuid4())
         
-        # 解析端口
-        ports = []
+        # 解析端口（支持"1-1000,3389,8080-8090"表示法或端口列表，忽略无效部分）
+        ports = PortSet()
         if "ports" in request:
-            port_spec = request["ports"]
-            if isinstance(port_spec, str):
-                # 处理端口范围表示法(如"1-1000,3389,8080-8090")
-                parts = port_spec.split(',')
-                for part in parts:
-                    if '-' in part:
-                        start, end = map(int, part.split('-'))
-                        ports.extend(range(start, end + 1))
-                    else:
-                        try:
-                            ports.append(int(part))
-                        except ValueError:
-                            pass
+            ports = PortSet.coerce(request["ports"], strict=False)
+        elif request.get("top_ports"):
+            ports = PortSet.from_ports(
+                get_top_ports(int(request["top_ports"]), request.get("scan_type", "tcp"))
+            )
+        
+        # top_ports默认按开放频率排序，使最可能开放的端口最先探测
+        port_order = request.get("port_order", "frequency" if "top_ports" in request else None)
+        
+        # 开始前估计耗时（任务逐个端口顺序探测，并发窗口为1）
+        estimate = _estimate_scan(
+            [request.get("target", "")], 1, len(ports), request.get("timeout", 3), 1,
+            request.get("rate_limit"), request.get("deadline_seconds")
+        )
         
         # 创建扫描任务状态
         scan_status = {
             "scan_id": scan_id,
-            "status": "running",
+            "status": "pending",
             "progress": 0,
             "total_ports": len(ports),
             "scanned_ports": 0,
             "found_ports": 0,
+            "estimate": estimate.as_dict(),
+            "estimated_time_remaining": estimate.duration,
             "start_time": time.strftime("%Y-%m-%dT%H:%M:%SZ"),
             "end_time": None
         }
         
         # 存储任务
-        _active_tasks[scan_id] = scan_status
+        _register_job(scan_id, scan_status, int(request.get("priority", 0)))
         _scan_results[scan_id] = []
         
+        scan_params = {
+            "target": request.get("target", ""),
+            "ports": str(ports),
+            "scan_type": request.get("scan_type", "tcp"),
+            "timeout": request.get("timeout", 3),
+            "max_threads": request.get("max_threads", 500),
+            "rate_limit": request.get("rate_limit"),
+            "port_order": port_order,
+            "deadline_seconds": request.get("deadline_seconds"),
+            "use_cache": request.get("use_cache", True),
+            "cache_max_age": request.get("max_age")
+        }
+        
+        # 记录检查点，进程重启后可从断点继续
+        checkpoint = None
+        if scan_checkpoint_store.enabled:
+            checkpoint = scan_checkpoint_store.open_job(scan_id, scan_params)
+        
         # 后台执行扫描
-        background_tasks.add_task(
-            _run_port_scan,
-            scan_id=scan_id,
-            target=request.get("target", ""),
-            ports=ports,
-            scan_type=request.get("scan_type", "tcp"),
-            timeout=request.get("timeout", 3),
-            max_threads=request.get("max_threads", 500)
+        job_manager.submit(
+            scan_id,
+            lambda: _run_port_scan(scan_id=scan_id, checkpoint=checkpoint, **scan_params)
         )
         
         return SuccessResponse(
             message="端口扫描已启动",
             data=scan_status
         )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -535,24 +1356,86 @@ async def get_scan_status(scan_id: str):
 
 
 @router.get("/results/{scan_id}", response_model=SuccessResponse)
-async def get_scan_results(scan_id: str):
+async def get_scan_results(scan_id: str,
+                           host: Optional[str] = None,
+                           port: Optional[int] = Query(default=None, ge=1, le=65535),
+                           port_status: Optional[str] = Query(default=None, alias="status"),
+                           service: Optional[str] = None,
+                           port_min: Optional[int] = None,
+                           port_max: Optional[int] = None,
+                           since: Optional[float] = None,
+                           until: Optional[float] = None,
+                           page: int = Query(default=1, ge=1),
+                           page_size: int = Query(default=100, ge=1, le=100),
+                           cursor: Optional[str] = None):
     """获取扫描结果
     
     Args:
         scan_id: 扫描任务ID
+        host: 按主机过滤
+        port: 按端口过滤
+        port_status: 按端口状态过滤
+        service: 按服务过滤
+        port_min: 端口范围下限
+        port_max: 端口范围上限
+        since: 扫描时间下限（时间戳，含）
+        until: 扫描时间上限（时间戳，不含）
+        page: 页码
+        page_size: 每页大小
+        cursor: 游标分页令牌，空字符串表示第一页，之后传入上一页的next_cursor
         
     Returns:
         SuccessResponse: 扫描结果
     """
-    if scan_id not in _scan_results:
+    stored = scan_result_store.enabled and scan_result_store.has_scan(scan_id)
+    if scan_id not in _scan_results and not stored:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="扫描结果不存在"
         )
     
+    results = _memory_results(scan_id)
     return SuccessResponse(
         message="扫描结果获取成功",
-        data=_scan_results[scan_id]
+        data=await _read_results(
+            results, _page_results,
+            scan_id, results, page, page_size, cursor,
+            host=host, port=port, status=port_status, service=service,
+            port_min=port_min, port_max=port_max, since=since, until=until
+        )
+    )
+
+
+@router.get("/results/{scan_id}/export")
+async def export_scan_results(scan_id: str,
+                              export_format: str = Query(default="ndjson", alias="format"),
+                              host: Optional[str] = None,
+                              port: Optional[int] = Query(default=None, ge=1, le=65535),
+                              port_status: Optional[str] = Query(default=None, alias="status"),
+                              service: Optional[str] = None):
+    """流式导出扫描结果
+    
+    Args:
+        scan_id: 扫描任务ID
+        export_format: 导出格式 ndjson/csv/msgpack
+        host: 按主机过滤
+        port: 按端口过滤
+        port_status: 按端口状态过滤
+        service: 按服务过滤
+        
+    Returns:
+        StreamingResponse: 导出内容
+    """
+    stored = scan_result_store.enabled and scan_result_store.has_scan(scan_id)
+    if scan_id not in _scan_results and not stored:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="扫描结果不存在"
+        )
+    
+    return _export_results(
+        scan_id, _memory_results(scan_id), export_format,
+        host=host, port=port, status=port_status, service=service
     )
 
 
@@ -572,9 +1455,11 @@ async def stop_scan(scan_id: str):
             detail="扫描任务不存在"
         )
     
-    # 更新任务状态
-    _active_tasks[scan_id]["status"] = "cancelled"
-    _active_tasks[scan_id]["end_time"] = time.strftime("%Y-%m-%dT%H:%M:%SZ")
+    # 取消后台协程并等待进行中的探测退出（已结束的任务保持原状态）
+    await job_manager.cancel(scan_id)
+    if _active_tasks[scan_id]["status"] not in ("completed", "partial", "failed", "cancelled"):
+        _active_tasks[scan_id]["status"] = "cancelled"
+        _active_tasks[scan_id]["end_time"] = time.strftime("%Y-%m-%dT%H:%M:%SZ")
     
     return SuccessResponse(
         message="扫描已停止",
@@ -582,27 +1467,161 @@ async def stop_scan(scan_id: str):
     )
 
 
-async def _run_port_scan(scan_id: str, target: str, ports: List[int], scan_type: str, timeout: float, max_threads: int):
+@router.get("/checkpoints", response_model=SuccessResponse)
+async def list_scan_checkpoints():
+    """列出可续扫的扫描任务
+    
+    Returns:
+        SuccessResponse: 检查点中未完成的任务列表
+    """
+    if not scan_checkpoint_store.enabled:
+        return SuccessResponse(message="扫描检查点未启用", data={"enabled": False, "jobs": []})
+    
+    jobs = []
+    for job in scan_checkpoint_store.list_jobs(resumable_only=True):
+        params = job.pop("params")
+        job["target"] = params.get("target")
+        job["total_ports"] = len(PortSet.coerce(params.get("ports", ""), strict=False))
+        jobs.append(job)
+    
+    return SuccessResponse(
+        message="检查点任务获取成功",
+        data={"enabled": True, "jobs": jobs}
+    )
+
+
+@router.post("/resume/{scan_id}", response_model=SuccessResponse)
+async def resume_scan(scan_id: str):
+    """从检查点继续未完成的扫描
+    
+    Args:
+        scan_id: 扫描任务ID
+        
+    Returns:
+        SuccessResponse: 扫描任务信息
+    """
+    resource_governor.admit()
+    
+    if not scan_checkpoint_store.enabled:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="扫描检查点未启用"
+        )
+    
+    job = scan_checkpoint_store.get_job(scan_id)
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="扫描检查点不存在"
+        )
+    
+    if job["status"] == "completed":
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="扫描任务已完成，无需续扫"
+        )
+    
+    if _active_tasks.get(scan_id, {}).get("status") in ("pending", "running"):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="扫描任务正在运行"
+        )
+    
+    params = job["params"]
+    results = scan_checkpoint_store.load_results(scan_id)
+    total_ports = len(PortSet.coerce(params.get("ports", ""), strict=False))
+    
+    scan_status = {
+        "scan_id": scan_id,
+        "status": "pending",
+        "progress": (len(results) / total_ports) * 100 if total_ports > 0 else 100,
+        "total_ports": total_ports,
+        "scanned_ports": len(results),
+        "found_ports": len([r for r in results if r.get("status") == "open"]),
+        "start_time": time.strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "end_time": None,
+        "resumed": True
+    }
+    
+    _register_job(scan_id, scan_status)
+    _scan_results[scan_id] = results
+    
+    checkpoint = scan_checkpoint_store.open_job(scan_id, params)
+    job_manager.submit(
+        scan_id,
+        lambda: _run_port_scan(scan_id=scan_id, checkpoint=checkpoint, **params)
+    )
+    
+    return SuccessResponse(
+        message=f"扫描已从检查点恢复，已完成 {len(results)} 个端口",
+        data=scan_status
+    )
+
+
+async def _run_port_scan(scan_id: str, target: str, ports: Union[PortSet, str, List[int]], scan_type: str, timeout: float, max_threads: int,
+                         rate_limit: Optional[float] = None, port_order: Optional[str] = None,
+                         deadline_seconds: Optional[float] = None, use_cache: bool = True,
+                         cache_max_age: Optional[float] = None, checkpoint: Optional[ScanCheckpoint] = None):
     """后台执行端口扫描
     
     Args:
         scan_id: 扫描任务ID
         target: 目标主机
-        ports: 端口列表
+        ports: 端口集合或端口范围表达式
         scan_type: 扫描类型
         timeout: 超时时间
         max_threads: 最大线程数
+        rate_limit: 每秒最大探测数
+        port_order: 端口探测顺序 (numeric/frequency)
+        deadline_seconds: 扫描时间预算（秒）
+        use_cache: 是否使用缓存的扫描结果
+        cache_max_age: 可接受的缓存结果最大年龄（秒）
+        checkpoint: 任务检查点，续扫时跳过已完成的端口
     """
+    scanner = None
+    writer = None
     try:
-        scanner = PortScannerEngine()
+        _active_tasks[scan_id]["status"] = "running"
+        scanner = _create_scanner(
+            timeout=timeout,
+            max_concurrent=max_threads,
+            rate_limit=rate_limit,
+            deadline_seconds=deadline_seconds,
+            use_cache=use_cache,
+            cache_max_age=cache_max_age
+        )
+        port_set = PortSet.coerce(ports, strict=False)
+        total_ports = len(port_set)
+        
+        # 续扫时跳过检查点中已完成的端口
+        done_ports = checkpoint.completed_ports(target) if checkpoint else set()
+        if done_ports:
+            logger.info(f"扫描任务 {scan_id} 从检查点恢复，已完成 {len(done_ports)} 个端口")
+            port_set = port_set - PortSet.from_ports(done_ports)
+        
+        # 只在此处展开一次端口列表
+        ports_to_scan = scanner.order_scan_ports(port_set, scan_type, port_order)
+        writer = scan_result_store.open_writer(scan_id) if scan_result_store.enabled else None
         
-        total_ports = len(ports)
-        completed_ports = 0
-        found_ports = 0
+        scanner.start_deadline()
+        scanner.coverage.add_requested(target, ports_to_scan)
         
-        for port in ports:
+        completed_ports = total_ports - len(ports_to_scan)
+        found_ports = len([r for r in _scan_results[scan_id] if r.get("status") == "open"])
+        
+        # 按剩余端口估计耗时（任务逐个端口顺序探测，并发窗口为1）
+        estimate = _estimate_scan([target], 1, len(ports_to_scan), timeout, 1, rate_limit, deadline_seconds)
+        progress_eta = ScanProgress(total_ports, estimate, completed=completed_ports)
+        _active_tasks[scan_id]["estimate"] = estimate.as_dict()
+        _active_tasks[scan_id]["estimated_time_remaining"] = estimate.duration
+        
+        for port in ports_to_scan:
             if _active_tasks[scan_id]["status"] == "cancelled":
                 break
+            
+            # 截止时间已到，剩余端口记为未探测
+            if scanner.deadline_expired():
+                break
                 
             try:
                 result = await scanner.scan_port(
@@ -623,6 +1642,10 @@ async def _run_port_scan(scan_id: str, target: str, ports: List[int], scan_type:
                     }
                     
                     _scan_results[scan_id].append(scan_result)
+                    if writer:
+                        writer.add(scan_result)
+                    if checkpoint:
+                        checkpoint.record(target, port, scan_result)
                     
                     if scan_result["status"] == "open":
                         found_ports += 1
@@ -637,14 +1660,50 @@ async def _run_port_scan(scan_id: str, target: str, ports: List[int], scan_type:
             _active_tasks[scan_id]["scanned_ports"] = completed_ports
             _active_tasks[scan_id]["found_ports"] = found_ports
             _active_tasks[scan_id]["progress"] = progress
+            _active_tasks[scan_id]["estimated_time_remaining"] = progress_eta.update(completed_ports)
+        
+        if writer:
+            await writer.close()
         
-        # 扫描完成
-        _active_tasks[scan_id]["status"] = "completed"
-        _active_tasks[scan_id]["progress"] = 100
+        # 刷写检查点，被停止或截止时间内未扫完的任务保留为可续扫状态
+        if checkpoint:
+            if _active_tasks[scan_id]["status"] == "cancelled":
+                await checkpoint.finish("cancelled")
+            elif completed_ports < total_ports:
+                await checkpoint.finish("partial")
+            else:
+                await checkpoint.finish("completed")
+        
+        # 扫描完成，截止时间内未扫完时标记为部分完成并保留实际进度
+        deadline_reached = completed_ports < total_ports and scanner.deadline_expired()
+        _active_tasks[scan_id]["status"] = "partial" if deadline_reached else "completed"
+        _active_tasks[scan_id]["deadline_reached"] = deadline_reached
+        _active_tasks[scan_id]["progress"] = (completed_ports / total_ports) * 100 if deadline_reached else 100
+        _active_tasks[scan_id]["estimated_time_remaining"] = 0.0
+        _active_tasks[scan_id]["statistics"] = scanner.get_statistics()
+        _active_tasks[scan_id]["coverage"] = scanner.get_coverage()
         _active_tasks[scan_id]["end_time"] = time.strftime("%Y-%m-%dT%H:%M:%SZ")
         
+    except asyncio.CancelledError:
+        # 任务被取消，检查点保留为可续扫状态
+        await _finish_cancelled(scan_id, scanner, writer)
+        if checkpoint:
+            try:
+                await checkpoint.finish("cancelled")
+            except Exception as checkpoint_error:
+                logger.error(f"扫描任务 {scan_id} 检查点写入失败: {checkpoint_error}")
+        raise
     except Exception as e:
         # 扫描失败
         _active_tasks[scan_id]["status"] = "failed"
         _active_tasks[scan_id]["error"] = str(e)
-        _active_tasks[scan_id]["end_time"] = time.strftime("%Y-%m-%dT%H:%M:%SZ")
\ No newline at end of file
+        _active_tasks[scan_id]["end_time"] = time.strftime("%Y-%m-%dT%H:%M:%SZ")
+        if checkpoint:
+            try:
+                await checkpoint.finish("failed")
+            except Exception as checkpoint_error:
+                logger.error(f"扫描任务 {scan_id} 检查点写入失败: {checkpoint_error}")
+    finally:
+        # 失败时也写入缓冲中的结果并等待后台写入结束
+        if writer is not None:
+            await writer.close()
\ No newline at end of file
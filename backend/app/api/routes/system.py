@@ -8,6 +8,10 @@ Description:                系统监控API路由模块
 
 Changed history:            
                             2025/05/23: 初始创建;
+                            2026/10/19: 添加后台任务管理统计接口;
+                            2026/10/19: 添加进程级资源预算统计接口;
+                            2026/10/19: 系统信息包含文件描述符预算;
+                            2026/10/19: 资源统计包含扫描源地址池的本地端口占用;
 ----
 """
 
@@ -17,6 +21,11 @@ import psutil
 import time
 from datetime import datetime
 
+from ...core.job_manager import job_manager
+from ...core.resource_governor import resource_governor
+from ...core.fd_limits import get_fd_budget
+from ...core.source_pool import scan_source_pool
+
 router = APIRouter()
 
 @router.get("/status")
@@ -105,9 +114,21 @@ async def get_performance_stats():
         "uptime_hours": 24.5
     }
 
+@router.get("/jobs")
+async def get_job_statistics():
+    """获取后台任务管理统计（任务数、排队与运行数、内存占用估算）"""
+    return job_manager.get_statistics()
+
+@router.get("/resources")
+async def get_resource_statistics():
+    """获取进程级资源预算统计（套接字、子进程额度的占用与排队情况，扫描源地址的本地端口占用）"""
+    stats = resource_governor.get_statistics()
+    stats["source_pool"] = scan_source_pool.get_statistics()
+    return stats
+
 @router.get("/info")
 async def get_system_info():
-    """获取系统信息"""
+    """获取系统信息（含文件描述符限制与推导出的并发上限）"""
     try:
         return {
             "hostname": psutil.os.uname().nodename,
@@ -115,7 +136,8 @@ async def get_system_info():
             "architecture": psutil.os.uname().machine,
             "cpu_count": psutil.cpu_count(),
             "memory_total": psutil.virtual_memory().total,
-            "python_version": f"{psutil.sys.version_info.major}.{psutil.sys.version_info.minor}.{psutil.sys.version_info.micro}"
+            "python_version": f"{psutil.sys.version_info.major}.{psutil.sys.version_info.minor}.{psutil.sys.version_info.micro}",
+            "fd_budget": get_fd_budget().as_dict()
         }
     except Exception:
         return {
@@ -124,5 +146,6 @@ async def get_system_info():
             "architecture": "unknown",
             "cpu_count": 1,
             "memory_total": 0,
-            "python_version": "3.11"
+            "python_version": "3.11",
+            "fd_budget": get_fd_budget().as_dict()
         } 
\ No newline at end of file
@@ -9,11 +9,14 @@ Description:                TCP API路由控制器，提供TCP通信相关的API
 Changed history:            
                             2025/05/23: 初始创建;
                             2025/05/23: 集成真实TCPServer和TCPClient模块;
+                            2026/10/19: 消息历史接口支持游标分页与类型、发送者、时间窗口过滤;
+                            2026/10/19: 启动服务器和建立客户端连接前进行资源预算准入检查;
+                            2026/10/19: 服务器最大连接数限制在文件描述符预算内;
 ----
 """
 
-from fastapi import APIRouter, HTTPException, status, BackgroundTasks
-from typing import List, Dict, Any
+from fastapi import APIRouter, HTTPException, status, BackgroundTasks, Query
+from typing import List, Dict, Any, Optional
 import uuid
 import time
 import asyncio
@@ -26,6 +29,9 @@ from ...schemas.tcp import (
 from ...schemas.common import SuccessResponse, ErrorResponse, Pagination
 from ...core.tcp_server import TCPServer
 from ...core.tcp_client import TCPClient
+from ...core.cursor import encode_cursor, decode_cursor, page_sequence
+from ...core.resource_governor import resource_governor
+from ...core.fd_limits import clamp_concurrency, get_fd_budget
 
 router = APIRouter()
 
@@ -46,6 +52,9 @@ async def start_tcp_server(config: TCPServerConfig, background_tasks: Background
     Returns:
         SuccessResponse: 服务器信息
     """
+    # 系统资源繁忙时快速拒绝（503 + Retry-After）
+    resource_governor.admit()
+    
     try:
         # 检查是否已有服务器在运行
         if _tcp_servers:
@@ -68,11 +77,12 @@ async def start_tcp_server(config: TCPServerConfig, background_tasks: Background
         
         server_id = str(uuid.uuid4())
         
-        # 创建真实的TCP服务器实例
+        # 创建真实的TCP服务器实例（最大连接数不超过文件描述符预算）
+        max_connections = clamp_concurrency(config.max_connections, get_fd_budget().tcp_connections)
         tcp_server = TCPServer(
             host=config.host,
             port=config.port,
-            max_connections=config.max_connections,
+            max_connections=max_connections,
             message_buffer_size=getattr(config, 'buffer_size', 8192),
             client_timeout=config.timeout
         )
@@ -92,7 +102,7 @@ async def start_tcp_server(config: TCPServerConfig, background_tasks: Background
             "port": actual_port,
             "status": "running",
             "start_time": time.time(),
-            "max_connections": config.max_connections,
+            "max_connections": tcp_server.max_connections,
             "current_connections": len(tcp_server.clients),
             "ssl_enabled": getattr(config, 'ssl_enabled', False) # Use getattr for ssl_enabled from config
         }
@@ -206,6 +216,8 @@ async def connect_tcp_client(config: TCPClientConfig):
     Returns:
         SuccessResponse: 连接信息
     """
+    resource_governor.admit()
+    
     try:
         client_id = str(uuid.uuid4())
         
@@ -468,12 +480,27 @@ async def get_tcp_statistics():
 
 
 @router.get("/server/{server_id}/messages", response_model=SuccessResponse)
-async def get_server_messages(server_id: str, limit: int = 100):
+async def get_server_messages(server_id: str,
+                              limit: int = Query(default=100, ge=1, le=1000),
+                              cursor: Optional[str] = None,
+                              message_type: Optional[str] = Query(default=None, alias="type"),
+                              sender: Optional[str] = None,
+                              since: Optional[float] = None,
+                              until: Optional[float] = None):
     """获取服务器消息历史
     
+    不带cursor时返回最近的limit条消息；next_cursor指向已返回消息之后的位置，
+    带上它再次请求即可按顺序读取之后的消息（包括新到达的消息）。
+    游标记录消息的全局序号，历史裁剪不影响续读位置。
+    
     Args:
         server_id: 服务器ID
         limit: 返回消息数量限制
+        cursor: 上一次返回的next_cursor
+        message_type: 按消息类型过滤
+        sender: 按发送者过滤
+        since: 时间下限（时间戳，含）
+        until: 时间上限（时间戳，不含）
         
     Returns:
         SuccessResponse: 消息历史
@@ -484,20 +511,58 @@ async def get_server_messages(server_id: str, limit: int = 100):
             detail="服务器不存在"
         )
     
+    tcp_server = _tcp_servers[server_id]
+    scope = {"server_id": server_id, "type": message_type, "sender": sender, "since": since, "until": until}
     try:
-        tcp_server = _tcp_servers[server_id]
-        messages = tcp_server.get_message_history()
-        
-        # 限制返回数量
-        limited_messages = messages[-limit:] if len(messages) > limit else messages
+        position = decode_cursor(cursor, scope) if cursor else None
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    def matches(msg) -> bool:
+        if message_type is not None and msg.type != message_type:
+            return False
+        if sender is not None and msg.sender != sender:
+            return False
+        if since is not None and msg.timestamp < since:
+            return False
+        return until is None or msg.timestamp < until
+    
+    try:
+        history = tcp_server.message_history
+        base = tcp_server.message_history_offset
+        missed = 0
+        has_more = False
+        
+        if position is None:
+            # 从最新消息向前查找
+            page = []
+            for msg in reversed(history):
+                if matches(msg):
+                    page.append(msg)
+                    if len(page) == limit:
+                        break
+            page.reverse()
+            next_position = base + len(history)
+        else:
+            # 游标位置已被裁剪时从最早保留的消息开始
+            missed = max(base - position, 0)
+            page, next_index = page_sequence(history, max(position - base, 0), limit, matches)
+            has_more = next_index is not None
+            next_position = base + (next_index if has_more else len(history))
         
         return SuccessResponse(
             message="服务器消息历史获取成功",
             data={
                 "server_id": server_id,
-                "total_messages": len(messages),
-                "returned_messages": len(limited_messages),
-                "messages": limited_messages
+                "total_messages": len(history),
+                "returned_messages": len(page),
+                "messages": [msg.__dict__ for msg in page],
+                "next_cursor": encode_cursor(next_position, scope),
+                "has_more": has_more,
+                "missed_messages": missed
             }
         )
     except Exception as e:
@@ -9,12 +9,16 @@ Description:                WebSocket API路由控制器，提供实时通信相
 Changed history:            
                             2025/05/23: 初始创建;
                             2025/05/23: 集成真实PING和扫描工具数据推送;
+                            2026/10/19: 扫描推送支持top_ports和按开放频率排序;
+                            2026/10/19: 端口解析改用PortSet，只在探测前展开一次;
+                            2026/10/19: 扫描目标支持CIDR、地址范围和排除项;
+                            2026/10/19: 扫描推送包含耗时估计与预计剩余时间;
 ----
 """
 
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, status
 from fastapi.responses import JSONResponse
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Union
 import json
 import uuid
 import time
@@ -24,6 +28,10 @@ import logging
 from ...schemas.common import SuccessResponse, ErrorResponse
 from ...core.ping_tool import PingEngine
 from ...core.port_scanner import PortScannerEngine
+from ...core.port_ranking import get_top_ports, order_ports
+from ...core.port_set import PortSet
+from ...core.target_spec import TargetSpec
+from ...core.scan_estimator import ScanProgress, estimate_scan
 
 router = APIRouter()
 
@@ -202,9 +210,14 @@ class ConnectionManager:
                     # 忽略发送错误的尝试
                     pass
 
-    async def start_scan_monitoring(self, websocket: WebSocket, targets: List[str], 
-                                  ports: str = "1-1000", scan_type: str = "tcp", max_threads: int = 200):
-        """启动扫描监控推送"""
+    async def start_scan_monitoring(self, websocket: WebSocket, targets: Union[List[str], TargetSpec], 
+                                  ports: str = "1-1000", scan_type: str = "tcp", max_threads: int = 200,
+                                  top_ports: Optional[int] = None, port_order: Optional[str] = None):
+        """启动扫描监控推送
+        
+        指定top_ports时扫描开放频率最高的前N个端口并忽略ports；
+        port_order为frequency时最可能开放的端口最先探测，未指定时top_ports默认按频率排序。
+        """
         task_id = str(uuid.uuid4())
         client_id_info = "[unknown]"
         for cid, info in self.connection_info.items():
@@ -215,6 +228,8 @@ class ConnectionManager:
         try:
             total_targets = len(targets)
             completed_targets = 0
+            port_list: Optional[List[int]] = None  # 各目标共用，只展开一次
+            progress_eta: Optional[ScanProgress] = None
             logging.debug(f"[{client_id_info}] start_scan_monitoring({task_id}): Starting scan for {total_targets} target(s).")
 
             for target_idx, target in enumerate(targets):
@@ -227,10 +242,18 @@ class ConnectionManager:
                         
                     # 解析端口范围
                     logging.debug(f"[{client_id_info}] start_scan_monitoring({task_id}): Parsing ports '{ports}' for target {target}.")
-                    port_list = self._parse_port_range(ports)
+                    if port_list is None:
+                        if top_ports:
+                            port_list = get_top_ports(top_ports, scan_type)
+                        else:
+                            port_list = PortSet.parse(ports).to_list()
+                        if (port_order or ("frequency" if top_ports else "numeric")) == "frequency":
+                            port_list = order_ports(port_list, scan_type)
                     total_ports = len(port_list)
                     scanned_ports = 0
                     open_ports_found = 0
+                    if progress_eta is None:
+                        progress_eta = self._estimate_scan_progress(targets, total_targets, total_ports, max_threads)
                     logging.debug(f"[{client_id_info}] start_scan_monitoring({task_id}): Parsed {total_ports} ports for target {target}.")
 
                     # 发送开始扫描通知
@@ -240,6 +263,8 @@ class ConnectionManager:
                         "target": target,
                         "total_ports": total_ports,
                         "scan_type": scan_type,
+                        "estimate": progress_eta.estimate.as_dict(),
+                        "estimated_time_remaining": progress_eta.eta(),
                         "timestamp": time.time()
                     }
                     
@@ -325,6 +350,9 @@ class ConnectionManager:
                             "total_ports": total_ports,
                             "total_targets": total_targets,
                             "scan_type": scan_type,
+                            "estimated_time_remaining": progress_eta.update(
+                                completed_targets * total_ports + scanned_ports
+                            ),
                             "timestamp": time.time()
                         }
                         
@@ -397,21 +425,23 @@ class ConnectionManager:
                 except (WebSocketDisconnect, RuntimeError):
                     pass
 
-    def _parse_port_range(self, ports: str) -> List[int]:
-        """解析端口范围字符串"""
-        port_list = []
-        
-        for part in ports.split(","):
-            part = part.strip()
-            if "-" in part:
-                # 端口范围
-                start, end = map(int, part.split("-", 1))
-                port_list.extend(range(start, end + 1))
-            else:
-                # 单个端口
-                port_list.append(int(part))
-        
-        return sorted(list(set(port_list)))  # 去重并排序
+    def _estimate_scan_progress(self, targets: Union[List[str], TargetSpec], total_targets: int,
+                                total_ports: int, max_threads: int) -> ScanProgress:
+        """按推送扫描引擎的超时、并发与限速估计耗时"""
+        scanner = self.port_scanner
+        limiter = scanner.rate_limiter
+        global_bucket = limiter.global_bucket
+        estimate = estimate_scan(
+            probes=total_targets * total_ports,
+            hosts=iter(targets),
+            timeout=scanner.timeout,
+            concurrency=min(max_threads, scanner.max_concurrent),
+            job_rate=limiter.job_bucket.rate,
+            target_rate=limiter.target_rate,
+            global_rate=global_bucket.rate if global_bucket is not None else 0.0,
+            host_count=total_targets
+        )
+        return ScanProgress(total_targets * total_ports, estimate)
 
     def _get_ping_status(self, result):
         """根据PING结果映射状态"""
@@ -516,14 +546,20 @@ async def websocket_endpoint(websocket: WebSocket):
 async def scan_monitor_websocket(websocket: WebSocket, 
                                 targets: Optional[str] = "127.0.0.1",
                                 ports: Optional[str] = "80,443,22,21,25,53,110,993,995",
-                                scan_type: Optional[str] = "tcp"):
+                                scan_type: Optional[str] = "tcp",
+                                top_ports: Optional[int] = None,
+                                port_order: Optional[str] = None,
+                                exclude: Optional[str] = None):
     """扫描监控WebSocket端点
     
     Args:
         websocket: WebSocket连接
-        targets: 扫描目标，逗号分隔
+        targets: 扫描目标，逗号分隔，支持CIDR和地址范围
+        exclude: 排除的目标，逗号分隔
         ports: 端口范围
         scan_type: 扫描类型
+        top_ports: 扫描开放频率最高的前N个端口
+        port_order: 端口探测顺序 (numeric/frequency)
     """
     client_id = await manager.connect(websocket)
     
@@ -534,15 +570,26 @@ async def scan_monitor_websocket(websocket: WebSocket,
             "message": "扫描监控连接已建立"
         }))
         
-        # 解析目标列表
-        target_list = [t.strip() for t in targets.split(",") if t.strip()]
+        # 解析目标规格（支持CIDR、地址范围、主机名和排除项，迭代时才展开）
+        try:
+            target_spec = TargetSpec.parse(targets, exclude=exclude)
+        except ValueError as e:
+            await websocket.send_text(json.dumps({
+                "type": "scan_error",
+                "error": str(e),
+                "timestamp": time.time()
+            }))
+            manager.disconnect(websocket)
+            return
         
         # 启动真实扫描监控
         await manager.start_scan_monitoring(
             websocket=websocket,
-            targets=target_list,
+            targets=target_spec,
             ports=ports,
-            scan_type=scan_type
+            scan_type=scan_type,
+            top_ports=top_ports,
+            port_order=port_order
         )
         
     except WebSocketDisconnect:
@@ -805,15 +852,21 @@ async def scan_websocket(websocket: WebSocket,
                         targets: Optional[str] = "127.0.0.1",
                         ports: Optional[str] = "80,443,22,21,25,53,110,993,995",
                         scan_type: Optional[str] = "tcp",
-                        max_threads: Optional[int] = 200):
+                        max_threads: Optional[int] = 200,
+                        top_ports: Optional[int] = None,
+                        port_order: Optional[str] = None,
+                        exclude: Optional[str] = None):
     """扫描WebSocket端点（与前端路径匹配）
     
     Args:
         websocket: WebSocket连接
-        targets: 扫描目标，逗号分隔
+        targets: 扫描目标，逗号分隔，支持CIDR和地址范围
+        exclude: 排除的目标，逗号分隔
         ports: 端口范围
         scan_type: 扫描类型
         max_threads: 最大并发线程数
+        top_ports: 扫描开放频率最高的前N个端口
+        port_order: 端口探测顺序 (numeric/frequency)
     """
     # 记录接收到的参数
     logging.info(f"扫描WebSocket连接参数：targets={targets}, ports={ports}, scan_type={scan_type}, max_threads={max_threads}")
@@ -828,17 +881,28 @@ async def scan_websocket(websocket: WebSocket,
         }))
         logging.info(f"扫描WebSocket ({client_id}) connected for targets: {targets}, ports: {ports}, scan_type: {scan_type}, max_threads: {max_threads}")
         
-        # 解析目标列表
-        target_list = [t.strip() for t in targets.split(",") if t.strip()]
-        logging.info(f"扫描WebSocket ({client_id})目标列表：{target_list}")
+        # 解析目标规格（支持CIDR、地址范围、主机名和排除项，迭代时才展开）
+        try:
+            target_spec = TargetSpec.parse(targets, exclude=exclude)
+        except ValueError as e:
+            await websocket.send_text(json.dumps({
+                "type": "scan_error",
+                "error": str(e),
+                "timestamp": time.time()
+            }))
+            manager.disconnect(websocket)
+            return
+        logging.info(f"扫描WebSocket ({client_id})目标规格：{target_spec!r}")
         
         # 启动真实扫描监控，传递max_threads参数
         await manager.start_scan_monitoring(
             websocket=websocket,
-            targets=target_list,
+            targets=target_spec,
             ports=ports,
             scan_type=scan_type,
-            max_threads=max_threads
+            max_threads=max_threads,
+            top_ports=top_ports,
+            port_order=port_order
         )
         logging.info(f"扫描WebSocket ({client_id}) completed start_scan_monitoring call for targets: {targets}.")
 
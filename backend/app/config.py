@@ -8,6 +8,20 @@ Description:                应用配置管理系统，包含环境变量处理
 
 Changed history:            
                             2025/05/23: 初始创建;
+                            2026/10/19: 添加扫描速率限制配置;
+                            2026/10/19: 添加扫描结果缓存配置;
+                            2026/10/19: 添加扫描检查点配置;
+                            2026/10/19: 添加扫描结果持久化配置;
+                            2026/10/19: 添加后台任务运行数、保留时间与结果落盘配置;
+                            2026/10/19: 添加多工作进程与共享状态存储配置;
+                            2026/10/19: 添加进程级资源预算配置;
+                            2026/10/19: 添加文件描述符限制配置，套接字预算默认按限制推导;
+                            2026/10/19: 添加扫描源地址池与关闭时发送RST配置;
+                            2026/10/19: 添加客户端探测权重与交互式保留额度配置;
+                            2026/10/19: 添加单个批量扫描请求的探测数上限;
+                            2026/10/19: 添加扫描结果最长缓冲时间配置;
+                            2026/10/19: 说明多工作进程时不可用的进程内功能;
+                            2026/10/19: 客户端权重的来源地址以ip:前缀配置;
 ----
 """
 
@@ -92,6 +106,29 @@ class Settings(BaseSettings):
     default_ping_count: int = Field(default=4, description="默认PING次数")
     max_tcp_connections: int = Field(default=1000, description="最大TCP连接数")
     
+    # 扫描速率限制配置（0表示不限速）
+    scan_global_pps: float = Field(default=0.0, ge=0, description="全局扫描速率上限(包/秒)")
+    scan_job_pps: float = Field(default=0.0, ge=0, description="单任务扫描速率上限(包/秒)")
+    scan_target_pps: float = Field(default=0.0, ge=0, description="单目标扫描速率上限(包/秒)")
+    scan_rate_burst: float = Field(default=1.0, ge=1, description="扫描令牌桶突发容量(包)")
+    
+    # 单个批量扫描请求的探测数上限（目标数×端口数）
+    scan_max_batch_probes: int = Field(default=1000000, ge=1, description="单个批量扫描请求的最大探测数(目标数×端口数)")
+    
+    # 扫描结果缓存配置（TTL为0表示禁用缓存）
+    scan_cache_ttl: float = Field(default=30.0, ge=0, description="扫描结果缓存有效期(秒)")
+    scan_cache_max_entries: int = Field(default=10000, ge=0, description="扫描结果缓存最大条目数")
+    
+    # 扫描检查点配置（路径为空表示禁用断点续扫）
+    scan_checkpoint_path: Optional[str] = Field(default=None, description="扫描检查点SQLite文件路径")
+    scan_checkpoint_batch_size: int = Field(default=500, ge=1, description="检查点每批刷盘结果数")
+    scan_checkpoint_flush_interval: float = Field(default=2.0, ge=0, description="检查点最长刷盘间隔(秒)")
+    
+    # 扫描结果持久化配置（路径为空表示结果只保存在内存中）
+    scan_result_store_path: Optional[str] = Field(default=None, description="扫描结果SQLite文件路径")
+    scan_result_store_batch_size: int = Field(default=2000, ge=1, description="扫描结果每批写入条数")
+    scan_result_store_flush_interval: float = Field(default=1.0, ge=0, description="扫描结果最长缓冲时间(秒)")
+    
     # API限制配置
     rate_limit_requests: int = Field(default=100, description="速率限制请求数")
     rate_limit_window: int = Field(default=60, description="速率限制时间窗口(秒)")
@@ -101,6 +138,51 @@ class Settings(BaseSettings):
     task_timeout: int = Field(default=300, description="任务超时时间(秒)")
     max_task_queue_size: int = Field(default=1000, description="最大任务队列大小")
     task_cleanup_interval: int = Field(default=3600, description="任务清理间隔(秒)")
+    max_running_tasks: int = Field(default=10, ge=1, description="同时运行的后台任务数上限")
+    task_ttl: int = Field(default=3600, ge=0, description="已结束任务保留时间(秒)，0表示只按数量上限淘汰")
+    task_spill_dir: Optional[str] = Field(default=None, description="大结果集任务的结果落盘目录")
+    task_spill_threshold: int = Field(default=10000, ge=0, description="结果数超过此值的已结束任务落盘")
+    
+    # 文件描述符配置
+    fd_limit_target: Optional[int] = Field(
+        default=65536, ge=256,
+        description="启动时尝试把RLIMIT_NOFILE软限制提高到该值(不超过硬限制)，None表示不调整"
+    )
+    fd_reserved: int = Field(default=128, ge=16, description="为监听套接字、数据库、日志等保留的文件描述符数")
+    
+    # 进程级资源预算配置
+    max_open_sockets: Optional[int] = Field(
+        default=None, ge=1,
+        description="所有扫描、PING、TCP连接同时占用的套接字上限，None表示按文件描述符限制推导"
+    )
+    max_ping_subprocesses: int = Field(default=32, ge=1, description="同时运行的系统ping进程上限")
+    max_resource_waiters: int = Field(default=2000, ge=0, description="等待资源的探测数超过此值时拒绝新任务")
+    resource_retry_after: float = Field(default=1.0, ge=0, description="资源繁忙时建议客户端重试的等待时间(秒)")
+    
+    # 扫描源地址配置
+    scan_source_addresses: List[str] = Field(
+        default=[],
+        description="连接探测使用的本机源地址列表，为空时由系统选择源地址"
+    )
+    scan_reset_on_close: bool = Field(default=True, description="关闭探测连接时发送RST，本端不进入TIME_WAIT")
+    
+    # 探测公平调度配置
+    scan_client_weights: Dict[str, float] = Field(
+        default={},
+        description="客户端探测额度权重，键为API Key或\"ip:客户端地址\"，未列出的客户端权重为1"
+    )
+    scan_interactive_reserve: int = Field(
+        default=16, ge=0,
+        description="只供交互式单次探测使用的套接字额度(最多为套接字预算的10%)"
+    )
+    
+    # 多工作进程配置
+    workers: int = Field(default=1, ge=1, description="uvicorn工作进程数(大于1时资产清单、快照和周期扫描不可用)")
+    state_backend_url: Optional[str] = Field(
+        default=None,
+        description="共享状态存储(sqlite:///路径 或 redis://...)，多工作进程时必须设置"
+    )
+    state_sync_interval: float = Field(default=1.0, gt=0, description="运行中任务状态的同步间隔(秒)")
     
     # WebSocket配置
     websocket_timeout: int = Field(default=60, description="WebSocket超时(秒)")
@@ -183,6 +265,14 @@ class Settings(BaseSettings):
             "ping_timeout": self.default_ping_timeout,
             "ping_count": self.default_ping_count,
             "max_tcp_connections": self.max_tcp_connections,
+            "scan_global_pps": self.scan_global_pps,
+            "scan_job_pps": self.scan_job_pps,
+            "scan_target_pps": self.scan_target_pps,
+            "scan_rate_burst": self.scan_rate_burst,
+            "scan_cache_ttl": self.scan_cache_ttl,
+            "scan_cache_max_entries": self.scan_cache_max_entries,
+            "scan_checkpoint_enabled": bool(self.scan_checkpoint_path),
+            "scan_result_store_enabled": bool(self.scan_result_store_path),
         }
     
     def is_development(self) -> bool:
@@ -0,0 +1,273 @@
+"""
+---------------------------------------------------------------
+File name:                  banner_grabber.py
+Author:                     Ignorant-lu
+Date created:               2026/10/19
+Description:                服务Banner抓取阶段，独立并发池，与端口发现阶段解耦
+----------------------------------------------------------------
+
+Changed history:
+                            2026/10/19: 初始创建;
+                            2026/10/19: 服务端不主动发送banner时发送探测载荷;
+                            2026/10/19: 抓取连接向进程级资源预算借用套接字额度;
+                            2026/10/19: 可选关闭连接时发送RST;
+                            2026/10/19: 借用额度时按所属客户端公平排队;
+                            2026/10/19: 排队中被取消的抓取任务关闭发现阶段交接的连接;
+                            2026/10/19: 交接的连接连同探测借用的套接字额度一起交给抓取任务;
+----
+"""
+
+import asyncio
+import logging
+from typing import Dict, Any, Optional, Callable, Set
+
+from .service_fingerprint import ServiceFingerprinter
+from .resource_governor import SOCKETS, ResourceGovernor
+from .source_pool import set_reset_on_close
+
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+
+class BannerGrabber:
+    """Banner抓取器
+
+    端口发现阶段确认端口开放后，把已建立的连接交给本阶段，立即释放
+    扫描并发槽位；本阶段用独立的信号量控制同时读取banner的连接数，
+    每个banner完成时通过回调推送，不阻塞端口发现。
+
+    交接的连接可连同发现阶段借用的套接字额度一起交接，排队等待抓取期间
+    仍计入进程级预算，抓取任务结束时归还；自行建立连接的抓取先借用额度
+    再等待并发槽位，占用槽位的抓取不会等待额度。
+    """
+
+    def __init__(self,
+                 max_concurrent: int = 20,
+                 timeout: float = 2.0,
+                 read_size: int = 1024,
+                 max_pending_connections: int = 256,
+                 fingerprinter: Optional[ServiceFingerprinter] = None,
+                 governor: Optional[ResourceGovernor] = None,
+                 reset_on_close: bool = False,
+                 client: Optional[str] = None,
+                 interactive: bool = False):
+        """初始化Banner抓取器
+
+        Args:
+            max_concurrent: 同时读取banner的最大连接数
+            timeout: 等待banner的超时时间（秒）
+            read_size: 单次读取的最大字节数
+            max_pending_connections: 排队等待抓取时最多保持的已建立连接数，
+                超出后先关闭连接，轮到时重新连接，避免占用过多文件描述符
+            fingerprinter: 提供探测载荷库的指纹识别器，None表示只被动等待banner
+            governor: 借用套接字额度的资源预算，None表示不受进程级预算约束
+            reset_on_close: 关闭连接时发送RST，本端不进入TIME_WAIT
+            client: 借用额度时所属的客户端（按客户端公平排队）
+            interactive: 是否为交互式请求（优先分配额度）
+        """
+        self.max_concurrent = max_concurrent
+        self.timeout = timeout
+        self.read_size = read_size
+        self.max_pending_connections = max_pending_connections
+        self.fingerprinter = fingerprinter
+        self.governor = governor
+        self.reset_on_close = reset_on_close
+        self.client = client
+        self.interactive = interactive
+        self.semaphore = asyncio.Semaphore(max_concurrent)
+
+        self._tasks: Set[asyncio.Task] = set()
+        self._held_connections = 0
+
+        # 统计信息
+        self.grabbed = 0
+        self.empty = 0
+        self.failed = 0
+        self.reconnects = 0
+        self.probes_sent = 0
+
+    @property
+    def pending(self) -> int:
+        """未完成的抓取任务数"""
+        return len(self._tasks)
+
+    def submit(self,
+               host: str,
+               port: int,
+               reader: Optional[asyncio.StreamReader] = None,
+               writer: Optional[asyncio.StreamWriter] = None,
+               on_complete: Optional[Callable[[Optional[str]], None]] = None,
+               leased: bool = False) -> asyncio.Task:
+        """提交一个抓取任务（不等待完成）
+
+        Args:
+            host: 目标主机
+            port: 目标端口
+            reader: 发现阶段已建立连接的读取端
+            writer: 发现阶段已建立连接的写入端
+            on_complete: 抓取完成回调，参数为banner（可能为None）
+            leased: 连接已占用一份套接字额度，随连接交给抓取任务，由抓取任务归还
+
+        Returns:
+            asyncio.Task: 抓取任务
+        """
+        leased = leased and writer is not None and self.governor is not None
+        if writer is not None:
+            if self._held_connections >= self.max_pending_connections:
+                writer.close()
+                reader = writer = None
+                self.reconnects += 1
+                if leased:
+                    self.governor.release(SOCKETS)
+                    leased = False
+            else:
+                self._held_connections += 1
+
+        task = asyncio.create_task(self._run(host, port, reader, writer, on_complete, leased))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        if writer is not None:
+            # 任务在开始前或排队时被取消也要关闭交接的连接、归还交接的额度
+            task.add_done_callback(lambda _: self._release_held(writer, leased))
+        return task
+
+    def _release_held(self, writer: asyncio.StreamWriter, leased: bool):
+        """抓取任务结束：归还持有连接计数和交接的额度，关闭仍未关闭的交接连接"""
+        self._held_connections -= 1
+        if leased:
+            self.governor.release(SOCKETS)
+        if not writer.is_closing():
+            if self.reset_on_close:
+                set_reset_on_close(writer)
+            writer.close()
+
+    async def _run(self,
+                   host: str,
+                   port: int,
+                   reader: Optional[asyncio.StreamReader],
+                   writer: Optional[asyncio.StreamWriter],
+                   on_complete: Optional[Callable[[Optional[str]], None]],
+                   leased: bool = False):
+        """执行抓取并回调"""
+        banner = await self.grab(host, port, reader, writer, leased)
+
+        if on_complete:
+            try:
+                on_complete(banner)
+            except Exception as e:
+                logger.error(f"Banner回调执行失败: {e}")
+
+    async def grab(self,
+                   host: str,
+                   port: int,
+                   reader: Optional[asyncio.StreamReader] = None,
+                   writer: Optional[asyncio.StreamWriter] = None,
+                   leased: bool = False) -> Optional[str]:
+        """抓取banner
+
+        Args:
+            host: 目标主机
+            port: 目标端口
+            reader: 已建立连接的读取端，None时新建连接
+            writer: 已建立连接的写入端
+            leased: 连接已占用套接字额度（由提交方归还），不再借用
+
+        Returns:
+            banner字符串，没有数据或失败时返回None
+        """
+        borrowed = False
+        # 等待套接字额度或并发槽位时被取消，关闭已交接的连接
+        try:
+            if self.governor is not None and not leased:
+                await self.governor.acquire(SOCKETS, self, self.client, self.interactive)
+                borrowed = True
+            await self.semaphore.acquire()
+        except asyncio.CancelledError:
+            if borrowed:
+                self.governor.release(SOCKETS)
+            if writer is not None:
+                writer.close()
+            raise
+        try:
+            try:
+                if writer is None:
+                    reader, writer = await asyncio.wait_for(
+                        asyncio.open_connection(host, port),
+                        timeout=self.timeout
+                    )
+
+                data = await self._read(reader)
+                # 超时无数据（连接未关闭）时，发送该端口的首选探测载荷
+                if data is None and self.fingerprinter is not None:
+                    probe = self.fingerprinter.probes_for(port)[0]
+                    writer.write(probe.payload)
+                    await writer.drain()
+                    self.probes_sent += 1
+                    data = await self._read(reader)
+
+                banner = data.decode("utf-8", errors="ignore").strip() if data else ""
+                if banner:
+                    self.grabbed += 1
+                    return banner
+                self.empty += 1
+                return None
+            except asyncio.TimeoutError:
+                self.empty += 1
+                return None
+            except Exception as e:
+                logger.debug(f"Banner抓取失败 {host}:{port}: {e}")
+                self.failed += 1
+                return None
+            finally:
+                if borrowed:
+                    self.governor.release(SOCKETS)
+                if writer is not None:
+                    if self.reset_on_close:
+                        set_reset_on_close(writer)
+                    writer.close()
+                    try:
+                        await writer.wait_closed()
+                    except Exception:
+                        pass
+        finally:
+            self.semaphore.release()
+
+    async def _read(self, reader: asyncio.StreamReader) -> Optional[bytes]:
+        """读取一次数据，超时返回None"""
+        try:
+            return await asyncio.wait_for(reader.read(self.read_size), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    async def drain(self, timeout: Optional[float] = None) -> bool:
+        """等待已提交的抓取任务完成
+
+        Args:
+            timeout: 最长等待时间（秒），超时后取消剩余任务
+
+        Returns:
+            是否全部完成
+        """
+        if not self._tasks:
+            return True
+
+        _, pending = await asyncio.wait(set(self._tasks), timeout=timeout)
+        if pending:
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+            return False
+        return True
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """获取抓取统计信息"""
+        return {
+            "banner_concurrency": self.max_concurrent,
+            "banners_grabbed": self.grabbed,
+            "banners_empty": self.empty,
+            "banners_failed": self.failed,
+            "banners_pending": self.pending,
+            "banner_reconnects": self.reconnects,
+            "probes_sent": self.probes_sent
+        }
@@ -0,0 +1,95 @@
+"""
+---------------------------------------------------------------
+File name:                  cursor.py
+Author:                     Ignorant-lu
+Date created:               2026/10/19
+Description:                游标分页，不透明续读令牌与顺序结果的游标分页
+----------------------------------------------------------------
+
+Changed history:
+                            2026/10/19: 初始创建;
+----
+"""
+
+import json
+import base64
+import hashlib
+from typing import Dict, List, Any, Optional, Callable, Sequence, Tuple
+
+
+def _scope_digest(scope: Dict[str, Any]) -> str:
+    """过滤条件摘要（游标只能配合生成它的过滤条件使用）"""
+    text = json.dumps(scope, sort_keys=True, default=str)
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=6).hexdigest()
+
+
+def encode_cursor(position: int, scope: Dict[str, Any]) -> str:
+    """生成续读令牌
+
+    Args:
+        position: 下一页的起始位置（结果表主键或序列号）
+        scope: 数据源标识与过滤条件
+
+    Returns:
+        URL安全的不透明令牌
+    """
+    payload = json.dumps({"p": position, "s": _scope_digest(scope)}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token: Optional[str], scope: Dict[str, Any]) -> int:
+    """解析续读令牌
+
+    Args:
+        token: 令牌，None表示从头开始
+        scope: 数据源标识与过滤条件，必须与生成令牌时一致
+
+    Returns:
+        起始位置
+
+    Raises:
+        ValueError: 令牌无效或与过滤条件不匹配
+    """
+    if not token:
+        return 0
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        position = payload["p"]
+        digest = payload["s"]
+    except (ValueError, KeyError, TypeError):
+        raise ValueError("无效的游标")
+    if not isinstance(position, int) or position < 0:
+        raise ValueError("无效的游标")
+    if digest != _scope_digest(scope):
+        raise ValueError("游标与当前查询条件不匹配")
+    return position
+
+
+def page_sequence(items: Sequence[Any],
+                  start: int,
+                  limit: int,
+                  predicate: Optional[Callable[[Any], bool]] = None) -> Tuple[List[Any], Optional[int]]:
+    """从只追加的序列中按位置读取一页满足条件的元素
+
+    从start开始顺序扫描，找到limit个匹配元素后再向后查找一个匹配，
+    用它的位置作为下一页起点；代价与本页跨越的元素数成正比，与总数无关。
+
+    Args:
+        items: 只追加的序列
+        start: 起始位置
+        limit: 每页数量
+        predicate: 过滤条件，None表示不过滤
+
+    Returns:
+        (本页元素, 下一页起始位置，没有更多结果时为None)
+    """
+    page = []
+    for index in range(start, len(items)):
+        item = items[index]
+        if predicate is not None and not predicate(item):
+            continue
+        if len(page) == limit:
+            return page, index
+        page.append(item)
+    return page, None
@@ -0,0 +1,169 @@
+"""
+---------------------------------------------------------------
+File name:                  fd_limits.py
+Author:                     Ignorant-lu
+Date created:               2026/10/19
+Description:                文件描述符预算，读取/提高RLIMIT_NOFILE并推导各引擎的安全并发上限
+----------------------------------------------------------------
+
+Changed history:
+                            2026/10/19: 初始创建;
+----
+"""
+
+import logging
+from dataclasses import dataclass, asdict
+from typing import Dict, Any, Optional, Tuple
+
+# resource模块仅在类Unix系统上可用
+try:
+    import resource
+    RESOURCE_AVAILABLE = True
+except ImportError:
+    RESOURCE_AVAILABLE = False
+    resource = None
+
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+
+# 无法读取限制时（如Windows）假定的描述符数
+DEFAULT_NOFILE = 1024
+
+
+@dataclass
+class FdBudget:
+    """文件描述符预算与推导出的并发上限"""
+    soft_limit: int
+    hard_limit: Optional[int]
+    raised: bool
+    reserved: int
+    sockets: int
+    scan_concurrency: int
+    banner_concurrency: int
+    ping_subprocesses: int
+    tcp_connections: int
+
+    def as_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def read_nofile_limit() -> Tuple[int, Optional[int]]:
+    """读取进程的文件描述符限制
+
+    Returns:
+        (软限制, 硬限制)，硬限制无上限或无法读取时为None
+    """
+    if not RESOURCE_AVAILABLE:
+        return DEFAULT_NOFILE, None
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    unlimited = resource.RLIM_INFINITY
+    return (
+        DEFAULT_NOFILE * 64 if soft == unlimited else soft,
+        None if hard == unlimited else hard
+    )
+
+
+def raise_nofile_limit(target: int) -> Tuple[int, bool]:
+    """在硬限制允许范围内把软限制提高到target
+
+    Args:
+        target: 期望的软限制
+
+    Returns:
+        (当前软限制, 是否已提高)
+    """
+    soft, hard = read_nofile_limit()
+    if not RESOURCE_AVAILABLE or soft >= target:
+        return soft, False
+    new_soft = target if hard is None else min(target, hard)
+    if new_soft <= soft:
+        return soft, False
+    try:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (new_soft, hard if hard is not None else resource.RLIM_INFINITY))
+    except (ValueError, OSError) as e:
+        logger.warning(f"提高文件描述符限制失败({soft} -> {new_soft}): {e}")
+        return soft, False
+    logger.info(f"文件描述符软限制已提高: {soft} -> {new_soft}")
+    return new_soft, True
+
+
+def compute_fd_budget(soft_limit: int,
+                      hard_limit: Optional[int] = None,
+                      raised: bool = False,
+                      reserved: int = 128,
+                      max_scan_concurrent: int = 500,
+                      max_banner_concurrent: int = 100,
+                      max_ping_subprocesses: int = 32,
+                      max_tcp_connections: int = 1000) -> FdBudget:
+    """根据描述符限制推导并发上限
+
+    保留reserved个（至少为限制的10%）给监听套接字、数据库、日志、WebSocket等，
+    其余作为所有探测共用的套接字预算；单个扫描任务最多使用一半，
+    保证至少两个任务可以同时运行。每个系统ping进程占用约3个描述符（管道）。
+
+    Args:
+        soft_limit: 文件描述符软限制
+        hard_limit: 硬限制
+        raised: 启动时是否提高过软限制
+        reserved: 为非探测用途保留的描述符数
+        max_scan_concurrent: 配置的单任务扫描并发上限
+        max_banner_concurrent: 配置的banner抓取并发上限
+        max_ping_subprocesses: 配置的系统ping进程上限
+        max_tcp_connections: 配置的TCP服务器连接上限
+
+    Returns:
+        FdBudget: 描述符预算
+    """
+    reserved = min(max(reserved, soft_limit // 10), soft_limit - 2)
+    sockets = max(2, soft_limit - reserved)
+    return FdBudget(
+        soft_limit=soft_limit,
+        hard_limit=hard_limit,
+        raised=raised,
+        reserved=reserved,
+        sockets=sockets,
+        scan_concurrency=max(1, min(max_scan_concurrent, sockets // 2)),
+        banner_concurrency=max(1, min(max_banner_concurrent, sockets // 4)),
+        ping_subprocesses=max(1, min(max_ping_subprocesses, sockets // 3)),
+        tcp_connections=max(1, min(max_tcp_connections, sockets // 2))
+    )
+
+
+# 当前生效的预算（导入时按现有限制计算，应用启动时提高限制后重新计算）
+_fd_budget = compute_fd_budget(*read_nofile_limit())
+
+
+def get_fd_budget() -> FdBudget:
+    return _fd_budget
+
+
+def configure_fd_budget(target: Optional[int] = None, **limits) -> FdBudget:
+    """提高描述符限制（target为None时不提高）并重新计算预算
+
+    Args:
+        target: 期望的软限制
+        **limits: 传递给compute_fd_budget的配置上限
+
+    Returns:
+        FdBudget: 新的预算
+    """
+    global _fd_budget
+    raised = False
+    if target:
+        _, raised = raise_nofile_limit(target)
+    soft, hard = read_nofile_limit()
+    _fd_budget = compute_fd_budget(soft, hard, raised, **limits)
+    logger.info(
+        f"文件描述符预算: 限制={soft}, 套接字={_fd_budget.sockets}, "
+        f"单任务扫描并发={_fd_budget.scan_concurrency}"
+    )
+    return _fd_budget
+
+
+def clamp_concurrency(requested: Optional[int], ceiling: int) -> Optional[int]:
+    """把请求的并发数限制在预算上限内（None保持不变）"""
+    if requested is None:
+        return None
+    return max(1, min(int(requested), ceiling))
@@ -0,0 +1,207 @@
+"""
+---------------------------------------------------------------
+File name:                  framing.py
+Author:                     Ignorant-lu
+Date created:               2026/10/19
+Description:                长度前缀帧的增量解析与基于asyncio.Protocol的成批收帧
+----------------------------------------------------------------
+
+Changed history:
+                            2026/10/19: 初始创建;
+----
+"""
+
+import json
+import struct
+import asyncio
+import logging
+from collections import deque
+from typing import Any, Callable, Deque, List, Optional, Tuple
+
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+
+# 帧头：4字节大端序长度
+FRAME_HEADER = struct.Struct(">I")
+
+
+class FrameError(Exception):
+    """帧格式错误（长度超限或内容无法解码）"""
+
+
+def encode_frame(payload: bytes) -> bytes:
+    """为载荷加上长度前缀"""
+    return FRAME_HEADER.pack(len(payload)) + payload
+
+
+def decode_json_frame(view: memoryview) -> Any:
+    """把帧内容按UTF-8 JSON解码（直接从视图解码，不生成中间bytes）"""
+    return json.loads(str(view, "utf-8"))
+
+
+class FrameDecoder:
+    """长度前缀帧增量解析器
+
+    缓冲区为空时直接在收到的数据上用memoryview切出完整帧，只把末尾
+    不完整的帧复制进可复用的缓冲区；缓冲区中有残留数据时先补齐当前帧。
+    帧视图只在回调期间有效，回调需要在返回前完成解码。
+    """
+
+    def __init__(self, max_frame_size: int):
+        """初始化解析器
+
+        Args:
+            max_frame_size: 单帧内容的最大字节数
+        """
+        self.max_frame_size = max_frame_size
+        self._buffer = bytearray()
+
+    @property
+    def buffered(self) -> int:
+        """缓冲区中尚未组成完整帧的字节数"""
+        return len(self._buffer)
+
+    def _frame_length(self, view: memoryview, offset: int) -> int:
+        (length,) = FRAME_HEADER.unpack_from(view, offset)
+        if length > self.max_frame_size:
+            raise FrameError(f"帧长度 {length} 超过上限 {self.max_frame_size}")
+        return length
+
+    def _parse(self, view: memoryview, on_frame: Callable[[memoryview], None]) -> int:
+        """解析视图中所有完整帧
+
+        Returns:
+            已解析的字节数
+        """
+        offset, size, header = 0, len(view), FRAME_HEADER.size
+        while size - offset >= header:
+            length = self._frame_length(view, offset)
+            end = offset + header + length
+            if end > size:
+                break
+            on_frame(view[offset + header:end])
+            offset = end
+        return offset
+
+    def feed(self, data: bytes, on_frame: Callable[[memoryview], None]):
+        """输入收到的数据，对其中每个完整帧调用on_frame
+
+        Raises:
+            FrameError: 帧长度超过上限
+        """
+        if not self._buffer:
+            with memoryview(data) as view:
+                consumed = self._parse(view, on_frame)
+                if consumed < len(data):
+                    self._buffer += view[consumed:]
+            return
+
+        self._buffer += data
+        with memoryview(self._buffer) as view:
+            consumed = self._parse(view, on_frame)
+        del self._buffer[:consumed]
+
+
+class FramedProtocol(asyncio.streams.FlowControlMixin, asyncio.Protocol):
+    """长度前缀帧协议
+
+    在data_received中一次解析并解码本次数据里的所有完整帧，作为一批
+    交给read_batch()的调用方，每批只需一次挂起/唤醒。未取走的帧数超过
+    max_pending时暂停读取，取走后恢复。发送仍通过writer（StreamWriter）
+    进行，write/drain/close/wait_closed与流式接口相同。
+    """
+
+    def __init__(self,
+                 max_frame_size: int,
+                 decode: Callable[[memoryview], Any] = decode_json_frame,
+                 client_connected_cb: Optional[Callable[["FramedProtocol", asyncio.StreamWriter], Any]] = None,
+                 max_pending: int = 1024,
+                 loop: Optional[asyncio.AbstractEventLoop] = None):
+        """初始化协议
+
+        Args:
+            max_frame_size: 单帧内容的最大字节数
+            decode: 帧内容解码函数
+            client_connected_cb: 连接建立后调用的协程函数(protocol, writer)
+            max_pending: 未取走的帧数上限，超出后暂停读取
+            loop: 事件循环
+        """
+        super().__init__(loop=loop)
+        self.decoder = FrameDecoder(max_frame_size)
+        self.decode = decode
+        self.max_pending = max_pending
+        self.transport: Optional[asyncio.Transport] = None
+        self.writer: Optional[asyncio.StreamWriter] = None
+        self.error: Optional[Exception] = None
+        self._client_connected_cb = client_connected_cb
+        self._task: Optional[asyncio.Task] = None
+        self._batches: Deque[List[Tuple[Any, int]]] = deque()
+        self._pending = 0
+        self._reading_paused = False
+        self._eof = False
+        self._waiter: Optional[asyncio.Future] = None
+        self._closed = self._loop.create_future()
+
+    def connection_made(self, transport: asyncio.Transport):
+        self.transport = transport
+        self.writer = asyncio.StreamWriter(transport, self, None, self._loop)
+        if self._client_connected_cb is not None:
+            self._task = self._loop.create_task(self._client_connected_cb(self, self.writer))
+
+    def data_received(self, data: bytes):
+        if self._eof:
+            return
+        batch: List[Tuple[Any, int]] = []
+        try:
+            self.decoder.feed(data, lambda view: batch.append((self.decode(view), len(view))))
+        except (FrameError, ValueError) as e:
+            # 超长帧或无法解码的内容：已解析的帧照常交付，之后视为连接结束
+            self.error = e
+            self._eof = True
+        if batch:
+            self._batches.append(batch)
+            self._pending += len(batch)
+            if self._pending >= self.max_pending and not self._reading_paused:
+                self._reading_paused = True
+                self.transport.pause_reading()
+        self._wake()
+
+    def eof_received(self) -> bool:
+        self._eof = True
+        self._wake()
+        return False
+
+    def connection_lost(self, exc: Optional[Exception]):
+        super().connection_lost(exc)
+        self._eof = True
+        self._wake()
+        if not self._closed.done():
+            self._closed.set_result(None)
+
+    def _get_close_waiter(self, stream: asyncio.StreamWriter) -> asyncio.Future:
+        return self._closed
+
+    def _wake(self):
+        waiter, self._waiter = self._waiter, None
+        if waiter is not None and not waiter.done():
+            waiter.set_result(None)
+
+    async def read_batch(self) -> Optional[List[Tuple[Any, int]]]:
+        """读取下一批已解码的帧
+
+        Returns:
+            [(消息, 帧长度), ...]，连接结束或出错后返回None
+        """
+        while not self._batches:
+            if self._eof:
+                return None
+            self._waiter = self._loop.create_future()
+            await self._waiter
+        batch = self._batches.popleft()
+        self._pending -= len(batch)
+        if self._reading_paused and self._pending < self.max_pending // 2:
+            self._reading_paused = False
+            self.transport.resume_reading()
+        return batch
@@ -0,0 +1,302 @@
+"""
+---------------------------------------------------------------
+File name:                  inventory_index.py
+Author:                     Ignorant-lu
+Date created:               2026/10/19
+Description:                资产清单倒排索引，按端口/服务查询开放主机，增量维护
+----------------------------------------------------------------
+
+Changed history:
+                            2026/10/19: 初始创建;
+                            2026/10/19: 添加有序快照用于差异比较;
+                            2026/10/19: 维护按地址排序的主机编号顺序，分页查询不再全量排序;
+----
+"""
+
+import time
+import bisect
+import ipaddress
+from typing import Dict, List, Any, Optional, Tuple, Iterator
+
+
+# 会更新最新状态的端口状态（超时/错误不确定，不覆盖已知状态）
+KNOWN_STATUSES = frozenset({"open", "closed", "filtered"})
+
+# 新增主机不超过此数量时逐个插入有序编号列表，否则整体重新排序
+ORDER_INSERT_LIMIT = 256
+
+# 排序一个主机与沿有序列表检查一个主机的相对代价（用于选择分页方式）
+SORT_COST = 16
+
+
+def iter_bits(bits: int) -> Iterator[int]:
+    """按升序迭代整数位图中置位的序号"""
+    text = bin(bits)[:1:-1]
+    index = text.find("1")
+    while index != -1:
+        yield index
+        index = text.find("1", index + 1)
+
+
+class InventoryIndex:
+    """资产清单索引
+
+    每个主机分配一个稠密的整数编号，端口→主机、服务→主机的倒排集合
+    都是以主机编号为位序的Python整数位图：数十万主机的集合只占几十KB，
+    多条件查询是位图与运算，计数用bit_count。
+
+    主机编号按出现顺序分配，另外维护按地址排序的编号列表（排序键在分配编号时
+    计算一次）。分页时结果多则沿有序列表逐个检查位图，取够一页即停止；
+    结果少则只对命中的主机按排序键排序。
+    """
+
+    def __init__(self):
+        self._host_ids: Dict[str, int] = {}
+        self._hosts: List[str] = []
+        # 主机编号 -> 排序键；按地址排序的主机编号（新主机先进入_unordered，查询时合入）
+        self._sort_keys: List[Tuple[int, int, str]] = []
+        self._order: List[int] = []
+        self._unordered: List[int] = []
+        # 主机编号 -> {(端口, 协议): (状态, 服务, 版本, 更新时间)}
+        self._states: List[Dict[Tuple[int, str], Tuple[str, Optional[str], Optional[str], float]]] = []
+        # 倒排位图
+        self._by_port: Dict[int, int] = {}
+        self._by_service: Dict[str, int] = {}
+        # (主机编号, 服务) -> 该主机上此服务的开放端口数
+        self._service_counts: Dict[Tuple[int, str], int] = {}
+        self.updates = 0
+
+    def _host_id(self, host: str) -> int:
+        """获取（必要时分配）主机编号"""
+        host_id = self._host_ids.get(host)
+        if host_id is None:
+            host_id = len(self._hosts)
+            self._host_ids[host] = host_id
+            self._hosts.append(host)
+            self._states.append({})
+            self._sort_keys.append(self._sort_key(host))
+            self._unordered.append(host_id)
+        return host_id
+
+    def _ordered_ids(self) -> List[int]:
+        """按地址排序的全部主机编号"""
+        if self._unordered:
+            key = self._sort_keys.__getitem__
+            if len(self._unordered) <= ORDER_INSERT_LIMIT:
+                for host_id in self._unordered:
+                    bisect.insort(self._order, host_id, key=key)
+            else:
+                self._order.extend(self._unordered)
+                self._order.sort(key=key)
+            self._unordered.clear()
+        return self._order
+
+    def update(self,
+               host: str,
+               port: int,
+               status: str,
+               protocol: str = "tcp",
+               service: Optional[str] = None,
+               version: Optional[str] = None,
+               timestamp: Optional[float] = None) -> bool:
+        """用一次探测结果更新索引
+
+        Args:
+            host: 主机
+            port: 端口
+            status: 端口状态
+            protocol: 协议
+            service: 服务名称
+            version: 服务版本
+            timestamp: 探测时间，默认当前时间
+
+        Returns:
+            索引是否发生变化（不确定的状态不更新）
+        """
+        if status not in KNOWN_STATUSES:
+            return False
+
+        host_id = self._host_id(host)
+        key = (port, protocol)
+        states = self._states[host_id]
+        previous = states.get(key)
+        if previous is not None and previous[0] == "open":
+            self._remove_open(host_id, port, previous[1])
+
+        states[key] = (status, service, version, timestamp or time.time())
+        if status == "open":
+            self._add_open(host_id, port, service)
+        self.updates += 1
+        return True
+
+    def update_result(self, result: Dict[str, Any]) -> bool:
+        """用扫描结果字典更新索引（兼容引擎结果与后台任务结果字段）"""
+        return self.update(
+            result.get("host") or result.get("target"),
+            int(result["port"]),
+            result.get("status"),
+            result.get("protocol") or "tcp",
+            result.get("service_name") or result.get("service") or None,
+            result.get("service_version") or result.get("version")
+        )
+
+    def _add_open(self, host_id: int, port: int, service: Optional[str]):
+        bit = 1 << host_id
+        self._by_port[port] = self._by_port.get(port, 0) | bit
+        if service:
+            count_key = (host_id, service)
+            self._service_counts[count_key] = self._service_counts.get(count_key, 0) + 1
+            self._by_service[service] = self._by_service.get(service, 0) | bit
+
+    def _remove_open(self, host_id: int, port: int, service: Optional[str]):
+        bit = 1 << host_id
+        # 同一端口可能以其他协议保持开放（调用时原状态尚未覆盖，计数包含自身）
+        if self._open_protocols(host_id, port) <= 1:
+            self._set(self._by_port, port, self._by_port.get(port, 0) & ~bit)
+        if service:
+            count_key = (host_id, service)
+            remaining = self._service_counts.get(count_key, 0) - 1
+            if remaining > 0:
+                self._service_counts[count_key] = remaining
+            else:
+                self._service_counts.pop(count_key, None)
+                self._set(self._by_service, service, self._by_service.get(service, 0) & ~bit)
+
+    def _open_protocols(self, host_id: int, port: int) -> int:
+        """主机上该端口处于开放状态的协议数"""
+        return sum(
+            1 for (p, _), state in self._states[host_id].items()
+            if p == port and state[0] == "open"
+        )
+
+    @staticmethod
+    def _set(mapping: Dict[Any, int], key: Any, bits: int):
+        if bits:
+            mapping[key] = bits
+        else:
+            mapping.pop(key, None)
+
+    def _match_bits(self, ports: List[int], services: List[str], match_all: bool) -> int:
+        """计算满足条件的主机位图"""
+        sets = [self._by_port.get(port, 0) for port in ports]
+        sets += [self._by_service.get(service.lower(), 0) for service in services]
+        if not sets:
+            return 0
+        bits = sets[0]
+        for other in sets[1:]:
+            bits = (bits & other) if match_all else (bits | other)
+        return bits
+
+    def query(self,
+              ports: Optional[List[int]] = None,
+              services: Optional[List[str]] = None,
+              match_all: bool = True,
+              offset: int = 0,
+              limit: int = 100) -> Tuple[List[str], int]:
+        """查询开放指定端口/服务的主机
+
+        Args:
+            ports: 端口列表
+            services: 服务名称列表
+            match_all: True表示同时满足全部条件，False表示满足任一条件
+            offset: 分页偏移
+            limit: 分页大小
+
+        Returns:
+            (按地址排序的主机列表当前页, 满足条件的主机总数)
+        """
+        bits = self._match_bits(ports or [], services or [], match_all)
+        total = bits.bit_count()
+        if offset >= total or limit <= 0:
+            return [], total
+
+        wanted = min(offset + limit, total)
+        # 沿有序列表大约需要检查 wanted * 主机数 / total 个主机；排序每个命中主机的代价
+        # 远高于检查一位，只有命中很少时才直接排序命中的主机
+        if total * total * SORT_COST < wanted * len(self._hosts):
+            host_ids = sorted(iter_bits(bits), key=self._sort_keys.__getitem__)[offset:wanted]
+            return [self._hosts[i] for i in host_ids], total
+
+        mask = bits.to_bytes((len(self._hosts) + 7) // 8, "little")
+        page: List[str] = []
+        seen = 0
+        for host_id in self._ordered_ids():
+            if mask[host_id >> 3] >> (host_id & 7) & 1:
+                if seen >= offset:
+                    page.append(self._hosts[host_id])
+                    if len(page) >= limit:
+                        break
+                seen += 1
+        return page, total
+
+    def count(self, ports: Optional[List[int]] = None,
+              services: Optional[List[str]] = None,
+              match_all: bool = True) -> int:
+        """统计满足条件的主机数"""
+        return self._match_bits(ports or [], services or [], match_all).bit_count()
+
+    @staticmethod
+    def _sort_key(host: str):
+        """IP地址按数值排序，主机名排在之后"""
+        try:
+            address = ipaddress.ip_address(host)
+            return (address.version, int(address), "")
+        except ValueError:
+            return (7, 0, host)
+
+    def host_ports(self, host: str) -> Optional[List[Dict[str, Any]]]:
+        """获取主机最新已知的端口状态，未知主机返回None"""
+        host_id = self._host_ids.get(host)
+        if host_id is None:
+            return None
+        return [
+            {"port": port, "protocol": protocol, "status": status,
+             "service": service, "version": version, "updated_at": updated_at}
+            for (port, protocol), (status, service, version, updated_at)
+            in sorted(self._states[host_id].items())
+        ]
+
+    def open_ports(self) -> Iterator[Tuple[str, int, str, Optional[str]]]:
+        """迭代全部开放端口 (主机, 端口, 协议, 服务)"""
+        for host_id, states in enumerate(self._states):
+            for (port, protocol), (status, service, _, _) in states.items():
+                if status == "open":
+                    yield self._hosts[host_id], port, protocol, service
+
+    def snapshot(self) -> List[Tuple[str, int, str, str, Optional[str]]]:
+        """生成当前状态的有序快照
+
+        Returns:
+            按(主机, 端口, 协议)排序的(主机, 端口, 协议, 状态, 服务)列表
+        """
+        return sorted(
+            (self._hosts[host_id], port, protocol, status, service)
+            for host_id, states in enumerate(self._states)
+            for (port, protocol), (status, service, _, _) in states.items()
+        )
+
+    def top_ports(self, count: int = 10) -> List[Dict[str, int]]:
+        """开放主机数最多的端口"""
+        ranked = sorted(
+            ((port, bits.bit_count()) for port, bits in self._by_port.items()),
+            key=lambda item: (-item[1], item[0])
+        )
+        return [{"port": port, "hosts": hosts} for port, hosts in ranked[:count]]
+
+    def clear(self):
+        """清空索引"""
+        self.__init__()
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """获取索引统计信息"""
+        return {
+            "hosts": len(self._hosts),
+            "hosts_with_open_ports": self._match_bits(list(self._by_port), [], False).bit_count(),
+            "indexed_ports": len(self._by_port),
+            "indexed_services": len(self._by_service),
+            "updates": self.updates
+        }
+
+
+# 全局资产清单索引
+inventory_index = InventoryIndex()
@@ -0,0 +1,762 @@
+"""
+---------------------------------------------------------------
+File name:                  job_manager.py
+Author:                     Ignorant-lu
+Date created:               2026/10/19
+Description:                后台任务管理，有界优先级队列、完成任务TTL淘汰、结果落盘与多进程状态共享
+----------------------------------------------------------------
+
+Changed history:
+                            2026/10/19: 初始创建;
+                            2026/10/19: 支持取消排队和运行中的任务;
+                            2026/10/19: 任务状态与结果同步到共享状态存储，支持多工作进程;
+                            2026/10/19: 任务在提交时的上下文中运行（保留发起请求的客户端标识）;
+                            2026/10/19: 任务视图的成员判断只检查是否存在，不读取落盘或共享存储中的结果;
+                            2026/10/19: 同步时也执行对排队中任务的取消请求;
+                            2026/10/19: 共享状态存储的读写在线程中按顺序执行，不阻塞事件循环;
+                            2026/10/19: 保留后台任务的引用；落盘结果按行偏移分块读取，不整体读回;
+                            2026/10/19: 截止时间内未扫完的partial状态视为已结束;
+----
+"""
+
+import os
+import sys
+import json
+import time
+import heapq
+import socket
+import asyncio
+import logging
+import itertools
+import contextvars
+from array import array
+from typing import Dict, List, Any, Optional, Callable, Awaitable, Iterator, MutableMapping, Sequence, Set
+
+from .state_backend import StateBackend
+
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+
+# 视为已结束的任务状态
+FINISHED_STATUSES = frozenset({"completed", "partial", "failed", "cancelled", "stopped"})
+
+
+class JobQueueFullError(Exception):
+    """任务数量达到上限且没有可淘汰的已结束任务"""
+
+
+class Job:
+    """后台任务记录"""
+
+    __slots__ = ("job_id", "kind", "priority", "state", "results", "created_at",
+                 "finished_at", "spill_path", "spill_offsets", "runner", "context", "task")
+
+    def __init__(self, job_id: str, kind: str, state: Dict[str, Any], priority: int = 0):
+        self.job_id = job_id
+        self.kind = kind
+        self.priority = priority
+        self.state = state
+        self.results: Optional[List[Any]] = None
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.spill_path: Optional[str] = None
+        self.spill_offsets: Optional[array] = None
+        self.runner: Optional[Callable[[], Awaitable[Any]]] = None
+        self.context: Optional[contextvars.Context] = None
+        self.task: Optional[asyncio.Task] = None
+
+    @property
+    def finished(self) -> bool:
+        """任务是否已结束（排队和运行中的任务不会被淘汰）"""
+        if self.task is not None and not self.task.done():
+            return False
+        return self.finished_at is not None or self.state.get("status") in FINISHED_STATUSES
+
+    def finished_time(self) -> float:
+        return self.finished_at or self.created_at
+
+
+class SpilledResults(Sequence):
+    """已落盘的任务结果（只读序列）
+
+    按落盘时记录的行偏移定位，按下标读取时一次读入一块并缓存，
+    分页代价与页大小成正比；遍历时逐行读取，不把整个文件读回内存。
+    读取文件是同步操作，大范围读取应在线程中进行。
+    """
+
+    # 按下标读取时每次读入的行数
+    BLOCK_SIZE = 256
+
+    def __init__(self, path: str, offsets: array):
+        self.path = path
+        self._offsets = offsets
+        self._block: tuple = (0, [])
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("结果下标超出范围")
+        start, block = self._block
+        if not start <= index < start + len(block):
+            block = self._read_block(index)
+            start = index
+            self._block = (start, block)
+        return block[index - start]
+
+    def _read_block(self, start: int) -> List[Any]:
+        with open(self.path, "rb") as f:
+            f.seek(self._offsets[start])
+            return [json.loads(f.readline()) for _ in range(min(self.BLOCK_SIZE, len(self) - start))]
+
+    def __iter__(self) -> Iterator[Any]:
+        with open(self.path, "rb") as f:
+            for line in f:
+                yield json.loads(line)
+
+
+class _JobView(MutableMapping):
+    """按任务类型查看任务状态或结果的字典视图
+
+    路由代码沿用字典访问方式（tasks[id]["status"] = ...），
+    写入新键即登记任务，删除键即移除任务。
+    配置了共享状态存储时，本进程没有的任务从存储读取（只读副本）。
+    """
+
+    def __init__(self, manager: "JobManager", kind: str, field: str):
+        self._manager = manager
+        self._kind = kind
+        self._field = field
+        manager._kinds.add(kind)
+
+    def _job(self, job_id: str) -> Job:
+        job = self._manager.get(job_id)
+        if job is None or job.kind != self._kind:
+            raise KeyError(job_id)
+        if self._field == "results" and job.results is None and job.spill_path is None:
+            raise KeyError(job_id)
+        return job
+
+    def __getitem__(self, job_id: str):
+        try:
+            job = self._job(job_id)
+        except KeyError:
+            value = self._manager.remote(self._kind, self._field, job_id)
+            if value is None:
+                raise
+            return value
+        if self._field == "state":
+            return job.state
+        return self._manager.load_results(job)
+
+    def __contains__(self, job_id: object) -> bool:
+        # Mapping默认通过__getitem__判断，会读回落盘结果或拉取共享存储中的整份结果
+        try:
+            self._job(job_id)
+            return True
+        except KeyError:
+            return self._manager.remote_exists(self._kind, self._field, job_id)
+
+    def __setitem__(self, job_id: str, value):
+        job = self._manager.get(job_id)
+        if job is None or job.kind != self._kind:
+            state = value if self._field == "state" else {"status": "pending"}
+            job = self._manager.create(self._kind, state, job_id=job_id)
+        if self._field == "state":
+            job.state = value
+        else:
+            self._manager.discard_spill(job)
+            job.results = value
+
+    def __delitem__(self, job_id: str):
+        job = self._job(job_id)
+        if self._field == "state":
+            self._manager.remove(job_id)
+        else:
+            self._manager.discard_spill(job)
+            job.results = None
+
+    def __iter__(self) -> Iterator[str]:
+        for job in list(self._manager.jobs()):
+            if job.kind == self._kind and (
+                self._field == "state" or job.results is not None or job.spill_path is not None
+            ):
+                yield job.job_id
+        yield from self._manager.remote_ids(self._kind, self._field)
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+
+class JobManager:
+    """后台任务管理器
+
+    - 任务总数有上限，登记新任务时先淘汰过期的已结束任务，
+      仍然满员时按完成时间淘汰最早结束的任务，全部未结束时拒绝新任务；
+    - 提交的任务按优先级排队，同时运行的任务数有上限；
+    - 已结束任务保留job_ttl秒后由清理循环淘汰；
+    - 结果数量超过阈值的已结束任务可将结果写入磁盘，访问时再读回；
+    - 配置共享状态存储后，任务状态（含进度）定期同步、结果在结束时同步，
+      其他工作进程可以查询和取消本进程的任务。写入在线程中按提交顺序执行，
+      不阻塞事件循环。
+    """
+
+    def __init__(self,
+                 max_jobs: int = 1000,
+                 max_running: int = 10,
+                 job_ttl: float = 3600.0,
+                 cleanup_interval: float = 60.0,
+                 spill_dir: Optional[str] = None,
+                 spill_threshold: int = 10000):
+        """初始化任务管理器
+
+        Args:
+            max_jobs: 最多保留的任务数（含已结束任务）
+            max_running: 最多同时运行的任务数
+            job_ttl: 已结束任务的保留时间（秒），0表示不按时间淘汰
+            cleanup_interval: 清理循环间隔（秒）
+            spill_dir: 结果落盘目录，None表示不落盘
+            spill_threshold: 结果数超过此值的已结束任务落盘
+        """
+        self._jobs: Dict[str, Job] = {}
+        self._queue: List[tuple] = []
+        self._sequence = itertools.count()
+        self._running = 0
+        self._cleanup_task: Optional[asyncio.Task] = None
+        self._sync_task: Optional[asyncio.Task] = None
+        self._kinds = set()
+        # 共享状态存储写入链的末尾（每次写入等待前一次完成，保证写入顺序）
+        self._backend_writes: Optional[asyncio.Task] = None
+        # 后台写入和落盘任务的引用，事件循环只保留弱引用
+        self._background_tasks: Set[asyncio.Task] = set()
+
+        self.state_backend: Optional[StateBackend] = None
+        self.sync_interval = 1.0
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+
+        self.evicted = 0
+        self.rejected = 0
+        self.spilled = 0
+        self.configure(max_jobs, max_running, job_ttl, cleanup_interval, spill_dir, spill_threshold)
+
+    def configure(self,
+                  max_jobs: int,
+                  max_running: int,
+                  job_ttl: float,
+                  cleanup_interval: float = 60.0,
+                  spill_dir: Optional[str] = None,
+                  spill_threshold: int = 10000):
+        """更新管理器配置"""
+        self.max_jobs = max(1, int(max_jobs))
+        self.max_running = max(1, int(max_running))
+        self.job_ttl = max(0.0, float(job_ttl))
+        self.cleanup_interval = max(1.0, float(cleanup_interval))
+        self.spill_dir = spill_dir or None
+        self.spill_threshold = max(0, int(spill_threshold))
+        if self.spill_dir:
+            os.makedirs(self.spill_dir, exist_ok=True)
+
+    # ------------------------------------------------------------------
+    # 任务登记
+    # ------------------------------------------------------------------
+
+    def tasks(self, kind: str) -> MutableMapping:
+        """指定类型任务状态的字典视图"""
+        return _JobView(self, kind, "state")
+
+    def results(self, kind: str) -> MutableMapping:
+        """指定类型任务结果的字典视图"""
+        return _JobView(self, kind, "results")
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def jobs(self) -> Iterator[Job]:
+        """按登记顺序迭代任务"""
+        return iter(self._jobs.values())
+
+    def create(self,
+               kind: str,
+               state: Dict[str, Any],
+               job_id: Optional[str] = None,
+               priority: int = 0) -> Job:
+        """登记任务
+
+        Raises:
+            JobQueueFullError: 任务数达到上限且没有已结束的任务可淘汰
+        """
+        job_id = job_id or state.get("task_id") or state.get("scan_id")
+        if job_id in self._jobs:
+            self.remove(job_id)
+        if len(self._jobs) >= self.max_jobs:
+            self.evict_expired()
+        if len(self._jobs) >= self.max_jobs and not self._evict_oldest_finished():
+            self.rejected += 1
+            raise JobQueueFullError(f"任务数量已达上限({self.max_jobs})")
+
+        job = Job(job_id, kind, state, priority)
+        self._jobs[job_id] = job
+        self.publish(job)
+        return job
+
+    def remove(self, job_id: str):
+        """移除任务（运行中的任务会被取消）"""
+        job = self._jobs.pop(job_id, None)
+        if job is None:
+            return
+        if job.task is not None and not job.task.done():
+            job.task.cancel()
+        self.discard_spill(job)
+        if self.state_backend is not None:
+            self._write_backend(self._delete_job_state, job.kind, job_id)
+
+    def _delete_job_state(self, kind: str, job_id: str):
+        try:
+            self.state_backend.delete(f"state:{kind}", job_id)
+            self.state_backend.delete(f"results:{kind}", job_id)
+        except Exception as e:
+            logger.error(f"删除共享任务状态失败 {job_id}: {e}")
+
+    # ------------------------------------------------------------------
+    # 排队与运行
+    # ------------------------------------------------------------------
+
+    def submit(self, job_id: str, runner: Callable[[], Awaitable[Any]], priority: Optional[int] = None):
+        """提交任务运行
+
+        Args:
+            job_id: 已登记的任务ID
+            runner: 无参协程函数
+            priority: 优先级，数值越大越先运行，None表示使用登记时的优先级
+        """
+        job = self._jobs[job_id]
+        if priority is not None:
+            job.priority = priority
+        job.runner = runner
+        # 任务可能在其他任务结束时才启动，保留提交时的上下文（如发起请求的客户端）
+        job.context = contextvars.copy_context()
+        job.finished_at = None
+        heapq.heappush(self._queue, (-job.priority, next(self._sequence), job_id))
+        self._dispatch()
+
+    def _dispatch(self):
+        """在运行数上限内启动排队中优先级最高的任务"""
+        while self._queue and self._running < self.max_running:
+            _, _, job_id = heapq.heappop(self._queue)
+            job = self._jobs.get(job_id)
+            if job is None or job.runner is None or job.task is not None and not job.task.done():
+                continue
+            if job.state.get("status") in FINISHED_STATUSES:
+                # 排队期间已被取消
+                job.finished_at = time.time()
+                job.runner = None
+                continue
+            runner, job.runner = job.runner, None
+            context, job.context = job.context, None
+            self._running += 1
+            job.task = asyncio.create_task(runner(), context=context)
+            job.task.add_done_callback(lambda task, job=job: self._on_done(job, task))
+
+    def _on_done(self, job: Job, task: asyncio.Task):
+        self._running -= 1
+        job.finished_at = time.time()
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"后台任务 {job.job_id} 异常结束: {task.exception()}")
+        if self.state_backend is not None and self._jobs.get(job.job_id) is job:
+            self.publish(job)
+            if job.results is not None:
+                self._write_backend(self._set_results, job.kind, job.job_id, job.results)
+        if self.spill_dir and job.results is not None and len(job.results) > self.spill_threshold:
+            self._track(asyncio.create_task(self._spill(job)))
+        self._dispatch()
+
+    async def cancel(self, job_id: str, timeout: float = 5.0) -> bool:
+        """取消任务
+
+        排队中的任务移出队列；运行中的任务取消其协程（取消沿await链传递到
+        每个进行中的探测），并等待任务完成清理。
+
+        Args:
+            job_id: 任务ID
+            timeout: 等待运行中任务结束的最长时间（秒）
+
+        Returns:
+            任务是否已结束
+        """
+        job = self._jobs.get(job_id)
+        if job is None:
+            return await self._cancel_remote(job_id, timeout)
+        self._unqueue(job)
+        task = job.task
+        if task is None or task.done():
+            job.finished_at = job.finished_at or time.time()
+            return True
+        task.cancel()
+        done, _ = await asyncio.wait({task}, timeout=timeout)
+        return bool(done)
+
+    def _unqueue(self, job: Job):
+        """把排队中的任务移出队列"""
+        if job.runner is None:
+            return
+        job.runner = None
+        job.context = None
+        self._queue = [entry for entry in self._queue if entry[2] != job.job_id]
+        heapq.heapify(self._queue)
+
+    async def _cancel_remote(self, job_id: str, timeout: float) -> bool:
+        """请求其他工作进程取消任务，等待其同步结束状态"""
+        if self.state_backend is None or await asyncio.to_thread(self._remote_state, job_id) is None:
+            return False
+        await asyncio.to_thread(
+            self.state_backend.set, "cancel", job_id, self.worker_id, max(timeout, self.sync_interval) * 10
+        )
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            await asyncio.sleep(min(0.1, self.sync_interval))
+            state = await asyncio.to_thread(self._remote_state, job_id)
+            if state is None or state.get("status") in FINISHED_STATUSES:
+                return True
+        return False
+
+    def queue_position(self, job_id: str) -> Optional[int]:
+        """排队中的任务在队列中的位置（从0开始），未排队返回None"""
+        for position, (_, _, queued_id) in enumerate(sorted(self._queue)):
+            if queued_id == job_id:
+                return position
+        return None
+
+    # ------------------------------------------------------------------
+    # 淘汰与落盘
+    # ------------------------------------------------------------------
+
+    def evict_expired(self, now: Optional[float] = None) -> int:
+        """淘汰超过保留时间的已结束任务
+
+        Returns:
+            淘汰的任务数
+        """
+        if self.job_ttl <= 0:
+            return 0
+        cutoff = (now or time.time()) - self.job_ttl
+        expired = [job.job_id for job in self._jobs.values()
+                   if job.finished and job.finished_time() < cutoff]
+        for job_id in expired:
+            self.remove(job_id)
+        self.evicted += len(expired)
+        return len(expired)
+
+    def _evict_oldest_finished(self) -> bool:
+        finished = [job for job in self._jobs.values() if job.finished]
+        if not finished:
+            return False
+        oldest = min(finished, key=Job.finished_time)
+        self.remove(oldest.job_id)
+        self.evicted += 1
+        return True
+
+    async def _spill(self, job: Job):
+        """把已结束任务的结果写入磁盘并释放内存"""
+        results = job.results
+        if results is None or self._jobs.get(job.job_id) is not job:
+            return
+        path = os.path.join(self.spill_dir, f"{job.job_id}.ndjson")
+
+        def write() -> array:
+            # 记录每行的起始偏移，读取时按下标定位
+            offsets = array("q")
+            position = 0
+            with open(path, "wb") as f:
+                for result in results:
+                    line = json.dumps(result, ensure_ascii=False, default=str).encode("utf-8") + b"\n"
+                    offsets.append(position)
+                    f.write(line)
+                    position += len(line)
+            return offsets
+
+        try:
+            offsets = await asyncio.to_thread(write)
+        except Exception as e:
+            logger.error(f"任务结果落盘失败 {job.job_id}: {e}")
+            return
+        # 落盘期间结果被替换时保留内存中的新结果
+        if job.results is results:
+            job.spill_path = path
+            job.spill_offsets = offsets
+            job.results = None
+            self.spilled += 1
+        else:
+            os.remove(path)
+
+    def load_results(self, job: Job) -> Sequence[Any]:
+        """获取任务结果（已落盘的返回按需读取文件的只读序列，不重新驻留内存）"""
+        if job.results is not None:
+            return job.results
+        return SpilledResults(job.spill_path, job.spill_offsets)
+
+    def discard_spill(self, job: Job):
+        if job.spill_path is not None:
+            try:
+                os.remove(job.spill_path)
+            except OSError:
+                pass
+            job.spill_path = None
+            job.spill_offsets = None
+
+    # ------------------------------------------------------------------
+    # 共享状态
+    # ------------------------------------------------------------------
+
+    def set_state_backend(self, backend: Optional[StateBackend], sync_interval: float = 1.0):
+        """设置共享状态存储
+
+        Args:
+            backend: 状态存储，None表示只在本进程内保存
+            sync_interval: 运行中任务状态的同步间隔（秒）
+        """
+        self.state_backend = backend
+        self.sync_interval = max(0.1, float(sync_interval))
+        for job in list(self._jobs.values()):
+            self.publish(job)
+
+    def publish(self, job: Job):
+        """把任务状态（当前快照）写入共享状态存储"""
+        if self.state_backend is None:
+            return
+        self._write_backend(self._set_states, [(job.kind, job.job_id, dict(job.state, worker_id=self.worker_id))])
+
+    def _write_backend(self, func: Callable[..., None], *args):
+        """在线程中执行一次共享状态存储写入
+
+        写入串成一条链，每次等待前一次完成，同一任务的状态不会被较早的快照覆盖；
+        没有运行中的事件循环时（如启动前）直接写入。
+        """
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            func(*args)
+            return
+        previous = self._backend_writes
+
+        async def write():
+            if previous is not None:
+                await previous
+            await asyncio.to_thread(func, *args)
+
+        self._backend_writes = self._track(asyncio.create_task(write()))
+
+    def _track(self, task: asyncio.Task) -> asyncio.Task:
+        """保留后台任务的引用直到其完成"""
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+        return task
+
+    async def flush_backend(self):
+        """等待已提交的共享状态存储写入完成"""
+        while self._backend_writes is not None:
+            pending = self._backend_writes
+            await pending
+            if self._backend_writes is pending:
+                self._backend_writes = None
+
+    def _set_states(self, states: List[tuple]):
+        for kind, job_id, state in states:
+            try:
+                self.state_backend.set(f"state:{kind}", job_id, state, ttl=self.job_ttl or None)
+            except Exception as e:
+                logger.error(f"同步任务状态失败 {job_id}: {e}")
+
+    def _set_results(self, kind: str, job_id: str, results: List[Any]):
+        """把已结束任务的结果写入共享状态存储（在线程中序列化）"""
+        try:
+            self.state_backend.set(f"results:{kind}", job_id, results, self.job_ttl or None)
+        except Exception as e:
+            logger.error(f"同步任务结果失败 {job_id}: {e}")
+
+    def remote(self, kind: str, field: str, job_id: str) -> Optional[Any]:
+        """从共享状态存储读取其他工作进程的任务状态或结果"""
+        if self.state_backend is None or job_id in self._jobs:
+            return None
+        try:
+            return self.state_backend.get(f"{field}:{kind}", job_id)
+        except Exception as e:
+            logger.error(f"读取共享任务状态失败 {job_id}: {e}")
+            return None
+
+    def remote_exists(self, kind: str, field: str, job_id: str) -> bool:
+        """共享状态存储中是否有其他工作进程的该任务状态或结果（不读取值）"""
+        if self.state_backend is None or job_id in self._jobs:
+            return False
+        try:
+            return self.state_backend.exists(f"{field}:{kind}", job_id)
+        except Exception as e:
+            logger.error(f"读取共享任务状态失败 {job_id}: {e}")
+            return False
+
+    def remote_ids(self, kind: str, field: str) -> List[str]:
+        """共享状态存储中其他工作进程的任务ID"""
+        if self.state_backend is None:
+            return []
+        try:
+            keys = self.state_backend.keys(f"{field}:{kind}")
+        except Exception as e:
+            logger.error(f"读取共享任务列表失败: {e}")
+            return []
+        return [job_id for job_id in keys if job_id not in self._jobs]
+
+    def _remote_state(self, job_id: str) -> Optional[Dict[str, Any]]:
+        for kind in self._kinds:
+            state = self.remote(kind, "state", job_id)
+            if state is not None:
+                return state
+        return None
+
+    async def sync(self) -> int:
+        """同步运行中任务的状态，并执行其他工作进程发来的取消请求
+
+        排队中的任务收到取消请求时移出队列、标记为已取消并同步状态，
+        运行中的任务取消其协程（结束状态在任务完成时同步）。
+        读取取消请求和写入状态都在线程中进行。
+
+        Returns:
+            被取消的任务数
+        """
+        if self.state_backend is None:
+            return 0
+        active = [
+            job for job in self._jobs.values()
+            if job.runner is not None or job.task is not None and not job.task.done()
+        ]
+        if not active:
+            return 0
+        requested = await asyncio.to_thread(self._take_cancel_requests, [job.job_id for job in active])
+
+        cancelled = 0
+        states = []
+        for job in active:
+            if job.job_id in requested:
+                cancelled += 1
+                self._unqueue(job)
+                if job.task is not None and not job.task.done():
+                    job.task.cancel()
+                elif job.state.get("status") not in FINISHED_STATUSES:
+                    job.state["status"] = "cancelled"
+                    job.finished_at = time.time()
+                    self.publish(job)
+            elif job.task is not None and not job.task.done():
+                states.append((job.kind, job.job_id, dict(job.state, worker_id=self.worker_id)))
+        if states:
+            self._write_backend(self._set_states, states)
+        return cancelled
+
+    def _take_cancel_requests(self, job_ids: List[str]) -> set:
+        """读取并删除发给这些任务的取消请求"""
+        requested = set()
+        for job_id in job_ids:
+            try:
+                if self.state_backend.get("cancel", job_id) is not None:
+                    self.state_backend.delete("cancel", job_id)
+                    requested.add(job_id)
+            except Exception as e:
+                logger.error(f"读取取消请求失败 {job_id}: {e}")
+        return requested
+
+    async def _sync_loop(self):
+        while True:
+            await asyncio.sleep(self.sync_interval)
+            try:
+                await self.sync()
+            except Exception as e:
+                logger.error(f"同步任务状态失败: {e}")
+
+    async def _cleanup_loop(self):
+        while True:
+            await asyncio.sleep(self.cleanup_interval)
+            evicted = self.evict_expired()
+            if evicted:
+                logger.info(f"已淘汰 {evicted} 个过期任务")
+            if self.state_backend is not None:
+                try:
+                    await asyncio.to_thread(self.state_backend.purge_expired)
+                except Exception as e:
+                    logger.error(f"清理共享任务状态失败: {e}")
+
+    def start(self):
+        """启动定期清理和状态同步（重复调用无副作用）"""
+        if self._cleanup_task is None or self._cleanup_task.done():
+            self._cleanup_task = asyncio.create_task(self._cleanup_loop())
+        if self.state_backend is not None and (self._sync_task is None or self._sync_task.done()):
+            self._sync_task = asyncio.create_task(self._sync_loop())
+
+    async def stop(self):
+        """停止清理、同步循环并取消运行中的任务"""
+        tasks = [job.task for job in self._jobs.values() if job.task is not None and not job.task.done()]
+        for loop_task in (self._cleanup_task, self._sync_task):
+            if loop_task is not None:
+                tasks.append(loop_task)
+        self._cleanup_task = self._sync_task = None
+        self._queue.clear()
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        await self.flush_backend()
+
+    # ------------------------------------------------------------------
+    # 统计
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _estimate_size(value: Any) -> int:
+        """估算对象占用的内存（列表按首个元素的大小外推）"""
+        size = sys.getsizeof(value)
+        if isinstance(value, dict):
+            size += sum(sys.getsizeof(v) for v in value.values())
+        elif isinstance(value, list) and value:
+            size += len(value) * JobManager._estimate_size(value[0])
+        return size
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """获取任务管理统计信息"""
+        by_status: Dict[str, int] = {}
+        by_kind: Dict[str, int] = {}
+        result_items = 0
+        memory = 0
+        for job in self._jobs.values():
+            job_status = job.state.get("status", "unknown")
+            by_status[job_status] = by_status.get(job_status, 0) + 1
+            by_kind[job.kind] = by_kind.get(job.kind, 0) + 1
+            memory += self._estimate_size(job.state)
+            if job.results is not None:
+                result_items += len(job.results)
+                memory += self._estimate_size(job.results)
+
+        return {
+            "jobs": len(self._jobs),
+            "max_jobs": self.max_jobs,
+            "queued": len(self._queue),
+            "running": self._running,
+            "max_running": self.max_running,
+            "by_status": by_status,
+            "by_kind": by_kind,
+            "result_items_in_memory": result_items,
+            "memory_bytes_estimate": memory,
+            "spilled_jobs": sum(1 for job in self._jobs.values() if job.spill_path is not None),
+            "evicted": self.evicted,
+            "rejected": self.rejected,
+            "spilled": self.spilled,
+            "job_ttl": self.job_ttl,
+            "worker_id": self.worker_id,
+            "state_backend": type(self.state_backend).__name__ if self.state_backend is not None else None
+        }
+
+
+# 全局任务管理器（由应用启动时按配置设置上限与保留时间）
+job_manager = JobManager()
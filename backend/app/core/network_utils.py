@@ -8,6 +8,8 @@ Description:                网络工具函数库，提供通用的网络工具
 
 Changed history:            
                             2025/05/23: 初始创建，TDD实现;
+                            2026/10/19: 端口范围解析改用PortSet;
+                            2026/10/19: IP范围和子网展开改用TargetSpec;
 ----
 """
 
@@ -22,6 +24,9 @@ from typing import List, Dict, Optional, Union, Tuple, Any
 import asyncio
 import logging
 
+from .port_set import PortSet
+from .target_spec import TargetSpec
+
 # 配置日志
 logger = logging.getLogger(__name__)
 
@@ -167,37 +172,10 @@ class NetworkUtils:
             port_range: 端口范围字符串，如 "80", "80-85", "80,443,8080"
             
         Returns:
-            端口号列表
+            端口号列表（已去重排序），需要集合运算或延迟展开时直接使用PortSet
         """
-        ports = []
-        
-        try:
-            # 分割逗号分隔的部分
-            parts = port_range.split(',')
-            
-            for part in parts:
-                part = part.strip()
-                
-                if '-' in part:
-                    # 处理范围，如 "80-85"
-                    start, end = part.split('-', 1)
-                    start_port = int(start.strip())
-                    end_port = int(end.strip())
-                    
-                    if (NetworkUtils.validate_port(start_port) and 
-                        NetworkUtils.validate_port(end_port) and 
-                        start_port <= end_port):
-                        ports.extend(range(start_port, end_port + 1))
-                else:
-                    # 处理单个端口
-                    port = int(part)
-                    if NetworkUtils.validate_port(port):
-                        ports.append(port)
-        
-        except ValueError:
-            logger.error(f"无效的端口范围格式: {port_range}")
-        
-        return sorted(list(set(ports)))  # 去重并排序
+        # 忽略无效部分
+        return PortSet.parse(port_range, strict=False).to_list()
     
     @staticmethod
     def calculate_subnet_range(network: str) -> List[str]:
@@ -207,11 +185,12 @@ class NetworkUtils:
             network: 网络地址，如 "192.168.1.0/24"
             
         Returns:
-            IP地址列表
+            IP地址列表，大网段应直接迭代TargetSpec以避免生成完整列表
         """
         try:
-            net = ipaddress.ip_network(network, strict=False)
-            return [str(ip) for ip in net.hosts()]
+            if "/" not in network:
+                network = str(ipaddress.ip_network(network, strict=False))
+            return list(TargetSpec.parse(network))
         except ValueError as e:
             logger.error(f"无效的网络地址 {network}: {e}")
             return []
@@ -485,22 +464,10 @@ class NetworkUtils:
             end_ip: 结束IP地址
             
         Returns:
-            IP地址列表
+            IP地址列表，大范围应直接迭代TargetSpec以避免生成完整列表
         """
         try:
-            start = ipaddress.ip_address(start_ip)
-            end = ipaddress.ip_address(end_ip)
-            
-            if start > end:
-                start, end = end, start
-            
-            ip_list = []
-            current = start
-            while current <= end:
-                ip_list.append(str(current))
-                current += 1
-            
-            return ip_list
+            return list(TargetSpec.from_range(start_ip, end_ip))
         
         except ValueError as e:
             logger.error(f"生成IP范围失败: {e}")
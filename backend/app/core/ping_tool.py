@@ -8,6 +8,8 @@ Description:                PING监控引擎，支持ICMP协议、连续监控
 
 Changed history:            
                             2025/05/23: 初始创建，TDD实现;
+                            2026/10/19: 任务取消时结束仍在运行的系统ping进程;
+                            2026/10/19: 系统ping进程与ICMP套接字向进程级资源预算借用额度;
 ----
 """
 
@@ -24,6 +26,8 @@ from enum import Enum
 import ipaddress
 import platform
 
+from .resource_governor import SOCKETS, SUBPROCESSES, ResourceGovernor, resource_governor
+
 # 尝试导入ping3库作为降级方案
 try:
     import ping3
@@ -227,7 +231,8 @@ class PingEngine:
                  interval: float = 1.0,
                  use_raw_socket: bool = False,
                  use_ping3_fallback: bool = True,
-                 include_geolocation: bool = False):
+                 include_geolocation: bool = False,
+                 governor: Optional[ResourceGovernor] = None):
         """初始化PING引擎
         
         Args:
@@ -237,6 +242,7 @@ class PingEngine:
             use_raw_socket: 是否使用原生socket
             use_ping3_fallback: 是否使用ping3降级
             include_geolocation: 是否包含地理位置信息
+            governor: 借用子进程/套接字额度的资源预算，None表示使用进程全局预算
         """
         self.packet_size = packet_size
         self.timeout = timeout
@@ -244,6 +250,7 @@ class PingEngine:
         self.use_raw_socket = use_raw_socket
         self.use_ping3_fallback = use_ping3_fallback and PING3_AVAILABLE
         self.include_geolocation = include_geolocation
+        self.governor = governor or resource_governor
         
         # 统计信息
         self.statistics = PingStatistics()
@@ -403,7 +410,8 @@ class PingEngine:
         
         # 首先尝试系统ping命令（能提供TTL）
         try:
-            result = await self._ping_system_command(host, ip_address, sequence)
+            async with self.governor.lease(SUBPROCESSES, self):
+                result = await self._ping_system_command(host, ip_address, sequence)
             result.method = PingMethod.SYSTEM_PING.value
         except Exception as e:
             logger.debug(f"系统PING命令失败: {e}")
@@ -412,7 +420,8 @@ class PingEngine:
         # 降级到ping3
         if result is None and self.use_ping3_fallback:
             try:
-                result = await self._ping_with_ping3(host, ip_address, sequence)
+                async with self.governor.lease(SOCKETS, self):
+                    result = await self._ping_with_ping3(host, ip_address, sequence)
                 result.method = PingMethod.PING3.value
             except Exception as e:
                 logger.debug(f"ping3 PING失败: {e}")
@@ -421,7 +430,8 @@ class PingEngine:
         # 最后尝试原生socket
         if result is None and self.use_raw_socket:
             try:
-                result = await self._ping_raw_socket(host, ip_address, sequence)
+                async with self.governor.lease(SOCKETS, self):
+                    result = await self._ping_raw_socket(host, ip_address, sequence)
                 result.method = PingMethod.RAW_SOCKET.value
             except PermissionError:
                 logger.debug("原生socket PING需要管理员权限")
@@ -570,7 +580,13 @@ class PingEngine:
                 stderr=asyncio.subprocess.PIPE
             )
             
-            stdout, stderr = await process.communicate()
+            try:
+                stdout, stderr = await process.communicate()
+            except asyncio.CancelledError:
+                # 任务被取消时不留下孤立的ping进程
+                if process.returncode is None:
+                    process.kill()
+                raise
             receive_time = time.time()
             
             if process.returncode == 0:
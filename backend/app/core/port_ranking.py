@@ -0,0 +1,108 @@
+"""
+---------------------------------------------------------------
+File name:                  port_ranking.py
+Author:                     Ignorant-lu
+Date created:               2026/10/19
+Description:                端口开放频率排名表，支持top-N端口选择和按开放概率排序
+----------------------------------------------------------------
+
+Changed history:
+                            2026/10/19: 初始创建;
+                            2026/10/19: top-N超出排名表时截断为排名表，不再用未排名端口补齐;
+----
+"""
+
+from typing import Dict, Iterable, List, Tuple
+
+
+# TCP端口按互联网上观测到的开放频率降序排列（参考nmap-services统计）
+TOP_TCP_PORTS: Tuple[int, ...] = (
+    80, 23, 443, 21, 22, 25, 3389, 110, 445, 139,
+    143, 53, 135, 3306, 8080, 1723, 111, 995, 993, 5900,
+    1025, 587, 8888, 199, 1720, 465, 548, 113, 81, 6001,
+    10000, 514, 5060, 179, 1026, 2000, 8443, 8000, 32768, 554,
+    26, 1433, 49152, 2001, 515, 8008, 49154, 1027, 5666, 646,
+    5000, 5631, 631, 49153, 8081, 2049, 88, 79, 5800, 106,
+    2121, 1110, 49155, 6000, 513, 990, 5357, 427, 49156, 543,
+    544, 5101, 144, 7, 389, 8009, 3128, 444, 9999, 5009,
+    7070, 5190, 3000, 5432, 1900, 3986, 13, 1029, 9, 5051,
+    6646, 49157, 1028, 873, 1755, 2717, 4899, 9100, 119, 37,
+    # 以下为常见服务端口的补充，频率低于前100
+    6379, 27017, 9200, 11211, 5672, 15672, 9092, 2181, 8161, 61616,
+    5984, 9000, 9090, 8086, 3268, 636, 1521, 1830, 5433, 6443,
+    2375, 2376, 10250, 4443, 8880, 8181, 7001, 7002, 9443, 5985,
+    5986, 47001, 1883, 8883, 5222, 5269, 6667, 502, 102, 20000,
+)
+
+# UDP端口开放频率排名
+TOP_UDP_PORTS: Tuple[int, ...] = (
+    631, 161, 137, 123, 138, 1434, 445, 135, 67, 53,
+    139, 500, 68, 520, 1900, 4500, 514, 49152, 162, 69,
+    5353, 111, 49154, 1701, 998, 996, 997, 999, 3283, 49153,
+    1812, 136, 2222, 2049, 32768, 626, 1433, 177, 1645, 1813,
+)
+
+MAX_PORT = 65535
+
+# 排名查找表，模块加载时构建一次
+_RANK_TABLES: Dict[str, Dict[int, int]] = {
+    "tcp": {port: rank for rank, port in enumerate(TOP_TCP_PORTS)},
+    "udp": {port: rank for rank, port in enumerate(TOP_UDP_PORTS)},
+}
+
+
+def _rank_table(protocol: str) -> Dict[int, int]:
+    """获取协议对应的排名表（syn与tcp共用）"""
+    return _RANK_TABLES["udp" if protocol.lower() == "udp" else "tcp"]
+
+
+def get_port_rank(port: int, protocol: str = "tcp") -> int:
+    """获取端口的频率排名
+
+    Args:
+        port: 端口号
+        protocol: 协议类型
+
+    Returns:
+        排名（0最常见），不在排名表中的端口排在所有已知端口之后按端口号排序
+    """
+    table = _rank_table(protocol)
+    rank = table.get(port)
+    if rank is not None:
+        return rank
+    return len(table) + port
+
+
+def get_top_ports(count: int, protocol: str = "tcp") -> List[int]:
+    """获取开放频率最高的前N个端口
+
+    只返回排名表中的端口：N超过排名表长度（TCP 150个、UDP 40个）时返回整个
+    排名表，不用未排名的端口补齐，补齐的端口没有频率依据。
+
+    Args:
+        count: 端口数量（1-65535）
+        protocol: 协议类型
+
+    Returns:
+        按频率降序排列的端口列表，长度为min(N, 排名表长度)
+    """
+    if not (1 <= count <= MAX_PORT):
+        raise ValueError(f"top端口数量必须在1-{MAX_PORT}之间")
+
+    ranked = TOP_UDP_PORTS if protocol.lower() == "udp" else TOP_TCP_PORTS
+    return list(ranked[:count])
+
+
+def order_ports(ports: Iterable[int], protocol: str = "tcp") -> List[int]:
+    """按开放概率对端口排序，最可能开放的端口优先
+
+    Args:
+        ports: 端口集合
+        protocol: 协议类型
+
+    Returns:
+        排序后的端口列表
+    """
+    table = _rank_table(protocol)
+    offset = len(table)
+    return sorted(ports, key=lambda port: table.get(port, offset + port))
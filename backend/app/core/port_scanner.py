@@ -8,6 +8,23 @@ Description:                异步端口扫描引擎，支持TCP/UDP扫描、并
 
 Changed history:            
                             2025/05/23: 初始创建，TDD实现;
+                            2026/10/19: 添加全局/任务/目标三级令牌桶限速;
+                            2026/10/19: 支持按开放频率排序端口;
+                            2026/10/19: 添加扫描截止时间与覆盖率信息;
+                            2026/10/19: 接入扫描结果缓存;
+                            2026/10/19: banner抓取拆分为独立并发池的第二阶段;
+                            2026/10/19: 服务识别接入预编译签名库与主动探测;
+                            2026/10/19: 探测结果增量写入资产清单索引;
+                            2026/10/19: 扫描任务取消时终止进行中的探测与banner抓取，归还限速令牌;
+                            2026/10/19: 探测与banner连接向进程级资源预算借用套接字额度;
+                            2026/10/19: 连接探测支持源地址池与关闭时发送RST;
+                            2026/10/19: 套接字额度按客户端加权公平排队，交互式探测优先;
+                            2026/10/19: 记录各目标的探测耗时，供扫描耗时估计参考;
+                            2026/10/19: 缓存键包含探测超时与服务检测开关;
+                            2026/10/19: 按端口号顺序扫描时直接迭代PortSet，覆盖率按区间登记，不展开端口列表;
+                            2026/10/19: 开放端口的连接交给banner阶段时一并交接套接字额度;
+                            2026/10/19: 限时批量扫描按位置顺序逐个产生探测，由固定数量的工作协程执行;
+                            2026/10/19: 占用并发槽位和套接字额度后才领取限速令牌，截止时间到达时归还令牌;
 ----
 """
 
@@ -15,15 +32,29 @@ import asyncio
 import socket
 import time
 import logging
-from typing import Dict, List, Optional, Callable, Any, Union
+from typing import Dict, List, Optional, Callable, Any, Union, Iterable, Iterator, Set, Tuple
 from dataclasses import dataclass, field
 from enum import Enum
 import json
 
+from .rate_limiter import ScanRateLimiter, global_rate_limiter
+from .port_ranking import order_ports
+from .port_set import PortSet
+from .scan_cache import ScanResultCache
+from .banner_grabber import BannerGrabber
+from .service_fingerprint import Fingerprint, service_fingerprinter
+from .inventory_index import InventoryIndex
+from .resource_governor import SOCKETS, ResourceGovernor, resource_governor
+from .source_pool import SourceAddressPool, set_reset_on_close
+from .scan_estimator import ProbeTimingModel, probe_timing_model
+
 
 # 配置日志
 logger = logging.getLogger(__name__)
 
+# 探测结果中的内部标记：连接及其套接字额度已交给banner阶段，探测结束时不归还
+LEASE_HANDED_OFF = "_lease_handed_off"
+
 
 class ScanStatus(Enum):
     """扫描状态枚举"""
@@ -40,6 +71,17 @@ class ScanProtocol(Enum):
     UDP = "udp"
 
 
+class PortOrder(Enum):
+    """端口探测顺序枚举"""
+    NUMERIC = "numeric"
+    FREQUENCY = "frequency"
+
+
+class ScanDeadlineExceeded(Exception):
+    """扫描截止时间已到，探测未执行"""
+    pass
+
+
 @dataclass
 class ScanResult:
     """扫描结果数据类"""
@@ -98,6 +140,7 @@ class ScanStatistics:
             sum(self.response_times) / len(self.response_times)
             if self.response_times else 0.0
         )
+        scan_duration = time.time() - self.start_time
         
         return {
             "total_scans": self.total_scans,
@@ -106,7 +149,67 @@ class ScanStatistics:
             "filtered_ports": self.filtered_ports,
             "error_count": self.error_count,
             "average_response_time": avg_response_time,
-            "scan_duration": time.time() - self.start_time
+            "scan_duration": scan_duration,
+            "effective_pps": self.total_scans / scan_duration if scan_duration > 0 else 0.0
+        }
+
+
+class ScanCoverage:
+    """扫描覆盖率跟踪类
+    
+    记录请求扫描的端口与实际完成探测的端口，截止时间到达后据此给出
+    未探测（unprobed）和结果不确定（inconclusive）的端口列表。
+    """
+    
+    # 结论不确定的状态：超时被截止时间缩短时无法区分过滤和无响应
+    INCONCLUSIVE_STATUSES = {ScanStatus.TIMEOUT.value, ScanStatus.FILTERED.value}
+    
+    def __init__(self):
+        self.requested: Dict[str, PortSet] = {}
+        self.probed: Dict[str, Set[int]] = {}
+        self.inconclusive: Dict[str, Set[int]] = {}
+    
+    def add_requested(self, host: str, ports: Iterable[int]):
+        """登记计划扫描的端口（按区间合并保存）"""
+        requested = self.requested.get(host)
+        ports = PortSet.coerce(ports)
+        self.requested[host] = ports if requested is None else requested | ports
+    
+    def is_inconclusive(self, host: str, port: int) -> bool:
+        """端口探测结果是否不确定"""
+        return port in self.inconclusive.get(host, ())
+    
+    def mark_probed(self, host: str, port: int, conclusive: bool = True):
+        """登记已探测端口"""
+        self.probed.setdefault(host, set()).add(port)
+        if not conclusive:
+            self.inconclusive.setdefault(host, set()).add(port)
+    
+    def get_coverage(self) -> Dict[str, Any]:
+        """获取覆盖率信息字典"""
+        unprobed = {}
+        requested_total = 0
+        for host, ports in self.requested.items():
+            requested_total += len(ports)
+            probed = self.probed.get(host, set())
+            missing = [port for port in ports if port not in probed]
+            if missing:
+                unprobed[host] = missing
+        
+        inconclusive = {
+            host: sorted(ports) for host, ports in self.inconclusive.items() if ports
+        }
+        unprobed_count = sum(len(ports) for ports in unprobed.values())
+        inconclusive_count = sum(len(ports) for ports in inconclusive.values())
+        
+        return {
+            "requested_ports": requested_total,
+            "probed_ports": sum(len(ports) for ports in self.probed.values()),
+            "unprobed_count": unprobed_count,
+            "inconclusive_count": inconclusive_count,
+            "unprobed_ports": unprobed,
+            "inconclusive_ports": inconclusive,
+            "complete": unprobed_count == 0 and inconclusive_count == 0
         }
 
 
@@ -134,16 +237,21 @@ class ServiceDetector:
     
     @classmethod
     def detect_service(cls, port: int, banner: Optional[str] = None) -> Optional[str]:
-        """检测端口服务"""
-        # 基于端口号的基础检测
-        service = cls.COMMON_PORTS.get(port)
+        """检测端口服务（banner命中签名时优先于端口号映射）"""
+        fingerprint = service_fingerprinter.match(banner)
+        if fingerprint is not None:
+            return fingerprint.service
         
-        # TODO: 基于banner的高级检测
-        if banner and service:
-            # 这里可以添加更复杂的banner分析逻辑
-            pass
-        
-        return service
+        # 基于端口号的基础检测
+        return cls.COMMON_PORTS.get(port)
+    
+    @classmethod
+    def fingerprint(cls, host: str, port: int, banner: Optional[str]) -> Fingerprint:
+        """识别服务指纹（按主机、端口和banner缓存），无法识别时回退到端口号映射"""
+        fingerprint = service_fingerprinter.fingerprint(host, port, banner)
+        if fingerprint is not None:
+            return fingerprint
+        return Fingerprint(cls.COMMON_PORTS.get(port))
 
 
 class PortScannerEngine:
@@ -155,14 +263,39 @@ class PortScannerEngine:
     - 智能服务识别
     - 实时进度回调
     - 统计信息收集
+    - 截止时间内返回部分结果
     """
     
+    # 剩余时间低于该值时不再发起新的探测（秒）
+    MIN_PROBE_TIMEOUT = 0.05
+    
+    # 截止时间后等待进行中探测收尾的宽限时间（秒）
+    DEADLINE_GRACE = 0.25
+    
     def __init__(self, 
                  max_concurrent: int = 100,
                  timeout: float = 3.0,
                  retry_count: int = 1,
                  service_detection: bool = False,
-                 banner_grabbing: bool = False):
+                 banner_grabbing: bool = False,
+                 rate_limit: float = 0.0,
+                 target_rate_limit: float = 0.0,
+                 rate_limit_burst: float = 1.0,
+                 use_global_rate_limit: bool = True,
+                 deadline_seconds: Optional[float] = None,
+                 result_cache: Optional[ScanResultCache] = None,
+                 use_cache: bool = True,
+                 cache_max_age: Optional[float] = None,
+                 banner_concurrency: int = 20,
+                 banner_timeout: float = 2.0,
+                 active_probing: bool = False,
+                 inventory: Optional[InventoryIndex] = None,
+                 governor: Optional[ResourceGovernor] = None,
+                 source_pool: Optional[SourceAddressPool] = None,
+                 reset_on_close: bool = False,
+                 client: Optional[str] = None,
+                 interactive: bool = False,
+                 timing_model: Optional[ProbeTimingModel] = None):
         """初始化端口扫描引擎
         
         Args:
@@ -171,6 +304,24 @@ class PortScannerEngine:
             retry_count: 重试次数
             service_detection: 是否启用服务检测
             banner_grabbing: 是否启用banner抓取
+            rate_limit: 本引擎（任务）每秒最大探测数，0表示不限速
+            target_rate_limit: 单个目标每秒最大探测数，0表示不限速
+            rate_limit_burst: 任务/目标令牌桶允许的突发探测数
+            use_global_rate_limit: 是否受进程全局限速约束
+            deadline_seconds: 扫描时间预算（秒），到期后返回已有结果，None表示不限时
+            result_cache: 共享的扫描结果缓存，None表示不使用缓存
+            use_cache: 是否读取缓存（为False时强制探测并刷新缓存）
+            cache_max_age: 可接受的缓存结果最大年龄（秒）
+            banner_concurrency: banner抓取阶段的最大并发连接数（与max_concurrent相互独立）
+            banner_timeout: 等待banner的超时时间（秒）
+            active_probing: 服务端不主动发送banner时，是否按端口发送探测载荷
+            inventory: 共享的资产清单索引，None表示不更新索引
+            governor: 借用套接字额度的资源预算，None表示使用进程全局预算
+            source_pool: 连接探测使用的源地址池，None或未配置地址时由系统选择源地址
+            reset_on_close: 关闭探测连接时发送RST，本端不进入TIME_WAIT
+            client: 发起扫描的客户端标识，套接字额度在客户端之间按权重公平分配
+            interactive: 交互式扫描（如单端口检查），额度排队时优先于批量任务
+            timing_model: 记录探测耗时的模型，None表示使用进程共享的模型
         """
         self.max_concurrent = max_concurrent
         self.timeout = timeout
@@ -178,18 +329,65 @@ class PortScannerEngine:
         self.service_detection = service_detection
         self.banner_grabbing = banner_grabbing
         
-        # 并发控制
+        # 并发控制（任务内并发上限，所有任务合计再受进程级套接字预算约束）
         self.semaphore = asyncio.Semaphore(max_concurrent)
+        self.governor = governor or resource_governor
+        self.client = client
+        self.interactive = interactive
+        self.timing_model = timing_model or probe_timing_model
+        
+        # 源地址与连接关闭方式（大规模连接扫描时避免源端口耗尽）
+        self.source_pool = source_pool
+        self.reset_on_close = reset_on_close
+        
+        # 速率控制（与并发控制配合：先按速率排队，再占用并发槽位）
+        self.rate_limiter = ScanRateLimiter(
+            job_rate=rate_limit,
+            target_rate=target_rate_limit,
+            burst=rate_limit_burst,
+            global_bucket=global_rate_limiter if use_global_rate_limit else None
+        )
         
         # 统计信息
         self.statistics = ScanStatistics()
         
+        # 截止时间与覆盖率（截止时间在首次扫描时开始计时）
+        self.deadline_seconds = deadline_seconds if deadline_seconds and deadline_seconds > 0 else None
+        self._deadline_at: Optional[float] = None
+        self.deadline_reached = False
+        self.coverage = ScanCoverage()
+        self.cancelled = False
+        
+        # 结果缓存
+        self.result_cache = result_cache
+        self.use_cache = use_cache
+        self.cache_max_age = cache_max_age
+        self.cache_hits = 0
+        
+        # 资产清单索引
+        self.inventory = inventory
+        
+        # banner抓取阶段（开放端口的连接交给独立并发池，不占用扫描槽位）
+        self.banner_grabber = (
+            BannerGrabber(
+                max_concurrent=banner_concurrency,
+                timeout=banner_timeout,
+                fingerprinter=service_fingerprinter if active_probing else None,
+                governor=self.governor,
+                reset_on_close=reset_on_close,
+                client=client,
+                interactive=interactive
+            )
+            if banner_grabbing else None
+        )
+        
         # 进度回调
         self.progress_callback: Optional[Callable] = None
+        self.banner_callback: Optional[Callable[[Dict[str, Any]], None]] = None
         
         logger.info(
             f"端口扫描引擎初始化: 并发={max_concurrent}, "
-            f"超时={timeout}s, 重试={retry_count}"
+            f"超时={timeout}s, 重试={retry_count}, 限速={rate_limit}pps"
         )
     
     def set_progress_callback(self, callback: Callable[[int, int, str, int], None]):
@@ -200,6 +398,14 @@ class PortScannerEngine:
         """
         self.progress_callback = callback
     
+    def set_banner_callback(self, callback: Callable[[Dict[str, Any]], None]):
+        """设置banner回调函数，每个开放端口的banner抓取完成时调用
+        
+        Args:
+            callback: 回调函数，参数为已补充banner的扫描结果
+        """
+        self.banner_callback = callback
+    
     async def scan_port(self, 
                        host: str, 
                        port: int, 
@@ -218,19 +424,95 @@ class PortScannerEngine:
         if not self._validate_inputs(host, port, protocol):
             return self._create_error_result(host, port, protocol, "无效的输入参数")
         
-        async with self.semaphore:
+        if self.result_cache is None:
+            return await self._probe_port(host, port, protocol)
+        
+        key = self._cache_key(host, port, protocol)
+        result, cached = await self.result_cache.get_or_probe(
+            key,
+            lambda: self._probe_port(host, port, protocol),
+            max_age=self.cache_max_age,
+            use_cache=self.use_cache,
+            cacheable=lambda r: self._is_cacheable(host, port, r)
+        )
+        if cached:
+            self.cache_hits += 1
+            self.coverage.mark_probed(host, port)
+        return result
+    
+    def _cache_key(self, host: str, port: int, protocol: str) -> Tuple:
+        """缓存键
+
+        超时不同的探测结论不同（短超时下的filtered在长超时下可能是open），
+        banner抓取与服务检测会改变结果内容，三者都作为键的一部分。
+        """
+        return (host, port, protocol.lower(), self.timeout, self.banner_grabbing, self.service_detection)
+    
+    def _is_cacheable(self, host: str, port: int, result: Dict[str, Any]) -> bool:
+        """错误结果和截止时间下不确定的结果不写入缓存"""
+        return (
+            result.get("status") != ScanStatus.ERROR.value
+            and not self.coverage.is_inconclusive(host, port)
+        )
+    
+    async def _probe_port(self, host: str, port: int, protocol: str) -> Dict[str, Any]:
+        """实际探测单个端口（受截止时间、速率和并发限制）"""
+        self.start_deadline()
+        if self.deadline_expired():
+            self.deadline_reached = True
+            raise ScanDeadlineExceeded(f"{host}:{port}")
+        
+        await self.semaphore.acquire()
+        
+        leased = False
+        try:
+            # 借用进程级套接字额度（额度用尽时按客户端加权公平排队）
+            await self.governor.acquire(SOCKETS, self, self.client, self.interactive)
+            leased = True
+            
+            # 排队期间可能已到截止时间
+            if self._probe_timeout() is None:
+                self.deadline_reached = True
+                raise ScanDeadlineExceeded(f"{host}:{port}")
+            
+            # 速率限制：占用槽位后才预约发送时间，排队中的探测不提前占用共享令牌桶
+            # （等待期间被取消时限速器自行归还令牌）
+            await self.rate_limiter.acquire(host)
+            
+            # 等待令牌期间可能已到截止时间，探测未发出，归还令牌
+            probe_timeout = self._probe_timeout()
+            if probe_timeout is None:
+                self.rate_limiter.release(host)
+                self.deadline_reached = True
+                raise ScanDeadlineExceeded(f"{host}:{port}")
+            shortened = probe_timeout < self.timeout
             start_time = time.time()
             
             try:
                 if protocol.lower() == "tcp":
-                    result = await self._scan_tcp_port(host, port)
+                    result = await self._scan_tcp_port(host, port, probe_timeout)
+                    if result.pop(LEASE_HANDED_OFF, False):
+                        leased = False
                 elif protocol.lower() == "udp":
-                    result = await self._scan_udp_port(host, port)
+                    result = await self._scan_udp_port(host, port, probe_timeout)
                 elif protocol.lower() == "syn":
-                    result = await self._scan_syn_port(host, port)
+                    result = await self._scan_syn_port(host, port, probe_timeout)
                 else:
                     return self._create_error_result(host, port, protocol, "不支持的协议")
                 
+                # 超时被截止时间缩短时，未响应不代表端口被过滤
+                self.coverage.mark_probed(
+                    host, port,
+                    conclusive=not (shortened and result["status"] in ScanCoverage.INCONCLUSIVE_STATUSES)
+                )
+                
+                # 记录探测耗时（超时被截止时间缩短的探测不代表目标的正常表现）
+                if not shortened and result["status"] != ScanStatus.ERROR.value:
+                    self.timing_model.observe(
+                        host, time.time() - start_time,
+                        responded=result["status"] in (ScanStatus.OPEN.value, ScanStatus.CLOSED.value)
+                    )
+                
                 # 计算响应时间
                 if result["status"] == ScanStatus.OPEN.value:
                     result["response_time"] = (time.time() - start_time) * 1000  # 转换为毫秒
@@ -244,21 +526,73 @@ class PortScannerEngine:
                 # 更新统计信息
                 scan_result = ScanResult(**result)
                 self.statistics.add_result(scan_result)
+                self._index_result(result)
                 
                 return result
                 
+            except asyncio.CancelledError:
+                # 探测进行中被取消（如截止时间到达），结果不确定
+                self.coverage.mark_probed(host, port, conclusive=False)
+                raise
             except Exception as e:
                 logger.error(f"扫描端口 {host}:{port} 时发生错误: {e}")
+                self.coverage.mark_probed(host, port)
                 return self._create_error_result(host, port, protocol, str(e))
+        finally:
+            if leased:
+                self.governor.release(SOCKETS)
+            self.semaphore.release()
+    
+    def start_deadline(self):
+        """开始截止时间计时（已开始时不重复计时）"""
+        if self.deadline_seconds is not None and self._deadline_at is None:
+            self._deadline_at = time.monotonic() + self.deadline_seconds
     
-    async def _scan_tcp_port(self, host: str, port: int) -> Dict[str, Any]:
+    def remaining_time(self) -> Optional[float]:
+        """距截止时间的剩余秒数，未设置截止时间时返回None"""
+        if self._deadline_at is None:
+            return None
+        return max(0.0, self._deadline_at - time.monotonic())
+    
+    def deadline_expired(self) -> bool:
+        """截止时间是否已到（剩余时间不足以完成一次最短探测）"""
+        remaining = self.remaining_time()
+        return remaining is not None and remaining < self.MIN_PROBE_TIMEOUT
+    
+    def _probe_timeout(self) -> Optional[float]:
+        """计算本次探测的超时时间
+        
+        接近截止时间时超时随剩余时间缩短，剩余时间不足时返回None。
+        """
+        remaining = self.remaining_time()
+        if remaining is None:
+            return self.timeout
+        if remaining < self.MIN_PROBE_TIMEOUT:
+            return None
+        return min(self.timeout, remaining)
+    
+    def _connect(self, host: str, port: int):
+        """建立探测连接（配置了源地址池时由池选择源地址）"""
+        if self.source_pool is not None and self.source_pool.enabled:
+            return self.source_pool.open_connection(host, port)
+        return asyncio.open_connection(host, port)
+    
+    async def _close_probe(self, writer: asyncio.StreamWriter):
+        """关闭探测连接"""
+        if self.reset_on_close:
+            set_reset_on_close(writer)
+        writer.close()
+        await writer.wait_closed()
+    
+    async def _scan_tcp_port(self, host: str, port: int, timeout: Optional[float] = None) -> Dict[str, Any]:
         """扫描TCP端口"""
+        timeout = timeout or self.timeout
         for attempt in range(self.retry_count + 1):
             try:
-                # 尝试连接
+                # 尝试连接（重试时同样不超过截止时间）
                 reader, writer = await asyncio.wait_for(
-                    asyncio.open_connection(host, port),
-                    timeout=self.timeout
+                    self._connect(host, port),
+                    timeout=min(timeout, self._probe_timeout() or self.MIN_PROBE_TIMEOUT)
                 )
                 
                 # 成功连接，端口开放
@@ -270,24 +604,19 @@ class PortScannerEngine:
                     "banner": None
                 }
                 
-                # Banner抓取
-                if self.banner_grabbing:
-                    try:
-                        # 等待banner数据
-                        banner_data = await asyncio.wait_for(
-                            reader.read(1024), 
-                            timeout=2.0
-                        )
-                        if banner_data:
-                            result["banner"] = banner_data.decode('utf-8', errors='ignore').strip()
-                    except asyncio.TimeoutError:
-                        pass  # 没有banner数据
-                    except Exception as e:
-                        logger.debug(f"Banner抓取失败: {e}")
+                # Banner抓取：连接交给banner阶段，立即释放扫描并发槽位
+                if self.banner_grabber is not None:
+                    # 连接仍占用套接字额度，调用方借用的额度随连接一起交接
+                    self.banner_grabber.submit(
+                        host, port, reader, writer,
+                        on_complete=lambda banner, r=result: self._on_banner(r, banner),
+                        leased=True
+                    )
+                    result[LEASE_HANDED_OFF] = True
+                    return result
                 
                 # 关闭连接
-                writer.close()
-                await writer.wait_closed()
+                await self._close_probe(writer)
                 
                 return result
                 
@@ -326,7 +655,55 @@ class PortScannerEngine:
             "status": ScanStatus.ERROR.value
         }
     
-    async def _scan_udp_port(self, host: str, port: int) -> Dict[str, Any]:
+    def _on_banner(self, result: Dict[str, Any], banner: Optional[str]):
+        """banner抓取完成：补充结果、刷新缓存并推送"""
+        result["banner"] = banner
+        if self.service_detection:
+            fingerprint = ServiceDetector.fingerprint(result["host"], result["port"], banner)
+            result["service_name"] = fingerprint.service
+            if fingerprint.version:
+                result["service_version"] = fingerprint.version
+        
+        # 缓存中保存的是发现阶段的副本，补充banner后重新写入
+        if self.result_cache is not None and self._is_cacheable(result["host"], result["port"], result):
+            self.result_cache.put(self._cache_key(result["host"], result["port"], result["protocol"]), result)
+        
+        self._index_result(result)
+        
+        if self.banner_callback:
+            try:
+                self.banner_callback(result)
+            except Exception as e:
+                logger.error(f"banner回调执行失败: {e}")
+    
+    def _index_result(self, result: Dict[str, Any]):
+        """把探测结果写入资产清单索引（截止时间下不确定的结果不写入）"""
+        if self.inventory is None or self.coverage.is_inconclusive(result["host"], result["port"]):
+            return
+        service = result.get("service_name")
+        if service is None and result["status"] == ScanStatus.OPEN.value:
+            service = ServiceDetector.detect_service(result["port"], result.get("banner"))
+        self.inventory.update(
+            result["host"], result["port"], result["status"], result.get("protocol", "tcp"),
+            service, result.get("service_version")
+        )
+    
+    async def wait_for_banners(self, timeout: Optional[float] = None) -> bool:
+        """等待已提交的banner抓取完成
+        
+        Args:
+            timeout: 最长等待时间（秒），默认有截止时间时不超过剩余时间
+            
+        Returns:
+            是否全部完成（超时未完成的抓取被取消，对应结果banner为None）
+        """
+        if self.banner_grabber is None:
+            return True
+        if timeout is None:
+            timeout = self.remaining_time()
+        return await self.banner_grabber.drain(timeout)
+    
+    async def _scan_udp_port(self, host: str, port: int, timeout: Optional[float] = None) -> Dict[str, Any]:
         """扫描UDP端口（异步实现）"""
         try:
             # 使用asyncio在线程池中执行UDP扫描，避免阻塞事件循环
@@ -335,7 +712,8 @@ class PortScannerEngine:
                 None, 
                 self._sync_udp_scan, 
                 host, 
-                port
+                port,
+                timeout
             )
             return result
             
@@ -348,12 +726,12 @@ class PortScannerEngine:
                 "error_message": str(e)
             }
     
-    def _sync_udp_scan(self, host: str, port: int) -> Dict[str, Any]:
+    def _sync_udp_scan(self, host: str, port: int, timeout: Optional[float] = None) -> Dict[str, Any]:
         """同步UDP扫描（在线程池中执行）"""
         try:
             # 创建UDP socket
             sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-            sock.settimeout(self.timeout)
+            sock.settimeout(timeout or self.timeout)
             
             # 发送探测数据
             test_data = b"test"
@@ -385,25 +763,24 @@ class PortScannerEngine:
                 "error_message": str(e)
             }
     
-    async def _scan_syn_port(self, host: str, port: int) -> Dict[str, Any]:
+    async def _scan_syn_port(self, host: str, port: int, timeout: Optional[float] = None) -> Dict[str, Any]:
         """扫描SYN端口（简化为TCP连接探测）"""
         try:
             # SYN扫描需要原始socket权限，这里简化为快速TCP连接探测
             # 在实际生产环境中，可以集成nmap或其他专业工具
             
             # 使用更短的超时进行快速连接尝试
-            quick_timeout = min(self.timeout, 1.0)  # 最多1秒
+            quick_timeout = min(timeout or self.timeout, 1.0)  # 最多1秒
             
             try:
                 # 尝试快速连接
                 reader, writer = await asyncio.wait_for(
-                    asyncio.open_connection(host, port),
+                    self._connect(host, port),
                     timeout=quick_timeout
                 )
                 
                 # 立即关闭连接（模拟SYN扫描的行为）
-                writer.close()
-                await writer.wait_closed()
+                await self._close_probe(writer)
                 
                 return {
                     "host": host,
@@ -440,7 +817,8 @@ class PortScannerEngine:
                              host: str, 
                              start_port: int, 
                              end_port: int,
-                             protocol: str = "tcp") -> List[Dict[str, Any]]:
+                             protocol: str = "tcp",
+                             port_order: Optional[str] = None) -> List[Dict[str, Any]]:
         """扫描端口范围
         
         Args:
@@ -448,6 +826,7 @@ class PortScannerEngine:
             start_port: 起始端口
             end_port: 结束端口
             protocol: 扫描协议
+            port_order: 探测顺序 (numeric/frequency)，默认有截止时间时按频率
             
         Returns:
             扫描结果列表
@@ -455,10 +834,37 @@ class PortScannerEngine:
         if start_port > end_port:
             raise ValueError("起始端口不能大于结束端口")
         
-        ports = list(range(start_port, end_port + 1))
+        logger.info(f"开始扫描 {host} 的端口范围 {start_port}-{end_port}")
+        
+        return await self.scan_ports(
+            host, range(start_port, end_port + 1), protocol, port_order
+        )
+    
+    async def scan_ports(self,
+                         host: str,
+                         ports: Iterable[int],
+                         protocol: str = "tcp",
+                         port_order: Optional[str] = None) -> List[Dict[str, Any]]:
+        """扫描指定端口集合
+        
+        按frequency顺序时，最可能开放的端口最先探测，结果也按探测顺序返回，
+        使调用方（进度回调、WebSocket推送）能最早看到开放服务。
+        设置了截止时间时，到期后返回已完成的结果，覆盖情况见get_coverage()。
+        
+        Args:
+            host: 目标主机
+            ports: 端口集合
+            protocol: 扫描协议
+            port_order: 探测顺序 (numeric/frequency)，默认有截止时间时按频率
+            
+        Returns:
+            扫描结果列表
+        """
+        ports = self.order_scan_ports(ports, protocol, port_order)
         total_ports = len(ports)
         
-        logger.info(f"开始扫描 {host} 的端口范围 {start_port}-{end_port}")
+        self.start_deadline()
+        self.coverage.add_requested(host, ports)
         
         # 创建扫描任务
         tasks = []
@@ -467,19 +873,85 @@ class PortScannerEngine:
             tasks.append(task)
         
         # 并发执行扫描
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+        try:
+            results = await self._gather_until_deadline(tasks)
+            valid_results = self._filter_results(results)
+            await self.wait_for_banners()
+        except asyncio.CancelledError:
+            await self.abort()
+            raise
+        
+        logger.info(f"端口扫描完成，共扫描 {len(valid_results)} 个端口")
+        return valid_results
+    
+    async def _gather_until_deadline(self, coroutines: List) -> List[Any]:
+        """并发执行探测，设置了截止时间时到期取消剩余任务
+        
+        Returns:
+            与输入顺序一致的结果列表，未完成的任务对应异常对象
+        """
+        remaining = self.remaining_time()
+        if remaining is None or not coroutines:
+            return await asyncio.gather(*coroutines, return_exceptions=True)
         
-        # 过滤异常结果
+        tasks = [asyncio.ensure_future(coro) for coro in coroutines]
+        try:
+            _, pending = await asyncio.wait(tasks, timeout=remaining + self.DEADLINE_GRACE)
+        except asyncio.CancelledError:
+            # asyncio.wait不会取消等待的任务，外层被取消时需要逐个取消
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+        
+        if pending:
+            self.deadline_reached = True
+            logger.info(f"扫描截止时间已到，取消 {len(pending)} 个未完成的探测")
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+        
+        results = []
+        for task in tasks:
+            if task.cancelled():
+                results.append(asyncio.CancelledError())
+            elif task.exception() is not None:
+                results.append(task.exception())
+            else:
+                results.append(task.result())
+        return results
+    
+    @staticmethod
+    def _filter_results(results: List[Any]) -> List[Dict[str, Any]]:
+        """过滤异常结果，截止时间导致的跳过不视为错误"""
         valid_results = []
         for result in results:
             if isinstance(result, dict):
                 valid_results.append(result)
-            else:
+            elif not isinstance(result, (ScanDeadlineExceeded, asyncio.CancelledError)):
                 logger.error(f"扫描任务异常: {result}")
-        
-        logger.info(f"端口范围扫描完成，共扫描 {len(valid_results)} 个端口")
         return valid_results
     
+    def order_scan_ports(self,
+                         ports: Iterable[int],
+                         protocol: str = "tcp",
+                         port_order: Optional[str] = None) -> Union[List[int], PortSet]:
+        """按指定顺序排列待扫描端口
+        
+        未指定顺序时，有截止时间则按开放频率排序，使有限时间内优先探测价值最高的端口。
+        按端口号顺序时PortSet原样返回，迭代时才逐个产生端口。
+        """
+        if port_order is None:
+            port_order = (
+                PortOrder.FREQUENCY.value if self.deadline_seconds is not None
+                else PortOrder.NUMERIC.value
+            )
+        if port_order == PortOrder.FREQUENCY.value:
+            return order_ports(ports, protocol)
+        if port_order != PortOrder.NUMERIC.value:
+            raise ValueError(f"不支持的端口顺序: {port_order}")
+        return ports if isinstance(ports, PortSet) else list(ports)
+    
     async def batch_scan(self, targets: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
         """批量扫描多个目标
         
@@ -489,33 +961,119 @@ class PortScannerEngine:
         Returns:
             按主机分组的扫描结果字典
         """
-        results = {}
-        
-        for target in targets:
-            host = target["host"]
-            ports = target.get("ports", [])
-            protocol = target.get("protocol", "tcp")
+        try:
+            results = {}
+            self.start_deadline()
             
-            logger.info(f"开始扫描主机 {host}，端口数量: {len(ports)}")
+            plans: List[Tuple[str, str, List[int]]] = []
+            # 多个目标共用同一端口集合时只排序一次
+            ordered: Dict[Tuple[int, str, Optional[str]], Union[List[int], PortSet]] = {}
+            for target in targets:
+                host = target["host"]
+                protocol = target.get("protocol", "tcp")
+                requested = target.get("ports", [])
+                key = (id(requested), protocol, target.get("port_order"))
+                ports = ordered.get(key)
+                if ports is None:
+                    ports = ordered[key] = self.order_scan_ports(requested, protocol, target.get("port_order"))
+                self.coverage.add_requested(host, ports)
+                plans.append((host, protocol, ports))
             
-            # 为每个主机创建扫描任务
-            tasks = []
-            for port in ports:
-                task = self.scan_port(host, port, protocol)
-                tasks.append(task)
+            if self.deadline_seconds is not None:
+                results = await self._batch_scan_interleaved(plans)
+                await self.wait_for_banners()
+                return results
             
-            # 执行扫描
-            host_results = await asyncio.gather(*tasks, return_exceptions=True)
+            for host, protocol, ports in plans:
+                logger.info(f"开始扫描主机 {host}，端口数量: {len(ports)}")
+                
+                # 为每个主机创建扫描任务
+                tasks = []
+                for port in ports:
+                    task = self.scan_port(host, port, protocol)
+                    tasks.append(task)
+                
+                # 执行扫描
+                host_results = await asyncio.gather(*tasks, return_exceptions=True)
+                
+                # 过滤有效结果
+                valid_results = []
+                for result in host_results:
+                    if isinstance(result, dict):
+                        valid_results.append(result)
+                
+                results[host] = valid_results
             
-            # 过滤有效结果
-            valid_results = []
-            for result in host_results:
-                if isinstance(result, dict):
-                    valid_results.append(result)
+            await self.wait_for_banners()
+            return results
             
-            results[host] = valid_results
+        except asyncio.CancelledError:
+            await self.abort()
+            raise
+    
+    @staticmethod
+    def _interleave(plans: List[Tuple[str, str, Iterable[int]]]) -> Iterator[Tuple[int, str, int, str]]:
+        """按位置交错产生探测 (位置, 主机, 端口, 协议)：先所有目标的第一个端口，再第二个……"""
+        iterators = [(host, protocol, iter(ports)) for host, protocol, ports in plans]
+        position = 0
+        while iterators:
+            active = []
+            for plan in iterators:
+                port = next(plan[2], None)
+                if port is not None:
+                    yield position, plan[0], port, plan[1]
+                    active.append(plan)
+            iterators = active
+            position += 1
+    
+    async def _batch_scan_interleaved(self, plans: List[Tuple[str, str, Iterable[int]]]) -> Dict[str, List[Dict[str, Any]]]:
+        """在截止时间内批量扫描
         
-        return results
+        按各目标端口顺序的位置交错探测（先探测所有目标的第一个端口，再第二个……），
+        避免时间耗尽时后面的目标完全没有结果。探测逐个产生，由max_concurrent个
+        工作协程依次取出执行，不预先生成探测列表或协程。
+        """
+        total = sum(len(ports) for _, _, ports in plans)
+        logger.info(f"开始限时批量扫描，目标数量: {len(plans)}，探测数量: {total}")
+        
+        probes = self._interleave(plans)
+        collected: Dict[str, List[Tuple[int, Dict[str, Any]]]] = {host: [] for host, _, _ in plans}
+        
+        async def worker():
+            for position, host, port, protocol in probes:
+                try:
+                    result = await self.scan_port(host, port, protocol)
+                except ScanDeadlineExceeded:
+                    return
+                except Exception as e:
+                    logger.error(f"扫描任务异常: {e}")
+                    continue
+                collected[host].append((position, result))
+        
+        workers = [asyncio.ensure_future(worker()) for _ in range(min(self.max_concurrent, total))]
+        if workers:
+            remaining = self.remaining_time()
+            try:
+                _, pending = await asyncio.wait(
+                    workers, timeout=None if remaining is None else remaining + self.DEADLINE_GRACE
+                )
+            except asyncio.CancelledError:
+                for task in workers:
+                    task.cancel()
+                await asyncio.gather(*workers, return_exceptions=True)
+                raise
+            if pending:
+                self.deadline_reached = True
+                logger.info(f"扫描截止时间已到，取消 {len(pending)} 个进行中的探测")
+                for task in pending:
+                    task.cancel()
+                await asyncio.gather(*pending, return_exceptions=True)
+        
+        # 同一目标的结果按探测顺序排列
+        return {
+            host: [result for _, result in sorted(items, key=lambda item: item[0])]
+            for host, items in collected.items()
+        }
     
     async def _scan_with_progress(self, 
                                  host: str, 
@@ -565,6 +1123,29 @@ class PortScannerEngine:
             "banner": None
         }
     
+    async def abort(self):
+        """中止扫描：取消进行中的banner抓取并关闭其连接
+        
+        探测协程随所在任务取消而结束（连接由asyncio关闭、并发槽位和未使用的
+        限速令牌在取消路径上归还），banner阶段的任务独立运行，需要在此取消。
+        """
+        self.cancelled = True
+        if self.banner_grabber is not None:
+            await self.banner_grabber.drain(0)
+    
     def get_statistics(self) -> Dict[str, Any]:
         """获取扫描统计信息"""
-        return self.statistics.get_statistics() 
\ No newline at end of file
+        stats = self.statistics.get_statistics()
+        stats.update(self.rate_limiter.get_statistics())
+        stats["cache_hits"] = self.cache_hits
+        stats["cancelled"] = self.cancelled
+        if self.banner_grabber is not None:
+            stats.update(self.banner_grabber.get_statistics())
+        return stats
+    
+    def get_coverage(self) -> Dict[str, Any]:
+        """获取扫描覆盖率信息（含截止时间状态）"""
+        coverage = self.coverage.get_coverage()
+        coverage["deadline_seconds"] = self.deadline_seconds
+        coverage["deadline_reached"] = self.deadline_reached
+        return coverage 
\ No newline at end of file
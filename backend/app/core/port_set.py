@@ -0,0 +1,199 @@
+"""
+---------------------------------------------------------------
+File name:                  port_set.py
+Author:                     Ignorant-lu
+Date created:               2026/10/19
+Description:                端口集合类型，基于有序区间列表，统一端口范围表达式的解析
+----------------------------------------------------------------
+
+Changed history:
+                            2026/10/19: 初始创建;
+----
+"""
+
+import bisect
+from typing import Iterable, Iterator, List, Tuple, Union
+
+
+MIN_PORT = 1
+MAX_PORT = 65535
+
+
+class PortSet:
+    """端口集合
+
+    内部以合并后的有序闭区间元组保存，例如"1-1000,3389"只占两个区间，
+    并集/差集/交集按区间归并计算，只有迭代时才逐个产生端口，
+    避免把"1-65535"这样的表达式反复展开成列表。
+    """
+
+    __slots__ = ("_intervals", "_starts", "_size")
+
+    def __init__(self, intervals: Iterable[Tuple[int, int]] = ()):
+        """初始化端口集合
+
+        Args:
+            intervals: 闭区间(start, end)序列，可以无序或重叠
+        """
+        merged: List[Tuple[int, int]] = []
+        for start, end in sorted(intervals):
+            if not (MIN_PORT <= start <= end <= MAX_PORT):
+                raise ValueError(f"无效的端口区间: {start}-{end}")
+            if merged and start <= merged[-1][1] + 1:
+                if end > merged[-1][1]:
+                    merged[-1] = (merged[-1][0], end)
+            else:
+                merged.append((start, end))
+
+        self._intervals: Tuple[Tuple[int, int], ...] = tuple(merged)
+        self._starts = [start for start, _ in merged]
+        self._size = sum(end - start + 1 for start, end in merged)
+
+    @classmethod
+    def parse(cls, spec: str, strict: bool = True) -> "PortSet":
+        """解析端口范围表达式
+
+        Args:
+            spec: 端口范围字符串，如 "80", "80-85", "1-1000,3389,8080-8090"
+            strict: 为False时忽略无效的部分而不是抛出异常
+
+        Returns:
+            PortSet: 端口集合
+        """
+        intervals = []
+        for part in spec.split(","):
+            part = part.strip()
+            if not part:
+                continue
+            try:
+                if "-" in part:
+                    start, end = part.split("-", 1)
+                    interval = (int(start.strip()), int(end.strip()))
+                else:
+                    port = int(part)
+                    interval = (port, port)
+                if not (MIN_PORT <= interval[0] <= interval[1] <= MAX_PORT):
+                    raise ValueError(f"端口超出有效范围 ({MIN_PORT}-{MAX_PORT}): {part}")
+            except ValueError:
+                if strict:
+                    raise ValueError(f"无效的端口范围格式: {part}")
+                continue
+            intervals.append(interval)
+        return cls(intervals)
+
+    @classmethod
+    def from_ports(cls, ports: Iterable[int]) -> "PortSet":
+        """由端口号序列构建集合"""
+        intervals = []
+        for port in sorted(set(ports)):
+            if intervals and port == intervals[-1][1] + 1:
+                intervals[-1][1] = port
+            else:
+                intervals.append([port, port])
+        return cls((start, end) for start, end in intervals)
+
+    @classmethod
+    def from_range(cls, start: int, end: int) -> "PortSet":
+        """由起止端口构建集合"""
+        return cls([(start, end)])
+
+    @classmethod
+    def coerce(cls, value: Union["PortSet", str, int, Iterable[int]], strict: bool = True) -> "PortSet":
+        """将端口表达式、端口号或端口序列统一转换为PortSet"""
+        if isinstance(value, PortSet):
+            return value
+        if isinstance(value, str):
+            return cls.parse(value, strict)
+        if isinstance(value, int):
+            return cls.from_range(value, value)
+        if isinstance(value, range) and value.step == 1:
+            return cls.from_range(value.start, value.stop - 1) if len(value) else cls()
+        return cls.from_ports(value)
+
+    @property
+    def intervals(self) -> Tuple[Tuple[int, int], ...]:
+        """合并后的有序闭区间"""
+        return self._intervals
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __bool__(self) -> bool:
+        return self._size > 0
+
+    def __iter__(self) -> Iterator[int]:
+        for start, end in self._intervals:
+            yield from range(start, end + 1)
+
+    def __contains__(self, port: object) -> bool:
+        if not isinstance(port, int):
+            return False
+        index = bisect.bisect_right(self._starts, port) - 1
+        return index >= 0 and port <= self._intervals[index][1]
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, PortSet):
+            return NotImplemented
+        return self._intervals == other._intervals
+
+    def __hash__(self) -> int:
+        return hash(self._intervals)
+
+    def __str__(self) -> str:
+        return ",".join(
+            str(start) if start == end else f"{start}-{end}"
+            for start, end in self._intervals
+        )
+
+    def __repr__(self) -> str:
+        return f"PortSet('{self}')"
+
+    def union(self, other: "PortSet") -> "PortSet":
+        """并集"""
+        return PortSet(self._intervals + PortSet.coerce(other)._intervals)
+
+    def difference(self, other: "PortSet") -> "PortSet":
+        """差集（排除other中的端口）"""
+        result = []
+        excluded = PortSet.coerce(other)._intervals
+        i = 0
+        for start, end in self._intervals:
+            # 跳过完全位于当前区间之前的排除区间
+            while i < len(excluded) and excluded[i][1] < start:
+                i += 1
+            j = i
+            while j < len(excluded) and excluded[j][0] <= end:
+                ex_start, ex_end = excluded[j]
+                if ex_start > start:
+                    result.append((start, ex_start - 1))
+                start = max(start, ex_end + 1)
+                if start > end:
+                    break
+                j += 1
+            if start <= end:
+                result.append((start, end))
+        return PortSet(result)
+
+    def intersection(self, other: "PortSet") -> "PortSet":
+        """交集"""
+        result = []
+        a, b = self._intervals, PortSet.coerce(other)._intervals
+        i = j = 0
+        while i < len(a) and j < len(b):
+            start = max(a[i][0], b[j][0])
+            end = min(a[i][1], b[j][1])
+            if start <= end:
+                result.append((start, end))
+            if a[i][1] < b[j][1]:
+                i += 1
+            else:
+                j += 1
+        return PortSet(result)
+
+    __or__ = union
+    __sub__ = difference
+    __and__ = intersection
+
+    def to_list(self) -> List[int]:
+        """展开为有序端口列表"""
+        return list(self)
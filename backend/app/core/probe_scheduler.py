@@ -0,0 +1,204 @@
+"""
+---------------------------------------------------------------
+File name:                  probe_scheduler.py
+Author:                     Ignorant-lu
+Date created:               2026/10/19
+Description:                探测调度，按客户端加权公平排队（WFQ），交互式单次探测走优先通道
+----------------------------------------------------------------
+
+Changed history:
+                            2026/10/19: 初始创建;
+                            2026/10/19: 请求头中的客户端标识一律视为API Key，不按IP地址解析;
+----
+"""
+
+import heapq
+import hashlib
+import itertools
+import ipaddress
+from collections import deque
+from contextvars import ContextVar
+from typing import Dict, Any, Optional, Hashable, Deque, List, Tuple
+
+
+# 当前请求所属的客户端（由中间件按API Key或来源地址设置）
+current_client: ContextVar[Optional[str]] = ContextVar("current_client", default=None)
+
+# 交互式队列在位置表中的标记
+_INTERACTIVE = object()
+_MISSING = object()
+
+
+def client_flow(identity: str, address: bool = False) -> str:
+    """客户端标识：来源地址为"ip:地址"，API Key为"key:摘要"（避免在统计中暴露）
+
+    API Key由客户端随意填写，即使形如IP地址也不按地址解析，
+    否则客户端可以冒充其他来源地址的额度。
+
+    Args:
+        identity: API Key或客户端地址
+        address: identity是否为连接的来源地址
+
+    Returns:
+        客户端标识
+    """
+    if not address:
+        return "key:" + hashlib.sha256(identity.encode()).hexdigest()[:12]
+    try:
+        return f"ip:{ipaddress.ip_address(identity)}"
+    except ValueError:
+        return f"ip:{identity}"
+
+
+def configured_flow(name: str) -> str:
+    """配置中的客户端名称对应的标识："ip:地址"为来源地址，其他为API Key
+
+    Args:
+        name: 配置的客户端名称
+
+    Returns:
+        客户端标识
+    """
+    if name.startswith("ip:"):
+        return client_flow(name[3:], address=True)
+    return client_flow(name)
+
+
+class _Flow:
+    """一个流（通常是一个扫描引擎）的排队项与虚拟完成时间"""
+
+    __slots__ = ("client", "items", "finish")
+
+    def __init__(self, client: Hashable):
+        self.client = client
+        self.items: Deque[Tuple[float, Any]] = deque()
+        self.finish = 0.0
+
+
+class FairQueue:
+    """加权公平队列（起始时间公平排队，SFQ）
+
+    每个排队项按所在流打上虚拟起始时间 max(V, 流的上次完成时间)，
+    完成时间 = 起始时间 + 1/份额，出队时选起始时间最小的项并把虚拟时间V
+    推进到该值。份额 = 客户端权重 / 该客户端当前排队的流数，因此客户端之间
+    按权重分配，同一客户端的多个任务再平分其份额；一个大任务排了再多的项，
+    其他客户端的新请求也只需等待约一轮。
+
+    交互式项进入独立的先进先出通道，总是先于批量项出队。
+    """
+
+    def __init__(self):
+        self._interactive: Deque[Any] = deque()
+        self._flows: Dict[Hashable, _Flow] = {}
+        self._heap: List[Tuple[float, int, Hashable]] = []
+        self._seq = itertools.count()
+        self._where: Dict[Any, Any] = {}
+        self._client_flows: Dict[Hashable, int] = {}
+        self.virtual_time = 0.0
+
+    def __len__(self) -> int:
+        return len(self._where)
+
+    @property
+    def interactive_waiting(self) -> int:
+        return len(self._interactive)
+
+    @property
+    def bulk_waiting(self) -> int:
+        return len(self._where) - len(self._interactive)
+
+    @property
+    def flows(self) -> int:
+        """当前有排队项的批量流数"""
+        return len(self._flows)
+
+    @property
+    def clients(self) -> int:
+        """当前有排队项的客户端数"""
+        return len(self._client_flows)
+
+    def push(self,
+             item: Any,
+             flow: Hashable = None,
+             client: Hashable = None,
+             weight: float = 1.0,
+             interactive: bool = False):
+        """入队
+
+        Args:
+            item: 排队项（需可哈希，如Future）
+            flow: 流标识，同一流内先进先出
+            client: 客户端标识，None表示流自成一个客户端
+            weight: 客户端权重
+            interactive: 是否进入交互式优先通道
+        """
+        if interactive:
+            self._interactive.append(item)
+            self._where[item] = _INTERACTIVE
+            return
+
+        state = self._flows.get(flow)
+        if state is None:
+            state = self._flows[flow] = _Flow(flow if client is None else client)
+            self._client_flows[state.client] = self._client_flows.get(state.client, 0) + 1
+        share = max(weight, 1e-6) / self._client_flows[state.client]
+        start = max(self.virtual_time, state.finish)
+        state.finish = start + 1.0 / share
+        state.items.append((start, item))
+        self._where[item] = flow
+        if len(state.items) == 1:
+            heapq.heappush(self._heap, (start, next(self._seq), flow))
+
+    def pop_interactive(self) -> Any:
+        item = self._interactive.popleft()
+        del self._where[item]
+        return item
+
+    def pop_bulk(self) -> Any:
+        """取出虚拟起始时间最小的批量项"""
+        while True:
+            start, _, flow = heapq.heappop(self._heap)
+            state = self._flows.get(flow)
+            if state is None or not state.items or state.items[0][0] != start:
+                # 队首已被移除的过期堆项
+                continue
+            _, item = state.items.popleft()
+            del self._where[item]
+            self.virtual_time = start
+            if state.items:
+                heapq.heappush(self._heap, (state.items[0][0], next(self._seq), flow))
+            else:
+                self._drop_flow(flow, state)
+            return item
+
+    def discard(self, item: Any) -> bool:
+        """移除排队项（如等待方被取消）
+
+        Returns:
+            是否在队列中
+        """
+        flow = self._where.pop(item, _MISSING)
+        if flow is _MISSING:
+            return False
+        if flow is _INTERACTIVE:
+            self._interactive.remove(item)
+            return True
+
+        state = self._flows[flow]
+        for index, (_, queued) in enumerate(state.items):
+            if queued is item:
+                del state.items[index]
+                break
+        if not state.items:
+            self._drop_flow(flow, state)
+        elif index == 0:
+            heapq.heappush(self._heap, (state.items[0][0], next(self._seq), flow))
+        return True
+
+    def _drop_flow(self, flow: Hashable, state: _Flow):
+        del self._flows[flow]
+        remaining = self._client_flows[state.client] - 1
+        if remaining:
+            self._client_flows[state.client] = remaining
+        else:
+            del self._client_flows[state.client]
@@ -0,0 +1,224 @@
+"""
+---------------------------------------------------------------
+File name:                  rate_limiter.py
+Author:                     Ignorant-lu
+Date created:               2026/10/19
+Description:                扫描发包速率限制器，基于令牌桶(GCRA)实现全局/任务/目标三级限速
+----------------------------------------------------------------
+
+Changed history:
+                            2026/10/19: 初始创建;
+                            2026/10/19: 探测在占用并发槽位后才预约发送时间;
+----
+"""
+
+import asyncio
+import time
+import logging
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """令牌桶限速器
+
+    采用GCRA（通用信元速率算法）实现：只维护一个"理论到达时间"，
+    不需要后台补充令牌的任务。每个探测包按 1/rate 的间隔均匀排布，
+    burst 控制允许的突发量（默认1，即完全平滑）。
+    """
+
+    def __init__(self, rate: float = 0.0, burst: float = 1.0):
+        """初始化令牌桶
+
+        Args:
+            rate: 每秒令牌数（pps），<=0 表示不限速
+            burst: 桶容量，即允许的最大突发包数
+        """
+        self.rate = 0.0
+        self.burst = 1.0
+        self._emission_interval = 0.0
+        self._tolerance = 0.0
+        self._tat = 0.0  # 理论到达时间（monotonic）
+        self.configure(rate, burst)
+
+    @property
+    def enabled(self) -> bool:
+        """是否启用限速"""
+        return self.rate > 0
+
+    def configure(self, rate: float, burst: Optional[float] = None):
+        """更新速率配置
+
+        Args:
+            rate: 每秒令牌数，<=0 表示不限速
+            burst: 桶容量，None 表示保持不变
+        """
+        self.rate = max(0.0, float(rate or 0.0))
+        if burst is not None:
+            self.burst = max(1.0, float(burst))
+
+        if self.rate > 0:
+            self._emission_interval = 1.0 / self.rate
+            self._tolerance = (self.burst - 1.0) * self._emission_interval
+        else:
+            self._emission_interval = 0.0
+            self._tolerance = 0.0
+
+    def earliest(self, now: float) -> float:
+        """计算不早于now的最早可发送时间"""
+        if not self.enabled:
+            return now
+        return max(now, self._tat - self._tolerance)
+
+    def commit(self, send_time: float, tokens: float = 1.0):
+        """在send_time处消耗令牌"""
+        if not self.enabled:
+            return
+        self._tat = max(self._tat, send_time) + self._emission_interval * tokens
+
+    def refund(self, tokens: float = 1.0):
+        """归还未使用的令牌（如探测被取消）"""
+        if not self.enabled:
+            return
+        self._tat = max(time.monotonic(), self._tat - self._emission_interval * tokens)
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """获取令牌桶配置信息"""
+        return {
+            "rate": self.rate,
+            "burst": self.burst,
+            "enabled": self.enabled
+        }
+
+
+class ScanRateLimiter:
+    """扫描速率限制器
+
+    组合全局、任务、单目标三个令牌桶。每次探测在三个桶中取最晚的
+    可发送时间，并在同一时刻提交到所有桶，保证任一层级都不会超速；
+    与信号量并发限制互相独立；调用方占用并发槽位后才预约发送时间，
+    排队中的探测不会把共享的全局令牌桶预约到很远的将来。
+    """
+
+    # 单目标令牌桶缓存上限，超出后淘汰最久未使用的目标
+    MAX_TARGET_BUCKETS = 4096
+
+    def __init__(self,
+                 job_rate: float = 0.0,
+                 target_rate: float = 0.0,
+                 burst: float = 1.0,
+                 global_bucket: Optional[TokenBucket] = None):
+        """初始化扫描速率限制器
+
+        Args:
+            job_rate: 单个扫描任务的pps上限，<=0 表示不限速
+            target_rate: 单个目标主机的pps上限，<=0 表示不限速
+            burst: 任务和目标令牌桶的突发容量
+            global_bucket: 进程共享的全局令牌桶
+        """
+        self.job_bucket = TokenBucket(job_rate, burst)
+        self.target_rate = max(0.0, float(target_rate or 0.0))
+        self.burst = burst
+        self.global_bucket = global_bucket
+        self.target_buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+
+        # 统计信息
+        self.acquired = 0
+        self.total_wait_time = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        """是否有任一层级启用了限速"""
+        return (
+            self.job_bucket.enabled
+            or self.target_rate > 0
+            or (self.global_bucket is not None and self.global_bucket.enabled)
+        )
+
+    def _buckets_for(self, host: str) -> Tuple[TokenBucket, ...]:
+        """获取某目标需要经过的所有令牌桶"""
+        buckets = []
+
+        if self.target_rate > 0:
+            bucket = self.target_buckets.get(host)
+            if bucket is None:
+                bucket = TokenBucket(self.target_rate, self.burst)
+                self.target_buckets[host] = bucket
+                if len(self.target_buckets) > self.MAX_TARGET_BUCKETS:
+                    self.target_buckets.popitem(last=False)
+            else:
+                self.target_buckets.move_to_end(host)
+            buckets.append(bucket)
+
+        if self.job_bucket.enabled:
+            buckets.append(self.job_bucket)
+
+        if self.global_bucket is not None and self.global_bucket.enabled:
+            buckets.append(self.global_bucket)
+
+        return tuple(buckets)
+
+    def reserve(self, host: str) -> float:
+        """为一次探测预约发送时间
+
+        Args:
+            host: 目标主机
+
+        Returns:
+            需要等待的秒数
+        """
+        buckets = self._buckets_for(host)
+        if not buckets:
+            return 0.0
+
+        now = time.monotonic()
+        send_time = max(bucket.earliest(now) for bucket in buckets)
+        for bucket in buckets:
+            bucket.commit(send_time)
+
+        delay = send_time - now
+        self.acquired += 1
+        self.total_wait_time += delay
+        return delay
+
+    async def acquire(self, host: str):
+        """等待直到允许向host发送一次探测"""
+        if not self.enabled:
+            return
+
+        delay = self.reserve(host)
+        if delay <= 0:
+            return
+
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            # 取消时归还令牌，避免后续探测被无谓地推迟
+            self.release(host)
+            raise
+
+    def release(self, host: str):
+        """归还一次未实际发送的探测令牌"""
+        if self.target_rate > 0 and host in self.target_buckets:
+            self.target_buckets[host].refund()
+        self.job_bucket.refund()
+        if self.global_bucket is not None:
+            self.global_bucket.refund()
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """获取限速统计信息"""
+        return {
+            "global_pps": self.global_bucket.rate if self.global_bucket else 0.0,
+            "job_pps": self.job_bucket.rate,
+            "target_pps": self.target_rate,
+            "rate_limited_probes": self.acquired,
+            "rate_limit_wait_time": self.total_wait_time
+        }
+
+
+# 全局共享令牌桶（默认不限速，由API层根据配置设置速率）
+global_rate_limiter = TokenBucket()
@@ -0,0 +1,253 @@
+"""
+---------------------------------------------------------------
+File name:                  resource_governor.py
+Author:                     Ignorant-lu
+Date created:               2026/10/19
+Description:                进程级资源预算，限制所有扫描、PING、TCP连接占用的套接字与子进程总数
+----------------------------------------------------------------
+
+Changed history:
+                            2026/10/19: 初始创建;
+                            2026/10/19: 等待队列改为按客户端加权公平排队，交互式探测走优先通道并保留额度;
+----
+"""
+
+import math
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import Dict, Any, Optional, Hashable
+
+from .probe_scheduler import FairQueue
+
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+
+# 资源类型
+SOCKETS = "sockets"
+SUBPROCESSES = "subprocesses"
+
+
+class ResourceBudgetExceeded(Exception):
+    """等待资源的请求过多，新任务应稍后重试"""
+
+    def __init__(self, message: str, retry_after: float = 1.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class _Pool:
+    """单类资源的额度与等待队列（按客户端加权公平分配）"""
+
+    __slots__ = ("limit", "reserve", "in_use", "peak", "waiters", "granted", "interactive_granted", "queued")
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.reserve = 0
+        self.in_use = 0
+        self.peak = 0
+        self.waiters = FairQueue()
+        self.granted = 0
+        self.interactive_granted = 0
+        self.queued = 0
+
+    @property
+    def waiting(self) -> int:
+        return len(self.waiters)
+
+    def available(self, interactive: bool) -> bool:
+        """是否有空闲额度（批量请求不能占用为交互式请求保留的额度）"""
+        if interactive:
+            return self.in_use < self.limit
+        return self.in_use < self.limit - min(self.reserve, self.limit // 10)
+
+
+class ResourceGovernor:
+    """进程级资源预算
+
+    每个扫描/PING引擎在发起连接或启动子进程前向本对象借用额度，结束后归还；
+    额度用尽时按客户端权重加权公平分配（同一客户端的多个任务再平分），
+    单个大任务不会饿死其他任务。交互式请求（单次探测）优先出队，并可使用
+    为其保留的少量额度，批量任务占满预算时也能立即开始。
+    等待数超过上限时，新任务在入口处被拒绝（503）。
+    """
+
+    def __init__(self,
+                 max_sockets: int = 1000,
+                 max_subprocesses: int = 32,
+                 max_waiters: int = 10000,
+                 retry_after: float = 1.0,
+                 interactive_reserve: int = 0):
+        """初始化资源预算
+
+        Args:
+            max_sockets: 同时打开的套接字上限（探测、banner、TCP连接）
+            max_subprocesses: 同时运行的子进程上限（系统ping命令）
+            max_waiters: 等待额度的请求数超过此值后拒绝新任务
+            retry_after: 拒绝时建议客户端等待的时间（秒）
+            interactive_reserve: 只供交互式请求使用的套接字额度（最多为上限的10%）
+        """
+        self._pools: Dict[str, _Pool] = {SOCKETS: _Pool(1), SUBPROCESSES: _Pool(1)}
+        self.max_waiters = max_waiters
+        self.retry_after = retry_after
+        self.weights: Dict[Hashable, float] = {}
+        self.rejected = 0
+        self.configure(max_sockets, max_subprocesses, max_waiters, retry_after, interactive_reserve)
+
+    def configure(self,
+                  max_sockets: int,
+                  max_subprocesses: int,
+                  max_waiters: Optional[int] = None,
+                  retry_after: Optional[float] = None,
+                  interactive_reserve: Optional[int] = None):
+        """更新预算（扩大额度时立即唤醒等待者）"""
+        if interactive_reserve is not None:
+            self._pools[SOCKETS].reserve = max(0, int(interactive_reserve))
+        for kind, limit in ((SOCKETS, max_sockets), (SUBPROCESSES, max_subprocesses)):
+            pool = self._pools[kind]
+            pool.limit = max(1, int(limit))
+            self._wake(pool)
+        if max_waiters is not None:
+            self.max_waiters = max(0, int(max_waiters))
+        if retry_after is not None:
+            self.retry_after = max(0.0, float(retry_after))
+
+    def set_weights(self, weights: Dict[Hashable, float]):
+        """设置客户端权重（未列出的客户端权重为1）"""
+        self.weights = {client: float(weight) for client, weight in weights.items() if weight > 0}
+
+    def limit(self, kind: str) -> int:
+        return self._pools[kind].limit
+
+    def try_acquire(self, kind: str, interactive: bool = False) -> bool:
+        """不等待地借用一份额度（没有空闲额度或有人排队时返回False）"""
+        pool = self._pools[kind]
+        queued = pool.waiters.interactive_waiting if interactive else pool.waiting
+        if pool.available(interactive) and not queued:
+            self._grant(pool, interactive)
+            return True
+        return False
+
+    async def acquire(self,
+                      kind: str,
+                      owner: Optional[Hashable] = None,
+                      client: Optional[Hashable] = None,
+                      interactive: bool = False):
+        """借用一份额度，额度用尽时排队等待
+
+        Args:
+            kind: 资源类型（SOCKETS/SUBPROCESSES）
+            owner: 所有者标识（通常是一个任务的引擎），同一所有者的请求按先后顺序
+            client: 所有者所属的客户端，客户端之间按权重公平分配，None表示所有者自成一个客户端
+            interactive: 交互式请求，优先于所有批量请求分配
+        """
+        if self.try_acquire(kind, interactive):
+            return
+
+        pool = self._pools[kind]
+        future = asyncio.get_running_loop().create_future()
+        pool.waiters.push(future, owner, client, self.weights.get(client, 1.0), interactive)
+        pool.queued += 1
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # 已分配额度但等待方被取消，归还给下一个等待者
+                self.release(kind)
+            else:
+                pool.waiters.discard(future)
+            raise
+
+    def release(self, kind: str):
+        """归还一份额度"""
+        pool = self._pools[kind]
+        pool.in_use -= 1
+        self._wake(pool)
+
+    @asynccontextmanager
+    async def lease(self,
+                    kind: str,
+                    owner: Optional[Hashable] = None,
+                    client: Optional[Hashable] = None,
+                    interactive: bool = False):
+        """借用额度的上下文管理器"""
+        await self.acquire(kind, owner, client, interactive)
+        try:
+            yield
+        finally:
+            self.release(kind)
+
+    def _grant(self, pool: _Pool, interactive: bool = False):
+        pool.in_use += 1
+        pool.granted += 1
+        if interactive:
+            pool.interactive_granted += 1
+        pool.peak = max(pool.peak, pool.in_use)
+
+    def _wake(self, pool: _Pool):
+        """把空闲额度分给等待者（交互式优先，批量按加权公平顺序）"""
+        waiters = pool.waiters
+        while True:
+            if waiters.interactive_waiting and pool.available(True):
+                future, interactive = waiters.pop_interactive(), True
+            elif waiters.bulk_waiting and pool.available(False):
+                future, interactive = waiters.pop_bulk(), False
+            else:
+                break
+            if future.done():
+                continue
+            self._grant(pool, interactive)
+            future.set_result(None)
+
+    @property
+    def waiting(self) -> int:
+        """所有资源上的等待数"""
+        return sum(pool.waiting for pool in self._pools.values())
+
+    @property
+    def retry_after_header(self) -> Dict[str, str]:
+        """503响应的Retry-After头（整数秒）"""
+        return {"Retry-After": str(max(1, math.ceil(self.retry_after)))}
+
+    def admit(self):
+        """新任务准入检查
+
+        Raises:
+            ResourceBudgetExceeded: 等待额度的请求已超过上限
+        """
+        waiting = self.waiting
+        if waiting >= self.max_waiters:
+            self.rejected += 1
+            raise ResourceBudgetExceeded(
+                f"系统资源繁忙（{waiting} 个请求等待中），请稍后重试",
+                retry_after=self.retry_after
+            )
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """获取资源预算统计信息"""
+        stats: Dict[str, Any] = {
+            "max_waiters": self.max_waiters,
+            "rejected": self.rejected,
+            "weighted_clients": len(self.weights)
+        }
+        for kind, pool in self._pools.items():
+            stats[kind] = {
+                "limit": pool.limit,
+                "interactive_reserve": min(pool.reserve, pool.limit // 10),
+                "in_use": pool.in_use,
+                "peak": pool.peak,
+                "waiting": pool.waiting,
+                "interactive_waiting": pool.waiters.interactive_waiting,
+                "waiting_owners": pool.waiters.flows,
+                "waiting_clients": pool.waiters.clients,
+                "granted": pool.granted,
+                "interactive_granted": pool.interactive_granted,
+                "queued": pool.queued
+            }
+        return stats
+
+
+# 进程全局资源预算（由应用启动时按配置设置额度）
+resource_governor = ResourceGovernor()
@@ -0,0 +1,128 @@
+"""
+---------------------------------------------------------------
+File name:                  result_export.py
+Author:                     Ignorant-lu
+Date created:               2026/10/19
+Description:                结果流式导出，按块编码为NDJSON/CSV/msgpack
+----------------------------------------------------------------
+
+Changed history:
+                            2026/10/19: 初始创建;
+----
+"""
+
+import io
+import csv
+import json
+from typing import Dict, Any, Optional, Iterable, Iterator, Sequence
+
+# msgpack为可选依赖，未安装时不提供该格式
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+    msgpack = None
+
+
+# 导出格式 -> (媒体类型, 文件扩展名)
+EXPORT_FORMATS = {
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "msgpack": ("application/x-msgpack", "msgpack"),
+}
+
+# 每个输出块的目标大小
+CHUNK_BYTES = 64 * 1024
+
+
+def available_formats() -> list:
+    """当前环境可用的导出格式"""
+    return [fmt for fmt in EXPORT_FORMATS if fmt != "msgpack" or MSGPACK_AVAILABLE]
+
+
+def _csv_value(value: Any) -> Any:
+    """CSV单元格值（嵌套结构编码为JSON）"""
+    if isinstance(value, (dict, list, tuple)):
+        return json.dumps(value, ensure_ascii=False, default=str)
+    return value
+
+
+class _CsvEncoder:
+    """逐行CSV编码，首行输出表头"""
+
+    def __init__(self, columns: Optional[Sequence[str]]):
+        self.columns = list(columns) if columns else None
+        self._buffer = io.StringIO()
+        self._writer: Optional[csv.DictWriter] = None
+
+    def __call__(self, row: Dict[str, Any]) -> bytes:
+        if self._writer is None:
+            # 未指定列时以第一行的字段为准，其余行多出的字段忽略
+            self._writer = csv.DictWriter(
+                self._buffer, fieldnames=self.columns or list(row), extrasaction="ignore"
+            )
+            self._writer.writeheader()
+        self._writer.writerow({key: _csv_value(value) for key, value in row.items()})
+        data = self._buffer.getvalue()
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        return data.encode("utf-8")
+
+
+def _ndjson_encoder(row: Dict[str, Any]) -> bytes:
+    return (json.dumps(row, ensure_ascii=False, default=str) + "\n").encode("utf-8")
+
+
+def _msgpack_encoder():
+    packer = msgpack.Packer(default=str)
+    return packer.pack
+
+
+def iter_export(rows: Iterable[Dict[str, Any]],
+                fmt: str,
+                columns: Optional[Sequence[str]] = None,
+                chunk_bytes: int = CHUNK_BYTES) -> Iterator[bytes]:
+    """把结果行编码为导出格式的字节块
+
+    行逐条编码并攒成约chunk_bytes大小的块输出，内存占用与结果总数无关；
+    第一块在攒满或输入结束时立即输出。
+
+    Args:
+        rows: 结果行迭代器
+        fmt: 导出格式 ndjson/csv/msgpack（msgpack为连续的map对象流）
+        columns: CSV列顺序，None表示使用第一行的字段
+        chunk_bytes: 输出块的目标大小
+
+    Yields:
+        编码后的字节块
+    """
+    if fmt == "ndjson":
+        encode = _ndjson_encoder
+    elif fmt == "csv":
+        encode = _CsvEncoder(columns)
+    elif fmt == "msgpack":
+        if not MSGPACK_AVAILABLE:
+            raise ValueError("msgpack库不可用")
+        encode = _msgpack_encoder()
+    else:
+        raise ValueError(f"不支持的导出格式: {fmt}")
+
+    pending = []
+    size = 0
+    empty = True
+    for row in rows:
+        empty = False
+        data = encode(row)
+        pending.append(data)
+        size += len(data)
+        if size >= chunk_bytes:
+            yield b"".join(pending)
+            pending = []
+            size = 0
+
+    if pending:
+        yield b"".join(pending)
+    elif empty and fmt == "csv" and columns:
+        # 没有结果时CSV仍输出表头
+        yield (",".join(columns) + "\r\n").encode("utf-8")
@@ -0,0 +1,370 @@
+"""
+---------------------------------------------------------------
+File name:                  result_store.py
+Author:                     Ignorant-lu
+Date created:               2026/10/19
+Description:                扫描结果持久化存储，SQLite(WAL)批量写入与带索引的分页查询
+----------------------------------------------------------------
+
+Changed history:
+                            2026/10/19: 初始创建;
+                            2026/10/19: 支持按主机端口有序流式读取;
+                            2026/10/19: 支持按写入顺序分块读取结果用于导出;
+                            2026/10/19: 支持端口范围、时间窗口过滤与游标分页;
+                            2026/10/19: 写入失败只影响当前批次；缓冲超过刷盘间隔时写入，运行中任务的结果及时可查;
+----
+"""
+
+import time
+import asyncio
+import sqlite3
+import logging
+import threading
+from typing import Dict, List, Any, Optional, Tuple, Iterator
+
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+
+# 结果表列（查询结果按此顺序转换为字典）
+RESULT_COLUMNS = (
+    "scan_id", "host", "port", "protocol", "status",
+    "service", "version", "banner", "response_time", "scanned_at"
+)
+
+# 范围过滤条件 -> SQL比较（其余过滤条件按等值比较）
+RANGE_FILTERS = {
+    "port_min": "port >= ?",
+    "port_max": "port <= ?",
+    "since": "scanned_at >= ?",
+    "until": "scanned_at < ?",
+    "after_id": "id > ?",
+}
+
+
+def normalize_result(scan_id: str, result: Dict[str, Any]) -> tuple:
+    """将不同接口产生的结果字典统一为结果表的一行
+
+    引擎结果使用host/service_name，后台扫描任务结果使用target/service。
+    """
+    return (
+        scan_id,
+        result.get("host") or result.get("target"),
+        int(result["port"]),
+        result.get("protocol") or "tcp",
+        result.get("status"),
+        result.get("service_name") or result.get("service") or None,
+        result.get("service_version") or result.get("version"),
+        result.get("banner"),
+        result.get("response_time"),
+        result.get("scanned_at") or result.get("detected_at") or time.time()
+    )
+
+
+class ScanResultWriter:
+    """单个扫描任务的结果写入器
+
+    结果先进入内存缓冲，攒满一批或缓冲中最早的结果超过刷盘间隔后，
+    在线程池中以单个事务批量写入，扫描循环不等待磁盘；前一批写完之前
+    下一批排队，保证写入顺序。某一批写入失败时记录日志，不影响后续批次。
+    """
+
+    def __init__(self, store: "ScanResultStore", scan_id: str):
+        self.store = store
+        self.scan_id = scan_id
+        self._buffer: List[tuple] = []
+        self._pending: Optional[asyncio.Task] = None
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self.written = 0
+        self.failed = 0
+
+    def add(self, result: Dict[str, Any]):
+        """添加一个扫描结果（不阻塞）"""
+        self._buffer.append(normalize_result(self.scan_id, result))
+        if len(self._buffer) >= self.store.batch_size:
+            self._schedule_flush()
+        elif self._timer is None:
+            # 结果较少时也在刷盘间隔内写入，运行中的任务可查询到最新结果
+            self._timer = asyncio.get_running_loop().call_later(
+                self.store.flush_interval, self._schedule_flush
+            )
+
+    def _schedule_flush(self):
+        """把当前缓冲交给后台写入"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._buffer:
+            return
+        rows, self._buffer = self._buffer, []
+        previous = self._pending
+
+        async def write():
+            if previous is not None:
+                await previous
+            try:
+                await asyncio.to_thread(self.store.write_rows, rows)
+                self.written += len(rows)
+            except Exception as e:
+                self.failed += len(rows)
+                logger.error(f"扫描结果写入失败 {self.scan_id}（{len(rows)}条）: {e}")
+
+        self._pending = asyncio.create_task(write())
+
+    async def close(self):
+        """写入剩余结果并等待后台写入完成（可重复调用）"""
+        self._schedule_flush()
+        if self._pending is not None:
+            await self._pending
+            self._pending = None
+
+
+class ScanResultStore:
+    """扫描结果存储
+
+    结果表按(host)、(port, status)、(scan_id)建立索引，
+    按任务、主机、端口、状态、服务过滤和分页都在SQLite中完成。
+    """
+
+    def __init__(self, path: Optional[str] = None, batch_size: int = 2000, flush_interval: float = 1.0):
+        """初始化结果存储
+
+        Args:
+            path: SQLite数据库文件路径，None表示禁用持久化
+            batch_size: 每批写入的结果数
+            flush_interval: 未满一批的结果最长缓冲时间（秒）
+        """
+        self.path: Optional[str] = None
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self.configure(path, batch_size, flush_interval)
+
+    @property
+    def enabled(self) -> bool:
+        """是否启用持久化"""
+        return self.path is not None
+
+    def configure(self,
+                  path: Optional[str],
+                  batch_size: Optional[int] = None,
+                  flush_interval: Optional[float] = None):
+        """更新存储配置（路径变化时重新打开数据库）"""
+        if batch_size is not None:
+            self.batch_size = max(1, int(batch_size))
+        if flush_interval is not None:
+            self.flush_interval = max(0.0, float(flush_interval))
+
+        if path != self.path:
+            self.close()
+            self.path = path or None
+
+    def _connection(self) -> sqlite3.Connection:
+        """获取数据库连接（首次使用时创建表结构与索引）"""
+        if self._conn is None:
+            if not self.enabled:
+                raise RuntimeError("扫描结果存储未启用")
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS scan_results (
+                    id INTEGER PRIMARY KEY,
+                    scan_id TEXT NOT NULL,
+                    host TEXT NOT NULL,
+                    port INTEGER NOT NULL,
+                    protocol TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    service TEXT,
+                    version TEXT,
+                    banner TEXT,
+                    response_time REAL,
+                    scanned_at REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_scan_results_host ON scan_results (host);
+                CREATE INDEX IF NOT EXISTS idx_scan_results_port_status ON scan_results (port, status);
+                -- 任务索引带上主机端口，差异比较时可按序流式读取而无需排序
+                CREATE INDEX IF NOT EXISTS idx_scan_results_scan_id ON scan_results (scan_id, host, port, protocol);
+                -- 按状态过滤的游标分页：索引项隐含主键，可按id顺序范围扫描
+                CREATE INDEX IF NOT EXISTS idx_scan_results_scan_status ON scan_results (scan_id, status);
+            """)
+            self._conn = conn
+        return self._conn
+
+    def open_writer(self, scan_id: str) -> ScanResultWriter:
+        """创建扫描任务的结果写入器"""
+        return ScanResultWriter(self, scan_id)
+
+    def write_rows(self, rows: List[tuple]):
+        """批量写入结果行（每批一个事务）"""
+        with self._lock:
+            conn = self._connection()
+            for start in range(0, len(rows), self.batch_size):
+                with conn:
+                    conn.executemany(
+                        f"INSERT INTO scan_results ({', '.join(RESULT_COLUMNS)}) "
+                        f"VALUES ({', '.join('?' * len(RESULT_COLUMNS))})",
+                        rows[start:start + self.batch_size]
+                    )
+
+    def write_results(self, scan_id: str, results: List[Dict[str, Any]]):
+        """批量写入扫描结果"""
+        self.write_rows([normalize_result(scan_id, result) for result in results])
+
+    @staticmethod
+    def _where(filters: Dict[str, Any]) -> Tuple[str, list]:
+        """由非空过滤条件生成WHERE子句"""
+        clauses, params = [], []
+        for column, value in filters.items():
+            if value is not None:
+                clauses.append(RANGE_FILTERS.get(column, f"{column} = ?"))
+                params.append(value)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def query(self,
+              scan_id: Optional[str] = None,
+              offset: int = 0,
+              limit: int = 100,
+              **filters) -> Tuple[List[Dict[str, Any]], int]:
+        """过滤并分页查询扫描结果
+
+        Args:
+            scan_id: 扫描任务ID，None表示全部任务
+            offset: 分页偏移
+            limit: 分页大小
+            filters: host/port/status/service等值条件，
+                     port_min/port_max/since/until范围条件
+
+        Returns:
+            (当前页结果列表, 满足条件的总数)
+        """
+        where, params = self._where({"scan_id": scan_id, **filters})
+        with self._lock:
+            conn = self._connection()
+            total = conn.execute(f"SELECT COUNT(*) FROM scan_results{where}", params).fetchone()[0]
+            rows = conn.execute(
+                f"SELECT {', '.join(RESULT_COLUMNS)} FROM scan_results{where} "
+                f"ORDER BY id LIMIT ? OFFSET ?",
+                params + [limit, offset]
+            ).fetchall()
+        return [dict(zip(RESULT_COLUMNS, row)) for row in rows], total
+
+    def query_after(self,
+                    scan_id: str,
+                    after_id: int = 0,
+                    limit: int = 100,
+                    **filters) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        """按主键游标查询一页结果
+
+        条件与游标都下推到SQLite（WHERE id > 游标 ORDER BY id LIMIT n+1），
+        不计算总数也不使用OFFSET，每页的代价与页大小成正比。
+
+        Args:
+            scan_id: 扫描任务ID
+            after_id: 上一页最后一条结果的主键，0表示从头开始
+            limit: 每页数量
+            filters: host/port/status/service等值条件，
+                     port_min/port_max/since/until范围条件
+
+        Returns:
+            (本页结果列表, 本页最后一条的主键，没有更多结果时为None)
+        """
+        where, params = self._where({"scan_id": scan_id, **filters, "after_id": after_id})
+        with self._lock:
+            rows = self._connection().execute(
+                f"SELECT id, {', '.join(RESULT_COLUMNS)} FROM scan_results{where} "
+                f"ORDER BY id LIMIT ?",
+                params + [limit + 1]
+            ).fetchall()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        items = [dict(zip(RESULT_COLUMNS, row[1:])) for row in rows]
+        return items, (rows[-1][0] if has_more else None)
+
+    def iter_results(self,
+                     scan_id: str,
+                     chunk_size: int = 1000,
+                     **filters) -> Iterator[Dict[str, Any]]:
+        """按写入顺序分块流式读取扫描任务结果
+
+        每块按主键续读（WHERE id > 上一块末尾），不使用OFFSET，
+        每块的代价与块大小成正比，导出大结果集时内存占用恒定。
+
+        Args:
+            scan_id: 扫描任务ID
+            chunk_size: 每次查询的行数
+            filters: 过滤条件，同query_after
+        """
+        after_id = 0
+        while True:
+            items, after_id = self.query_after(scan_id, after_id, chunk_size, **filters)
+            yield from items
+            if after_id is None:
+                return
+
+    def iter_sorted(self, scan_id: str, chunk_size: int = 5000) -> Iterator[tuple]:
+        """按(主机, 端口, 协议)顺序流式读取扫描任务结果
+
+        Yields:
+            (host, port, protocol, status, service)，同一端口的多条记录按写入顺序相邻
+        """
+        last_key: Optional[tuple] = None
+        while True:
+            with self._lock:
+                conn = self._connection()
+                if last_key is None:
+                    rows = conn.execute(
+                        "SELECT host, port, protocol, status, service, id FROM scan_results "
+                        "WHERE scan_id = ? ORDER BY host, port, protocol, id LIMIT ?",
+                        (scan_id, chunk_size)
+                    ).fetchall()
+                else:
+                    rows = conn.execute(
+                        "SELECT host, port, protocol, status, service, id FROM scan_results "
+                        "WHERE scan_id = ? AND (host, port, protocol, id) > (?, ?, ?, ?) "
+                        "ORDER BY host, port, protocol, id LIMIT ?",
+                        (scan_id, *last_key, chunk_size)
+                    ).fetchall()
+            if not rows:
+                return
+            for row in rows:
+                yield row[:5]
+            last = rows[-1]
+            last_key = (last[0], last[1], last[2], last[5])
+
+    def count_by_status(self, scan_id: str) -> Dict[str, int]:
+        """按状态统计扫描任务的结果数"""
+        with self._lock:
+            rows = self._connection().execute(
+                "SELECT status, COUNT(*) FROM scan_results WHERE scan_id = ? GROUP BY status",
+                (scan_id,)
+            ).fetchall()
+        return dict(rows)
+
+    def has_scan(self, scan_id: str) -> bool:
+        """扫描任务是否有已存储的结果"""
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT 1 FROM scan_results WHERE scan_id = ? LIMIT 1", (scan_id,)
+            ).fetchone()
+        return row is not None
+
+    def delete_scan(self, scan_id: str):
+        """删除扫描任务的全部结果"""
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.execute("DELETE FROM scan_results WHERE scan_id = ?", (scan_id,))
+
+    def close(self):
+        """关闭数据库连接"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+# 全局结果存储（默认禁用，由应用启动时根据配置设置路径）
+scan_result_store = ScanResultStore()
@@ -0,0 +1,210 @@
+"""
+---------------------------------------------------------------
+File name:                  scan_cache.py
+Author:                     Ignorant-lu
+Date created:               2026/10/19
+Description:                扫描结果缓存，TTL过期+LRU淘汰，相同探测并发请求单飞合并
+----------------------------------------------------------------
+
+Changed history:
+                            2026/10/19: 初始创建;
+----
+"""
+
+import asyncio
+import time
+import logging
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple, Callable, Awaitable, Hashable
+
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+
+class ScanResultCache:
+    """扫描结果缓存
+
+    以(host, port, protocol, ...)为键缓存单端口探测结果：
+    - 条目超过TTL后失效，容量满时淘汰最久未使用的条目
+    - 同一键的并发请求只发起一次探测（single-flight），其余请求等待共享结果
+    - 请求可指定max_age收紧可接受的结果年龄，或跳过读取缓存强制探测
+    """
+
+    def __init__(self, ttl: float = 30.0, max_entries: int = 10000):
+        """初始化扫描结果缓存
+
+        Args:
+            ttl: 缓存有效期（秒），<=0 表示禁用缓存
+            max_entries: 最大缓存条目数，<=0 表示禁用缓存
+        """
+        self.ttl = 0.0
+        self.max_entries = 0
+        self._entries: "OrderedDict[Hashable, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+
+        # 统计信息
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+        self.configure(ttl, max_entries)
+
+    @property
+    def enabled(self) -> bool:
+        """是否启用缓存"""
+        return self.ttl > 0 and self.max_entries > 0
+
+    def configure(self, ttl: float, max_entries: Optional[int] = None):
+        """更新缓存配置
+
+        Args:
+            ttl: 缓存有效期（秒）
+            max_entries: 最大缓存条目数，None 表示保持不变
+        """
+        self.ttl = max(0.0, float(ttl or 0.0))
+        if max_entries is not None:
+            self.max_entries = max(0, int(max_entries))
+        self._evict_overflow()
+
+    def get(self, key: Hashable, max_age: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """读取未过期的缓存结果
+
+        Args:
+            key: 缓存键
+            max_age: 可接受的最大结果年龄（秒），不能放宽TTL
+
+        Returns:
+            结果副本，不存在或已过期时返回None
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        stored_at, result = entry
+        age = time.monotonic() - stored_at
+        if age > self.ttl:
+            del self._entries[key]
+            return None
+        if max_age is not None and age > max_age:
+            return None
+
+        self._entries.move_to_end(key)
+        return dict(result)
+
+    def put(self, key: Hashable, result: Dict[str, Any]):
+        """写入缓存结果"""
+        if not self.enabled:
+            return
+        self._entries[key] = (time.monotonic(), dict(result))
+        self._entries.move_to_end(key)
+        self._evict_overflow()
+
+    def _evict_overflow(self):
+        """淘汰超出容量的最久未使用条目"""
+        while self._entries and len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def get_or_probe(self,
+                           key: Hashable,
+                           probe: Callable[[], Awaitable[Dict[str, Any]]],
+                           max_age: Optional[float] = None,
+                           use_cache: bool = True,
+                           cacheable: Optional[Callable[[Dict[str, Any]], bool]] = None
+                           ) -> Tuple[Dict[str, Any], bool]:
+        """读取缓存，未命中时探测并写入缓存
+
+        Args:
+            key: 缓存键
+            probe: 执行实际探测的协程工厂
+            max_age: 可接受的最大结果年龄（秒）
+            use_cache: 为False时跳过读取缓存和合并，强制探测（结果仍写入缓存）
+            cacheable: 判断结果是否可缓存的函数
+
+        Returns:
+            (结果, 是否来自缓存或合并的探测)
+        """
+        if not self.enabled:
+            return await probe(), False
+
+        if not use_cache:
+            result = await probe()
+            self._store(key, result, cacheable)
+            return result, False
+
+        while True:
+            cached = self.get(key, max_age)
+            if cached is not None:
+                self.hits += 1
+                return cached, True
+
+            future = self._inflight.get(key)
+            if future is None:
+                break
+
+            # 已有相同探测在进行，等待共享其结果
+            try:
+                result = await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if future.cancelled():
+                    # 发起探测的请求被取消，重新竞争发起探测
+                    continue
+                raise
+            except Exception:
+                # 发起者的探测失败（如其截止时间已到），由本请求重新探测
+                continue
+            self.coalesced += 1
+            return dict(result), True
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await probe()
+        except BaseException as e:
+            if isinstance(e, asyncio.CancelledError):
+                future.cancel()
+            else:
+                future.set_exception(e)
+                # 没有等待者时避免"Future exception was never retrieved"警告
+                future.exception()
+            raise
+        finally:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+
+        self._store(key, result, cacheable)
+        future.set_result(result)
+        return result, False
+
+    def _store(self, key: Hashable, result: Dict[str, Any],
+               cacheable: Optional[Callable[[Dict[str, Any]], bool]]):
+        """按可缓存条件写入结果"""
+        if cacheable is None or cacheable(result):
+            self.put(key, result)
+
+    def clear(self):
+        """清空缓存"""
+        self._entries.clear()
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """获取缓存统计信息"""
+        lookups = self.hits + self.coalesced + self.misses
+        return {
+            "enabled": self.enabled,
+            "ttl": self.ttl,
+            "max_entries": self.max_entries,
+            "entries": len(self._entries),
+            "inflight": len(self._inflight),
+            "hits": self.hits,
+            "coalesced": self.coalesced,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": (self.hits + self.coalesced) / lookups if lookups else 0.0
+        }
+
+
+# 全局扫描结果缓存（由应用启动时根据配置设置TTL和容量）
+scan_result_cache = ScanResultCache()
@@ -0,0 +1,288 @@
+"""
+---------------------------------------------------------------
+File name:                  scan_checkpoint.py
+Author:                     Ignorant-lu
+Date created:               2026/10/19
+Description:                扫描断点续扫，基于SQLite(WAL)的追加式检查点日志，批量刷盘
+----------------------------------------------------------------
+
+Changed history:
+                            2026/10/19: 初始创建;
+                            2026/10/19: 记录只写入缓冲，批量刷盘在线程中进行，不阻塞事件循环;
+----
+"""
+
+import json
+import time
+import asyncio
+import sqlite3
+import logging
+import threading
+from typing import Dict, List, Any, Optional, Set
+
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+
+class ScanCheckpoint:
+    """单个扫描任务的检查点
+
+    已完成的探测结果先写入内存缓冲，达到批量大小或刷盘间隔后
+    一次事务批量写入，避免逐条提交拖慢扫描。在事件循环中使用时批量写入
+    交给线程执行，前一批写完之前下一批排队，扫描循环不等待磁盘；
+    某一批写入失败时记录日志，不影响后续批次。
+    """
+
+    def __init__(self, store: "ScanCheckpointStore", job_id: str):
+        self.store = store
+        self.job_id = job_id
+        self._buffer: List[tuple] = []
+        # 已交给后台写入但尚未提交的批次
+        self._writing: List[List[tuple]] = []
+        self._pending: Optional[asyncio.Task] = None
+        self._last_flush = time.monotonic()
+        self.failed = 0
+
+    def record(self, host: str, port: int, result: Dict[str, Any]):
+        """记录一个已完成的探测结果（不阻塞）"""
+        self._buffer.append((self.job_id, host, port, json.dumps(result, ensure_ascii=False)))
+        if (len(self._buffer) >= self.store.batch_size
+                or time.monotonic() - self._last_flush >= self.store.flush_interval):
+            self._schedule_flush()
+
+    def _schedule_flush(self):
+        """把当前缓冲交给后台写入（没有运行中的事件循环时直接写入）"""
+        self._last_flush = time.monotonic()
+        if not self._buffer:
+            return
+        rows, self._buffer = self._buffer, []
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            self._write(rows)
+            return
+        self._writing.append(rows)
+        previous = self._pending
+
+        async def write():
+            if previous is not None:
+                await previous
+            try:
+                await asyncio.to_thread(self._write, rows)
+            finally:
+                self._writing.remove(rows)
+
+        self._pending = asyncio.create_task(write())
+
+    def _write(self, rows: List[tuple]):
+        try:
+            self.store._write_results(rows)
+        except Exception as e:
+            self.failed += len(rows)
+            logger.error(f"扫描检查点写入失败 {self.job_id}（{len(rows)}条）: {e}")
+
+    async def flush(self):
+        """将缓冲的结果写入磁盘并等待后台写入完成"""
+        self._schedule_flush()
+        if self._pending is not None:
+            await self._pending
+            self._pending = None
+
+    def completed_ports(self, host: str) -> Set[int]:
+        """获取已完成探测的端口（含未刷盘部分）"""
+        ports = self.store.load_completed_ports(self.job_id, host)
+        for rows in self._writing + [self._buffer]:
+            ports.update(port for _, buffered_host, port, _ in rows if buffered_host == host)
+        return ports
+
+    async def finish(self, status: str):
+        """刷盘并更新任务状态"""
+        await self.flush()
+        await asyncio.to_thread(self.store.update_job_status, self.job_id, status)
+
+
+class ScanCheckpointStore:
+    """扫描检查点存储
+
+    使用SQLite WAL模式：写入只追加到WAL文件，synchronous=NORMAL下
+    每个批次只有一次顺序写，检查点开销远低于探测本身。
+    """
+
+    def __init__(self,
+                 path: Optional[str] = None,
+                 batch_size: int = 500,
+                 flush_interval: float = 2.0):
+        """初始化检查点存储
+
+        Args:
+            path: SQLite数据库文件路径，None表示禁用检查点
+            batch_size: 每批刷盘的结果数
+            flush_interval: 最长刷盘间隔（秒）
+        """
+        self.path: Optional[str] = None
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self.configure(path, batch_size, flush_interval)
+
+    @property
+    def enabled(self) -> bool:
+        """是否启用检查点"""
+        return self.path is not None
+
+    def configure(self,
+                  path: Optional[str],
+                  batch_size: Optional[int] = None,
+                  flush_interval: Optional[float] = None):
+        """更新存储配置（路径变化时重新打开数据库）"""
+        if batch_size is not None:
+            self.batch_size = max(1, int(batch_size))
+        if flush_interval is not None:
+            self.flush_interval = max(0.0, float(flush_interval))
+
+        if path != self.path:
+            self.close()
+            self.path = path or None
+
+    def _connection(self) -> sqlite3.Connection:
+        """获取数据库连接（首次使用时创建表结构）"""
+        if self._conn is None:
+            if not self.enabled:
+                raise RuntimeError("扫描检查点未启用")
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS scan_jobs (
+                    job_id TEXT PRIMARY KEY,
+                    params TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS scan_checkpoints (
+                    job_id TEXT NOT NULL,
+                    host TEXT NOT NULL,
+                    port INTEGER NOT NULL,
+                    result TEXT NOT NULL,
+                    PRIMARY KEY (job_id, host, port)
+                ) WITHOUT ROWID;
+            """)
+            self._conn = conn
+        return self._conn
+
+    def open_job(self, job_id: str, params: Dict[str, Any]) -> ScanCheckpoint:
+        """创建或重新打开扫描任务的检查点
+
+        Args:
+            job_id: 扫描任务ID
+            params: 恢复扫描所需的任务参数
+
+        Returns:
+            ScanCheckpoint: 任务检查点
+        """
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.execute(
+                    "INSERT INTO scan_jobs (job_id, params, status, created_at, updated_at) "
+                    "VALUES (?, ?, 'running', ?, ?) "
+                    "ON CONFLICT(job_id) DO UPDATE SET status='running', updated_at=excluded.updated_at",
+                    (job_id, json.dumps(params, ensure_ascii=False), now, now)
+                )
+        return ScanCheckpoint(self, job_id)
+
+    def _write_results(self, rows: List[tuple]):
+        """批量写入探测结果（单个事务）"""
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO scan_checkpoints (job_id, host, port, result) "
+                    "VALUES (?, ?, ?, ?)",
+                    rows
+                )
+
+    def update_job_status(self, job_id: str, status: str):
+        """更新任务状态"""
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.execute(
+                    "UPDATE scan_jobs SET status = ?, updated_at = ? WHERE job_id = ?",
+                    (status, time.time(), job_id)
+                )
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """获取任务信息"""
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT job_id, params, status, created_at, updated_at FROM scan_jobs WHERE job_id = ?",
+                (job_id,)
+            ).fetchone()
+        return self._job_from_row(row) if row else None
+
+    def list_jobs(self, resumable_only: bool = False) -> List[Dict[str, Any]]:
+        """列出检查点中的任务
+
+        Args:
+            resumable_only: 只列出未完成（可续扫）的任务
+        """
+        sql = "SELECT job_id, params, status, created_at, updated_at FROM scan_jobs"
+        if resumable_only:
+            sql += " WHERE status != 'completed'"
+        with self._lock:
+            rows = self._connection().execute(sql + " ORDER BY created_at").fetchall()
+        return [self._job_from_row(row) for row in rows]
+
+    @staticmethod
+    def _job_from_row(row: tuple) -> Dict[str, Any]:
+        """将数据库行转换为任务字典"""
+        job_id, params, status, created_at, updated_at = row
+        return {
+            "job_id": job_id,
+            "params": json.loads(params),
+            "status": status,
+            "created_at": created_at,
+            "updated_at": updated_at
+        }
+
+    def load_completed_ports(self, job_id: str, host: str) -> Set[int]:
+        """获取任务中某主机已完成探测的端口"""
+        with self._lock:
+            rows = self._connection().execute(
+                "SELECT port FROM scan_checkpoints WHERE job_id = ? AND host = ?",
+                (job_id, host)
+            ).fetchall()
+        return {port for (port,) in rows}
+
+    def load_results(self, job_id: str) -> List[Dict[str, Any]]:
+        """获取任务已记录的全部结果"""
+        with self._lock:
+            rows = self._connection().execute(
+                "SELECT result FROM scan_checkpoints WHERE job_id = ? ORDER BY host, port",
+                (job_id,)
+            ).fetchall()
+        return [json.loads(result) for (result,) in rows]
+
+    def delete_job(self, job_id: str):
+        """删除任务及其检查点"""
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.execute("DELETE FROM scan_checkpoints WHERE job_id = ?", (job_id,))
+                conn.execute("DELETE FROM scan_jobs WHERE job_id = ?", (job_id,))
+
+    def close(self):
+        """关闭数据库连接"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+# 全局检查点存储（默认禁用，由应用启动时根据配置设置路径）
+scan_checkpoint_store = ScanCheckpointStore()
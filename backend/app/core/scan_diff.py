@@ -0,0 +1,131 @@
+"""
+---------------------------------------------------------------
+File name:                  scan_diff.py
+Author:                     Ignorant-lu
+Date created:               2026/10/19
+Description:                扫描结果差异比较，基于有序条目的归并连接
+----------------------------------------------------------------
+
+Changed history:
+                            2026/10/19: 初始创建;
+----
+"""
+
+from typing import Dict, List, Any, Optional, Iterable, Iterator, Tuple
+
+
+# 有序条目: (主机, 端口, 协议, 状态, 服务)
+Entry = Tuple[str, int, str, str, Optional[str]]
+
+# 能确定端口状态的结果（超时/错误不能说明端口已关闭）
+CONCLUSIVE_STATUSES = frozenset({"open", "closed", "filtered"})
+
+
+def sorted_entries(results: Iterable[Dict[str, Any]]) -> List[Entry]:
+    """把扫描结果字典转换为按(主机, 端口, 协议)排序的唯一条目
+
+    同一端口出现多次时以最后一次结果为准。
+    兼容引擎结果(host/service_name)与后台任务结果(target/service)。
+    """
+    latest: Dict[Tuple[str, int, str], Tuple[str, Optional[str]]] = {}
+    for result in results:
+        key = (
+            result.get("host") or result.get("target"),
+            int(result["port"]),
+            result.get("protocol") or "tcp"
+        )
+        latest[key] = (
+            result.get("status"),
+            result.get("service_name") or result.get("service") or None
+        )
+    return [key + value for key, value in sorted(latest.items())]
+
+
+def _unique(entries: Iterable[Entry]) -> Iterator[Entry]:
+    """合并有序输入中相邻的重复键（保留最后一条）"""
+    previous: Optional[Entry] = None
+    for entry in entries:
+        if previous is not None and entry[:3] != previous[:3]:
+            yield previous
+        previous = entry
+    if previous is not None:
+        yield previous
+
+
+def _change(entry_before: Optional[Entry], entry_after: Optional[Entry]) -> Dict[str, Any]:
+    """构造变化记录"""
+    entry = entry_after or entry_before
+    return {
+        "host": entry[0],
+        "port": entry[1],
+        "protocol": entry[2],
+        "before": {"status": entry_before[3], "service": entry_before[4]} if entry_before else None,
+        "after": {"status": entry_after[3], "service": entry_after[4]} if entry_after else None
+    }
+
+
+def diff_entries(base: Iterable[Entry],
+                 target: Iterable[Entry],
+                 limit: Optional[int] = None) -> Dict[str, Any]:
+    """比较两组有序条目
+
+    两个输入都必须按(主机, 端口, 协议)升序排列，单次归并遍历，
+    时间与条目数成线性、内存与输入规模无关（只保留前limit条变化明细）。
+
+    Args:
+        base: 基准扫描条目
+        target: 对比扫描条目
+        limit: 每类变化最多返回的明细条数，None表示不限
+
+    Returns:
+        opened/closed/service_changed/unverified变化明细及各类计数
+    """
+    changes: Dict[str, List[Dict[str, Any]]] = {
+        "opened": [], "closed": [], "service_changed": [], "unverified": []
+    }
+    counts = {name: 0 for name in changes}
+    counts.update({"compared": 0, "unchanged": 0, "base_only": 0, "target_only": 0})
+
+    def record(kind: str, before: Optional[Entry], after: Optional[Entry]):
+        counts[kind] += 1
+        if limit is None or len(changes[kind]) < limit:
+            changes[kind].append(_change(before, after))
+
+    base_iter, target_iter = _unique(base), _unique(target)
+    old = next(base_iter, None)
+    new = next(target_iter, None)
+    while old is not None or new is not None:
+        if new is None or (old is not None and old[:3] < new[:3]):
+            # 本次未扫描到，开放端口无法确认是否仍开放
+            counts["base_only"] += 1
+            if old[3] == "open":
+                record("unverified", old, None)
+            old = next(base_iter, None)
+            continue
+
+        if old is None or new[:3] < old[:3]:
+            counts["target_only"] += 1
+            if new[3] == "open":
+                record("opened", None, new)
+            new = next(target_iter, None)
+            continue
+
+        counts["compared"] += 1
+        was_open, is_open = old[3] == "open", new[3] == "open"
+        if is_open and not was_open:
+            record("opened", old, new)
+        elif was_open and not is_open:
+            if new[3] in CONCLUSIVE_STATUSES:
+                record("closed", old, new)
+            else:
+                record("unverified", old, new)
+        elif is_open and old[4] and new[4] and old[4] != new[4]:
+            record("service_changed", old, new)
+        else:
+            counts["unchanged"] += 1
+        old = next(base_iter, None)
+        new = next(target_iter, None)
+
+    return {**changes, "counts": counts, "truncated": any(
+        counts[kind] > len(changes[kind]) for kind in changes
+    )}
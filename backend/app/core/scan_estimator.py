@@ -0,0 +1,225 @@
+"""
+---------------------------------------------------------------
+File name:                  scan_estimator.py
+Author:                     Ignorant-lu
+Date created:               2026/10/19
+Description:                扫描耗时估计，按目标RTT/超时模型、并发窗口与速率限制预测耗时并在运行中更新剩余时间
+----------------------------------------------------------------
+
+Changed history:
+                            2026/10/19: 初始创建;
+----
+"""
+
+import time
+import itertools
+from collections import OrderedDict
+from dataclasses import dataclass, asdict
+from typing import Dict, Any, Optional, Iterable
+
+
+# 没有任何观测数据时假定的往返时间（秒）与有响应（开放/关闭）的探测比例
+DEFAULT_RTT = 0.05
+DEFAULT_RESPONSE_RATIO = 0.5
+
+# 估计多目标任务时最多参考的目标数
+SAMPLE_HOSTS = 256
+
+
+class _HostTiming:
+    """单个目标的往返时间与响应比例（指数加权平均）"""
+
+    __slots__ = ("rtt", "response_ratio", "samples")
+
+    def __init__(self, rtt: float, response_ratio: float):
+        self.rtt = rtt
+        self.response_ratio = response_ratio
+        self.samples = 0
+
+
+class ProbeTimingModel:
+    """探测耗时模型
+
+    有响应的探测（开放或被拒绝）耗时约为一个RTT，无响应的探测耗时为超时时间。
+    按目标记录RTT与响应比例，单次探测的期望耗时为
+    响应比例 × RTT + (1 - 响应比例) × 超时；未观测过的目标使用全部目标的平均值。
+    """
+
+    # 按目标记录的上限，超出后淘汰最久未使用的目标
+    MAX_HOSTS = 4096
+
+    def __init__(self, alpha: float = 0.2):
+        """初始化耗时模型
+
+        Args:
+            alpha: 指数加权平均的新样本权重
+        """
+        self.alpha = alpha
+        self._hosts: "OrderedDict[str, _HostTiming]" = OrderedDict()
+        self._overall = _HostTiming(DEFAULT_RTT, DEFAULT_RESPONSE_RATIO)
+
+    def _update(self, timing: _HostTiming, elapsed: float, responded: bool):
+        # 前几个样本按算术平均，避免初始假定值长时间占主导
+        timing.samples += 1
+        alpha = max(self.alpha, 1.0 / timing.samples)
+        timing.response_ratio += alpha * ((1.0 if responded else 0.0) - timing.response_ratio)
+        if responded:
+            timing.rtt += alpha * (elapsed - timing.rtt)
+
+    def observe(self, host: str, elapsed: float, responded: bool):
+        """记录一次探测
+
+        Args:
+            host: 目标主机
+            elapsed: 探测耗时（秒）
+            responded: 是否收到响应（开放或关闭）
+        """
+        timing = self._hosts.get(host)
+        if timing is None:
+            timing = self._hosts[host] = _HostTiming(self._overall.rtt, self._overall.response_ratio)
+            if len(self._hosts) > self.MAX_HOSTS:
+                self._hosts.popitem(last=False)
+        else:
+            self._hosts.move_to_end(host)
+        self._update(timing, elapsed, responded)
+        self._update(self._overall, elapsed, responded)
+
+    def expected_probe_time(self, host: Optional[str], timeout: float) -> float:
+        """单次探测的期望耗时（秒）"""
+        timing = self._hosts.get(host) if host is not None else None
+        if timing is None:
+            timing = self._overall
+        rtt = min(timing.rtt, timeout)
+        return timing.response_ratio * rtt + (1.0 - timing.response_ratio) * timeout
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """获取耗时模型统计信息"""
+        return {
+            "hosts": len(self._hosts),
+            "samples": self._overall.samples,
+            "rtt": round(self._overall.rtt, 6),
+            "response_ratio": round(self._overall.response_ratio, 4)
+        }
+
+
+@dataclass
+class ScanEstimate:
+    """扫描耗时估计"""
+    probes: int
+    concurrency: int
+    probe_time: float
+    throughput: float
+    duration: float
+    limited_by: str
+    deadline: Optional[float] = None
+
+    def as_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def estimate_scan(probes: int,
+                  hosts: Iterable[str],
+                  timeout: float,
+                  concurrency: int,
+                  job_rate: float = 0.0,
+                  target_rate: float = 0.0,
+                  global_rate: float = 0.0,
+                  host_count: Optional[int] = None,
+                  deadline: Optional[float] = None,
+                  model: Optional[ProbeTimingModel] = None) -> ScanEstimate:
+    """开始前估计扫描耗时
+
+    吞吐量取并发窗口（并发数 / 单次探测期望耗时）与各层速率限制中的最小值，
+    耗时 = 探测数 / 吞吐量，设置了截止时间时不超过截止时间。
+
+    Args:
+        probes: 计划探测数
+        hosts: 扫描目标（最多参考SAMPLE_HOSTS个）
+        timeout: 单次探测超时（秒）
+        concurrency: 同时进行的探测数
+        job_rate: 任务速率上限(包/秒)，<=0表示不限速
+        target_rate: 单目标速率上限(包/秒)，<=0表示不限速
+        global_rate: 全局速率上限(包/秒)，<=0表示不限速
+        host_count: 目标总数（用于单目标限速的合计），None表示按参考的目标数
+        deadline: 扫描时间预算（秒）
+        model: 探测耗时模型，None表示使用进程共享的模型
+
+    Returns:
+        ScanEstimate: 耗时估计
+    """
+    model = model or probe_timing_model
+    sample = list(itertools.islice(hosts, SAMPLE_HOSTS)) or [None]
+    probe_time = sum(model.expected_probe_time(host, timeout) for host in sample) / len(sample)
+    concurrency = max(1, int(concurrency))
+
+    throughput = concurrency / max(probe_time, 1e-6)
+    limited_by = "concurrency"
+    if target_rate > 0:
+        target_rate *= host_count if host_count is not None else len(sample)
+    for name, rate in (("job_rate", job_rate), ("target_rate", target_rate), ("global_rate", global_rate)):
+        if 0 < rate < throughput:
+            throughput, limited_by = rate, name
+
+    duration = probes / throughput
+    if deadline is not None and duration > deadline:
+        duration, limited_by = deadline, "deadline"
+    return ScanEstimate(
+        probes=probes,
+        concurrency=concurrency,
+        probe_time=round(probe_time, 6),
+        throughput=round(throughput, 3),
+        duration=round(duration, 2),
+        limited_by=limited_by,
+        deadline=deadline
+    )
+
+
+class ScanProgress:
+    """扫描进度与剩余时间
+
+    刚开始时按估计的吞吐量计算剩余时间，完成的探测增多后逐步改用实际吞吐量；
+    完成约两个并发窗口的探测后完全按实际吞吐量计算。
+    """
+
+    def __init__(self, total: int, estimate: ScanEstimate, completed: int = 0):
+        """初始化扫描进度
+
+        Args:
+            total: 总探测数（含续扫前已完成的部分）
+            estimate: 开始前的耗时估计
+            completed: 已完成的探测数（续扫时不计入实际吞吐量）
+        """
+        self.total = total
+        self.estimate = estimate
+        self.completed = completed
+        self._baseline = completed
+        self._warmup = max(20, 2 * estimate.concurrency)
+        self.started_at = time.monotonic()
+
+    def update(self, completed: int) -> float:
+        """更新已完成的探测数
+
+        Returns:
+            预计剩余时间（秒）
+        """
+        self.completed = completed
+        return self.eta()
+
+    def eta(self) -> float:
+        """预计剩余时间（秒）"""
+        remaining = max(0, self.total - self.completed)
+        if remaining == 0:
+            return 0.0
+        elapsed = time.monotonic() - self.started_at
+        eta = remaining / self.estimate.throughput
+        done = self.completed - self._baseline
+        if done > 0 and elapsed > 0:
+            weight = min(1.0, done / self._warmup)
+            eta = weight * remaining * elapsed / done + (1.0 - weight) * eta
+        if self.estimate.deadline is not None:
+            eta = min(eta, max(0.0, self.estimate.deadline - elapsed))
+        return round(eta, 2)
+
+
+# 进程共享的探测耗时模型（扫描引擎记录实际探测，估计时参考）
+probe_timing_model = ProbeTimingModel()
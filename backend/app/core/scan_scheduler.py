@@ -0,0 +1,451 @@
+"""
+---------------------------------------------------------------
+File name:                  scan_scheduler.py
+Author:                     Ignorant-lu
+Date created:               2026/10/19
+Description:                周期扫描调度，按主机历史生成增量探测计划
+----------------------------------------------------------------
+
+Changed history:
+                            2026/10/19: 初始创建;
+                            2026/10/19: 每轮由固定数量的工作协程拉取目标，端口计划分批探测;
+                            2026/10/19: 周期任务记录创建它的客户端，每轮扫描按该客户端分配探测额度;
+                            2026/10/19: 某个工作协程失败时取消并等待其他工作协程，避免与下一轮重叠;
+----
+"""
+
+import time
+import uuid
+import asyncio
+import logging
+import itertools
+import contextvars
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Dict, List, Any, Optional, Callable, Set, Tuple
+
+from .port_set import PortSet
+from .probe_scheduler import current_client
+from .target_spec import TargetSpec
+
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+
+class CronSchedule:
+    """五段式cron表达式（分 时 日 月 周）
+
+    支持 *、数字、a-b 范围、逗号列表和 /n 步长；周字段0表示周日。
+    """
+
+    FIELD_RANGES = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 6))
+
+    def __init__(self, expression: str):
+        parts = expression.split()
+        if len(parts) != 5:
+            raise ValueError(f"cron表达式必须包含5个字段: {expression}")
+        self.expression = expression
+        self.minutes, self.hours, self.days, self.months, self.weekdays = (
+            self._parse_field(part, low, high)
+            for part, (low, high) in zip(parts, self.FIELD_RANGES)
+        )
+        # 日和周同时受限时，满足任一即可（与标准cron一致）
+        self._day_or_weekday = parts[2] != "*" and parts[4] != "*"
+
+    @staticmethod
+    def _parse_field(field: str, low: int, high: int) -> Set[int]:
+        values: Set[int] = set()
+        for part in field.split(","):
+            base, _, step_text = part.partition("/")
+            step = int(step_text) if step_text else 1
+            if base == "*":
+                start, end = low, high
+            elif "-" in base:
+                start, end = (int(value) for value in base.split("-", 1))
+            else:
+                start = int(base)
+                end = high if step_text else start
+            if not (low <= start <= end <= high) or step < 1:
+                raise ValueError(f"无效的cron字段: {field}")
+            values.update(range(start, end + 1, step))
+        return values
+
+    def _day_matches(self, moment: datetime) -> bool:
+        day_ok = moment.day in self.days
+        weekday_ok = (moment.weekday() + 1) % 7 in self.weekdays
+        return (day_ok or weekday_ok) if self._day_or_weekday else (day_ok and weekday_ok)
+
+    def next_after(self, timestamp: float) -> float:
+        """计算timestamp之后的下一个触发时间（本地时间）"""
+        moment = datetime.fromtimestamp(timestamp).replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = moment + timedelta(days=366 * 4)
+        while moment < limit:
+            if moment.month not in self.months:
+                month = moment.month % 12 + 1
+                moment = moment.replace(
+                    year=moment.year + (month == 1), month=month, day=1, hour=0, minute=0
+                )
+                continue
+            if not self._day_matches(moment):
+                moment = (moment + timedelta(days=1)).replace(hour=0, minute=0)
+                continue
+            if moment.hour not in self.hours:
+                moment = (moment + timedelta(hours=1)).replace(minute=0)
+                continue
+            if moment.minute not in self.minutes:
+                moment += timedelta(minutes=1)
+                continue
+            return moment.timestamp()
+        raise ValueError(f"cron表达式没有可触发的时间: {self.expression}")
+
+
+class HostHistory:
+    """单个主机的扫描历史
+
+    只记录开放端口和最近状态变化过的端口，其余端口视为"稳定关闭区间"，
+    作为一个整体按指数退避降低重扫频率，历史大小与主机的开放端口数成正比。
+    """
+
+    __slots__ = ("open_ports", "volatile_ports", "rest_last_run", "rest_interval", "last_seen")
+
+    def __init__(self):
+        # 端口 -> 最近一次状态变化的轮次
+        self.open_ports: Dict[int, int] = {}
+        self.volatile_ports: Dict[int, int] = {}
+        self.rest_last_run = 0
+        self.rest_interval = 1
+        self.last_seen: Optional[float] = None
+
+    def plan(self, ports: PortSet, run: int) -> Tuple[PortSet, bool]:
+        """生成本轮探测计划
+
+        Returns:
+            (本轮探测的端口集合, 是否包含稳定关闭区间)
+        """
+        if self.rest_last_run == 0 or run - self.rest_last_run >= self.rest_interval:
+            return ports, True
+        known = PortSet.from_ports(list(self.open_ports) + list(self.volatile_ports))
+        return known & ports, False
+
+    def observe(self,
+                host: str,
+                run: int,
+                results: List[Dict[str, Any]],
+                full: bool,
+                max_backoff: int,
+                volatile_runs: int) -> List[Dict[str, Any]]:
+        """用本轮结果更新历史
+
+        Returns:
+            端口状态变化列表
+        """
+        changes = []
+        rest_changed = False
+        for result in results:
+            port, status = result["port"], result.get("status")
+            if status == "open":
+                if port not in self.open_ports:
+                    if port not in self.volatile_ports:
+                        rest_changed = True
+                    self.open_ports[port] = run
+                    self.volatile_ports.pop(port, None)
+                    changes.append({"host": host, "port": port, "change": "opened"})
+            elif status in ("closed", "filtered"):
+                if port in self.open_ports:
+                    del self.open_ports[port]
+                    self.volatile_ports[port] = run
+                    changes.append({"host": host, "port": port, "change": "closed"})
+
+        # 一段时间内没有再变化的端口回到稳定区间
+        for port, changed_at in list(self.volatile_ports.items()):
+            if run - changed_at >= volatile_runs:
+                del self.volatile_ports[port]
+
+        if full:
+            self.rest_last_run = run
+            self.rest_interval = 1 if rest_changed else min(max_backoff, self.rest_interval * 2)
+        self.last_seen = time.time()
+        return changes
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "open_ports": sorted(self.open_ports),
+            "volatile_ports": sorted(self.volatile_ports),
+            "rest_last_run": self.rest_last_run,
+            "rest_interval_runs": self.rest_interval,
+            "last_seen": self.last_seen
+        }
+
+
+class ScanSchedule:
+    """周期扫描任务"""
+
+    def __init__(self,
+                 target: str,
+                 ports: str,
+                 interval_seconds: Optional[float] = None,
+                 cron: Optional[str] = None,
+                 protocol: str = "tcp",
+                 name: Optional[str] = None,
+                 max_backoff_runs: int = 16,
+                 volatile_runs: int = 3,
+                 scan_options: Optional[Dict[str, Any]] = None,
+                 schedule_id: Optional[str] = None,
+                 client: Optional[str] = None):
+        """初始化周期扫描任务
+
+        Args:
+            target: 目标规格（CIDR、地址范围、主机名，支持排除项）
+            ports: 端口范围表达式
+            interval_seconds: 固定间隔（秒），与cron二选一
+            cron: cron表达式
+            protocol: 扫描协议
+            name: 任务名称
+            max_backoff_runs: 稳定关闭区间最多间隔的轮数
+            volatile_runs: 状态变化后的端口保持每轮重扫的轮数
+            scan_options: 传给扫描引擎的参数
+            schedule_id: 任务ID
+            client: 创建任务的客户端，每轮扫描的探测额度记在该客户端名下
+        """
+        if (interval_seconds is None) == (cron is None):
+            raise ValueError("interval_seconds和cron必须且只能指定一个")
+        self.schedule_id = schedule_id or str(uuid.uuid4())
+        self.name = name or self.schedule_id
+        self.target = target
+        self.targets = TargetSpec.parse(target)
+        self.ports = PortSet.parse(ports)
+        self.interval_seconds = interval_seconds
+        self.cron = CronSchedule(cron) if cron else None
+        self.protocol = protocol
+        self.max_backoff_runs = max(1, max_backoff_runs)
+        self.volatile_runs = max(1, volatile_runs)
+        self.scan_options = scan_options or {}
+        self.client = client
+
+        self.enabled = True
+        self.running = False
+        self.run_count = 0
+        self.next_run_at = self._next_after(time.time(), first=True)
+        self.runs: deque = deque(maxlen=20)
+        self.hosts: Dict[str, HostHistory] = {}
+
+    def _next_after(self, timestamp: float, first: bool = False) -> float:
+        if self.cron is not None:
+            return self.cron.next_after(timestamp)
+        return timestamp if first else timestamp + self.interval_seconds
+
+    def next_run_after(self, started_at: float) -> float:
+        """一轮结束后的下一次触发时间（固定间隔从本轮开始计算，超时的轮次不补跑）"""
+        now = time.time()
+        if self.cron is not None:
+            return self.cron.next_after(now)
+        return max(started_at + self.interval_seconds, now)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "schedule_id": self.schedule_id,
+            "name": self.name,
+            "target": self.target,
+            "ports": str(self.ports),
+            "protocol": self.protocol,
+            "interval_seconds": self.interval_seconds,
+            "cron": self.cron.expression if self.cron else None,
+            "enabled": self.enabled,
+            "running": self.running,
+            "run_count": self.run_count,
+            "next_run_at": self.next_run_at,
+            "hosts_tracked": len(self.hosts),
+            "last_run": self.runs[-1] if self.runs else None
+        }
+
+
+class ScanScheduler:
+    """周期扫描调度器
+
+    每轮按主机历史只探测开放端口、近期变化的端口，以及到期的稳定关闭区间；
+    稳定关闭区间每次无变化时重扫间隔翻倍（上限max_backoff_runs轮），
+    发现新开放端口时恢复为每轮扫描。
+    """
+
+    # 同时扫描的主机数
+    HOST_CONCURRENCY = 32
+
+    # 单台主机每次交给扫描引擎的端口数（限制同时存在的探测协程数）
+    PORT_BATCH_SIZE = 1024
+
+    # 调度循环最长休眠时间（秒）
+    MAX_SLEEP = 60.0
+
+    def __init__(self):
+        self.schedules: Dict[str, ScanSchedule] = {}
+        self.scanner_factory: Optional[Callable[..., Any]] = None
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._running_runs: Set[asyncio.Task] = set()
+
+    @property
+    def started(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self, scanner_factory: Callable[..., Any]):
+        """启动调度循环（已启动时只更新扫描引擎工厂）
+
+        Args:
+            scanner_factory: 以扫描参数创建扫描引擎的函数
+        """
+        self.scanner_factory = scanner_factory
+        if not self.started:
+            self._wakeup = asyncio.Event()
+            # 在空白上下文中运行，不继承首个添加任务的请求的上下文（如客户端标识）
+            self._task = asyncio.create_task(self._loop(), context=contextvars.Context())
+            logger.info("周期扫描调度器已启动")
+
+    async def stop(self):
+        """停止调度循环和进行中的扫描"""
+        tasks = list(self._running_runs)
+        if self._task is not None:
+            tasks.append(self._task)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._task = None
+        self._running_runs.clear()
+
+    def add(self, schedule: ScanSchedule) -> ScanSchedule:
+        """添加周期扫描任务"""
+        self.schedules[schedule.schedule_id] = schedule
+        self._wake()
+        return schedule
+
+    def remove(self, schedule_id: str) -> bool:
+        """删除周期扫描任务"""
+        return self.schedules.pop(schedule_id, None) is not None
+
+    def trigger(self, schedule_id: str) -> bool:
+        """立即执行一次（正在运行时忽略）"""
+        schedule = self.schedules.get(schedule_id)
+        if schedule is None or schedule.running:
+            return False
+        schedule.next_run_at = time.time()
+        self._wake()
+        return True
+
+    def _wake(self):
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _loop(self):
+        """调度循环"""
+        while True:
+            now = time.time()
+            for schedule in list(self.schedules.values()):
+                if schedule.enabled and not schedule.running and schedule.next_run_at <= now:
+                    schedule.running = True
+                    task = asyncio.create_task(self._run_guarded(schedule))
+                    self._running_runs.add(task)
+                    task.add_done_callback(self._running_runs.discard)
+
+            pending = [
+                s.next_run_at for s in self.schedules.values() if s.enabled and not s.running
+            ]
+            delay = min(pending, default=now + self.MAX_SLEEP) - time.time()
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=min(max(delay, 0.01), self.MAX_SLEEP))
+            except asyncio.TimeoutError:
+                pass
+
+    async def _run_guarded(self, schedule: ScanSchedule):
+        """执行一轮并计算下一次触发时间"""
+        started_at = time.time()
+        try:
+            await self.run_once(schedule)
+        except Exception as e:
+            logger.error(f"周期扫描 {schedule.name} 执行失败: {e}")
+        finally:
+            schedule.running = False
+            schedule.next_run_at = schedule.next_run_after(started_at)
+            self._wake()
+
+    async def run_once(self, schedule: ScanSchedule) -> Dict[str, Any]:
+        """按增量计划执行一轮扫描（以创建任务的客户端身份）
+
+        Returns:
+            本轮执行摘要
+        """
+        token = current_client.set(schedule.client)
+        try:
+            return await self._run(schedule)
+        finally:
+            current_client.reset(token)
+
+    async def _run(self, schedule: ScanSchedule) -> Dict[str, Any]:
+        schedule.run_count += 1
+        run = schedule.run_count
+        factory = self.scanner_factory
+        if factory is None:
+            raise RuntimeError("扫描调度器未设置扫描引擎工厂")
+        scanner = factory(**schedule.scan_options)
+
+        summary = {
+            "run": run,
+            "started_at": time.time(),
+            "finished_at": None,
+            "hosts": 0,
+            "probes": 0,
+            "full_probes": 0,
+            "full_range_hosts": 0,
+            "changes": 0,
+            "change_details": []
+        }
+        async def scan_host(host: str):
+            history = schedule.hosts.setdefault(host, HostHistory())
+            plan, full = history.plan(schedule.ports, run)
+            summary["hosts"] += 1
+            summary["probes"] += len(plan)
+            summary["full_probes"] += len(schedule.ports)
+            summary["full_range_hosts"] += int(full)
+            results = []
+            ports = iter(plan)
+            while True:
+                batch = list(itertools.islice(ports, self.PORT_BATCH_SIZE))
+                if not batch:
+                    break
+                results.extend(await scanner.scan_ports(host, batch, schedule.protocol))
+            changes = history.observe(
+                host, run, results, full, schedule.max_backoff_runs, schedule.volatile_runs
+            )
+            summary["changes"] += len(changes)
+            summary["change_details"].extend(changes[:100 - len(summary["change_details"])])
+
+        # 固定数量的工作协程从同一个目标迭代器中依次取主机，不为每个目标预先创建协程
+        targets = schedule.targets.iterate()
+
+        async def worker():
+            for host in targets:
+                await scan_host(host)
+
+        # 任一工作协程失败时其余协程被取消并等待结束后才返回，本轮不会在下一轮开始后继续探测
+        workers = min(self.HOST_CONCURRENCY, len(schedule.targets))
+        try:
+            async with asyncio.TaskGroup() as group:
+                for _ in range(workers):
+                    group.create_task(worker())
+        except ExceptionGroup as e:
+            raise e.exceptions[0]
+
+        summary["finished_at"] = time.time()
+        summary["probe_savings"] = (
+            1 - summary["probes"] / summary["full_probes"] if summary["full_probes"] else 0.0
+        )
+        schedule.runs.append(summary)
+        logger.info(
+            f"周期扫描 {schedule.name} 第{run}轮完成: 探测 {summary['probes']}/{summary['full_probes']}，"
+            f"变化 {summary['changes']}"
+        )
+        return summary
+
+
+# 全局周期扫描调度器（创建第一个周期任务时启动）
+scan_scheduler = ScanScheduler()
@@ -0,0 +1,230 @@
+"""
+---------------------------------------------------------------
+File name:                  service_fingerprint.py
+Author:                     Ignorant-lu
+Date created:               2026/10/19
+Description:                服务指纹识别，探测载荷库与预编译的签名匹配
+----------------------------------------------------------------
+
+Changed history:
+                            2026/10/19: 初始创建;
+----
+"""
+
+import hashlib
+import os
+import re
+import struct
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Any, List, Optional, Tuple, Hashable
+
+
+@dataclass(frozen=True)
+class ServiceProbe:
+    """主动探测载荷"""
+    name: str
+    payload: bytes
+    ports: Tuple[int, ...] = ()
+
+
+@dataclass(frozen=True)
+class Signature:
+    """服务签名
+
+    pattern中的第一个捕获组（如果有）作为版本/产品信息。
+    """
+    name: str
+    service: str
+    pattern: str
+
+
+@dataclass(frozen=True)
+class Fingerprint:
+    """指纹识别结果"""
+    service: Optional[str]
+    version: Optional[str] = None
+    signature: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"service": self.service, "version": self.version, "signature": self.signature}
+
+
+def _build_tls_client_hello() -> bytes:
+    """构造最小的TLS 1.2 ClientHello（无扩展）
+
+    不支持的服务端也会回复Alert记录，同样可以识别为TLS。
+    """
+    cipher_suites = [0xc02f, 0xc030, 0xc02b, 0xc02c, 0x009c, 0x009d, 0x002f, 0x0035]
+    body = (
+        b"\x03\x03"
+        + os.urandom(32)
+        + b"\x00"
+        + struct.pack("!H", len(cipher_suites) * 2)
+        + b"".join(struct.pack("!H", suite) for suite in cipher_suites)
+        + b"\x01\x00"
+    )
+    handshake = b"\x01" + struct.pack("!I", len(body))[1:] + body
+    return b"\x16\x03\x01" + struct.pack("!H", len(handshake)) + handshake
+
+
+# 探测载荷库（按端口选择，服务端先发言的协议使用空载荷）
+DEFAULT_PROBES: Tuple[ServiceProbe, ...] = (
+    ServiceProbe("http-head", b"HEAD / HTTP/1.0\r\n\r\n",
+                 (80, 81, 3000, 5000, 8000, 8008, 8080, 8081, 8888, 9000)),
+    ServiceProbe("tls-client-hello", _build_tls_client_hello(),
+                 (443, 465, 636, 853, 993, 995, 5986, 8443, 9443)),
+    ServiceProbe("ssh", b"SSH-2.0-NetworkTool\r\n", (22, 2222)),
+    ServiceProbe("smtp-ehlo", b"EHLO network-tool\r\n", (25, 465, 587)),
+    ServiceProbe("redis-ping", b"*1\r\n$4\r\nPING\r\n", (6379,)),
+    ServiceProbe("generic-lines", b"\r\n\r\n"),
+)
+
+
+# 签名库：同一服务更具体的签名排在前面
+DEFAULT_SIGNATURES: Tuple[Signature, ...] = (
+    Signature("ssh", "ssh", r"SSH-[\d.]+-([^\s]+)"),
+    Signature("vsftpd", "ftp", r"220[ -]\((vsFTPd [\w.]+)\)"),
+    Signature("ftp", "ftp", r"220[ -][^\r\n]*?(ProFTPD [\w.]+|FileZilla Server[^\r\n]*|FTP)"),
+    Signature("smtp-product", "smtp", r"220[ -][^\r\n]*?(Postfix|Exim [\w.]+|Sendmail[^;\r\n]*)"),
+    Signature("smtp", "smtp", r"220[ -][^\r\n]*?E?SMTP()"),
+    Signature("pop3", "pop3", r"\+OK[^\r\n]*?(Dovecot|POP3|ready)"),
+    Signature("imap", "imap", r"\* OK[^\r\n]*?(Dovecot|IMAP4rev1|IMAP)"),
+    Signature("http-server", "http", r"HTTP/[\d.]+ \d{3}[\s\S]*?\r?\n[Ss]erver: *([^\r\n]+)"),
+    Signature("http", "http", r"HTTP/([\d.]+) \d{3}"),
+    Signature("redis", "redis", r"(?:\+PONG|-NOAUTH |-DENIED Redis)()"),
+    Signature("mysql", "mysql", r"[\s\S]{1,4}\n(\d+\.\d+\.\d+[\w.-]*)\x00"),
+    Signature("vnc", "vnc", r"RFB (\d{3}\.\d{3})"),
+    Signature("tls", "tls", r"[\x15\x16]\x03[\x00-\x04]()"),
+)
+
+
+class SignatureDatabase:
+    """预编译的签名库
+
+    所有签名合并为一个带命名分组的正则（s0|s1|...），
+    每个banner只需一次匹配，通过命中的分组名定位签名。
+    """
+
+    def __init__(self, signatures: Tuple[Signature, ...] = DEFAULT_SIGNATURES):
+        self.signatures = tuple(signatures)
+        parts = []
+        # 每个签名第一个内部捕获组在合并正则中的编号
+        self._version_groups: Dict[str, Optional[int]] = {}
+        group = 0
+        for index, signature in enumerate(self.signatures):
+            inner_groups = re.compile(signature.pattern).groups
+            key = f"s{index}"
+            group += 1
+            self._version_groups[key] = group + 1 if inner_groups else None
+            group += inner_groups
+            parts.append(f"(?P<{key}>{signature.pattern})")
+        self._pattern = re.compile("|".join(parts))
+
+    def match(self, banner: str) -> Optional[Fingerprint]:
+        """单次匹配banner
+
+        Args:
+            banner: 服务banner
+
+        Returns:
+            Fingerprint，无匹配时返回None
+        """
+        if not banner:
+            return None
+        match = self._pattern.match(banner)
+        if match is None:
+            return None
+        key = match.lastgroup
+        signature = self.signatures[int(key[1:])]
+        version_group = self._version_groups[key]
+        version = match.group(version_group) if version_group else None
+        return Fingerprint(signature.service, (version or "").strip() or None, signature.name)
+
+
+class ServiceFingerprinter:
+    """服务指纹识别器
+
+    识别结果按(host, port, banner哈希)缓存，大量开放端口重复出现
+    相同banner时不重复匹配。
+    """
+
+    def __init__(self,
+                 database: Optional[SignatureDatabase] = None,
+                 probes: Tuple[ServiceProbe, ...] = DEFAULT_PROBES,
+                 max_entries: int = 10000):
+        """初始化指纹识别器
+
+        Args:
+            database: 签名库，None时使用默认签名库
+            probes: 主动探测载荷库
+            max_entries: 结果缓存最大条目数
+        """
+        self.database = database or SignatureDatabase()
+        self.probes = tuple(probes)
+        self.max_entries = max_entries
+        self._cache: "OrderedDict[Hashable, Optional[Fingerprint]]" = OrderedDict()
+
+        self._port_probes: Dict[int, List[ServiceProbe]] = {}
+        self._fallback_probes: List[ServiceProbe] = []
+        for probe in self.probes:
+            if not probe.ports:
+                self._fallback_probes.append(probe)
+            for port in probe.ports:
+                self._port_probes.setdefault(port, []).append(probe)
+
+        self.hits = 0
+        self.misses = 0
+
+    def probes_for(self, port: int) -> List[ServiceProbe]:
+        """获取端口适用的探测载荷（端口专用的在前）"""
+        return self._port_probes.get(port, []) + self._fallback_probes
+
+    def match(self, banner: Optional[str]) -> Optional[Fingerprint]:
+        """匹配banner（不使用缓存）"""
+        return self.database.match(banner) if banner else None
+
+    def fingerprint(self, host: str, port: int, banner: Optional[str]) -> Optional[Fingerprint]:
+        """识别服务指纹（带缓存）
+
+        Args:
+            host: 目标主机
+            port: 目标端口
+            banner: 服务banner
+
+        Returns:
+            Fingerprint，无法识别时返回None
+        """
+        if not banner:
+            return None
+        digest = hashlib.blake2b(banner.encode("utf-8", errors="ignore"), digest_size=8).digest()
+        key = (host, port, digest)
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return self._cache[key]
+
+        self.misses += 1
+        result = self.database.match(banner)
+        self._cache[key] = result
+        while len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+        return result
+
+    def clear(self):
+        """清空缓存"""
+        self._cache.clear()
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """获取识别统计信息"""
+        return {
+            "signatures": len(self.database.signatures),
+            "probes": len(self.probes),
+            "cache_entries": len(self._cache),
+            "cache_hits": self.hits,
+            "cache_misses": self.misses
+        }
+
+
+# 全局指纹识别器（导入时编译签名库）
+service_fingerprinter = ServiceFingerprinter()
@@ -0,0 +1,210 @@
+"""
+---------------------------------------------------------------
+File name:                  source_pool.py
+Author:                     Ignorant-lu
+Date created:               2026/10/19
+Description:                扫描源地址池，连接探测分散到多个源地址，延迟分配源端口，关闭时发送RST避免TIME_WAIT
+----------------------------------------------------------------
+
+Changed history:
+                            2026/10/19: 初始创建;
+----
+"""
+
+import sys
+import time
+import errno
+import socket
+import struct
+import asyncio
+import logging
+import ipaddress
+from typing import Dict, List, Any, Optional, Set, Tuple
+
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+
+# Linux的IP_BIND_ADDRESS_NO_PORT：bind时只绑定地址，connect时再按四元组分配源端口，
+# 同一源端口可以同时用于不同的目标，临时端口不再成为连接数上限
+IP_BIND_ADDRESS_NO_PORT = getattr(
+    socket, "IP_BIND_ADDRESS_NO_PORT", 24 if sys.platform.startswith("linux") else None
+)
+
+# SO_LINGER(on, 0)：close时发送RST而不是FIN，本端不进入TIME_WAIT
+_LINGER_RESET = struct.pack("ii", 1, 0)
+
+# 源端口耗尽类错误，对应源地址暂停使用
+_EXHAUSTED_ERRNOS = {errno.EADDRNOTAVAIL, errno.EADDRINUSE}
+
+
+def set_reset_on_close(writer: Any) -> bool:
+    """设置连接在关闭时发送RST
+
+    Args:
+        writer: asyncio.StreamWriter
+
+    Returns:
+        是否设置成功
+    """
+    sock = writer.get_extra_info("socket")
+    if sock is None:
+        return False
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, _LINGER_RESET)
+        return True
+    except (OSError, AttributeError, TypeError):
+        return False
+
+
+def ephemeral_port_range() -> Tuple[int, int]:
+    """系统临时端口范围（无法读取时使用IANA建议范围）"""
+    try:
+        with open("/proc/sys/net/ipv4/ip_local_port_range") as f:
+            low, high = f.read().split()
+        return int(low), int(high)
+    except (OSError, ValueError):
+        return 49152, 65535
+
+
+class _Source:
+    """单个源地址的使用情况"""
+
+    __slots__ = ("address", "family", "sockets", "peak", "opened", "exhausted", "paused_until")
+
+    def __init__(self, address: str):
+        self.address = address
+        self.family = socket.AF_INET6 if ipaddress.ip_address(address).version == 6 else socket.AF_INET
+        self.sockets: Set[socket.socket] = set()
+        self.peak = 0
+        self.opened = 0
+        self.exhausted = 0
+        self.paused_until = 0.0
+
+
+class SourceAddressPool:
+    """扫描源地址池
+
+    每个连接探测选择同地址族中当前占用端口最少的源地址，绑定时设置
+    IP_BIND_ADDRESS_NO_PORT；源端口耗尽（EADDRNOTAVAIL）的地址暂停
+    pause_seconds秒后再参与选择。占用的本地端口按源地址统计，
+    套接字关闭后在下次整理时移出统计。
+    """
+
+    def __init__(self,
+                 addresses: Optional[List[str]] = None,
+                 bind_no_port: bool = True,
+                 pause_seconds: float = 1.0,
+                 prune_every: int = 256):
+        """初始化源地址池
+
+        Args:
+            addresses: 本机源地址列表，为空时不绑定（由系统选择）
+            bind_no_port: 是否设置IP_BIND_ADDRESS_NO_PORT（系统不支持时忽略）
+            pause_seconds: 源端口耗尽后暂停使用该地址的时间（秒）
+            prune_every: 每打开多少个连接整理一次已关闭的套接字
+        """
+        self._sources: List[_Source] = []
+        self.bind_no_port = bind_no_port and IP_BIND_ADDRESS_NO_PORT is not None
+        self.pause_seconds = pause_seconds
+        self.prune_every = max(1, prune_every)
+        self._since_prune = 0
+        self.port_range = ephemeral_port_range()
+        self.configure(addresses or [])
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self._sources)
+
+    def configure(self, addresses: List[str]):
+        """更新源地址列表（已有地址保留统计）
+
+        Raises:
+            ValueError: 地址格式无效
+        """
+        existing = {source.address: source for source in self._sources}
+        self._sources = [existing.get(address) or _Source(address) for address in addresses]
+
+    def _prune(self):
+        for source in self._sources:
+            source.sockets = {sock for sock in source.sockets if sock.fileno() != -1}
+        self._since_prune = 0
+
+    def select(self, family: int) -> Optional[_Source]:
+        """选择同地址族中占用最少且未暂停的源地址"""
+        if self._since_prune >= self.prune_every:
+            self._prune()
+        now = time.monotonic()
+        candidates = [s for s in self._sources if s.family == family and s.paused_until <= now]
+        if not candidates:
+            return None
+        return min(candidates, key=lambda s: len(s.sockets))
+
+    async def open_connection(self, host: str, port: int) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        """从源地址池建立TCP连接
+
+        Raises:
+            OSError: 没有可用的同地址族源地址或连接失败
+        """
+        loop = asyncio.get_running_loop()
+        infos = await loop.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+        family, _, _, _, address = infos[0]
+
+        tried: Set[str] = set()
+        while True:
+            source = self.select(family)
+            if source is None or source.address in tried:
+                raise OSError(errno.EADDRNOTAVAIL, f"没有可用的源地址连接 {host}:{port}")
+            tried.add(source.address)
+
+            sock = socket.socket(family, socket.SOCK_STREAM)
+            try:
+                sock.setblocking(False)
+                if self.bind_no_port:
+                    sock.setsockopt(socket.IPPROTO_IP, IP_BIND_ADDRESS_NO_PORT, 1)
+                sock.bind((source.address, 0))
+                await loop.sock_connect(sock, address)
+            except OSError as e:
+                sock.close()
+                if e.errno in _EXHAUSTED_ERRNOS:
+                    # 该源地址到此目标的源端口已用尽，暂停后换下一个地址
+                    source.exhausted += 1
+                    source.paused_until = time.monotonic() + self.pause_seconds
+                    logger.warning(f"源地址 {source.address} 源端口耗尽，暂停 {self.pause_seconds}s")
+                    continue
+                raise
+            except BaseException:
+                sock.close()
+                raise
+
+            source.sockets.add(sock)
+            source.opened += 1
+            source.peak = max(source.peak, len(source.sockets))
+            self._since_prune += 1
+            return await asyncio.open_connection(sock=sock)
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """获取源地址池统计信息"""
+        self._prune()
+        capacity = self.port_range[1] - self.port_range[0] + 1
+        return {
+            "bind_no_port": self.bind_no_port,
+            "ephemeral_ports": capacity,
+            "sources": [
+                {
+                    "address": source.address,
+                    "ports_in_use": len(source.sockets),
+                    "port_utilization": round(len(source.sockets) / capacity, 4),
+                    "peak_ports_in_use": source.peak,
+                    "connections_opened": source.opened,
+                    "exhausted": source.exhausted,
+                    "paused": source.paused_until > time.monotonic()
+                }
+                for source in self._sources
+            ]
+        }
+
+
+# 全局扫描源地址池（由应用启动时按配置设置源地址）
+scan_source_pool = SourceAddressPool()
@@ -0,0 +1,284 @@
+"""
+---------------------------------------------------------------
+File name:                  state_backend.py
+Author:                     Ignorant-lu
+Date created:               2026/10/19
+Description:                共享状态存储，任务状态、进度与结果在多个工作进程间共享（内存/SQLite WAL/Redis）
+----------------------------------------------------------------
+
+Changed history:
+                            2026/10/19: 初始创建;
+                            2026/10/19: 添加exists，只检查键是否存在而不读取值;
+----
+"""
+
+import json
+import time
+import sqlite3
+import logging
+import threading
+from typing import Dict, List, Any, Optional, Tuple
+
+# redis为可选依赖，未安装时只能使用内存或SQLite存储
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+    redis = None
+
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, default=str)
+
+
+class StateBackend:
+    """状态存储接口
+
+    按命名空间保存JSON可序列化的值，可设置过期时间。
+    读取返回的是副本，修改后需要重新写入。
+    """
+
+    # 是否在多个进程间共享
+    shared = False
+
+    def get(self, namespace: str, key: str) -> Optional[Any]:
+        """读取值，不存在或已过期返回None"""
+        raise NotImplementedError
+
+    def exists(self, namespace: str, key: str) -> bool:
+        """键是否存在且未过期（不读取和解析值）"""
+        return self.get(namespace, key) is not None
+
+    def set(self, namespace: str, key: str, value: Any, ttl: Optional[float] = None):
+        """写入值，ttl为过期时间（秒），None表示不过期"""
+        raise NotImplementedError
+
+    def delete(self, namespace: str, key: str):
+        """删除值"""
+        raise NotImplementedError
+
+    def keys(self, namespace: str) -> List[str]:
+        """命名空间下未过期的键"""
+        raise NotImplementedError
+
+    def purge_expired(self) -> int:
+        """删除已过期的记录（存储自身不会过期删除时由清理循环调用）"""
+        return 0
+
+    def close(self):
+        """释放连接"""
+
+
+class MemoryStateBackend(StateBackend):
+    """进程内状态存储（单工作进程时使用，值以JSON保存以保持与共享存储一致的语义）"""
+
+    def __init__(self):
+        self._data: Dict[str, Dict[str, Tuple[str, Optional[float]]]] = {}
+
+    def get(self, namespace: str, key: str) -> Optional[Any]:
+        entry = self._data.get(namespace, {}).get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= time.time():
+            del self._data[namespace][key]
+            return None
+        return json.loads(value)
+
+    def exists(self, namespace: str, key: str) -> bool:
+        entry = self._data.get(namespace, {}).get(key)
+        return entry is not None and (entry[1] is None or entry[1] > time.time())
+
+    def set(self, namespace: str, key: str, value: Any, ttl: Optional[float] = None):
+        expires_at = time.time() + ttl if ttl else None
+        self._data.setdefault(namespace, {})[key] = (_dumps(value), expires_at)
+
+    def delete(self, namespace: str, key: str):
+        self._data.get(namespace, {}).pop(key, None)
+
+    def keys(self, namespace: str) -> List[str]:
+        now = time.time()
+        return [key for key, (_, expires_at) in self._data.get(namespace, {}).items()
+                if expires_at is None or expires_at > now]
+
+
+class SQLiteStateBackend(StateBackend):
+    """基于SQLite(WAL)的共享状态存储
+
+    同一台机器上的多个工作进程各自打开连接，WAL模式下读写互不阻塞，
+    写入冲突由busy_timeout等待解决。
+    """
+
+    shared = True
+
+    def __init__(self, path: str, busy_timeout: float = 5.0):
+        """初始化状态存储
+
+        Args:
+            path: SQLite数据库文件路径
+            busy_timeout: 等待其他进程写锁的最长时间（秒）
+        """
+        self.path = path
+        self.busy_timeout = busy_timeout
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        """获取数据库连接（首次使用时创建表结构）"""
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.busy_timeout, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS shared_state (
+                    namespace TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    expires_at REAL,
+                    PRIMARY KEY (namespace, key)
+                ) WITHOUT ROWID
+            """)
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def get(self, namespace: str, key: str) -> Optional[Any]:
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT value FROM shared_state WHERE namespace = ? AND key = ? "
+                "AND (expires_at IS NULL OR expires_at > ?)",
+                (namespace, key, time.time())
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def exists(self, namespace: str, key: str) -> bool:
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT 1 FROM shared_state WHERE namespace = ? AND key = ? "
+                "AND (expires_at IS NULL OR expires_at > ?)",
+                (namespace, key, time.time())
+            ).fetchone()
+        return row is not None
+
+    def set(self, namespace: str, key: str, value: Any, ttl: Optional[float] = None):
+        expires_at = time.time() + ttl if ttl else None
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO shared_state (namespace, key, value, expires_at) VALUES (?, ?, ?, ?)",
+                (namespace, key, _dumps(value), expires_at)
+            )
+            conn.commit()
+
+    def delete(self, namespace: str, key: str):
+        with self._lock:
+            conn = self._connection()
+            conn.execute("DELETE FROM shared_state WHERE namespace = ? AND key = ?", (namespace, key))
+            conn.commit()
+
+    def keys(self, namespace: str) -> List[str]:
+        with self._lock:
+            rows = self._connection().execute(
+                "SELECT key FROM shared_state WHERE namespace = ? "
+                "AND (expires_at IS NULL OR expires_at > ?)",
+                (namespace, time.time())
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def purge_expired(self) -> int:
+        """删除已过期的记录
+
+        Returns:
+            删除的记录数
+        """
+        with self._lock:
+            conn = self._connection()
+            cursor = conn.execute(
+                "DELETE FROM shared_state WHERE expires_at IS NOT NULL AND expires_at <= ?",
+                (time.time(),)
+            )
+            conn.commit()
+        return cursor.rowcount
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+class RedisStateBackend(StateBackend):
+    """基于Redis协议的共享状态存储
+
+    只使用GET/SET PX/DEL/EXISTS/SCAN命令，任何兼容Redis协议的服务
+    （或提供相同方法的本地替代客户端）都可以使用。
+    """
+
+    shared = True
+
+    def __init__(self, url: Optional[str] = None, client: Any = None, prefix: str = "mingnet"):
+        """初始化状态存储
+
+        Args:
+            url: Redis连接URL（未提供client时使用）
+            client: 已创建的客户端
+            prefix: 键前缀
+        """
+        if client is None:
+            if not REDIS_AVAILABLE:
+                raise RuntimeError("redis库不可用，无法连接Redis共享状态存储")
+            client = redis.Redis.from_url(url, decode_responses=True)
+        self._client = client
+        self.prefix = prefix
+
+    def _key(self, namespace: str, key: str) -> str:
+        return f"{self.prefix}:{namespace}:{key}"
+
+    def get(self, namespace: str, key: str) -> Optional[Any]:
+        value = self._client.get(self._key(namespace, key))
+        return json.loads(value) if value is not None else None
+
+    def exists(self, namespace: str, key: str) -> bool:
+        return bool(self._client.exists(self._key(namespace, key)))
+
+    def set(self, namespace: str, key: str, value: Any, ttl: Optional[float] = None):
+        self._client.set(self._key(namespace, key), _dumps(value), px=max(1, int(ttl * 1000)) if ttl else None)
+
+    def delete(self, namespace: str, key: str):
+        self._client.delete(self._key(namespace, key))
+
+    def keys(self, namespace: str) -> List[str]:
+        start = len(self.prefix) + len(namespace) + 2
+        return [
+            (name.decode() if isinstance(name, bytes) else name)[start:]
+            for name in self._client.scan_iter(match=f"{self.prefix}:{namespace}:*")
+        ]
+
+    def close(self):
+        close = getattr(self._client, "close", None)
+        if close is not None:
+            close()
+
+
+def create_state_backend(url: Optional[str]) -> StateBackend:
+    """根据URL创建状态存储
+
+    Args:
+        url: None或"memory://"为进程内存储，"sqlite:///路径"为SQLite存储，
+             "redis://..."为Redis存储
+
+    Raises:
+        ValueError: 不支持的URL
+    """
+    if not url or url.startswith("memory://"):
+        return MemoryStateBackend()
+    if url.startswith("sqlite:///"):
+        return SQLiteStateBackend(url[len("sqlite:///"):])
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisStateBackend(url)
+    raise ValueError(f"不支持的状态存储: {url}")
@@ -0,0 +1,291 @@
+"""
+---------------------------------------------------------------
+File name:                  target_spec.py
+Author:                     Ignorant-lu
+Date created:               2026/10/19
+Description:                扫描目标规格解析，支持CIDR、IP范围、主机名和排除列表，延迟迭代
+----------------------------------------------------------------
+
+Changed history:
+                            2026/10/19: 初始创建;
+----
+"""
+
+import bisect
+import random
+import ipaddress
+import re
+from typing import Iterable, Iterator, List, Optional, Tuple, Union
+
+
+# 主机名格式（RFC 1123标签）
+_HOSTNAME_PATTERN = re.compile(
+    r"^(?=.{1,253}$)([A-Za-z0-9_]([A-Za-z0-9_-]{0,61}[A-Za-z0-9])?)(\.[A-Za-z0-9_]([A-Za-z0-9_-]{0,61}[A-Za-z0-9])?)*\.?$"
+)
+
+
+class _IntervalSet:
+    """整数闭区间集合（合并、有序），支持按序号随机访问"""
+
+    __slots__ = ("intervals", "_offsets", "size")
+
+    def __init__(self, intervals: Iterable[Tuple[int, int]] = ()):
+        merged: List[Tuple[int, int]] = []
+        for start, end in sorted(intervals):
+            if merged and start <= merged[-1][1] + 1:
+                if end > merged[-1][1]:
+                    merged[-1] = (merged[-1][0], end)
+            else:
+                merged.append((start, end))
+
+        self.intervals: Tuple[Tuple[int, int], ...] = tuple(merged)
+        # 每个区间之前的元素总数，用于按序号定位
+        self._offsets: List[int] = []
+        total = 0
+        for start, end in merged:
+            self._offsets.append(total)
+            total += end - start + 1
+        self.size = total
+
+    def __iter__(self) -> Iterator[int]:
+        for start, end in self.intervals:
+            yield from range(start, end + 1)
+
+    def __contains__(self, value: int) -> bool:
+        index = bisect.bisect_right(self.intervals, (value, float("inf"))) - 1
+        return index >= 0 and value <= self.intervals[index][1]
+
+    def at(self, index: int) -> int:
+        """第index个元素（按升序）"""
+        position = bisect.bisect_right(self._offsets, index) - 1
+        return self.intervals[position][0] + index - self._offsets[position]
+
+    def difference(self, other: "_IntervalSet") -> "_IntervalSet":
+        """差集"""
+        result = []
+        excluded = other.intervals
+        i = 0
+        for start, end in self.intervals:
+            while i < len(excluded) and excluded[i][1] < start:
+                i += 1
+            j = i
+            while j < len(excluded) and excluded[j][0] <= end:
+                ex_start, ex_end = excluded[j]
+                if ex_start > start:
+                    result.append((start, ex_start - 1))
+                start = max(start, ex_end + 1)
+                if start > end:
+                    break
+                j += 1
+            if start <= end:
+                result.append((start, end))
+        return _IntervalSet(result)
+
+
+def _random_permutation(size: int, rng: random.Random) -> Iterator[int]:
+    """以常数内存生成[0, size)的随机排列
+
+    使用模2^k的满周期线性同余序列（a≡1 mod 4，c为奇数），
+    丢弃超出size的值；2^k < 2*size，平均每个输出最多生成两个值。
+    """
+    if size <= 0:
+        return
+    modulus = 1
+    while modulus < size:
+        modulus <<= 1
+    if modulus < 4:
+        order = list(range(size))
+        rng.shuffle(order)
+        yield from order
+        return
+
+    multiplier = rng.randrange(0, modulus // 4) * 4 + 1
+    increment = rng.randrange(0, modulus // 2) * 2 + 1
+    value = rng.randrange(modulus)
+    for _ in range(modulus):
+        value = (value * multiplier + increment) % modulus
+        if value < size:
+            yield value
+
+
+class TargetSpec:
+    """扫描目标规格
+
+    IPv4/IPv6地址分别保存为整数闭区间集合，主机名单独保存；
+    迭代时才生成地址字符串，/8规模的地址空间也只占用常数内存。
+    """
+
+    def __init__(self,
+                 ipv4: Optional[_IntervalSet] = None,
+                 ipv6: Optional[_IntervalSet] = None,
+                 hostnames: Iterable[str] = ()):
+        self._ipv4 = ipv4 or _IntervalSet()
+        self._ipv6 = ipv6 or _IntervalSet()
+        self.hostnames: Tuple[str, ...] = tuple(dict.fromkeys(hostnames))
+
+    @classmethod
+    def parse(cls,
+              spec: Union[str, Iterable[str]],
+              exclude: Union[str, Iterable[str], None] = None) -> "TargetSpec":
+        """解析目标规格
+
+        支持的写法（逗号/空白分隔，可混用）:
+        - 单个地址: 192.168.1.1、::1
+        - CIDR: 10.0.0.0/8（不含网络地址和广播地址）
+        - 地址范围: 10.0.0.1-10.0.0.50，或简写 10.0.0.1-50
+        - 主机名: example.com
+        - 排除项: 以"!"开头，如 !10.0.0.0/24
+
+        Args:
+            spec: 目标规格字符串或字符串列表
+            exclude: 额外的排除规格
+
+        Returns:
+            TargetSpec: 目标规格
+        """
+        include4, include6, hostnames = [], [], []
+        exclude4, exclude6, excluded_hosts = [], [], set()
+
+        for token in cls._tokens(spec):
+            if token.startswith("!"):
+                cls._parse_token(token[1:], exclude4, exclude6, excluded_hosts, exclusion=True)
+            else:
+                cls._parse_token(token, include4, include6, hostnames, exclusion=False)
+
+        for token in cls._tokens(exclude):
+            cls._parse_token(token.lstrip("!"), exclude4, exclude6, excluded_hosts, exclusion=True)
+
+        return cls(
+            _IntervalSet(include4).difference(_IntervalSet(exclude4)),
+            _IntervalSet(include6).difference(_IntervalSet(exclude6)),
+            [host for host in hostnames if host not in excluded_hosts]
+        )
+
+    @classmethod
+    def from_range(cls, start_ip: str, end_ip: str) -> "TargetSpec":
+        """由起止地址构建（顺序可颠倒）"""
+        start = ipaddress.ip_address(start_ip)
+        end = ipaddress.ip_address(end_ip)
+        if start.version != end.version:
+            raise ValueError(f"IP版本不一致: {start_ip} - {end_ip}")
+        interval = _IntervalSet([tuple(sorted((int(start), int(end))))])
+        return cls(ipv4=interval) if start.version == 4 else cls(ipv6=interval)
+
+    @staticmethod
+    def _tokens(spec: Union[str, Iterable[str], None]) -> Iterator[str]:
+        """拆分规格字符串"""
+        if spec is None:
+            return
+        parts = [spec] if isinstance(spec, str) else spec
+        for part in parts:
+            for token in re.split(r"[,\s]+", part):
+                if token:
+                    yield token
+
+    @staticmethod
+    def _parse_token(token: str,
+                     ipv4: List[Tuple[int, int]],
+                     ipv6: List[Tuple[int, int]],
+                     hostnames,
+                     exclusion: bool):
+        """解析单个目标项并加入对应集合"""
+        try:
+            if "/" in token:
+                network = ipaddress.ip_network(token, strict=False)
+                first, last = int(network.network_address), int(network.broadcast_address)
+                # 与ipaddress.hosts()一致：排除网络地址和广播地址（排除项保留整个网段）
+                if not exclusion:
+                    if network.version == 4 and network.prefixlen < 31:
+                        first, last = first + 1, last - 1
+                    elif network.version == 6 and network.prefixlen < 127:
+                        first += 1
+                target = ipv4 if network.version == 4 else ipv6
+                target.append((first, last))
+                return
+
+            if "-" in token:
+                start_text, end_text = token.split("-", 1)
+                start = ipaddress.ip_address(start_text)
+                if "." not in end_text and ":" not in end_text and start.version == 4:
+                    # 简写形式：10.0.0.1-50 表示最后一段的范围
+                    end_text = start_text.rsplit(".", 1)[0] + "." + end_text
+                end = ipaddress.ip_address(end_text)
+                if start.version != end.version or start > end:
+                    raise ValueError
+                target = ipv4 if start.version == 4 else ipv6
+                target.append((int(start), int(end)))
+                return
+
+            address = ipaddress.ip_address(token)
+            target = ipv4 if address.version == 4 else ipv6
+            target.append((int(address), int(address)))
+            return
+        except ValueError:
+            pass
+
+        # 最后一段为纯数字的视为无效IP而不是主机名
+        if _HOSTNAME_PATTERN.match(token) and not token.rstrip(".").rsplit(".", 1)[-1].isdigit():
+            if isinstance(hostnames, set):
+                hostnames.add(token.lower())
+            else:
+                hostnames.append(token.lower())
+            return
+
+        raise ValueError(f"无效的扫描目标: {token}")
+
+    def __len__(self) -> int:
+        return self._ipv4.size + self._ipv6.size + len(self.hostnames)
+
+    def __bool__(self) -> bool:
+        return len(self) > 0
+
+    def __iter__(self) -> Iterator[str]:
+        for value in self._ipv4:
+            yield str(ipaddress.IPv4Address(value))
+        for value in self._ipv6:
+            yield str(ipaddress.IPv6Address(value))
+        yield from self.hostnames
+
+    def __contains__(self, target: object) -> bool:
+        if not isinstance(target, str):
+            return False
+        try:
+            address = ipaddress.ip_address(target)
+        except ValueError:
+            return target.lower() in self.hostnames
+        addresses = self._ipv4 if address.version == 4 else self._ipv6
+        return int(address) in addresses
+
+    def _address_at(self, index: int) -> str:
+        """按序号取目标（IPv4、IPv6、主机名顺序）"""
+        if index < self._ipv4.size:
+            return str(ipaddress.IPv4Address(self._ipv4.at(index)))
+        index -= self._ipv4.size
+        if index < self._ipv6.size:
+            return str(ipaddress.IPv6Address(self._ipv6.at(index)))
+        return self.hostnames[index - self._ipv6.size]
+
+    def iter_random(self, seed: Optional[int] = None) -> Iterator[str]:
+        """以随机排列顺序迭代目标（常数内存）
+
+        Args:
+            seed: 随机种子，相同种子得到相同顺序（便于续扫）
+        """
+        rng = random.Random(seed)
+        for index in _random_permutation(len(self), rng):
+            yield self._address_at(index)
+
+    def iterate(self, randomize: bool = False, seed: Optional[int] = None) -> Iterator[str]:
+        """迭代目标
+
+        Args:
+            randomize: 是否随机顺序，分散对同一网段的连续探测
+            seed: 随机种子
+        """
+        return self.iter_random(seed) if randomize else iter(self)
+
+    def __repr__(self) -> str:
+        return (
+            f"TargetSpec(ipv4={len(self._ipv4.intervals)} ranges, "
+            f"ipv6={len(self._ipv6.intervals)} ranges, hostnames={len(self.hostnames)}, size={len(self)})"
+        )
@@ -8,6 +8,7 @@ Description:                异步TCP客户端，支持自动重连、心跳保
 
 Changed history:            
                             2025/05/23: 初始创建，TDD实现;
+                            2026/10/19: 改用FramedProtocol增量收帧，一次数据到达解析全部完整帧并成批回调;
 ----
 """
 
@@ -21,6 +22,8 @@ from dataclasses import dataclass, field
 from enum import Enum
 import weakref
 
+from .framing import FrameError, FramedProtocol
+
 
 # 配置日志
 logger = logging.getLogger(__name__)
@@ -68,6 +71,7 @@ class ConnectionConfig:
     heartbeat_interval: float = 30.0
     enable_message_buffering: bool = True
     max_buffer_size: int = 1000
+    max_message_size: int = 16 * 1024 * 1024
 
 
 class ClientStatistics:
@@ -157,7 +161,8 @@ class TCPClient:
                  reconnect_interval: float = 5.0,
                  heartbeat_interval: float = 30.0,
                  enable_message_buffering: bool = True,
-                 max_buffer_size: int = 1000):
+                 max_buffer_size: int = 1000,
+                 max_message_size: int = 16 * 1024 * 1024):
         """初始化TCP客户端
         
         Args:
@@ -169,6 +174,7 @@ class TCPClient:
             heartbeat_interval: 心跳间隔
             enable_message_buffering: 是否启用消息缓冲
             max_buffer_size: 最大缓冲区大小
+            max_message_size: 单条接收消息的最大字节数
         """
         # 连接配置
         self.config = ConnectionConfig(
@@ -179,7 +185,8 @@ class TCPClient:
             reconnect_interval=reconnect_interval,
             heartbeat_interval=heartbeat_interval,
             enable_message_buffering=enable_message_buffering,
-            max_buffer_size=max_buffer_size
+            max_buffer_size=max_buffer_size,
+            max_message_size=max_message_size
         )
         
         # 连接状态
@@ -188,7 +195,7 @@ class TCPClient:
         self.connection_id: Optional[str] = None
         
         # 网络连接
-        self.reader: Optional[asyncio.StreamReader] = None
+        self.reader: Optional[FramedProtocol] = None
         self.writer: Optional[asyncio.StreamWriter] = None
         
         # 消息缓冲
@@ -247,13 +254,16 @@ class TCPClient:
         
         try:
             # 尝试连接
-            self.reader, self.writer = await asyncio.wait_for(
-                asyncio.open_connection(
+            loop = asyncio.get_running_loop()
+            _, self.reader = await asyncio.wait_for(
+                loop.create_connection(
+                    lambda: FramedProtocol(self.config.max_message_size),
                     self.config.server_host,
                     self.config.server_port
                 ),
                 timeout=self.config.connect_timeout
             )
+            self.writer = self.reader.writer
             
             # 连接成功
             self.is_connected = True
@@ -447,16 +457,17 @@ class TCPClient:
         """消息接收循环"""
         try:
             while self.is_connected and not self._stop_event.is_set():
-                message = await self._receive_message()
-                if message is None:
+                messages = await self._receive_messages()
+                if messages is None:
                     break
                 
                 # 调用消息回调
                 if self.message_callback:
-                    try:
-                        self.message_callback(message)
-                    except Exception as e:
-                        logger.error(f"消息回调执行失败: {e}")
+                    for message in messages:
+                        try:
+                            self.message_callback(message)
+                        except Exception as e:
+                            logger.error(f"消息回调执行失败: {e}")
         
         except asyncio.CancelledError:
             logger.debug("消息接收循环被取消")
@@ -465,35 +476,33 @@ class TCPClient:
             if self.config.auto_reconnect:
                 await self._handle_connection_loss()
     
-    async def _receive_message(self) -> Optional[Dict[str, Any]]:
-        """接收消息"""
-        if not self.reader:
+    async def _receive_messages(self) -> Optional[List[Dict[str, Any]]]:
+        """接收一批消息（一次数据到达中的全部完整帧）"""
+        reader = self.reader
+        if not reader:
             return None
         
         try:
-            # 读取消息长度（4字节）
-            length_data = await self.reader.readexactly(4)
-            message_length = int.from_bytes(length_data, byteorder='big')
-            
-            # 读取消息内容
-            message_data = await self.reader.readexactly(message_length)
-            message_json = message_data.decode('utf-8')
-            
-            # 解析JSON
-            message_dict = json.loads(message_json)
+            batch = await reader.read_batch()
+            if batch is None:
+                error = reader.error
+                if isinstance(error, FrameError):
+                    logger.warning(f"收到的消息过大: {error}")
+                    self.statistics.update_error()
+                elif error is not None:
+                    logger.warning("收到无效的JSON消息")
+                    self.statistics.update_error()
+                else:
+                    logger.info("服务器连接断开")
+                return None
             
             # 更新统计信息
-            self.statistics.update_message(False, len(message_data))
+            messages = []
+            for message_dict, size in batch:
+                self.statistics.update_message(False, size)
+                messages.append(message_dict)
+            return messages
             
-            return message_dict
-            
-        except asyncio.IncompleteReadError:
-            logger.info("服务器连接断开")
-            return None
-        except json.JSONDecodeError:
-            logger.warning("收到无效的JSON消息")
-            self.statistics.update_error()
-            return None
         except Exception as e:
             logger.error(f"接收消息时发生错误: {e}")
             self.statistics.update_error()
@@ -8,6 +8,10 @@ Description:                高性能异步TCP服务器，支持多客户端连
 
 Changed history:            
                             2025/05/23: 初始创建，TDD实现;
+                            2026/10/19: 消息历史记录全局序号，支持游标分页;
+                            2026/10/19: 客户端连接占用进程级套接字额度，额度用尽时拒绝新连接;
+                            2026/10/19: 改用FramedProtocol增量收帧，一次数据到达解析全部完整帧并成批处理;
+                            2026/10/19: 收到的消息只解码、验证一次，转发时预先编码一次供所有接收方复用;
 ----
 """
 
@@ -21,6 +25,9 @@ from dataclasses import dataclass, field
 from enum import Enum
 import weakref
 
+from .resource_governor import SOCKETS, ResourceGovernor, resource_governor
+from .framing import FrameError, FramedProtocol, encode_frame, FRAME_HEADER
+
 
 # 配置日志
 logger = logging.getLogger(__name__)
@@ -52,7 +59,7 @@ class ClientInfo:
     """客户端信息数据类"""
     client_id: str
     address: tuple
-    reader: asyncio.StreamReader
+    reader: FramedProtocol
     writer: asyncio.StreamWriter
     connected_at: float = field(default_factory=time.time)
     last_activity: float = field(default_factory=time.time)
@@ -174,7 +181,8 @@ class TCPServer:
                  message_buffer_size: int = 8192,
                  client_timeout: float = 300.0,  # 5分钟
                  keep_message_history: bool = True,
-                 max_history_size: int = 1000):
+                 max_history_size: int = 1000,
+                 governor: Optional[ResourceGovernor] = None):
         """初始化TCP服务器
         
         Args:
@@ -185,6 +193,7 @@ class TCPServer:
             client_timeout: 客户端超时时间（秒）
             keep_message_history: 是否保留消息历史
             max_history_size: 最大历史记录数
+            governor: 客户端连接占用额度的资源预算，None表示使用进程全局预算
         """
         self.host = host
         self.port = port
@@ -193,6 +202,7 @@ class TCPServer:
         self.client_timeout = client_timeout
         self.keep_message_history = keep_message_history
         self.max_history_size = max_history_size
+        self.governor = governor or resource_governor
         
         # 服务器状态
         self.is_running = False
@@ -203,8 +213,10 @@ class TCPServer:
         self.clients: Dict[str, ClientInfo] = {}
         self.client_usernames: Dict[str, str] = {}  # username -> client_id映射
         
-        # 消息历史
+        # 消息历史（message_history_offset为已裁剪的消息数，
+        # message_history[i]的全局序号为offset + i，游标分页不受裁剪影响）
         self.message_history: List[Message] = []
+        self.message_history_offset = 0
         
         # 统计信息
         self.statistics = ServerStatistics()
@@ -222,8 +234,12 @@ class TCPServer:
         
         try:
             # 创建服务器
-            self.server = await asyncio.start_server(
-                self._handle_client_connection,
+            loop = asyncio.get_running_loop()
+            self.server = await loop.create_server(
+                lambda: FramedProtocol(
+                    self.message_buffer_size,
+                    client_connected_cb=self._handle_client_connection
+                ),
                 self.host,
                 self.port
             )
@@ -276,7 +292,7 @@ class TCPServer:
         logger.info("TCP服务器已停止")
     
     async def _handle_client_connection(self, 
-                                       reader: asyncio.StreamReader, 
+                                       reader: FramedProtocol, 
                                        writer: asyncio.StreamWriter):
         """处理新的客户端连接"""
         client_address = writer.get_extra_info('peername')
@@ -289,17 +305,27 @@ class TCPServer:
             await writer.wait_closed()
             return
         
-        client_id = await self.handle_new_connection(reader, writer)
-        if client_id:
-            try:
-                await self._client_message_loop(client_id)
-            except Exception as e:
-                logger.error(f"客户端 {client_id} 消息处理异常: {e}")
-            finally:
-                await self.handle_client_disconnect(client_id)
+        # 进程级套接字额度用尽时立即拒绝，不与扫描任务争抢文件描述符
+        if not self.governor.try_acquire(SOCKETS):
+            logger.warning(f"系统套接字额度已用尽，拒绝连接: {client_address}")
+            writer.close()
+            await writer.wait_closed()
+            return
+        
+        try:
+            client_id = await self.handle_new_connection(reader, writer)
+            if client_id:
+                try:
+                    await self._client_message_loop(client_id)
+                except Exception as e:
+                    logger.error(f"客户端 {client_id} 消息处理异常: {e}")
+                finally:
+                    await self.handle_client_disconnect(client_id)
+        finally:
+            self.governor.release(SOCKETS)
     
     async def handle_new_connection(self, 
-                                   reader: asyncio.StreamReader, 
+                                   reader: FramedProtocol, 
                                    writer: asyncio.StreamWriter) -> Optional[str]:
         """处理新连接并返回客户端ID"""
         try:
@@ -374,70 +400,72 @@ class TCPServer:
         
         try:
             while client_id in self.clients and self.is_running:
-                # 读取消息
-                message_data = await self._read_message_from_client(client_id)
-                if message_data is None:
+                # 读取一批消息（一次数据到达中的全部完整帧）
+                messages = await self._read_messages_from_client(client_id)
+                if messages is None:
                     break
                 
                 # 更新最后活动时间
                 client_info.last_activity = time.time()
                 
                 # 处理消息
-                await self._process_client_message(client_id, message_data)
+                for message_data in messages:
+                    await self._process_client_message(client_id, message_data)
                 
         except asyncio.CancelledError:
             logger.info(f"客户端 {client_id} 消息循环被取消")
         except Exception as e:
             logger.error(f"客户端 {client_id} 消息循环异常: {e}")
     
-    async def _read_message_from_client(self, client_id: str) -> Optional[Dict[str, Any]]:
-        """从客户端读取消息"""
+    async def _read_messages_from_client(self, client_id: str) -> Optional[List[Dict[str, Any]]]:
+        """从客户端读取一批消息
+        
+        帧的解析与JSON解码在协议的data_received中完成，这里只等待下一批结果。
+        
+        Returns:
+            已解码的消息列表，连接断开或收到无效帧时返回None
+        """
         client_info = self.clients.get(client_id)
         if not client_info:
             return None
         
         try:
-            # 读取消息长度（4字节）
-            length_data = await client_info.reader.readexactly(4)
-            message_length = int.from_bytes(length_data, byteorder='big')
-            
-            if message_length > self.message_buffer_size:
-                logger.warning(f"客户端 {client_id} 发送的消息过大: {message_length}")
+            batch = await client_info.reader.read_batch()
+            if batch is None:
+                error = client_info.reader.error
+                if isinstance(error, FrameError):
+                    logger.warning(f"客户端 {client_id} 发送的消息过大: {error}")
+                elif error is not None:
+                    logger.warning(f"客户端 {client_id} 发送了无效的JSON消息")
+                    self.statistics.update_error()
+                else:
+                    logger.info(f"客户端 {client_id} 连接断开")
                 return None
             
-            # 读取消息内容
-            message_data = await client_info.reader.readexactly(message_length)
-            message_json = message_data.decode('utf-8')
-            
-            # 解析JSON
-            message_dict = json.loads(message_json)
-            
             # 更新统计信息
-            self.statistics.update_message(False, len(message_data))
-            
-            return message_dict
+            messages = []
+            for message_dict, size in batch:
+                self.statistics.update_message(False, size)
+                messages.append(message_dict)
+            return messages
             
-        except asyncio.IncompleteReadError:
-            logger.info(f"客户端 {client_id} 连接断开")
-            return None
-        except json.JSONDecodeError:
-            logger.warning(f"客户端 {client_id} 发送了无效的JSON消息")
-            self.statistics.update_error()
-            return None
         except Exception as e:
             logger.error(f"从客户端 {client_id} 读取消息时发生错误: {e}")
             self.statistics.update_error()
             return None
     
     async def _process_client_message(self, client_id: str, message_data: Dict[str, Any]):
-        """处理客户端消息"""
+        """处理客户端消息
+        
+        message_data已在收帧时解码，这里直接验证；转发前只编码一次，
+        广播时所有接收方共用同一帧。
+        """
         # 验证消息
-        parsed_message = self.parse_message(json.dumps(message_data).encode())
-        if parsed_message is None:
+        if not isinstance(message_data, dict) or not MessageValidator.validate_message(message_data):
             logger.warning(f"客户端 {client_id} 发送了无效消息: {message_data}")
             return
         
-        message = Message(**parsed_message)
+        message = Message(**{k: v for k, v in message_data.items() if k in Message.__dataclass_fields__})
         message.sender = client_id
         
         # 添加到消息历史
@@ -445,15 +473,13 @@ class TCPServer:
             self.add_to_message_history(message.__dict__)
         
         # 根据消息类型处理
-        if message.type == MessageType.BROADCAST.value:
-            await self.broadcast_message(message.__dict__)
+        if message.type in (MessageType.BROADCAST.value, MessageType.CHAT.value):
+            # 聊天消息默认广播
+            await self.broadcast_message(message.__dict__, frame=self._encode_message(message))
         elif message.type == MessageType.PRIVATE.value:
             target_client = message.target
             if target_client:
-                await self.send_private_message(target_client, message.__dict__)
-        elif message.type == MessageType.CHAT.value:
-            # 聊天消息默认广播
-            await self.broadcast_message(message.__dict__)
+                await self.send_private_message(target_client, message.__dict__, frame=self._encode_message(message))
         elif message.type == MessageType.HEARTBEAT.value:
             # 心跳消息，更新活动时间即可
             pass
@@ -478,18 +504,33 @@ class TCPServer:
         except Exception:
             return None
     
-    async def broadcast_message(self, message: Dict[str, Any]):
-        """广播消息到所有客户端"""
+    @staticmethod
+    def _encode_message(message: Message) -> bytes:
+        """把消息编码为带长度前缀的帧"""
+        return encode_frame(json.dumps(message.__dict__).encode('utf-8'))
+    
+    async def broadcast_message(self, message: Dict[str, Any], frame: Optional[bytes] = None):
+        """广播消息到所有客户端
+        
+        Args:
+            message: 消息内容
+            frame: 已编码的消息帧，None表示在此编码一次
+        """
         if not self.clients:
             return
         
         logger.debug(f"广播消息到 {len(self.clients)} 个客户端")
         
+        # 所有接收方共用同一帧
+        message = Message(**message)
+        if frame is None:
+            frame = self._encode_message(message)
+        
         # 创建广播任务
         tasks = []
         for client_id in list(self.clients.keys()):
             task = asyncio.create_task(
-                self._send_message_to_client(client_id, Message(**message))
+                self._send_message_to_client(client_id, message, frame)
             )
             tasks.append(task)
         
@@ -502,38 +543,44 @@ class TCPServer:
                 if isinstance(result, Exception):
                     logger.error(f"广播消息时发生错误: {result}")
     
-    async def send_private_message(self, target_client_id: str, message: Dict[str, Any]) -> bool:
+    async def send_private_message(self,
+                                   target_client_id: str,
+                                   message: Dict[str, Any],
+                                   frame: Optional[bytes] = None) -> bool:
         """发送私有消息"""
         if target_client_id not in self.clients:
             logger.warning(f"目标客户端 {target_client_id} 不存在")
             return False
         
         try:
-            await self._send_message_to_client(target_client_id, Message(**message))
+            await self._send_message_to_client(target_client_id, Message(**message), frame)
             return True
         except Exception as e:
             logger.error(f"发送私有消息失败: {e}")
             return False
     
-    async def _send_message_to_client(self, client_id: str, message: Message):
-        """向指定客户端发送消息"""
+    async def _send_message_to_client(self, client_id: str, message: Message, frame: Optional[bytes] = None):
+        """向指定客户端发送消息
+        
+        Args:
+            client_id: 客户端ID
+            message: 消息
+            frame: 已编码的消息帧（长度前缀 + 内容），None表示在此编码
+        """
         client_info = self.clients.get(client_id)
         if not client_info or client_info.writer.is_closing():
             return
         
         try:
             # 序列化消息
-            message_json = json.dumps(message.__dict__)
-            message_bytes = message_json.encode('utf-8')
-            
-            # 发送消息长度（4字节）+ 消息内容
-            length_bytes = len(message_bytes).to_bytes(4, byteorder='big')
+            if frame is None:
+                frame = self._encode_message(message)
             
-            client_info.writer.write(length_bytes + message_bytes)
+            client_info.writer.write(frame)
             await client_info.writer.drain()
             
             # 更新统计信息
-            self.statistics.update_message(True, len(message_bytes))
+            self.statistics.update_message(True, len(frame) - FRAME_HEADER.size)
             
         except Exception as e:
             logger.error(f"向客户端 {client_id} 发送消息失败: {e}")
@@ -550,8 +597,10 @@ class TCPServer:
         self.message_history.append(msg)
         
         # 限制历史记录大小
-        if len(self.message_history) > self.max_history_size:
-            self.message_history = self.message_history[-self.max_history_size:]
+        excess = len(self.message_history) - self.max_history_size
+        if excess > 0:
+            del self.message_history[:excess]
+            self.message_history_offset += excess
     
     def get_message_history(self) -> List[Dict[str, Any]]:
         """获取消息历史记录"""
@@ -8,6 +8,19 @@ Description:                FastAPI应用主入口文件，包含应用初始化
 
 Changed history:            
                             2025/05/23: 初始创建;
+                            2026/10/19: 启动时配置全局扫描限速;
+                            2026/10/19: 启动时配置扫描结果缓存和检查点存储;
+                            2026/10/19: 启动时配置扫描结果存储;
+                            2026/10/19: 关闭时停止周期扫描调度器;
+                            2026/10/19: 启动时配置后台任务管理器;
+                            2026/10/19: 启动时配置共享状态存储;
+                            2026/10/19: 启动时配置进程级资源预算，资源繁忙时返回503与Retry-After;
+                            2026/10/19: 启动时提高文件描述符限制，资源预算按限制推导;
+                            2026/10/19: 启动时配置扫描源地址池;
+                            2026/10/19: 添加客户端标识中间件，启动时配置客户端探测权重;
+                            2026/10/19: 启动时配置扫描结果最长缓冲时间;
+                            2026/10/19: 多工作进程时提示资产清单、快照和周期扫描不可用;
+                            2026/10/19: 客户端权重的来源地址以ip:前缀配置;
 ----
 """
 
@@ -29,6 +42,18 @@ from .middleware.logging import LoggingMiddleware
 from .middleware.rate_limiting import RateLimitingMiddleware
 from .middleware.security import SecurityMiddleware
 from .middleware.performance import PerformanceMiddleware
+from .middleware.client_identity import ClientIdentityMiddleware
+from .core.rate_limiter import global_rate_limiter
+from .core.scan_cache import scan_result_cache
+from .core.scan_checkpoint import scan_checkpoint_store
+from .core.result_store import scan_result_store
+from .core.scan_scheduler import scan_scheduler
+from .core.job_manager import job_manager
+from .core.state_backend import create_state_backend
+from .core.resource_governor import ResourceBudgetExceeded, resource_governor
+from .core.fd_limits import configure_fd_budget
+from .core.source_pool import scan_source_pool
+from .core.probe_scheduler import configured_flow
 
 
 # 配置日志
@@ -60,6 +85,72 @@ async def lifespan(app: FastAPI):
     # 初始化Redis连接
     # await init_redis()
     
+    # 配置全局扫描限速
+    global_rate_limiter.configure(settings.scan_global_pps, settings.scan_rate_burst)
+    
+    # 配置扫描结果缓存
+    scan_result_cache.configure(settings.scan_cache_ttl, settings.scan_cache_max_entries)
+    
+    # 配置扫描检查点存储
+    scan_checkpoint_store.configure(
+        settings.scan_checkpoint_path,
+        settings.scan_checkpoint_batch_size,
+        settings.scan_checkpoint_flush_interval
+    )
+    
+    # 配置扫描结果存储
+    scan_result_store.configure(
+        settings.scan_result_store_path,
+        settings.scan_result_store_batch_size,
+        settings.scan_result_store_flush_interval
+    )
+    
+    # 提高文件描述符限制并推导各引擎的并发上限
+    fd_budget = configure_fd_budget(
+        settings.fd_limit_target,
+        reserved=settings.fd_reserved,
+        max_scan_concurrent=settings.max_scan_concurrent,
+        max_ping_subprocesses=settings.max_ping_subprocesses,
+        max_tcp_connections=settings.max_tcp_connections
+    )
+    
+    # 配置进程级资源预算（所有扫描、PING、TCP连接共用）
+    resource_governor.configure(
+        min(settings.max_open_sockets or fd_budget.sockets, fd_budget.sockets),
+        fd_budget.ping_subprocesses,
+        settings.max_resource_waiters,
+        settings.resource_retry_after,
+        settings.scan_interactive_reserve
+    )
+    resource_governor.set_weights({
+        configured_flow(client): weight for client, weight in settings.scan_client_weights.items()
+    })
+    
+    # 配置扫描源地址池（为空时由系统选择源地址）
+    scan_source_pool.configure(settings.scan_source_addresses)
+    
+    # 配置后台任务管理器并启动过期任务清理
+    job_manager.configure(
+        settings.max_task_queue_size,
+        settings.max_running_tasks,
+        settings.task_ttl,
+        settings.task_cleanup_interval,
+        settings.task_spill_dir,
+        settings.task_spill_threshold
+    )
+    
+    # 多工作进程时任务状态写入共享存储，状态查询可以落到任意进程
+    if settings.state_backend_url:
+        job_manager.set_state_backend(
+            create_state_backend(settings.state_backend_url),
+            settings.state_sync_interval
+        )
+    elif settings.workers > 1:
+        logger.warning("多工作进程运行但未配置共享状态存储，任务查询可能返回404")
+    if settings.workers > 1:
+        logger.warning("资产清单、快照和周期扫描只保存在单个工作进程中，多工作进程运行时相关接口返回409")
+    job_manager.start()
+    
     # 启动后台任务
     # await start_background_tasks()
     
@@ -72,6 +163,12 @@ async def lifespan(app: FastAPI):
     
     # 清理资源
     # await cleanup_resources()
+    await scan_scheduler.stop()
+    await job_manager.stop()
+    if job_manager.state_backend is not None:
+        job_manager.state_backend.close()
+    scan_checkpoint_store.close()
+    scan_result_store.close()
     
     logger.info("应用已成功关闭")
 
@@ -132,6 +229,7 @@ def setup_middleware(app: FastAPI) -> None:
     app.add_middleware(SecurityMiddleware)
     app.add_middleware(RateLimitingMiddleware)
     app.add_middleware(LoggingMiddleware)
+    app.add_middleware(ClientIdentityMiddleware)
 
 
 def setup_routes(app: FastAPI) -> None:
@@ -198,7 +296,23 @@ def setup_exception_handlers(app: FastAPI) -> None:
         )
         return JSONResponse(
             status_code=exc.status_code,
-            content=error_response.dict()
+            content=error_response.dict(),
+            headers=exc.headers
+        )
+    
+    @app.exception_handler(ResourceBudgetExceeded)
+    async def resource_budget_handler(request: Request, exc: ResourceBudgetExceeded):
+        """资源预算不足处理器"""
+        error_response = ErrorResponse(
+            error="service_unavailable",
+            message=str(exc),
+            details={"retry_after": exc.retry_after},
+            request_id=getattr(request.state, "request_id", None)
+        )
+        return JSONResponse(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            content=error_response.dict(),
+            headers=resource_governor.retry_after_header
         )
     
     @app.exception_handler(ValueError)
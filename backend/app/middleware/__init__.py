@@ -8,6 +8,7 @@ Description:                中间件模块初始化文件
 
 Changed history:            
                             2025/05/23: 初始创建;
+                            2026/10/19: 添加客户端标识中间件;
 ----
 """
 
@@ -15,10 +16,12 @@ from .logging import LoggingMiddleware
 from .rate_limiting import RateLimitingMiddleware
 from .security import SecurityMiddleware
 from .performance import PerformanceMiddleware
+from .client_identity import ClientIdentityMiddleware
 
 __all__ = [
     "LoggingMiddleware",
     "RateLimitingMiddleware", 
     "SecurityMiddleware",
     "PerformanceMiddleware",
+    "ClientIdentityMiddleware",
 ] 
\ No newline at end of file
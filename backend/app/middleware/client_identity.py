@@ -0,0 +1,51 @@
+"""
+---------------------------------------------------------------
+File name:                  client_identity.py
+Author:                     Ignorant-lu
+Date created:               2026/10/19
+Description:                客户端标识中间件，按API Key或来源地址标记请求所属的客户端
+----------------------------------------------------------------
+
+Changed history:
+                            2026/10/19: 初始创建;
+                            2026/10/19: 请求头中的标识只作为API Key，不按IP地址解析;
+----
+"""
+
+from typing import Callable
+from fastapi import Request, Response
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from ..core.probe_scheduler import current_client, client_flow
+
+
+class ClientIdentityMiddleware(BaseHTTPMiddleware):
+    """客户端标识中间件
+
+    请求处理期间设置current_client，扫描引擎据此在客户端之间公平分配探测额度。
+    """
+
+    def __init__(self, app, header: str = "X-API-Key"):
+        super().__init__(app)
+        self.header = header
+
+    async def dispatch(self, request: Request, call_next: Callable) -> Response:
+        """标记请求所属的客户端
+
+        Args:
+            request: HTTP请求
+            call_next: 下一个中间件或处理器
+
+        Returns:
+            Response: HTTP响应
+        """
+        api_key = request.headers.get(self.header)
+        if api_key:
+            client = client_flow(api_key)
+        else:
+            client = client_flow(request.client.host if request.client else "unknown", address=True)
+        token = current_client.set(client)
+        try:
+            return await call_next(request)
+        finally:
+            current_client.reset(token)
@@ -9,15 +9,50 @@ Description:                扫描相关Pydantic数据模型，包含扫描请
 Changed history:            
                             2025/05/23: 初始创建;
                             2025/05/23: 更新为Pydantic v2验证器;
+                            2026/10/19: 扫描请求添加速率限制参数;
+                            2026/10/19: 添加top_ports和端口探测顺序参数;
+                            2026/10/19: 扫描请求添加截止时间参数;
+                            2026/10/19: 扫描请求添加缓存控制参数;
+                            2026/10/19: 端口列表支持端口范围表达式;
+                            2026/10/19: 批量扫描目标支持CIDR、地址范围和排除列表;
+                            2026/10/19: 添加周期扫描任务请求模型;
+                            2026/10/19: 批量扫描请求添加任务优先级;
+                            2026/10/19: top_ports上限改为排名表长度;
+                            2026/10/19: 端口范围表达式只解析一次为PortSet，不在验证时展开;
+                            2026/10/19: 批量扫描请求限制目标数×端口数;
+                            2026/10/19: 任务状态添加截止时间内未扫完的partial状态;
 ----
 """
 
 from typing import List, Optional, Dict, Any, Union
-from pydantic import Field, field_validator, model_validator
+from pydantic import Field, PrivateAttr, field_validator, model_validator
 import time
 import ipaddress
 
 from .common import BaseModel, ConfigUpdate
+from ..config import get_settings
+from ..core.port_ranking import TOP_TCP_PORTS, get_top_ports
+from ..core.port_set import PortSet
+from ..core.target_spec import TargetSpec
+from ..core.scan_scheduler import CronSchedule
+
+
+# 允许的端口探测顺序
+PORT_ORDERS = ["numeric", "frequency"]
+
+# 批量扫描展开后的最大目标地址数
+MAX_BATCH_TARGETS = 65536
+
+# 显式端口列表的最大长度（范围表达式不受限制，按区间保存）
+MAX_PORT_LIST = 1000
+
+
+def _parse_ports(ports: Union[str, List[int]]) -> PortSet:
+    """把端口列表或范围表达式解析为非空端口集合"""
+    port_set = PortSet.coerce(ports)
+    if not port_set:
+        raise ValueError("端口列表不能为空")
+    return port_set
 
 
 class ScanRequest(BaseModel):
@@ -27,6 +62,8 @@ class ScanRequest(BaseModel):
     port: int = Field(..., ge=1, le=65535, description="目标端口")
     timeout: Optional[float] = Field(default=3.0, ge=0.1, le=30.0, description="超时时间(秒)")
     protocol: str = Field(default="tcp", description="协议类型")
+    use_cache: bool = Field(default=True, description="是否使用缓存的扫描结果")
+    max_age: Optional[float] = Field(default=None, ge=0, description="可接受的缓存结果最大年龄(秒)")
     
     @field_validator("target")
     @classmethod
@@ -67,6 +104,11 @@ class PortRangeRequest(BaseModel):
     timeout: Optional[float] = Field(default=3.0, ge=0.1, le=30.0, description="超时时间(秒)")
     protocol: str = Field(default="tcp", description="协议类型")
     max_concurrent: Optional[int] = Field(default=50, ge=1, le=500, description="最大并发数")
+    rate_limit: Optional[float] = Field(default=None, gt=0, description="每秒最大探测数(包/秒)")
+    port_order: Optional[str] = Field(default=None, description="端口探测顺序: numeric/frequency，默认有截止时间时按频率")
+    deadline_seconds: Optional[float] = Field(default=None, gt=0, le=3600, description="扫描时间预算(秒)，到期返回部分结果")
+    use_cache: bool = Field(default=True, description="是否使用缓存的扫描结果")
+    max_age: Optional[float] = Field(default=None, ge=0, description="可接受的缓存结果最大年龄(秒)")
     
     @field_validator("target")
     @classmethod
@@ -105,16 +147,37 @@ class PortRangeRequest(BaseModel):
         if v.lower() not in allowed_protocols:
             raise ValueError(f"协议必须是以下之一: {allowed_protocols}")
         return v.lower()
+    
+    @field_validator("port_order")
+    @classmethod
+    def validate_port_order(cls, v):
+        """验证端口探测顺序"""
+        if v is None:
+            return v
+        if v.lower() not in PORT_ORDERS:
+            raise ValueError(f"端口顺序必须是以下之一: {PORT_ORDERS}")
+        return v.lower()
 
 
 class BatchScanRequest(BaseModel):
     """批量扫描请求模型"""
     
-    targets: List[str] = Field(..., min_items=1, max_items=100, description="扫描目标列表")
-    ports: List[int] = Field(..., min_items=1, max_items=1000, description="端口列表")
+    targets: List[str] = Field(..., min_items=1, max_items=100, description="扫描目标列表，支持IP、CIDR、地址范围和主机名")
+    exclude: Optional[List[str]] = Field(default=None, max_items=100, description="排除的目标（IP、CIDR或地址范围）")
+    randomize_targets: bool = Field(default=False, description="是否以随机顺序扫描目标")
+    ports: Optional[Union[str, List[int]]] = Field(default=None, description="端口列表，也可为范围表达式如\"1-1000,3389\"")
+    top_ports: Optional[int] = Field(default=None, ge=1, le=len(TOP_TCP_PORTS), description="扫描开放频率最高的前N个端口（不超过排名表长度）")
     timeout: Optional[float] = Field(default=3.0, ge=0.1, le=30.0, description="超时时间(秒)")
     protocol: str = Field(default="tcp", description="协议类型")
     max_concurrent: Optional[int] = Field(default=50, ge=1, le=500, description="最大并发数")
+    rate_limit: Optional[float] = Field(default=None, gt=0, description="每秒最大探测数(包/秒)")
+    port_order: Optional[str] = Field(default=None, description="端口探测顺序: numeric/frequency，默认有截止时间时按频率")
+    deadline_seconds: Optional[float] = Field(default=None, gt=0, le=3600, description="扫描时间预算(秒)，到期返回部分结果")
+    use_cache: bool = Field(default=True, description="是否使用缓存的扫描结果")
+    max_age: Optional[float] = Field(default=None, ge=0, description="可接受的缓存结果最大年龄(秒)")
+    priority: int = Field(default=0, ge=-10, le=10, description="任务优先级，数值越大越先运行")
+    
+    _port_set: Optional[PortSet] = PrivateAttr(default=None)
     
     @field_validator("targets")
     @classmethod
@@ -126,32 +189,48 @@ class BatchScanRequest(BaseModel):
                 continue
             
             try:
-                ipaddress.ip_address(target)
-                validated_targets.append(target)
-                continue
+                TargetSpec.parse(target)
             except ValueError:
-                pass
-            
-            if target.replace(".", "").replace("-", "").replace("_", "").isalnum():
-                validated_targets.append(target)
-            else:
                 raise ValueError(f"无效的目标: {target}")
+            validated_targets.append(target.strip())
         
         if not validated_targets:
             raise ValueError("至少需要一个有效目标")
         
         return validated_targets
     
+    @field_validator("exclude")
+    @classmethod
+    def validate_exclude(cls, v):
+        """验证排除列表"""
+        if v:
+            TargetSpec.parse([], exclude=v)
+        return v
+    
+    def target_spec(self) -> TargetSpec:
+        """获取展开规则后的目标规格（延迟迭代，不生成地址列表）"""
+        return TargetSpec.parse(self.targets, exclude=self.exclude)
+    
+    @field_validator("ports", mode="before")
+    @classmethod
+    def parse_port_spec(cls, v):
+        """端口集合按表达式保存，不展开"""
+        if isinstance(v, PortSet):
+            return str(v)
+        return v
+    
     @field_validator("ports")
     @classmethod
     def validate_ports(cls, v):
-        """验证端口列表"""
-        for port in v:
-            if not (1 <= port <= 65535):
-                raise ValueError(f"端口 {port} 超出有效范围 (1-65535)")
-        
-        # 去重并排序
-        return sorted(list(set(v)))
+        """验证显式端口列表的长度（范围表达式在解析时验证）"""
+        if isinstance(v, list) and len(v) > MAX_PORT_LIST:
+            raise ValueError(f"端口列表过长，最多{MAX_PORT_LIST}个，更多端口请使用范围表达式")
+        return v
+    
+    @property
+    def port_set(self) -> PortSet:
+        """解析后的端口集合（按区间保存，迭代时才逐个产生端口）"""
+        return self._port_set
     
     @field_validator("protocol")
     @classmethod
@@ -161,6 +240,50 @@ class BatchScanRequest(BaseModel):
         if v.lower() not in allowed_protocols:
             raise ValueError(f"协议必须是以下之一: {allowed_protocols}")
         return v.lower()
+    
+    @field_validator("port_order")
+    @classmethod
+    def validate_port_order(cls, v):
+        """验证端口探测顺序"""
+        if v is None:
+            return v
+        if v.lower() not in PORT_ORDERS:
+            raise ValueError(f"端口顺序必须是以下之一: {PORT_ORDERS}")
+        return v.lower()
+    
+    @model_validator(mode='after')
+    def validate_target_count(self):
+        """验证排除后的目标数量"""
+        total = len(self.target_spec())
+        if total == 0:
+            raise ValueError("排除后没有剩余的扫描目标")
+        if total > MAX_BATCH_TARGETS:
+            raise ValueError(f"目标地址过多，最大支持{MAX_BATCH_TARGETS}个")
+        return self
+    
+    @model_validator(mode='after')
+    def resolve_top_ports(self):
+        """解析端口表达式或top_ports为端口集合（只解析一次）"""
+        if self.ports is None and self.top_ports is None:
+            raise ValueError("必须指定ports或top_ports")
+        
+        if self.ports is None:
+            self.ports = get_top_ports(self.top_ports, self.protocol)
+            # top_ports默认按频率顺序探测
+            if "port_order" not in self.model_fields_set:
+                self.port_order = "frequency"
+        
+        self._port_set = _parse_ports(self.ports)
+        return self
+    
+    @model_validator(mode='after')
+    def validate_probe_count(self):
+        """验证探测总数（目标数×端口数）不超过配置的上限"""
+        limit = get_settings().scan_max_batch_probes
+        probes = len(self.target_spec()) * len(self._port_set)
+        if probes > limit:
+            raise ValueError(f"探测数过多（{probes}），目标数×端口数最大支持{limit}")
+        return self
 
 
 class ScanResult(BaseModel):
@@ -241,12 +364,13 @@ class ScanTaskStatus(BaseModel):
     started_at: Optional[float] = Field(default=None, description="开始时间")
     completed_at: Optional[float] = Field(default=None, description="完成时间")
     error: Optional[str] = Field(default=None, description="错误信息")
+    deadline_reached: bool = Field(default=False, description="是否因截止时间结束（部分端口未探测）")
     
     @field_validator("status")
     @classmethod
     def validate_task_status(cls, v):
         """验证任务状态"""
-        allowed_statuses = ["pending", "running", "completed", "failed", "cancelled", "paused"]
+        allowed_statuses = ["pending", "running", "completed", "partial", "failed", "cancelled", "paused"]
         if v not in allowed_statuses:
             raise ValueError(f"任务状态必须是以下之一: {allowed_statuses}")
         return v
@@ -305,12 +429,74 @@ class PortInfo(BaseModel):
         return v.lower()
 
 
+class ScanScheduleRequest(BaseModel):
+    """周期扫描任务请求模型"""
+    
+    name: Optional[str] = Field(default=None, description="任务名称")
+    target: str = Field(..., description="目标规格，支持IP、CIDR、地址范围、主机名和!排除项")
+    ports: str = Field(..., description="端口范围表达式，如\"1-1024,3389\"")
+    interval_seconds: Optional[float] = Field(default=None, ge=1, description="固定执行间隔(秒)")
+    cron: Optional[str] = Field(default=None, description="cron表达式（分 时 日 月 周）")
+    protocol: str = Field(default="tcp", description="扫描协议")
+    max_backoff_runs: int = Field(default=16, ge=1, le=256, description="稳定关闭区间最多间隔的轮数")
+    volatile_runs: int = Field(default=3, ge=1, le=100, description="状态变化后的端口保持每轮重扫的轮数")
+    timeout: float = Field(default=3.0, ge=0.1, le=30.0, description="超时时间(秒)")
+    max_concurrent: int = Field(default=100, ge=1, le=1000, description="最大并发数")
+    rate_limit: Optional[float] = Field(default=None, gt=0, description="每秒最大探测数")
+    
+    @field_validator("target")
+    @classmethod
+    def validate_target(cls, v):
+        """验证目标规格"""
+        try:
+            total = len(TargetSpec.parse(v))
+        except ValueError as e:
+            raise ValueError(str(e))
+        if total == 0:
+            raise ValueError("排除后没有剩余的扫描目标")
+        if total > MAX_BATCH_TARGETS:
+            raise ValueError(f"目标地址过多，最大支持{MAX_BATCH_TARGETS}个")
+        return v.strip()
+    
+    @field_validator("ports")
+    @classmethod
+    def validate_ports(cls, v):
+        """验证端口范围表达式"""
+        if not PortSet.parse(v):
+            raise ValueError("端口列表不能为空")
+        return v
+    
+    @field_validator("cron")
+    @classmethod
+    def validate_cron(cls, v):
+        """验证cron表达式"""
+        if v is not None:
+            CronSchedule(v)
+        return v
+    
+    @field_validator("protocol")
+    @classmethod
+    def validate_protocol(cls, v):
+        """验证协议类型"""
+        allowed_protocols = ["tcp", "udp"]
+        if v.lower() not in allowed_protocols:
+            raise ValueError(f"协议必须是以下之一: {allowed_protocols}")
+        return v.lower()
+    
+    @model_validator(mode='after')
+    def validate_trigger(self):
+        """验证触发方式"""
+        if (self.interval_seconds is None) == (self.cron is None):
+            raise ValueError("interval_seconds和cron必须且只能指定一个")
+        return self
+
+
 class ScanProfile(BaseModel):
     """扫描配置模板模型"""
     
     name: str = Field(..., description="模板名称")
     description: Optional[str] = Field(default=None, description="模板描述")
-    ports: List[int] = Field(..., description="端口列表")
+    ports: Union[str, List[int]] = Field(..., description="端口列表，也可为范围表达式如\"1-1000,3389\"")
     timeout: float = Field(default=3.0, description="超时时间(秒)")
     max_concurrent: int = Field(default=50, description="最大并发数")
     service_detection: bool = Field(default=True, description="是否启用服务检测")
@@ -330,15 +516,24 @@ class ScanProfile(BaseModel):
             raise ValueError("模板名称长度不能超过50个字符")
         return v.strip()
     
+    @field_validator("ports", mode="before")
+    @classmethod
+    def parse_port_spec(cls, v):
+        """端口集合按表达式保存，不展开"""
+        if isinstance(v, PortSet):
+            return str(v)
+        return v
+    
     @field_validator("ports")
     @classmethod
     def validate_ports(cls, v):
-        """验证端口列表"""
-        if not v:
-            raise ValueError("端口列表不能为空")
-        
-        for port in v:
-            if not (1 <= port <= 65535):
-                raise ValueError(f"端口 {port} 超出有效范围 (1-65535)")
-        
-        return sorted(list(set(v))) 
\ No newline at end of file
+        """验证端口列表或范围表达式"""
+        if isinstance(v, list) and len(v) > MAX_PORT_LIST:
+            raise ValueError(f"端口列表过长，最多{MAX_PORT_LIST}个，更多端口请使用范围表达式")
+        _parse_ports(v)
+        return v
+    
+    @property
+    def port_set(self) -> PortSet:
+        """解析后的端口集合"""
+        return _parse_ports(self.ports) 
\ No newline at end of file
@@ -9,6 +9,7 @@ Description:                稳定启动脚本，禁用自动重载以保持WebS
 
 Changed history:            
                             2025/05/24: 初始创建;
+                            2026/10/19: 支持多工作进程运行;
 ----
 """
 
@@ -26,6 +27,13 @@ if __name__ == "__main__":
     print("🚀 启动网络安全工具平台 (稳定模式)")
     print("📝 自动重载已禁用，WebSocket连接将保持稳定")
     print("🔧 如需修改代码，请手动重启服务器")
+    
+    # 工作进程数（WORKERS环境变量），多进程时任务状态通过STATE_BACKEND_URL共享
+    workers = max(1, int(os.environ.get("WORKERS", "1")))
+    if workers > 1:
+        print(f"⚙️  工作进程数: {workers}")
+        if not os.environ.get("STATE_BACKEND_URL"):
+            print("⚠️  未设置STATE_BACKEND_URL，任务状态无法在工作进程间共享")
     print("=" * 50)
     
     uvicorn.run(
@@ -33,6 +41,7 @@ if __name__ == "__main__":
         host="0.0.0.0",
         port=8000,
         reload=False,  # 强制禁用重载
+        workers=workers,
         log_level="info",
         access_log=True,
     ) 
\ No newline at end of file
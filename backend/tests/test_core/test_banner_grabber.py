@@ -0,0 +1,161 @@
+"""
+---------------------------------------------------------------
+File name:                  test_banner_grabber.py
+Author:                     Ignorant-lu
+Date created:               2026/10/19
+Description:                Banner抓取阶段测试用例
+----------------------------------------------------------------
+
+Changed history:
+                            2026/10/19: 初始创建;
+                            2026/10/19: 添加交接连接占用套接字额度的测试;
+----
+"""
+
+import asyncio
+import pytest
+
+from backend.app.core.banner_grabber import BannerGrabber
+from backend.app.core.port_scanner import PortScannerEngine
+from backend.app.core.resource_governor import SOCKETS, ResourceGovernor
+
+
+async def _start_server(banner: bytes, delay: float = 0.0):
+    """启动本地测试服务，连接建立后延迟发送banner"""
+    async def handle(reader, writer):
+        await asyncio.sleep(delay)
+        if banner:
+            writer.write(banner)
+            await writer.drain()
+        await asyncio.sleep(0.5)
+        writer.close()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    return server, port
+
+
+class TestBannerGrabber:
+    """Banner抓取测试类"""
+
+    @pytest.mark.asyncio
+    async def test_grab_reconnects_without_connection(self):
+        """测试未移交连接时自行建立连接抓取"""
+        server, port = await _start_server(b"SSH-2.0-OpenSSH_8.9\r\n")
+        try:
+            grabber = BannerGrabber(max_concurrent=2, timeout=1.0)
+            assert await grabber.grab("127.0.0.1", port) == "SSH-2.0-OpenSSH_8.9"
+            assert grabber.get_statistics()["banners_grabbed"] == 1
+        finally:
+            server.close()
+            await server.wait_closed()
+
+    @pytest.mark.asyncio
+    async def test_drain_timeout_cancels_pending(self):
+        """测试等待超时后取消未完成的抓取"""
+        server, port = await _start_server(b"late", delay=5.0)
+        try:
+            grabber = BannerGrabber(timeout=5.0)
+            results = []
+            grabber.submit("127.0.0.1", port, on_complete=results.append)
+            assert await grabber.drain(timeout=0.2) is False
+            assert grabber.pending == 0
+            assert results == []
+        finally:
+            server.close()
+            await server.wait_closed()
+
+    @pytest.mark.asyncio
+    async def test_slow_banner_does_not_hold_scan_slot(self):
+        """测试banner等待不占用扫描并发槽位，结果在扫描返回前补齐"""
+        server, port = await _start_server(b"220 ftp ready", delay=0.3)
+        try:
+            scanner = PortScannerEngine(
+                max_concurrent=1, timeout=1.0, banner_grabbing=True,
+                service_detection=True, use_global_rate_limit=False,
+                banner_concurrency=4, banner_timeout=1.0
+            )
+            streamed = []
+            scanner.set_banner_callback(streamed.append)
+
+            # 发现阶段完成时banner尚未到达，扫描槽位已释放
+            result = await scanner.scan_port("127.0.0.1", port)
+            assert result["status"] == "open"
+            assert result["banner"] is None
+            assert scanner.semaphore._value == 1
+
+            results = await scanner.scan_ports("127.0.0.1", [port, port])
+            assert [r["banner"] for r in results] == ["220 ftp ready"] * 2
+            assert result["banner"] == "220 ftp ready"
+            assert len(streamed) == 3
+            assert scanner.get_statistics()["banners_grabbed"] == 3
+        finally:
+            server.close()
+            await server.wait_closed()
+
+    @pytest.mark.asyncio
+    async def test_cancelled_queued_grabs_close_handed_off_connections(self):
+        """测试排队等待并发槽位的抓取被取消时关闭发现阶段交接的连接"""
+        server, port = await _start_server(b"late", delay=5.0)
+        try:
+            grabber = BannerGrabber(max_concurrent=1, timeout=5.0)
+            writers = []
+            for _ in range(3):
+                reader, writer = await asyncio.open_connection("127.0.0.1", port)
+                writers.append(writer)
+                grabber.submit("127.0.0.1", port, reader, writer)
+            await asyncio.sleep(0.05)
+
+            assert await grabber.drain(0) is False
+            assert [writer.is_closing() for writer in writers] == [True, True, True]
+            assert grabber._held_connections == 0
+        finally:
+            server.close()
+            await server.wait_closed()
+
+    @pytest.mark.asyncio
+    async def test_grab_cancelled_before_start_closes_connection(self):
+        """测试尚未开始运行就被取消的抓取任务同样关闭交接的连接"""
+        server, port = await _start_server(b"late", delay=5.0)
+        try:
+            grabber = BannerGrabber(timeout=5.0)
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            task = grabber.submit("127.0.0.1", port, reader, writer)
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+            assert writer.is_closing()
+            assert grabber._held_connections == 0
+        finally:
+            server.close()
+            await server.wait_closed()
+
+    @pytest.mark.asyncio
+    async def test_handed_off_connections_keep_socket_lease(self):
+        """测试交接给banner阶段的连接在排队期间占用探测的额度，开始抓取时不再借用"""
+        server, port = await _start_server(b"220 ftp ready", delay=0.2)
+        governor = ResourceGovernor(max_sockets=10)
+        pool = governor._pools[SOCKETS]
+        try:
+            scanner = PortScannerEngine(
+                max_concurrent=4, timeout=1.0, banner_grabbing=True,
+                use_global_rate_limit=False, banner_concurrency=1,
+                banner_timeout=1.0, governor=governor
+            )
+            for _ in range(3):
+                assert (await scanner.scan_port("127.0.0.1", port))["status"] == "open"
+            assert pool.in_use == 3
+
+            assert await scanner.wait_for_banners(5.0)
+            assert pool.in_use == 0 and pool.peak == 3
+            assert scanner.get_statistics()["banners_grabbed"] == 3
+
+            # 排队中被取消的抓取同样归还交接的额度
+            for _ in range(3):
+                await scanner.scan_port("127.0.0.1", port)
+            await scanner.banner_grabber.drain(0)
+            assert pool.in_use == 0
+        finally:
+            server.close()
+            await server.wait_closed()
+
@@ -0,0 +1,109 @@
+"""
+---------------------------------------------------------------
+File name:                  test_cursor.py
+Author:                     Ignorant-lu
+Date created:               2026/10/19
+Description:                游标分页测试用例
+----------------------------------------------------------------
+
+Changed history:
+                            2026/10/19: 初始创建;
+----
+"""
+
+import pytest
+from fastapi import HTTPException
+from unittest.mock import patch
+
+from backend.app.core.cursor import encode_cursor, decode_cursor, page_sequence
+from backend.app.core.result_store import ScanResultStore
+from backend.app.core.tcp_server import TCPServer
+from backend.app.api.routes import scan as scan_routes
+from backend.app.api.routes import tcp as tcp_routes
+
+
+ROWS = [
+    {"host": "10.0.0.1", "port": p, "status": "open" if p % 3 == 0 else "closed", "scanned_at": 1000.0 + p}
+    for p in range(1, 301)
+]
+
+
+class TestCursor:
+    """游标分页测试类"""
+
+    def test_token_round_trip_and_scope(self):
+        """测试令牌往返与过滤条件绑定"""
+        token = encode_cursor(42, {"scan_id": "a", "status": "open"})
+        assert decode_cursor(token, {"status": "open", "scan_id": "a"}) == 42
+        assert decode_cursor(None, {}) == 0
+        with pytest.raises(ValueError):
+            decode_cursor(token, {"scan_id": "a", "status": "closed"})
+        with pytest.raises(ValueError):
+            decode_cursor("not-a-token", {})
+
+    def test_page_sequence(self):
+        """测试顺序分页只在存在下一条匹配时返回续读位置"""
+        items = list(range(10))
+        page, next_index = page_sequence(items, 0, 2, lambda x: x % 2 == 0)
+        assert page == [0, 2] and next_index == 4
+        page, next_index = page_sequence(items, 8, 2, lambda x: x % 2 == 0)
+        assert page == [8] and next_index is None
+
+    def test_store_query_after_pushes_filters(self, tmp_path):
+        """测试结果存储的游标查询与范围过滤"""
+        store = ScanResultStore(str(tmp_path / "results.db"))
+        store.write_results("a", ROWS)
+        seen, after_id = [], 0
+        while True:
+            items, after_id = store.query_after(
+                "a", after_id, limit=7, status="open", port_min=50, port_max=150, since=1060.0
+            )
+            seen += [item["port"] for item in items]
+            if after_id is None:
+                break
+        assert seen == [p for p in range(60, 151) if p % 3 == 0]
+        store.close()
+
+    @pytest.mark.asyncio
+    async def test_scan_results_cursor(self):
+        """测试扫描结果接口游标分页（内存结果）"""
+        with patch.dict(scan_routes._scan_results, {"scan-1": ROWS}):
+            seen, cursor = [], ""
+            while cursor is not None:
+                response = await scan_routes.get_scan_results(
+                    "scan-1", host=None, port=None, port_status="open", service=None,
+                    port_max=100, page=1, page_size=10, cursor=cursor
+                )
+                seen += [r["port"] for r in response.data["results"]]
+                cursor = response.data["next_cursor"]
+
+            with pytest.raises(HTTPException) as exc_info:
+                await scan_routes.get_scan_results(
+                    "scan-1", host=None, port=None, port_status="closed", service=None,
+                    page=1, page_size=10, cursor=encode_cursor(5, {"scan_id": "scan-1"})
+                )
+
+        assert seen == list(range(3, 101, 3))
+        assert exc_info.value.status_code == 400
+
+    @pytest.mark.asyncio
+    async def test_tcp_messages_tail_cursor(self):
+        """测试消息历史游标在历史裁剪后仍能续读"""
+        server = TCPServer(max_history_size=5)
+        for i in range(4):
+            server.add_to_message_history({"type": "chat", "content": str(i), "sender": "a"})
+
+        with patch.dict(tcp_routes._tcp_servers, {"s1": server}):
+            first = (await tcp_routes.get_server_messages("s1", limit=2, cursor=None, message_type=None,
+                                                          sender=None, since=None, until=None)).data
+            assert [m["content"] for m in first["messages"]] == ["2", "3"]
+
+            for i in range(4, 10):
+                server.add_to_message_history({"type": "chat", "content": str(i), "sender": "a"})
+            second = (await tcp_routes.get_server_messages("s1", limit=3, cursor=first["next_cursor"],
+                                                           message_type=None, sender=None,
+                                                           since=None, until=None)).data
+
+        # 消息4已被裁剪，从最早保留的消息5开始
+        assert [m["content"] for m in second["messages"]] == ["5", "6", "7"]
+        assert second["missed_messages"] == 1 and second["has_more"]
@@ -0,0 +1,59 @@
+"""
+---------------------------------------------------------------
+File name:                  test_fd_limits.py
+Author:                     Ignorant-lu
+Date created:               2026/10/19
+Description:                文件描述符预算测试用例
+----------------------------------------------------------------
+
+Changed history:
+                            2026/10/19: 初始创建;
+----
+"""
+
+import pytest
+from unittest.mock import patch
+
+from backend.app.core import fd_limits
+from backend.app.core.fd_limits import compute_fd_budget, read_nofile_limit, raise_nofile_limit
+from backend.app.api.routes import scan as scan_routes
+from backend.app.api.routes import system as system_routes
+
+
+class TestFdLimits:
+    """文件描述符预算测试类"""
+
+    def test_budget_on_default_limit(self):
+        """测试1024描述符时的并发上限：两个任务同时运行不超过限制"""
+        budget = compute_fd_budget(1024, 4096)
+        assert budget.reserved == 128 and budget.sockets == 896
+        assert budget.scan_concurrency == 448
+        assert 2 * budget.scan_concurrency + budget.reserved <= 1024
+        assert budget.tcp_connections == 448 and budget.ping_subprocesses == 32
+
+    def test_budget_scales_with_limit(self):
+        """测试提高限制后上限由配置决定，保留数不低于限制的10%"""
+        budget = compute_fd_budget(65536, max_scan_concurrent=500)
+        assert budget.reserved == 6553
+        assert budget.scan_concurrency == 500 and budget.tcp_connections == 1000
+
+    def test_raise_is_noop_when_already_high_enough(self):
+        """测试软限制已满足时不调整"""
+        soft, _ = read_nofile_limit()
+        assert raise_nofile_limit(soft) == (soft, False)
+
+    def test_scanner_concurrency_clamped(self):
+        """测试请求的扫描并发数被限制在预算内"""
+        with patch.object(fd_limits, "_fd_budget", compute_fd_budget(256)):
+            scanner = scan_routes._create_scanner(max_concurrent=500, banner_grabbing=True, banner_concurrency=200)
+            small = scan_routes._create_scanner(max_concurrent=10)
+        assert scanner.max_concurrent == 64
+        assert scanner.banner_grabber.max_concurrent == 32
+        assert small.max_concurrent == 10
+
+    @pytest.mark.asyncio
+    async def test_system_info_exposes_budget(self):
+        """测试系统信息接口返回描述符预算"""
+        info = await system_routes.get_system_info()
+        assert info["fd_budget"]["soft_limit"] == read_nofile_limit()[0]
+        assert info["fd_budget"]["scan_concurrency"] >= 1
@@ -0,0 +1,138 @@
+"""
+---------------------------------------------------------------
+File name:                  test_framing.py
+Author:                     Ignorant-lu
+Date created:               2026/10/19
+Description:                长度前缀帧增量解析测试用例
+----------------------------------------------------------------
+
+Changed history:
+                            2026/10/19: 初始创建;
+----
+"""
+
+import asyncio
+import json
+import sys
+
+import pytest
+from unittest.mock import patch
+
+from backend.app.core.framing import FrameDecoder, FrameError, FramedProtocol, encode_frame
+from backend.app.core.tcp_client import TCPClient
+from backend.app.core import tcp_server as tcp_server_module
+from backend.app.core.tcp_server import TCPServer
+
+
+def _frame(message) -> bytes:
+    return encode_frame(json.dumps(message).encode("utf-8"))
+
+
+class TestFraming:
+    """长度前缀帧测试类"""
+
+    def test_decoder_handles_split_and_coalesced_frames(self):
+        """测试帧被拆分到多次数据或多帧合并在一次数据中时都能正确切分"""
+        frames = [b"a", b"", b"hello world", bytes(range(200))]
+        stream = b"".join(encode_frame(frame) for frame in frames)
+        decoder = FrameDecoder(1024)
+
+        for step in (1, 3, 7, len(stream)):
+            received = []
+            for i in range(0, len(stream), step):
+                decoder.feed(stream[i:i + step], lambda view: received.append(bytes(view)))
+            assert received == frames
+            assert decoder.buffered == 0
+
+    def test_decoder_rejects_oversized_frame(self):
+        """测试帧长度超过上限时在读取内容前报错，之前的完整帧照常交付"""
+        decoder = FrameDecoder(8)
+        received = []
+        with pytest.raises(FrameError):
+            decoder.feed(encode_frame(b"ok") + encode_frame(b"x" * 9), lambda view: received.append(bytes(view)))
+        assert received == [b"ok"]
+
+    @pytest.mark.asyncio
+    async def test_protocol_delivers_frames_in_batches(self):
+        """测试一次数据到达中的全部帧作为一批交付，无效JSON之后视为连接结束"""
+        protocol = FramedProtocol(1024)
+        protocol.data_received(b"".join(_frame({"n": i}) for i in range(100)))
+        protocol.data_received(_frame({"n": 100})[:5])
+
+        batch = await protocol.read_batch()
+        assert [message["n"] for message, _ in batch] == list(range(100))
+
+        protocol.data_received(_frame({"n": 100})[5:] + encode_frame(b"{bad"))
+        assert [message for message, _ in await protocol.read_batch()] == [{"n": 100}]
+        assert await protocol.read_batch() is None
+        assert isinstance(protocol.error, ValueError)
+
+    @pytest.mark.asyncio
+    async def test_server_and_client_exchange_messages(self):
+        """测试服务器与客户端通过增量收帧收发消息"""
+        server = TCPServer(host="127.0.0.1", port=0)
+        await server.start()
+        received = []
+        client = TCPClient(server_port=server.actual_port, auto_reconnect=False, heartbeat_interval=60.0)
+        client.set_message_callback(received.append)
+        try:
+            assert await client.connect()
+            for i in range(20):
+                assert await client.send_message({"type": "broadcast", "content": f"msg {i}"})
+            for _ in range(100):
+                if len(received) >= 21:
+                    break
+                await asyncio.sleep(0.02)
+
+            assert received[0]["type"] == "system"
+            assert [message["content"] for message in received[1:]] == [f"msg {i}" for i in range(20)]
+            assert server.statistics.get_statistics()["messages_received"] == 20
+        finally:
+            await client.disconnect()
+            await server.stop()
+
+    @pytest.mark.asyncio
+    async def test_broadcast_encodes_once_for_all_recipients(self):
+        """测试转发消息不再重复编解码，广播时所有接收方共用一次编码"""
+        server = TCPServer(host="127.0.0.1", port=0)
+        await server.start()
+        inboxes = [[] for _ in range(3)]
+        clients = [TCPClient(server_port=server.actual_port, auto_reconnect=False, heartbeat_interval=60.0)
+                   for _ in inboxes]
+        calls = []
+        dumps, loads = json.dumps, json.loads
+
+        def counted(func):
+            def wrapper(*args, **kwargs):
+                if sys._getframe(1).f_globals.get("__name__") == tcp_server_module.__name__:
+                    calls.append(func.__name__)
+                return func(*args, **kwargs)
+            return wrapper
+
+        try:
+            for client, inbox in zip(clients, inboxes):
+                client.set_message_callback(inbox.append)
+                assert await client.connect()
+            for _ in range(100):
+                if len(server.clients) == 3:
+                    break
+                await asyncio.sleep(0.01)
+
+            sender = next(iter(server.clients))
+            with patch("json.dumps", counted(dumps)), patch("json.loads", counted(loads)):
+                await server._process_client_message(sender, {"type": "broadcast", "content": "hi", "extra": 1})
+            # 之前为 dumps + loads（验证）+ 每个接收方一次 dumps
+            assert calls == ["dumps"]
+
+            for _ in range(100):
+                if all(len(inbox) == 2 for inbox in inboxes):
+                    break
+                await asyncio.sleep(0.01)
+            relayed = [inbox[1] for inbox in inboxes]
+            assert all(message == relayed[0] for message in relayed)
+            assert relayed[0]["content"] == "hi" and relayed[0]["sender"] == sender
+            assert "extra" not in relayed[0]
+        finally:
+            for client in clients:
+                await client.disconnect()
+            await server.stop()
@@ -0,0 +1,122 @@
+"""
+---------------------------------------------------------------
+File name:                  test_inventory_index.py
+Author:                     Ignorant-lu
+Date created:               2026/10/19
+Description:                资产清单倒排索引测试用例
+----------------------------------------------------------------
+
+Changed history:
+                            2026/10/19: 初始创建;
+----
+"""
+
+import random
+import time
+import ipaddress
+import pytest
+from unittest.mock import patch
+
+from backend.app.core.inventory_index import InventoryIndex, iter_bits
+from backend.app.core.port_scanner import PortScannerEngine
+
+
+class TestInventoryIndex:
+    """资产清单索引测试类"""
+
+    def test_latest_state_replaces_previous(self):
+        """测试同一主机端口以最新已知状态为准"""
+        index = InventoryIndex()
+        index.update("10.0.0.2", 3389, "open", service="rdp")
+        index.update("10.0.0.1", 3389, "open", service="rdp")
+        index.update("10.0.0.3", 22, "open", service="ssh")
+        assert index.query(ports=[3389]) == (["10.0.0.1", "10.0.0.2"], 2)
+
+        index.update("10.0.0.2", 3389, "closed")
+        index.update("10.0.0.1", 3389, "timeout")
+        assert index.query(ports=[3389]) == (["10.0.0.1"], 1)
+        assert index.query(services=["rdp"]) == (["10.0.0.1"], 1)
+        assert index.host_ports("10.0.0.2")[0]["status"] == "closed"
+        assert index.host_ports("10.9.9.9") is None
+
+    def test_service_bitmap_tracks_multiple_ports(self):
+        """测试主机多个端口同一服务时，全部关闭后才移出服务集合"""
+        index = InventoryIndex()
+        index.update("h1", 80, "open", service="http")
+        index.update("h1", 8080, "open", service="http")
+        index.update("h1", 80, "closed")
+        assert index.count(services=["http"]) == 1
+        index.update("h1", 8080, "closed")
+        assert index.count(services=["http"]) == 0
+
+    def test_combined_queries(self):
+        """测试多条件交集与并集"""
+        index = InventoryIndex()
+        index.update("a", 22, "open", service="ssh")
+        index.update("a", 80, "open", service="http")
+        index.update("b", 80, "open", service="http")
+        assert index.query(ports=[22, 80])[0] == ["a"]
+        assert index.query(ports=[22, 80], match_all=False)[0] == ["a", "b"]
+        assert index.query(ports=[22], services=["http"])[0] == ["a"]
+
+    def test_large_inventory_query_is_fast(self):
+        """测试数十万主机规模下的查询耗时"""
+        index = InventoryIndex()
+        network = int(ipaddress.ip_address("10.0.0.0"))
+        for offset in range(200000):
+            host = str(ipaddress.IPv4Address(network + offset))
+            index.update(host, 443, "open", service="https")
+            if offset % 50 == 0:
+                index.update(host, 3389, "open", service="rdp")
+
+        start = time.perf_counter()
+        hosts, total = index.query(ports=[3389], services=["https"], limit=10)
+        elapsed = time.perf_counter() - start
+        assert total == 4000
+        assert hosts[:2] == ["10.0.0.0", "10.0.0.50"]
+        assert elapsed < 0.5
+        assert list(iter_bits(0b101001)) == [0, 3, 5]
+
+        # 命中大量主机的单端口查询分页不对全部结果排序
+        index.query(ports=[443], limit=1)
+        start = time.perf_counter()
+        hosts, total = index.query(ports=[443], offset=1000, limit=100)
+        elapsed = time.perf_counter() - start
+        assert total == 200000
+        assert hosts[0] == str(ipaddress.IPv4Address(network + 1000))
+        assert elapsed < 0.05
+
+    def test_pages_follow_address_order_regardless_of_insertion(self):
+        """测试乱序写入的IPv4/IPv6/主机名按地址顺序分页，稀疏与稠密结果一致"""
+        index = InventoryIndex()
+        hosts = [str(ipaddress.IPv4Address(0x0A000000 + i * 7)) for i in range(3000)]
+        hosts += ["2001:db8::%x" % i for i in range(300)] + ["host-%03d" % i for i in range(100)]
+        random.Random(7).shuffle(hosts)
+        for i, host in enumerate(hosts):
+            index.update(host, 80, "open")
+            if i % 97 == 0:
+                index.update(host, 25, "open")
+
+        for port in (80, 25):
+            expected = sorted(
+                (h for h in hosts if any(state["port"] == port for state in index.host_ports(h))),
+                key=InventoryIndex._sort_key
+            )
+            pages = []
+            for offset in range(0, len(expected), 250):
+                page, total = index.query(ports=[port], offset=offset, limit=250)
+                assert total == len(expected)
+                pages += page
+            assert pages == expected
+
+        index.update("0.0.0.1", 80, "open")
+        assert index.query(ports=[80], limit=1)[0] == ["0.0.0.1"]
+
+    @pytest.mark.asyncio
+    async def test_engine_updates_index(self):
+        """测试扫描引擎探测结果写入索引"""
+        index = InventoryIndex()
+        scanner = PortScannerEngine(inventory=index, use_global_rate_limit=False)
+        with patch("asyncio.open_connection", side_effect=ConnectionRefusedError()):
+            await scanner.scan_ports("10.1.1.1", [22, 80])
+        assert [p["status"] for p in index.host_ports("10.1.1.1")] == ["closed", "closed"]
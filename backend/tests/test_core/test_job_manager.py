@@ -0,0 +1,215 @@
+"""
+---------------------------------------------------------------
+File name:                  test_job_manager.py
+Author:                     Ignorant-lu
+Date created:               2026/10/19
+Description:                后台任务管理测试用例
+----------------------------------------------------------------
+
+Changed history:
+                            2026/10/19: 初始创建;
+                            2026/10/19: 添加任务取消测试;
+                            2026/10/19: 添加落盘结果按页读取的测试;
+----
+"""
+
+import asyncio
+import time
+
+import pytest
+from unittest.mock import patch
+
+from backend.app.core.cursor import page_sequence
+from backend.app.core.job_manager import JobManager, JobQueueFullError, SpilledResults, job_manager
+from backend.app.core.port_scanner import PortScannerEngine
+from backend.app.schemas.ping import ContinuousPingRequest
+from backend.app.api.routes import ping as ping_routes
+
+
+async def _wait_idle(manager: JobManager):
+    for _ in range(200):
+        if not manager.get_statistics()["running"] and not manager.get_statistics()["queued"]:
+            return
+        await asyncio.sleep(0.01)
+
+
+class TestJobManager:
+    """后台任务管理测试类"""
+
+    @pytest.mark.asyncio
+    async def test_priority_queue_respects_running_limit(self):
+        """测试运行数上限内按优先级启动"""
+        manager = JobManager(max_running=1)
+        started = []
+        release = asyncio.Event()
+
+        async def run(name):
+            started.append(name)
+            await release.wait()
+
+        for name, priority in [("first", 0), ("low", -1), ("high", 5), ("normal", 0)]:
+            manager.create("scan", {"status": "pending"}, job_id=name)
+            manager.submit(name, lambda name=name: run(name), priority=priority)
+
+        await asyncio.sleep(0)
+        assert started == ["first"]
+        assert manager.queue_position("high") == 0
+        release.set()
+        await _wait_idle(manager)
+        assert started == ["first", "high", "normal", "low"]
+
+    def test_capacity_evicts_finished_then_rejects(self):
+        """测试满员时淘汰最早结束的任务，全部未结束时拒绝"""
+        manager = JobManager(max_jobs=2)
+        tasks = manager.tasks("scan")
+        tasks["a"] = {"status": "completed"}
+        tasks["b"] = {"status": "running"}
+        tasks["c"] = {"status": "running"}
+        assert list(tasks) == ["b", "c"]
+
+        with pytest.raises(JobQueueFullError):
+            tasks["d"] = {"status": "pending"}
+        assert manager.get_statistics()["rejected"] == 1
+
+    def test_ttl_eviction_and_views(self):
+        """测试按TTL淘汰已结束任务，视图按类型隔离"""
+        manager = JobManager(job_ttl=60)
+        manager.tasks("scan")["old"] = {"status": "completed"}
+        manager.results("scan")["old"] = [{"port": 80}]
+        manager.tasks("ping")["live"] = {"status": "running"}
+
+        assert "live" not in manager.tasks("scan")
+        assert manager.evict_expired(now=time.time() + 30) == 0
+        assert manager.evict_expired(now=time.time() + 120) == 1
+        assert "old" not in manager.results("scan") and "live" in manager.tasks("ping")
+
+    @pytest.mark.asyncio
+    async def test_large_results_spill_to_disk(self, tmp_path):
+        """测试大结果集在任务结束后落盘并可读回"""
+        manager = JobManager(spill_dir=str(tmp_path), spill_threshold=2)
+        results = manager.results("scan")
+
+        async def run():
+            results["job"] = [{"port": port, "status": "open"} for port in range(5)]
+
+        manager.create("scan", {"status": "running"}, job_id="job")
+        manager.submit("job", run)
+        await _wait_idle(manager)
+        for _ in range(100):
+            if manager.get("job").spill_path:
+                break
+            await asyncio.sleep(0.01)
+
+        assert manager.get("job").results is None
+        # 成员判断不读回落盘结果
+        with patch.object(manager, "load_results", side_effect=AssertionError("loaded")):
+            assert "job" in results and "missing" not in results
+        assert [r["port"] for r in results["job"]] == list(range(5))
+        assert manager.get_statistics()["result_items_in_memory"] == 0
+
+        manager.remove("job")
+        assert not list(tmp_path.iterdir())
+
+    @pytest.mark.asyncio
+    async def test_spilled_results_read_by_page(self, tmp_path):
+        """测试落盘结果按行偏移分块读取，分页不读回整个文件"""
+        manager = JobManager(spill_dir=str(tmp_path), spill_threshold=2)
+        results = manager.results("scan")
+
+        async def run():
+            results["job"] = [{"port": port, "status": "open" if port % 2 else "closed"} for port in range(1000)]
+
+        manager.create("scan", {"status": "running"}, job_id="job")
+        manager.submit("job", run)
+        await _wait_idle(manager)
+        for _ in range(100):
+            if manager.get("job").spill_path:
+                break
+            await asyncio.sleep(0.01)
+        assert not manager._background_tasks
+
+        spilled = results["job"]
+        assert isinstance(spilled, SpilledResults) and len(spilled) == 1000
+        with patch.object(SpilledResults, "_read_block", wraps=spilled._read_block) as read_block:
+            page, next_position = page_sequence(spilled, 500, 3, lambda r: r["status"] == "open")
+        assert [r["port"] for r in page] == [501, 503, 505]
+        assert next_position == 507
+        assert read_block.call_count == 1
+        assert spilled[-1]["port"] == 999 and [r["port"] for r in spilled[10:13]] == [10, 11, 12]
+        manager.remove("job")
+
+    @pytest.mark.asyncio
+    async def test_cancel_queued_job_never_starts(self):
+        """测试取消排队中的任务后不再启动"""
+        manager = JobManager(max_running=1)
+        started = []
+        release = asyncio.Event()
+
+        async def run(name):
+            started.append(name)
+            await release.wait()
+
+        for name in ["a", "b"]:
+            manager.create("scan", {"status": "pending"}, job_id=name)
+            manager.submit(name, lambda name=name: run(name))
+
+        await asyncio.sleep(0)
+        assert await manager.cancel("b")
+        assert manager.queue_position("b") is None
+        release.set()
+        await _wait_idle(manager)
+        assert started == ["a"]
+
+    @pytest.mark.asyncio
+    async def test_cancel_running_scan_releases_probes(self):
+        """测试取消运行中的扫描会终止进行中的探测并归还并发槽位"""
+        manager = JobManager()
+        scanner = PortScannerEngine(max_concurrent=3, timeout=30.0, use_global_rate_limit=False, use_cache=False)
+        connecting = []
+
+        async def hang(host, port):
+            connecting.append(port)
+            await asyncio.Event().wait()
+
+        with patch("asyncio.open_connection", hang):
+            manager.create("scan", {"status": "running"}, job_id="scan")
+            manager.submit("scan", lambda: scanner.scan_ports("127.0.0.1", range(1, 21)))
+            for _ in range(100):
+                if len(connecting) == 3:
+                    break
+                await asyncio.sleep(0.01)
+
+            assert await manager.cancel("scan", timeout=1.0)
+
+        assert manager.get("scan").task.cancelled()
+        assert scanner.cancelled and scanner.semaphore._value == 3
+        assert len(connecting) == 3
+
+    @pytest.mark.asyncio
+    async def test_stop_continuous_ping_records_partial_statistics(self):
+        """测试停止连续PING时中断进行中的探测并记录已完成部分的统计"""
+        class FakeEngine:
+            def __init__(self, **kwargs):
+                pass
+
+            async def continuous_ping(self, host, duration=None):
+                yield {"success": True, "response_time": 10.0}
+                yield {"success": False, "response_time": None}
+                await asyncio.Event().wait()
+
+        request = ContinuousPingRequest(target="127.0.0.1", max_count=100)
+        with patch.object(ping_routes, "PingEngine", FakeEngine):
+            response = await ping_routes.start_continuous_ping(request)
+            task_id = response.data["task_id"]
+            for _ in range(100):
+                if len(ping_routes._ping_results.get(task_id, [])) == 2:
+                    break
+                await asyncio.sleep(0.01)
+
+            stopped = await ping_routes.stop_ping(task_id)
+
+        assert stopped.data["status"] == "stopped"
+        assert stopped.data["statistics"]["packets_sent"] == 2
+        assert stopped.data["statistics"]["packet_loss"] == 50.0
+        assert job_manager.get(task_id).task.done()
+        job_manager.remove(task_id)
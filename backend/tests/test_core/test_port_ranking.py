@@ -0,0 +1,64 @@
+"""
+---------------------------------------------------------------
+File name:                  test_port_ranking.py
+Author:                     Ignorant-lu
+Date created:               2026/10/19
+Description:                端口频率排名测试用例
+----------------------------------------------------------------
+
+Changed history:
+                            2026/10/19: 初始创建;
+----
+"""
+
+import pytest
+from unittest.mock import patch
+
+from backend.app.core.port_ranking import (
+    TOP_TCP_PORTS, TOP_UDP_PORTS, get_port_rank, get_top_ports, order_ports
+)
+from backend.app.core.port_scanner import PortScannerEngine
+
+
+class TestPortRanking:
+    """端口频率排名测试类"""
+
+    def test_ranking_tables_have_no_duplicates(self):
+        """测试排名表无重复端口"""
+        assert len(set(TOP_TCP_PORTS)) == len(TOP_TCP_PORTS)
+        assert len(set(TOP_UDP_PORTS)) == len(TOP_UDP_PORTS)
+
+    def test_top_ports_returns_most_common_first(self):
+        """测试top端口按频率降序返回"""
+        assert get_top_ports(3) == [80, 23, 443]
+        assert get_top_ports(2, "udp") == [631, 161]
+
+    def test_top_ports_capped_at_table(self):
+        """测试超出排名表时只返回排名表中的端口"""
+        assert get_top_ports(1000) == list(TOP_TCP_PORTS)
+        assert get_top_ports(1000, "udp") == list(TOP_UDP_PORTS)
+
+    def test_top_ports_rejects_invalid_count(self):
+        """测试无效数量"""
+        with pytest.raises(ValueError):
+            get_top_ports(0)
+        with pytest.raises(ValueError):
+            get_top_ports(65536)
+
+    def test_order_ports_puts_likely_open_first(self):
+        """测试按开放概率排序，未知端口按端口号排在最后"""
+        assert order_ports([1, 8080, 2, 443, 80]) == [80, 443, 8080, 1, 2]
+        assert get_port_rank(80) < get_port_rank(65000)
+
+    @pytest.mark.asyncio
+    async def test_engine_probes_in_frequency_order(self):
+        """测试扫描引擎按频率顺序探测端口"""
+        scanner = PortScannerEngine(use_global_rate_limit=False, max_concurrent=1)
+
+        with patch("asyncio.open_connection", side_effect=ConnectionRefusedError()):
+            results = await scanner.scan_port_range("127.0.0.1", 440, 445, port_order="frequency")
+
+        assert [r["port"] for r in results[:2]] == [443, 445]
+
+        with pytest.raises(ValueError):
+            await scanner.scan_ports("127.0.0.1", [80], port_order="random")
@@ -0,0 +1,91 @@
+"""
+---------------------------------------------------------------
+File name:                  test_port_set.py
+Author:                     Ignorant-lu
+Date created:               2026/10/19
+Description:                端口集合类型测试用例
+----------------------------------------------------------------
+
+Changed history:
+                            2026/10/19: 初始创建;
+                            2026/10/19: 添加批量扫描探测数上限的测试;
+----
+"""
+
+import pytest
+from unittest.mock import patch
+
+from backend.app.core.port_set import PortSet
+from backend.app.core.network_utils import NetworkUtils
+from backend.app.core.port_scanner import PortScannerEngine
+from backend.app.config import settings
+from backend.app.schemas.scan import BatchScanRequest, ScanProfile
+
+
+class TestPortSet:
+    """端口集合测试类"""
+
+    def test_parse_merges_overlapping_ranges(self):
+        """测试解析时合并重叠和相邻区间"""
+        ports = PortSet.parse("80, 1-100,101-200,443,442")
+        assert ports.intervals == ((1, 200), (442, 443))
+        assert len(ports) == 202
+        assert str(ports) == "1-200,442-443"
+
+    def test_full_range_is_not_expanded(self):
+        """测试全端口范围只保存一个区间"""
+        ports = PortSet.parse("1-65535")
+        assert ports.intervals == ((1, 65535),)
+        assert len(ports) == 65535
+        assert 65535 in ports and 0 not in ports
+
+    def test_parse_strict_and_lenient(self):
+        """测试严格模式报错，宽松模式忽略无效部分"""
+        with pytest.raises(ValueError):
+            PortSet.parse("80,abc")
+        with pytest.raises(ValueError):
+            PortSet.parse("100-50")
+        assert PortSet.parse("80,abc,70000,22", strict=False).to_list() == [22, 80]
+
+    def test_set_operations(self):
+        """测试并集、差集、交集"""
+        a = PortSet.parse("1-100")
+        b = PortSet.parse("50-60,90-120")
+        assert str(a | b) == "1-120"
+        assert str(a - b) == "1-49,61-89"
+        assert str(a & b) == "50-60,90-100"
+        assert str(PortSet.parse("1-10,20-30") - PortSet.parse("5-25")) == "1-4,26-30"
+        assert not (a - a)
+
+    def test_coerce_and_iteration(self):
+        """测试多种输入的统一转换与有序迭代"""
+        assert PortSet.coerce([443, 80, 81, 80]).intervals == ((80, 81), (443, 443))
+        assert PortSet.coerce(range(10, 13)).to_list() == [10, 11, 12]
+        assert PortSet.coerce(22) == PortSet.parse("22")
+
+    def test_network_utils_delegates(self):
+        """测试NetworkUtils解析结果保持去重排序"""
+        assert NetworkUtils.parse_port_range("443,80-82,80,bad") == [80, 81, 82, 443]
+
+    def test_scan_request_keeps_port_set_unexpanded(self):
+        """测试批量扫描请求接受全端口表达式并按区间保存，按端口号顺序扫描时不展开"""
+        request = BatchScanRequest(targets=["127.0.0.1"], ports="1-65535")
+        assert request.ports == "1-65535"
+        assert request.port_set.intervals == ((1, 65535),)
+        assert PortScannerEngine().order_scan_ports(request.port_set, "tcp", "numeric") is request.port_set
+
+        assert BatchScanRequest(targets=["127.0.0.1"], ports=[443, 80]).port_set.intervals == ((80, 80), (443, 443))
+        assert ScanProfile(name="full", ports="1-65535").port_set.intervals == ((1, 65535),)
+        with pytest.raises(ValueError):
+            BatchScanRequest(targets=["127.0.0.1"], ports=list(range(1, 1002)))
+        with pytest.raises(ValueError):
+            BatchScanRequest(targets=["127.0.0.1"], ports=[0])
+
+    def test_scan_request_limits_probe_count(self):
+        """测试目标数×端口数超过配置的上限时拒绝请求"""
+        with pytest.raises(ValueError):
+            BatchScanRequest(targets=["10.0.0.0/16"], ports="1-65535")
+        with patch.object(settings, "scan_max_batch_probes", 254 * 100):
+            assert len(BatchScanRequest(targets=["10.0.0.0/24"], ports="1-100").port_set) == 100
+            with pytest.raises(ValueError):
+                BatchScanRequest(targets=["10.0.0.0/24"], ports="1-101")
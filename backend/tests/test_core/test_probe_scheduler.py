@@ -0,0 +1,112 @@
+"""
+---------------------------------------------------------------
+File name:                  test_probe_scheduler.py
+Author:                     Ignorant-lu
+Date created:               2026/10/19
+Description:                探测公平调度测试用例
+----------------------------------------------------------------
+
+Changed history:
+                            2026/10/19: 初始创建;
+                            2026/10/19: 形如IP地址的API Key不按地址解析;
+----
+"""
+
+import asyncio
+
+import pytest
+
+from backend.app.core.job_manager import JobManager
+from backend.app.core.probe_scheduler import FairQueue, client_flow, configured_flow, current_client
+from backend.app.core.resource_governor import SOCKETS, ResourceGovernor
+
+
+class TestProbeScheduler:
+    """探测公平调度测试类"""
+
+    def test_clients_share_by_weight(self):
+        """测试客户端按权重分配，同一客户端的多个任务平分其份额"""
+        queue = FairQueue()
+        for i in range(40):
+            queue.push(("sweep", i), flow="sweep", client="a", weight=3.0)
+        for i in range(20):
+            queue.push(("b1", i), flow="b1", client="b")
+            queue.push(("b2", i), flow="b2", client="b")
+
+        served = [queue.pop_bulk()[0] for _ in range(40)]
+        assert 29 <= served.count("sweep") <= 31
+        assert abs(served.count("b1") - served.count("b2")) <= 1
+
+    def test_new_flow_not_stuck_behind_backlog(self):
+        """测试新客户端的请求不在大任务的积压之后排队"""
+        queue = FairQueue()
+        for i in range(1000):
+            queue.push(i, flow="sweep")
+        for _ in range(10):
+            queue.pop_bulk()
+
+        queue.push("check", flow="check")
+        assert "check" in [queue.pop_bulk() for _ in range(2)]
+
+        queue.push("urgent", interactive=True)
+        assert queue.interactive_waiting == 1
+        assert queue.pop_interactive() == "urgent"
+
+    def test_discard_keeps_order(self):
+        """测试移除排队项后计数与出队顺序保持一致"""
+        queue = FairQueue()
+        queue.push("a0", flow="a")
+        queue.push("a1", flow="a")
+        queue.push("b0", flow="b")
+        queue.push("i0", interactive=True)
+
+        assert queue.discard("a0") and queue.discard("i0")
+        assert not queue.discard("a0")
+        assert len(queue) == 2 and queue.flows == 2
+        assert [queue.pop_bulk(), queue.pop_bulk()] == ["b0", "a1"]
+        assert len(queue) == 0 and queue.clients == 0
+
+    @pytest.mark.asyncio
+    async def test_interactive_probe_skips_bulk_backlog(self):
+        """测试批量任务占满预算时交互式探测使用保留额度立即开始"""
+        governor = ResourceGovernor(max_sockets=20, interactive_reserve=2)
+        for _ in range(18):
+            await governor.acquire(SOCKETS, "sweep")
+        waiter = asyncio.create_task(governor.acquire(SOCKETS, "sweep"))
+        await asyncio.sleep(0)
+        assert not waiter.done()
+
+        await asyncio.wait_for(governor.acquire(SOCKETS, "check", interactive=True), 0.1)
+        stats = governor.get_statistics()[SOCKETS]
+        assert stats["in_use"] == 19 and stats["interactive_granted"] == 1
+        assert stats["waiting"] == 1 and stats["interactive_reserve"] == 2
+
+        governor.release(SOCKETS)
+        assert not waiter.done()
+        governor.release(SOCKETS)
+        await asyncio.wait_for(waiter, 0.1)
+
+    @pytest.mark.asyncio
+    async def test_job_runs_as_submitting_client(self):
+        """测试后台任务在提交请求的客户端上下文中运行"""
+        manager = JobManager()
+        seen = []
+
+        async def run():
+            seen.append(current_client.get())
+
+        token = current_client.set(client_flow("secret-key"))
+        try:
+            manager.create("scan", {"status": "pending"}, job_id="job")
+            manager.submit("job", run)
+        finally:
+            current_client.reset(token)
+        await manager.get("job").task
+
+        assert seen == [client_flow("secret-key")]
+        assert seen[0].startswith("key:") and "secret" not in seen[0]
+        assert client_flow("10.0.0.5", address=True) == "ip:10.0.0.5"
+        # 形如IP地址的API Key仍是API Key，不能冒充该地址的额度
+        assert client_flow("10.0.0.5").startswith("key:")
+        assert configured_flow("ip:10.0.0.5") == "ip:10.0.0.5"
+        assert configured_flow("10.0.0.5") == client_flow("10.0.0.5")
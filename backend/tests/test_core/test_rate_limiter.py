@@ -0,0 +1,138 @@
+"""
+---------------------------------------------------------------
+File name:                  test_rate_limiter.py
+Author:                     Ignorant-lu
+Date created:               2026/10/19
+Description:                扫描速率限制器测试用例
+----------------------------------------------------------------
+
+Changed history:
+                            2026/10/19: 初始创建;
+                            2026/10/19: 添加排队中的探测不占用全局令牌桶的测试;
+----
+"""
+
+import asyncio
+import pytest
+from unittest.mock import patch
+
+from backend.app.core.rate_limiter import TokenBucket, ScanRateLimiter, global_rate_limiter
+from backend.app.core.port_scanner import PortScannerEngine, ScanDeadlineExceeded
+
+
+class TestTokenBucket:
+    """令牌桶测试类"""
+
+    def test_disabled_bucket_never_delays(self):
+        """测试速率为0时不限速"""
+        bucket = TokenBucket(rate=0)
+        assert not bucket.enabled
+        assert bucket.earliest(100.0) == 100.0
+
+    def test_probes_are_evenly_spaced(self):
+        """测试探测按1/rate均匀排布，而不是突发"""
+        bucket = TokenBucket(rate=100)
+        now = 1000.0
+        send_times = []
+        for _ in range(5):
+            t = bucket.earliest(now)
+            bucket.commit(t)
+            send_times.append(t)
+
+        gaps = [b - a for a, b in zip(send_times, send_times[1:])]
+        assert all(gap == pytest.approx(0.01) for gap in gaps)
+
+    def test_burst_allows_initial_burst(self):
+        """测试突发容量允许前N个探测立即发送"""
+        bucket = TokenBucket(rate=10, burst=3)
+        now = 50.0
+        immediate = 0
+        for _ in range(5):
+            t = bucket.earliest(now)
+            bucket.commit(t)
+            if t == now:
+                immediate += 1
+        assert immediate == 3
+
+
+class TestScanRateLimiter:
+    """扫描速率限制器测试类"""
+
+    def test_slowest_level_wins(self):
+        """测试全局/任务/目标中最严格的速率生效"""
+        global_bucket = TokenBucket(rate=1000)
+        limiter = ScanRateLimiter(job_rate=500, target_rate=10, global_bucket=global_bucket)
+
+        delays = [limiter.reserve("10.0.0.1") for _ in range(3)]
+        assert delays[0] == pytest.approx(0.0, abs=1e-3)
+        assert delays[2] == pytest.approx(0.2, abs=0.01)
+
+    def test_targets_are_limited_independently(self):
+        """测试不同目标各自独立限速"""
+        limiter = ScanRateLimiter(target_rate=10)
+        limiter.reserve("10.0.0.1")
+        assert limiter.reserve("10.0.0.2") == pytest.approx(0.0, abs=1e-3)
+        assert limiter.reserve("10.0.0.1") == pytest.approx(0.1, abs=0.01)
+
+    @pytest.mark.asyncio
+    async def test_cancelled_acquire_refunds_token(self):
+        """测试取消等待时归还令牌"""
+        limiter = ScanRateLimiter(job_rate=2)
+        await limiter.acquire("h")
+
+        task = asyncio.create_task(limiter.acquire("h"))
+        await asyncio.sleep(0)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+        # 被取消的令牌已归还，下一次等待不会再往后推迟一个间隔
+        assert limiter.reserve("h") <= 0.5 + 0.01
+
+    @pytest.mark.asyncio
+    async def test_engine_reports_effective_rate(self):
+        """测试扫描统计中包含有效速率和限速信息"""
+        scanner = PortScannerEngine(rate_limit=200, use_global_rate_limit=False)
+
+        with patch("asyncio.open_connection", side_effect=ConnectionRefusedError()):
+            await scanner.scan_port_range("127.0.0.1", 1, 10)
+
+        stats = scanner.get_statistics()
+        assert stats["total_scans"] == 10
+        assert stats["job_pps"] == 200
+        assert stats["rate_limited_probes"] == 10
+        assert 0 < stats["effective_pps"] <= 200 * 1.2
+
+    @pytest.mark.asyncio
+    async def test_queued_probes_do_not_book_global_bucket(self):
+        """测试大任务排队中的探测不预约全局令牌桶，其他任务的单次探测不被推迟"""
+        global_rate_limiter.configure(200)
+        try:
+            large = PortScannerEngine(max_concurrent=10)
+            small = PortScannerEngine()
+            with patch("asyncio.open_connection", side_effect=ConnectionRefusedError()):
+                job = asyncio.create_task(large.scan_ports("127.0.0.1", list(range(1, 1001))))
+                await asyncio.sleep(0.05)
+                started = asyncio.get_running_loop().time()
+                await small.scan_port("127.0.0.1", 22)
+                waited = asyncio.get_running_loop().time() - started
+                job.cancel()
+                await asyncio.gather(job, return_exceptions=True)
+            # 之前需要排在大任务预约的1000个令牌之后（约5秒）
+            assert waited < 0.5
+        finally:
+            global_rate_limiter.configure(0)
+
+    @pytest.mark.asyncio
+    async def test_deadline_after_rate_wait_refunds_token(self):
+        """测试等待令牌期间到达截止时间时探测不发出并归还令牌"""
+        scanner = PortScannerEngine(rate_limit=2, deadline_seconds=0.2, use_global_rate_limit=False)
+        with patch("asyncio.open_connection", side_effect=ConnectionRefusedError()):
+            await scanner.scan_port("127.0.0.1", 1)
+            with pytest.raises(ScanDeadlineExceeded):
+                await scanner.scan_port("127.0.0.1", 2)
+
+        assert scanner.get_statistics()["total_scans"] == 1
+        # 未发出的探测令牌已归还，下一个令牌不会再往后推迟一个间隔
+        assert scanner.rate_limiter.reserve("127.0.0.1") <= 0.01
+
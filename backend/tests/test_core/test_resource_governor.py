@@ -0,0 +1,108 @@
+"""
+---------------------------------------------------------------
+File name:                  test_resource_governor.py
+Author:                     Ignorant-lu
+Date created:               2026/10/19
+Description:                进程级资源预算测试用例
+----------------------------------------------------------------
+
+Changed history:
+                            2026/10/19: 初始创建;
+----
+"""
+
+import asyncio
+
+import pytest
+from unittest.mock import patch
+
+from backend.app.core.resource_governor import (
+    SOCKETS, ResourceGovernor, ResourceBudgetExceeded
+)
+from backend.app.core.port_scanner import PortScannerEngine
+
+
+class TestResourceGovernor:
+    """进程级资源预算测试类"""
+
+    @pytest.mark.asyncio
+    async def test_round_robin_between_owners(self):
+        """测试额度用尽时在所有者之间轮流分配"""
+        governor = ResourceGovernor(max_sockets=1)
+        granted = []
+
+        async def borrow(owner, index):
+            async with governor.lease(SOCKETS, owner):
+                granted.append(f"{owner}{index}")
+                await asyncio.sleep(0)
+
+        await governor.acquire(SOCKETS)
+        tasks = [asyncio.create_task(borrow("a", i)) for i in range(3)]
+        tasks += [asyncio.create_task(borrow("b", i)) for i in range(2)]
+        await asyncio.sleep(0)
+        assert governor.get_statistics()[SOCKETS]["waiting"] == 5
+
+        governor.release(SOCKETS)
+        await asyncio.gather(*tasks)
+        assert granted == ["a0", "b0", "a1", "b1", "a2"]
+        assert governor.get_statistics()[SOCKETS]["in_use"] == 0
+
+    @pytest.mark.asyncio
+    async def test_cancelled_waiter_leaves_queue(self):
+        """测试排队中被取消的请求不占用额度"""
+        governor = ResourceGovernor(max_sockets=1)
+        await governor.acquire(SOCKETS)
+        waiter = asyncio.create_task(governor.acquire(SOCKETS, "a"))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+
+        governor.release(SOCKETS)
+        stats = governor.get_statistics()[SOCKETS]
+        assert stats["waiting"] == 0 and stats["in_use"] == 0
+        assert governor.try_acquire(SOCKETS)
+
+    @pytest.mark.asyncio
+    async def test_admission_rejects_when_queue_is_long(self):
+        """测试等待数超过上限时拒绝新任务"""
+        governor = ResourceGovernor(max_sockets=1, max_waiters=2, retry_after=2.5)
+        await governor.acquire(SOCKETS)
+        governor.admit()
+        waiters = [asyncio.create_task(governor.acquire(SOCKETS, i)) for i in range(2)]
+        await asyncio.sleep(0)
+
+        with pytest.raises(ResourceBudgetExceeded) as exc_info:
+            governor.admit()
+        assert exc_info.value.retry_after == 2.5
+        assert governor.retry_after_header == {"Retry-After": "3"}
+
+        for waiter in waiters:
+            waiter.cancel()
+        await asyncio.gather(*waiters, return_exceptions=True)
+        governor.admit()
+
+    @pytest.mark.asyncio
+    async def test_scanners_share_socket_budget(self):
+        """测试多个扫描引擎的同时连接数受共同预算约束"""
+        governor = ResourceGovernor(max_sockets=4)
+        active = {"now": 0, "peak": 0}
+
+        async def connect(host, port):
+            active["now"] += 1
+            active["peak"] = max(active["peak"], active["now"])
+            await asyncio.sleep(0.01)
+            active["now"] -= 1
+            raise ConnectionRefusedError()
+
+        scanners = [
+            PortScannerEngine(max_concurrent=10, use_global_rate_limit=False, governor=governor)
+            for _ in range(3)
+        ]
+        with patch("asyncio.open_connection", connect):
+            results = await asyncio.gather(*(
+                scanner.scan_ports("127.0.0.1", range(1, 21)) for scanner in scanners
+            ))
+
+        assert all(len(r) == 20 for r in results)
+        assert active["peak"] == 4
+        assert governor.get_statistics()[SOCKETS]["in_use"] == 0
@@ -0,0 +1,84 @@
+"""
+---------------------------------------------------------------
+File name:                  test_result_export.py
+Author:                     Ignorant-lu
+Date created:               2026/10/19
+Description:                结果流式导出测试用例
+----------------------------------------------------------------
+
+Changed history:
+                            2026/10/19: 初始创建;
+----
+"""
+
+import csv
+import io
+import json
+
+import pytest
+from fastapi import HTTPException
+from unittest.mock import patch
+
+from backend.app.core.result_export import iter_export
+from backend.app.core.result_store import RESULT_COLUMNS, ScanResultStore
+from backend.app.api.routes import scan as scan_routes
+
+
+ROWS = [{"host": "10.0.0.1", "port": p, "status": "open" if p % 2 else "closed"} for p in range(1, 1001)]
+
+
+class TestResultExport:
+    """结果流式导出测试类"""
+
+    def test_ndjson_chunks(self):
+        """测试NDJSON按块输出且每行一个对象"""
+        chunks = list(iter_export(iter(ROWS), "ndjson", chunk_bytes=4096))
+        assert len(chunks) > 1
+        lines = b"".join(chunks).decode().splitlines()
+        assert [json.loads(line) for line in lines] == ROWS
+
+    def test_csv_header_once(self):
+        """测试CSV只输出一次表头，空结果仍有表头"""
+        data = b"".join(iter_export(iter(ROWS), "csv", chunk_bytes=1024)).decode()
+        rows = list(csv.DictReader(io.StringIO(data)))
+        assert len(rows) == 1000 and rows[0] == {"host": "10.0.0.1", "port": "1", "status": "open"}
+
+        empty = b"".join(iter_export(iter([]), "csv", columns=["host", "port"])).decode()
+        assert empty == "host,port\r\n"
+
+    def test_unknown_format(self):
+        """测试不支持的格式"""
+        with pytest.raises(ValueError):
+            list(iter_export(iter(ROWS), "xml"))
+
+    def test_store_iter_results_filters(self, tmp_path):
+        """测试结果存储按主键分块读取并下推过滤条件"""
+        store = ScanResultStore(str(tmp_path / "results.db"))
+        store.write_results("a", ROWS)
+        store.write_results("b", ROWS[:10])
+        ports = [row["port"] for row in store.iter_results("a", chunk_size=7, status="open")]
+        assert ports == list(range(1, 1001, 2))
+        store.close()
+
+    @pytest.mark.asyncio
+    async def test_export_endpoint_streams_store(self, tmp_path):
+        """测试导出接口从结果存储流式读取"""
+        store = ScanResultStore(str(tmp_path / "results.db"))
+        store.write_results("scan-1", ROWS)
+        with patch.object(scan_routes, "scan_result_store", store):
+            response = await scan_routes.export_scan_results(
+                "scan-1", export_format="csv", host=None, port=None, port_status="open", service=None
+            )
+            body = b"".join([chunk async for chunk in response.body_iterator]).decode()
+
+            with pytest.raises(HTTPException) as exc_info:
+                await scan_routes.export_scan_results(
+                    "scan-1", export_format="xml", host=None, port=None, port_status=None, service=None
+                )
+        store.close()
+
+        rows = list(csv.DictReader(io.StringIO(body)))
+        assert list(rows[0]) == list(RESULT_COLUMNS)
+        assert len(rows) == 500
+        assert response.headers["content-disposition"].endswith('scan-1.csv"')
+        assert exc_info.value.status_code == 400
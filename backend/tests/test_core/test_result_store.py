@@ -0,0 +1,163 @@
+"""
+---------------------------------------------------------------
+File name:                  test_result_store.py
+Author:                     Ignorant-lu
+Date created:               2026/10/19
+Description:                扫描结果持久化存储测试用例
+----------------------------------------------------------------
+
+Changed history:
+                            2026/10/19: 初始创建;
+                            2026/10/19: 添加写入失败、按间隔刷盘与扫描失败时写入缓冲结果的测试;
+----
+"""
+
+import asyncio
+
+import pytest
+from unittest.mock import patch
+
+from backend.app.core.result_store import ScanResultStore
+from backend.app.core.scan_estimator import ScanProgress
+from backend.app.api.routes import scan as scan_routes
+
+
+def _results(host: str, count: int, open_every: int = 10):
+    return [
+        {"host": host, "port": port, "protocol": "tcp",
+         "status": "open" if port % open_every == 0 else "closed",
+         "service_name": "http" if port % open_every == 0 else None}
+        for port in range(1, count + 1)
+    ]
+
+
+class TestScanResultStore:
+    """扫描结果存储测试类"""
+
+    def test_filter_and_paginate(self, tmp_path):
+        """测试按条件过滤与分页在SQLite中完成"""
+        store = ScanResultStore(str(tmp_path / "results.db"), batch_size=100)
+        store.write_results("scan-a", _results("10.0.0.1", 1000))
+        store.write_results("scan-b", _results("10.0.0.2", 50))
+
+        items, total = store.query(scan_id="scan-a", status="open", offset=10, limit=5)
+        assert total == 100
+        assert [item["port"] for item in items] == [110, 120, 130, 140, 150]
+        assert items[0]["service"] == "http" and items[0]["host"] == "10.0.0.1"
+
+        _, total = store.query(host="10.0.0.2")
+        assert total == 50
+        assert store.count_by_status("scan-b") == {"open": 5, "closed": 45}
+        store.close()
+
+    def test_queries_use_indexes(self, tmp_path):
+        """测试主机、端口状态和任务查询命中索引"""
+        store = ScanResultStore(str(tmp_path / "results.db"))
+        conn = store._connection()
+        for sql in [
+            "SELECT * FROM scan_results WHERE host = '10.0.0.1'",
+            "SELECT * FROM scan_results WHERE port = 3389 AND status = 'open'",
+            "SELECT * FROM scan_results WHERE scan_id = 'x'",
+        ]:
+            plan = " ".join(str(row) for row in conn.execute("EXPLAIN QUERY PLAN " + sql))
+            assert "USING INDEX" in plan, plan
+        store.close()
+
+    @pytest.mark.asyncio
+    async def test_background_scan_persists_results(self, tmp_path):
+        """测试后台扫描批量写入并由结果接口分页读取"""
+        store = ScanResultStore(str(tmp_path / "results.db"), batch_size=3)
+        scan_routes._active_tasks["scan-1"] = {"status": "running"}
+        scan_routes._scan_results["scan-1"] = []
+        try:
+            with patch.object(scan_routes, "scan_result_store", store), \
+                    patch("asyncio.open_connection", side_effect=ConnectionRefusedError()):
+                await scan_routes._run_port_scan(
+                    scan_id="scan-1", target="127.0.0.1", ports="1-10",
+                    scan_type="tcp", timeout=1, max_threads=10, use_cache=False
+                )
+                scan_routes._scan_results.pop("scan-1")
+
+                response = await scan_routes.get_scan_results(
+                    "scan-1", host=None, port=None, port_status="closed",
+                    service=None, page=2, page_size=4
+                )
+
+            assert [r["port"] for r in response.data["results"]] == [5, 6, 7, 8]
+            assert response.data["pagination"]["total"] == 10
+            assert response.data["pagination"]["total_pages"] == 3
+        finally:
+            scan_routes._active_tasks.pop("scan-1", None)
+            scan_routes._scan_results.pop("scan-1", None)
+            store.close()
+
+    @pytest.mark.asyncio
+    async def test_failed_batch_does_not_drop_later_batches(self, tmp_path):
+        """测试某一批写入失败时后续批次照常写入"""
+        store = ScanResultStore(str(tmp_path / "results.db"), batch_size=2)
+        write_rows = store.write_rows
+        calls = []
+
+        def flaky(rows):
+            calls.append(len(rows))
+            if len(calls) == 1:
+                raise OSError("disk full")
+            write_rows(rows)
+
+        writer = store.open_writer("scan-a")
+        with patch.object(store, "write_rows", flaky):
+            for result in _results("10.0.0.1", 6):
+                writer.add(result)
+            await writer.close()
+
+        assert calls == [2, 2, 2]
+        assert writer.written == 4 and writer.failed == 2
+        assert [r["port"] for r in store.query(scan_id="scan-a")[0]] == [3, 4, 5, 6]
+        store.close()
+
+    @pytest.mark.asyncio
+    async def test_partial_batch_flushed_after_interval(self, tmp_path):
+        """测试未满一批的结果在刷盘间隔后写入，运行中即可查询"""
+        store = ScanResultStore(str(tmp_path / "results.db"), batch_size=100, flush_interval=0.05)
+        writer = store.open_writer("scan-a")
+        for result in _results("10.0.0.1", 3):
+            writer.add(result)
+        assert store.query(scan_id="scan-a")[1] == 0
+
+        for _ in range(50):
+            if store.query(scan_id="scan-a")[1] == 3:
+                break
+            await asyncio.sleep(0.02)
+        assert store.query(scan_id="scan-a")[1] == 3
+        await writer.close()
+        store.close()
+
+    @pytest.mark.asyncio
+    async def test_failed_scan_writes_buffered_results(self, tmp_path):
+        """测试扫描失败时缓冲中的结果仍写入存储"""
+        store = ScanResultStore(str(tmp_path / "results.db"), batch_size=100, flush_interval=60)
+        scan_routes._active_tasks["scan-f"] = {"status": "running"}
+        scan_routes._scan_results["scan-f"] = []
+        update = ScanProgress.update
+
+        def failing_update(progress, completed):
+            if completed >= 5:
+                raise RuntimeError("boom")
+            return update(progress, completed)
+
+        try:
+            with patch.object(scan_routes, "scan_result_store", store), \
+                    patch.object(ScanProgress, "update", failing_update), \
+                    patch("asyncio.open_connection", side_effect=ConnectionRefusedError()):
+                await scan_routes._run_port_scan(
+                    scan_id="scan-f", target="127.0.0.1", ports="1-10",
+                    scan_type="tcp", timeout=1, max_threads=10, use_cache=False
+                )
+
+            assert scan_routes._active_tasks["scan-f"]["status"] == "failed"
+            assert store.query(scan_id="scan-f")[1] == 5
+        finally:
+            scan_routes._active_tasks.pop("scan-f", None)
+            scan_routes._scan_results.pop("scan-f", None)
+            store.close()
+
@@ -0,0 +1,106 @@
+"""
+---------------------------------------------------------------
+File name:                  test_scan_cache.py
+Author:                     Ignorant-lu
+Date created:               2026/10/19
+Description:                扫描结果缓存测试用例
+----------------------------------------------------------------
+
+Changed history:
+                            2026/10/19: 初始创建;
+----
+"""
+
+import asyncio
+import pytest
+from unittest.mock import patch
+
+from backend.app.core.scan_cache import ScanResultCache
+from backend.app.core.port_scanner import PortScannerEngine
+
+
+class TestScanResultCache:
+    """扫描结果缓存测试类"""
+
+    def test_ttl_and_max_age(self):
+        """测试TTL过期和max_age收紧"""
+        cache = ScanResultCache(ttl=10)
+        with patch("time.monotonic", return_value=100.0):
+            cache.put("k", {"status": "open"})
+        with patch("time.monotonic", return_value=105.0):
+            assert cache.get("k") == {"status": "open"}
+            assert cache.get("k", max_age=1) is None
+        with patch("time.monotonic", return_value=111.0):
+            assert cache.get("k") is None
+
+    def test_lru_eviction(self):
+        """测试容量满时淘汰最久未使用的条目"""
+        cache = ScanResultCache(ttl=60, max_entries=2)
+        cache.put("a", {})
+        cache.put("b", {})
+        cache.get("a")
+        cache.put("c", {})
+        assert cache.get("b") is None
+        assert cache.get("a") is not None
+        assert cache.evictions == 1
+
+    @pytest.mark.asyncio
+    async def test_single_flight_coalesces_concurrent_probes(self):
+        """测试并发相同请求只探测一次"""
+        cache = ScanResultCache(ttl=60)
+        calls = 0
+
+        async def probe():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.05)
+            return {"status": "open"}
+
+        results = await asyncio.gather(*[cache.get_or_probe("k", probe) for _ in range(5)])
+        assert calls == 1
+        assert [cached for _, cached in results].count(False) == 1
+        assert cache.coalesced == 4
+
+    @pytest.mark.asyncio
+    async def test_bypass_cache_forces_probe(self):
+        """测试跳过缓存时强制探测并刷新结果"""
+        cache = ScanResultCache(ttl=60)
+        cache.put("k", {"status": "closed"})
+
+        async def probe():
+            return {"status": "open"}
+
+        result, cached = await cache.get_or_probe("k", probe, use_cache=False)
+        assert not cached and result["status"] == "open"
+        assert cache.get("k")["status"] == "open"
+
+    @pytest.mark.asyncio
+    async def test_engine_uses_shared_cache(self):
+        """测试扫描引擎共享缓存，错误结果不缓存"""
+        cache = ScanResultCache(ttl=60)
+
+        with patch("asyncio.open_connection", side_effect=ConnectionRefusedError()) as mock_conn:
+            first = PortScannerEngine(result_cache=cache, use_global_rate_limit=False)
+            await first.scan_port("127.0.0.1", 80)
+            second = PortScannerEngine(result_cache=cache, use_global_rate_limit=False)
+            result = await second.scan_port("127.0.0.1", 80)
+
+        assert result["status"] == "closed"
+        assert mock_conn.call_count == 1
+        assert second.get_statistics()["cache_hits"] == 1
+        assert second.get_coverage()["probed_ports"] == 1
+
+    @pytest.mark.asyncio
+    async def test_cache_key_includes_timeout_and_service_detection(self):
+        """测试不同超时或服务检测设置的请求不共用缓存结果"""
+        cache = ScanResultCache(ttl=60)
+
+        with patch("asyncio.open_connection", side_effect=ConnectionRefusedError()) as mock_conn:
+            await PortScannerEngine(timeout=0.1, result_cache=cache, use_global_rate_limit=False).scan_port("127.0.0.1", 80)
+            await PortScannerEngine(timeout=5.0, result_cache=cache, use_global_rate_limit=False).scan_port("127.0.0.1", 80)
+            await PortScannerEngine(timeout=5.0, service_detection=True, result_cache=cache,
+                                    use_global_rate_limit=False).scan_port("127.0.0.1", 80)
+            await PortScannerEngine(timeout=5.0, result_cache=cache, use_global_rate_limit=False).scan_port("127.0.0.1", 80)
+
+        assert mock_conn.call_count == 3
+        assert cache.hits == 1
@@ -0,0 +1,116 @@
+"""
+---------------------------------------------------------------
+File name:                  test_scan_checkpoint.py
+Author:                     Ignorant-lu
+Date created:               2026/10/19
+Description:                扫描检查点与断点续扫测试用例
+----------------------------------------------------------------
+
+Changed history:
+                            2026/10/19: 初始创建;
+                            2026/10/19: 刷盘改为异步，添加刷盘不阻塞事件循环的测试;
+----
+"""
+
+import time
+import asyncio
+import pytest
+from unittest.mock import patch
+
+from backend.app.core.scan_checkpoint import ScanCheckpointStore
+from backend.app.api.routes import scan as scan_routes
+
+
+class TestScanCheckpointStore:
+    """扫描检查点存储测试类"""
+
+    def test_results_survive_reopen(self, tmp_path):
+        """测试检查点在重新打开数据库后仍可读取"""
+        path = str(tmp_path / "checkpoints.db")
+        store = ScanCheckpointStore(path, batch_size=2, flush_interval=60)
+        checkpoint = store.open_job("job-1", {"target": "10.0.0.1", "ports": [1, 2, 3]})
+        checkpoint.record("10.0.0.1", 1, {"port": 1, "status": "open"})
+        checkpoint.record("10.0.0.1", 2, {"port": 2, "status": "closed"})
+        checkpoint.record("10.0.0.1", 3, {"port": 3, "status": "closed"})
+        # 第三条仍在缓冲中，模拟进程崩溃前未刷盘
+        store.close()
+
+        reopened = ScanCheckpointStore(path)
+        assert reopened.load_completed_ports("job-1", "10.0.0.1") == {1, 2}
+        assert reopened.get_job("job-1")["params"]["ports"] == [1, 2, 3]
+        assert [job["job_id"] for job in reopened.list_jobs(resumable_only=True)] == ["job-1"]
+
+        asyncio.run(reopened.open_job("job-1", {}).finish("completed"))
+        assert reopened.list_jobs(resumable_only=True) == []
+        reopened.close()
+
+    @pytest.mark.asyncio
+    async def test_batched_writes_are_cheap(self, tmp_path):
+        """测试批量刷盘的单条记录开销远低于一次探测"""
+        store = ScanCheckpointStore(str(tmp_path / "checkpoints.db"), batch_size=500)
+        checkpoint = store.open_job("job-2", {})
+
+        started = time.perf_counter()
+        for port in range(1, 10001):
+            checkpoint.record("10.0.0.1", port, {"port": port, "status": "closed"})
+        await checkpoint.flush()
+        per_record = (time.perf_counter() - started) / 10000
+
+        assert per_record < 0.001
+        assert len(store.load_results("job-2")) == 10000
+        store.close()
+
+    @pytest.mark.asyncio
+    async def test_flush_does_not_block_loop(self, tmp_path):
+        """测试刷盘在线程中进行：磁盘较慢时记录不阻塞事件循环，未提交的批次仍计入已完成端口"""
+        store = ScanCheckpointStore(str(tmp_path / "checkpoints.db"), batch_size=2, flush_interval=60)
+        checkpoint = store.open_job("job-3", {})
+        write_results = store._write_results
+
+        def slow_write(rows):
+            time.sleep(0.2)
+            write_results(rows)
+
+        with patch.object(store, "_write_results", side_effect=slow_write):
+            started = time.perf_counter()
+            for port in range(1, 6):
+                checkpoint.record("10.0.0.1", port, {"port": port, "status": "closed"})
+            assert time.perf_counter() - started < 0.1
+            assert checkpoint.completed_ports("10.0.0.1") == {1, 2, 3, 4, 5}
+            await checkpoint.finish("completed")
+
+        assert store.load_completed_ports("job-3", "10.0.0.1") == {1, 2, 3, 4, 5}
+        assert store.get_job("job-3")["status"] == "completed"
+        store.close()
+
+
+class TestResumeScan:
+    """断点续扫测试类"""
+
+    @pytest.mark.asyncio
+    async def test_resumed_scan_skips_completed_ports(self, tmp_path):
+        """测试续扫时只探测检查点中未完成的端口"""
+        store = ScanCheckpointStore(str(tmp_path / "checkpoints.db"))
+        checkpoint = store.open_job("scan-1", {})
+        checkpoint.record("127.0.0.1", 1, {"port": 1, "status": "closed"})
+        checkpoint.record("127.0.0.1", 2, {"port": 2, "status": "closed"})
+        await checkpoint.flush()
+
+        scan_routes._active_tasks["scan-1"] = {"status": "running"}
+        scan_routes._scan_results["scan-1"] = store.load_results("scan-1")
+        try:
+            with patch("asyncio.open_connection", side_effect=ConnectionRefusedError()) as mock_conn:
+                await scan_routes._run_port_scan(
+                    scan_id="scan-1", target="127.0.0.1", ports=[1, 2, 3, 4],
+                    scan_type="tcp", timeout=1, max_threads=10,
+                    use_cache=False, checkpoint=checkpoint
+                )
+
+            assert mock_conn.call_count == 2
+            assert scan_routes._active_tasks["scan-1"]["scanned_ports"] == 4
+            assert store.load_completed_ports("scan-1", "127.0.0.1") == {1, 2, 3, 4}
+            assert store.get_job("scan-1")["status"] == "completed"
+        finally:
+            scan_routes._active_tasks.pop("scan-1", None)
+            scan_routes._scan_results.pop("scan-1", None)
+            store.close()
@@ -0,0 +1,134 @@
+"""
+---------------------------------------------------------------
+File name:                  test_scan_deadline.py
+Author:                     Ignorant-lu
+Date created:               2026/10/19
+Description:                限时扫描与覆盖率信息测试用例
+----------------------------------------------------------------
+
+Changed history:
+                            2026/10/19: 初始创建;
+                            2026/10/19: 添加限时批量扫描逐个产生探测的测试;
+                            2026/10/19: 添加截止时间内未扫完的后台任务结束为partial状态的测试;
+----
+"""
+
+import asyncio
+import time
+import pytest
+from unittest.mock import patch
+
+from backend.app.core.port_scanner import PortScannerEngine
+from backend.app.core.port_set import PortSet
+from backend.app.api.routes import scan as scan_routes
+
+
+async def _hang(*args, **kwargs):
+    """模拟无响应的目标"""
+    await asyncio.sleep(30)
+
+
+class TestScanDeadline:
+    """限时扫描测试类"""
+
+    @pytest.mark.asyncio
+    async def test_returns_partial_results_at_deadline(self):
+        """测试截止时间到达时返回部分结果和覆盖率"""
+        scanner = PortScannerEngine(
+            max_concurrent=2, timeout=3.0, deadline_seconds=0.3, use_global_rate_limit=False
+        )
+
+        started = time.monotonic()
+        with patch("asyncio.open_connection", side_effect=_hang):
+            results = await scanner.scan_port_range("127.0.0.1", 1, 20)
+        elapsed = time.monotonic() - started
+
+        assert elapsed < 1.5
+        coverage = scanner.get_coverage()
+        assert coverage["deadline_reached"]
+        assert not coverage["complete"]
+        assert coverage["requested_ports"] == 20
+        assert coverage["unprobed_count"] > 0
+        # 进行中的探测超时被截止时间缩短，结论不确定
+        assert coverage["inconclusive_count"] == len(results) > 0
+        probed = {r["port"] for r in results}
+        assert probed.isdisjoint(coverage["unprobed_ports"]["127.0.0.1"])
+
+    @pytest.mark.asyncio
+    async def test_complete_scan_within_deadline(self):
+        """测试预算充足时覆盖率完整"""
+        scanner = PortScannerEngine(deadline_seconds=5, use_global_rate_limit=False)
+
+        with patch("asyncio.open_connection", side_effect=ConnectionRefusedError()):
+            results = await scanner.scan_ports("127.0.0.1", [22, 80, 443])
+
+        coverage = scanner.get_coverage()
+        assert len(results) == 3
+        assert coverage["complete"]
+        assert not coverage["deadline_reached"]
+        # 有截止时间时默认按开放频率顺序探测
+        assert [r["port"] for r in results] == [80, 443, 22]
+
+    @pytest.mark.asyncio
+    async def test_batch_scan_interleaves_targets(self):
+        """测试限时批量扫描时各目标都能获得高价值端口的结果"""
+        scanner = PortScannerEngine(
+            max_concurrent=2, timeout=3.0, deadline_seconds=0.3, use_global_rate_limit=False
+        )
+
+        with patch("asyncio.open_connection", side_effect=_hang):
+            await scanner.batch_scan([
+                {"host": "10.0.0.1", "ports": list(range(1, 50))},
+                {"host": "10.0.0.2", "ports": list(range(1, 50))},
+            ])
+
+        inconclusive = scanner.get_coverage()["inconclusive_ports"]
+        assert set(inconclusive) == {"10.0.0.1", "10.0.0.2"}
+
+    def test_interleave_yields_probes_in_position_order(self):
+        """测试交错顺序：先所有目标的第一个端口，端口少的目标提前结束"""
+        plans = [("a", "tcp", [1, 2, 3]), ("b", "tcp", PortSet.parse("10-11"))]
+        assert [(position, host, port) for position, host, port, _ in PortScannerEngine._interleave(plans)] == [
+            (0, "a", 1), (0, "b", 10), (1, "a", 2), (1, "b", 11), (2, "a", 3)
+        ]
+
+    @pytest.mark.asyncio
+    async def test_batch_scan_does_not_materialize_probes(self):
+        """测试全端口批量扫描只运行max_concurrent个工作协程，不预先生成全部探测"""
+        scanner = PortScannerEngine(
+            max_concurrent=4, timeout=3.0, deadline_seconds=0.3, use_global_rate_limit=False
+        )
+        ports = PortSet.parse("1-65535")
+
+        started = time.monotonic()
+        with patch("asyncio.open_connection", side_effect=_hang):
+            results = await scanner.batch_scan([
+                {"host": f"10.0.0.{i}", "ports": ports, "port_order": "numeric"} for i in range(1, 101)
+            ])
+        assert time.monotonic() - started < 2.0
+
+        # 每个工作协程在截止时间前只进行了一次探测，集中在各目标的第一个端口
+        assert sum(len(host_results) for host_results in results.values()) == 4
+        assert all(r["port"] == 1 for host_results in results.values() for r in host_results)
+        assert scanner.get_coverage()["deadline_reached"]
+
+    @pytest.mark.asyncio
+    async def test_task_stopped_by_deadline_is_partial(self):
+        """测试后台扫描因截止时间结束时状态为partial，进度为实际完成比例"""
+        scan_routes._active_tasks["deadline-1"] = {"status": "running"}
+        scan_routes._scan_results["deadline-1"] = []
+        try:
+            with patch("asyncio.open_connection", side_effect=_hang):
+                await scan_routes._run_port_scan(
+                    scan_id="deadline-1", target="127.0.0.1", ports=list(range(1, 11)),
+                    scan_type="tcp", timeout=1, max_threads=1,
+                    deadline_seconds=0.3, use_cache=False
+                )
+
+            task = scan_routes._active_tasks["deadline-1"]
+            assert task["status"] == "partial" and task["deadline_reached"]
+            assert task["progress"] < 100
+            assert task["progress"] == task["scanned_ports"] / 10 * 100
+        finally:
+            scan_routes._active_tasks.pop("deadline-1", None)
+            scan_routes._scan_results.pop("deadline-1", None)
@@ -0,0 +1,88 @@
+"""
+---------------------------------------------------------------
+File name:                  test_scan_diff.py
+Author:                     Ignorant-lu
+Date created:               2026/10/19
+Description:                扫描差异比较测试用例
+----------------------------------------------------------------
+
+Changed history:
+                            2026/10/19: 初始创建;
+----
+"""
+
+import pytest
+from unittest.mock import patch
+
+from backend.app.core.scan_diff import diff_entries, sorted_entries
+from backend.app.core.result_store import ScanResultStore
+from backend.app.core.inventory_index import InventoryIndex
+from backend.app.api.routes import scan as scan_routes
+
+
+BASE = [
+    {"host": "10.0.0.1", "port": 22, "status": "open", "service_name": "ssh"},
+    {"host": "10.0.0.1", "port": 80, "status": "open", "service_name": "http"},
+    {"host": "10.0.0.1", "port": 443, "status": "closed"},
+    {"host": "10.0.0.2", "port": 3389, "status": "open"},
+    {"host": "10.0.0.3", "port": 21, "status": "open"},
+]
+
+TARGET = [
+    {"target": "10.0.0.1", "port": 22, "status": "open", "service": "ssh"},
+    {"target": "10.0.0.1", "port": 80, "status": "open", "service": "nginx"},
+    {"target": "10.0.0.1", "port": 443, "status": "open"},
+    {"target": "10.0.0.2", "port": 3389, "status": "closed"},
+    {"target": "10.0.0.4", "port": 8080, "status": "open"},
+]
+
+
+class TestScanDiff:
+    """扫描差异比较测试类"""
+
+    def test_merge_join_classifies_changes(self):
+        """测试新开放、已关闭、服务变化与无法确认的端口"""
+        diff = diff_entries(sorted_entries(BASE), sorted_entries(TARGET))
+        ports = {kind: [(c["host"], c["port"]) for c in diff[kind]]
+                 for kind in ("opened", "closed", "service_changed", "unverified")}
+        assert ports == {
+            "opened": [("10.0.0.1", 443), ("10.0.0.4", 8080)],
+            "closed": [("10.0.0.2", 3389)],
+            "service_changed": [("10.0.0.1", 80)],
+            "unverified": [("10.0.0.3", 21)],
+        }
+        assert diff["counts"]["unchanged"] == 1
+        assert diff["counts"]["compared"] == 4
+
+    def test_timeout_is_not_closed_and_limit_truncates(self):
+        """测试超时不视为关闭，明细按limit截断但计数完整"""
+        base = sorted_entries({"host": "h", "port": p, "status": "open"} for p in range(1, 11))
+        target = sorted_entries({"host": "h", "port": p, "status": "timeout"} for p in range(1, 11))
+        diff = diff_entries(base, target, limit=3)
+        assert diff["counts"]["unverified"] == 10 and len(diff["unverified"]) == 3
+        assert diff["counts"]["closed"] == 0 and diff["truncated"]
+
+    def test_store_streams_sorted_unique_entries(self, tmp_path):
+        """测试结果存储分块有序读取，重复结果以最后一次为准"""
+        store = ScanResultStore(str(tmp_path / "results.db"))
+        store.write_results("a", BASE + [{"host": "10.0.0.1", "port": 22, "status": "closed"}])
+        store.write_results("b", TARGET)
+        diff = diff_entries(store.iter_sorted("a", chunk_size=1), store.iter_sorted("b", chunk_size=2))
+        assert [c["port"] for c in diff["opened"]] == [22, 443, 8080]
+        store.close()
+
+    @pytest.mark.asyncio
+    async def test_snapshot_diff_endpoint(self):
+        """测试资产清单快照之间的差异比较接口"""
+        index = InventoryIndex()
+        with patch.object(scan_routes, "inventory_index", index):
+            index.update("10.0.0.1", 22, "open", service="ssh")
+            first = (await scan_routes.create_inventory_snapshot()).data["snapshot_id"]
+            index.update("10.0.0.1", 22, "closed")
+            index.update("10.0.0.9", 443, "open")
+            second = (await scan_routes.create_inventory_snapshot()).data["snapshot_id"]
+
+            response = await scan_routes.diff_scans(first, second, source="snapshot", limit=100)
+
+        assert [c["port"] for c in response.data["closed"]] == [22]
+        assert [c["host"] for c in response.data["opened"]] == ["10.0.0.9"]
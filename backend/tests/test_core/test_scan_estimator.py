@@ -0,0 +1,92 @@
+"""
+---------------------------------------------------------------
+File name:                  test_scan_estimator.py
+Author:                     Ignorant-lu
+Date created:               2026/10/19
+Description:                扫描耗时估计测试用例
+----------------------------------------------------------------
+
+Changed history:
+                            2026/10/19: 初始创建;
+                            2026/10/19: 移除未使用的导入;
+----
+"""
+
+import time
+
+import pytest
+from unittest.mock import patch
+
+from backend.app.core.job_manager import job_manager
+from backend.app.core.scan_estimator import ProbeTimingModel, ScanProgress, estimate_scan
+from backend.app.schemas.scan import BatchScanRequest
+from backend.app.api.routes import scan as scan_routes
+
+
+class TestScanEstimator:
+    """扫描耗时估计测试类"""
+
+    def test_model_learns_per_host_timing(self):
+        """测试按目标学习RTT与响应比例，未知目标使用整体平均"""
+        model = ProbeTimingModel()
+        for _ in range(20):
+            model.observe("fast", 0.01, responded=True)
+            model.observe("dark", 2.0, responded=False)
+
+        assert model.expected_probe_time("fast", 2.0) == pytest.approx(0.01, abs=0.005)
+        assert model.expected_probe_time("dark", 2.0) == pytest.approx(2.0, abs=0.05)
+        assert 0.5 < model.expected_probe_time("unknown", 2.0) < 1.5
+        assert model.get_statistics()["hosts"] == 2
+
+    def test_estimate_bounded_by_concurrency_rate_and_deadline(self):
+        """测试吞吐量取并发窗口与速率限制的最小值，耗时不超过截止时间"""
+        model = ProbeTimingModel()
+        for _ in range(10):
+            model.observe("10.0.0.1", 0.1, responded=True)
+
+        estimate = estimate_scan(1000, ["10.0.0.1"], 3.0, 50, model=model)
+        assert estimate.limited_by == "concurrency"
+        assert estimate.duration == pytest.approx(2.0, rel=0.05)
+
+        estimate = estimate_scan(1000, ["10.0.0.1"], 3.0, 50, job_rate=100, model=model)
+        assert estimate.limited_by == "job_rate" and estimate.duration == 10.0
+
+        estimate = estimate_scan(1000, ["10.0.0.1"], 3.0, 50, target_rate=10, host_count=4, model=model)
+        assert estimate.limited_by == "target_rate" and estimate.duration == 25.0
+
+        estimate = estimate_scan(1000, ["10.0.0.1"], 3.0, 50, job_rate=100, deadline=5.0, model=model)
+        assert estimate.limited_by == "deadline" and estimate.duration == 5.0
+
+    def test_eta_moves_from_model_to_observed_rate(self):
+        """测试剩余时间从估计吞吐量过渡到实际吞吐量"""
+        model = ProbeTimingModel()
+        estimate = estimate_scan(100, ["10.0.0.1"], 1.0, 20, job_rate=10, model=model)
+        progress = ScanProgress(100, estimate)
+        assert progress.eta() == 10.0
+
+        # 实际每秒完成1个探测，比估计慢10倍
+        progress.started_at = time.monotonic() - 40
+        assert progress.update(40) == pytest.approx(60.0, rel=0.01)
+        assert progress.update(100) == 0.0
+
+        resumed = ScanProgress(100, estimate, completed=90)
+        assert resumed.eta() == 1.0
+
+    @pytest.mark.asyncio
+    async def test_async_task_reports_estimate_and_eta(self):
+        """测试异步扫描任务返回开始前的估计，完成后剩余时间为0"""
+        async def refuse(host, port):
+            raise ConnectionRefusedError()
+
+        request = BatchScanRequest(targets=["127.0.0.1"], ports=[1, 2, 3], timeout=1.0)
+        with patch("asyncio.open_connection", refuse):
+            response = await scan_routes.start_async_scan(request)
+            task_id = response.data["task_id"]
+            assert response.data["estimate"]["probes"] == 3
+            assert scan_routes._active_tasks[task_id]["estimated_time_remaining"] == response.data["estimate"]["duration"]
+            await job_manager.get(task_id).task
+
+        state = scan_routes._active_tasks[task_id]
+        assert state["status"] == "completed"
+        assert state["estimated_time_remaining"] == 0.0
+        assert state["estimate"]["concurrency"] == 1
@@ -0,0 +1,175 @@
+"""
+---------------------------------------------------------------
+File name:                  test_scan_scheduler.py
+Author:                     Ignorant-lu
+Date created:               2026/10/19
+Description:                周期扫描调度测试用例
+----------------------------------------------------------------
+
+Changed history:
+                            2026/10/19: 初始创建;
+                            2026/10/19: 添加周期扫描按创建任务的客户端分配额度的测试;
+                            2026/10/19: 添加工作协程失败时本轮其他探测随之结束的测试;
+----
+"""
+
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from backend.app.core.probe_scheduler import current_client
+from backend.app.core.scan_scheduler import CronSchedule, ScanSchedule, ScanScheduler
+
+
+class FakeScanner:
+    """按预设开放端口返回结果的扫描引擎"""
+
+    def __init__(self, network):
+        self.network = network
+
+    async def scan_ports(self, host, ports, protocol="tcp"):
+        return [
+            {"host": host, "port": port, "status": "open" if port in self.network.get(host, ()) else "closed"}
+            for port in ports
+        ]
+
+
+class TestCronSchedule:
+    """cron表达式测试类"""
+
+    def test_next_after(self):
+        """测试步长、列表和周字段"""
+        start = datetime(2026, 10, 19, 10, 7).timestamp()  # 周一
+        assert datetime.fromtimestamp(CronSchedule("*/15 * * * *").next_after(start)) == datetime(2026, 10, 19, 10, 15)
+        assert datetime.fromtimestamp(CronSchedule("0 3 * * 0").next_after(start)) == datetime(2026, 10, 25, 3, 0)
+        assert datetime.fromtimestamp(CronSchedule("30 1,13 1 * *").next_after(start)) == datetime(2026, 11, 1, 1, 30)
+
+    def test_invalid_expression(self):
+        """测试无效表达式"""
+        for expression in ["* * * *", "61 * * * *", "*/0 * * * *"]:
+            with pytest.raises(ValueError):
+                CronSchedule(expression)
+
+
+class TestScanScheduler:
+    """周期扫描调度测试类"""
+
+    @pytest.mark.asyncio
+    async def test_incremental_plan_backs_off_stable_ranges(self):
+        """测试稳定关闭区间退避，新开放端口恢复全量扫描"""
+        network = {"10.0.0.1": {22, 80}, "10.0.0.2": set()}
+        scheduler = ScanScheduler()
+        scheduler.scanner_factory = lambda **options: FakeScanner(network)
+        schedule = ScanSchedule("10.0.0.1-2", "1-1000", interval_seconds=3600, max_backoff_runs=8)
+
+        probes = [(await scheduler.run_once(schedule))["probes"] for _ in range(8)]
+        # 第1轮全量，之后只扫开放端口，稳定区间按1、2、4轮间隔重扫
+        assert probes[0] == 2000
+        assert sum(probes) < 2000 * 8 / 2
+        assert schedule.hosts["10.0.0.1"].to_dict()["open_ports"] == [22, 80]
+        assert schedule.hosts["10.0.0.2"].rest_interval > 1
+
+        network["10.0.0.1"].discard(80)
+        summary = await scheduler.run_once(schedule)
+        assert summary["change_details"] == [{"host": "10.0.0.1", "port": 80, "change": "closed"}]
+
+        # 稳定区间中新开放的端口在下一次区间重扫时发现，之后恢复每轮全量
+        network["10.0.0.2"].add(443)
+        for _ in range(10):
+            summary = await scheduler.run_once(schedule)
+            if summary["changes"]:
+                break
+        assert summary["change_details"] == [{"host": "10.0.0.2", "port": 443, "change": "opened"}]
+        assert schedule.hosts["10.0.0.2"].rest_interval == 1
+
+    @pytest.mark.asyncio
+    async def test_loop_runs_due_schedules(self):
+        """测试调度循环执行到期任务"""
+        scheduler = ScanScheduler()
+        schedule = scheduler.add(ScanSchedule("10.0.0.1", "80", interval_seconds=3600))
+        scheduler.start(lambda **options: FakeScanner({"10.0.0.1": {80}}))
+        try:
+            for _ in range(100):
+                if schedule.runs:
+                    break
+                await asyncio.sleep(0.01)
+            assert schedule.run_count == 1
+            assert schedule.next_run_at > schedule.runs[0]["started_at"] + 3000
+        finally:
+            await scheduler.stop()
+
+    @pytest.mark.asyncio
+    async def test_run_bounds_hosts_and_port_batches(self):
+        """测试每轮同时扫描的主机数和每批端口数有上限，所有目标都被扫描"""
+        class CountingScanner(FakeScanner):
+            active = peak = largest_batch = 0
+
+            async def scan_ports(self, host, ports, protocol="tcp"):
+                CountingScanner.active += 1
+                CountingScanner.peak = max(CountingScanner.peak, CountingScanner.active)
+                CountingScanner.largest_batch = max(CountingScanner.largest_batch, len(ports))
+                await asyncio.sleep(0)
+                CountingScanner.active -= 1
+                return await super().scan_ports(host, ports, protocol)
+
+        scheduler = ScanScheduler()
+        scheduler.scanner_factory = lambda **options: CountingScanner({})
+        schedule = ScanSchedule("10.0.0.0/24", "1-3000", interval_seconds=3600)
+
+        summary = await scheduler.run_once(schedule)
+        assert summary["hosts"] == 254 and summary["probes"] == 254 * 3000
+        assert CountingScanner.peak <= ScanScheduler.HOST_CONCURRENCY
+        assert CountingScanner.largest_batch == ScanScheduler.PORT_BATCH_SIZE
+
+    @pytest.mark.asyncio
+    async def test_failed_worker_stops_the_run(self):
+        """测试某个主机扫描失败时本轮其他工作协程被取消，返回后不再有进行中的探测"""
+        class FailingScanner(FakeScanner):
+            active = 0
+
+            async def scan_ports(self, host, ports, protocol="tcp"):
+                if host == "10.0.0.1":
+                    raise OSError("network unreachable")
+                FailingScanner.active += 1
+                try:
+                    await asyncio.sleep(10)
+                finally:
+                    FailingScanner.active -= 1
+
+        scheduler = ScanScheduler()
+        scheduler.scanner_factory = lambda **options: FailingScanner({})
+        schedule = ScanSchedule("10.0.0.0/29", "80", interval_seconds=3600)
+
+        with pytest.raises(OSError, match="network unreachable"):
+            await asyncio.wait_for(scheduler.run_once(schedule), timeout=2)
+        assert FailingScanner.active == 0
+
+    @pytest.mark.asyncio
+    async def test_runs_charged_to_creating_client(self):
+        """测试每轮扫描以创建任务的客户端身份运行，不沿用启动调度循环的请求的客户端"""
+        clients = {}
+
+        def factory(**options):
+            clients[options["name"]] = current_client.get()
+            return FakeScanner({})
+
+        scheduler = ScanScheduler()
+        token = current_client.set("ip:first")
+        try:
+            for name, client in [("a", "ip:a"), ("b", "ip:b"), ("anonymous", None)]:
+                scheduler.add(ScanSchedule(
+                    "10.0.0.1", "80", interval_seconds=3600, client=client, scan_options={"name": name}
+                ))
+            scheduler.start(factory)
+        finally:
+            current_client.reset(token)
+        try:
+            for _ in range(100):
+                if len(clients) == 3:
+                    break
+                await asyncio.sleep(0.01)
+            assert clients == {"a": "ip:a", "b": "ip:b", "anonymous": None}
+        finally:
+            await scheduler.stop()
+
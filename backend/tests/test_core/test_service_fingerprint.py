@@ -0,0 +1,89 @@
+"""
+---------------------------------------------------------------
+File name:                  test_service_fingerprint.py
+Author:                     Ignorant-lu
+Date created:               2026/10/19
+Description:                服务指纹识别测试用例
+----------------------------------------------------------------
+
+Changed history:
+                            2026/10/19: 初始创建;
+----
+"""
+
+import asyncio
+import pytest
+
+from backend.app.core.service_fingerprint import (
+    ServiceFingerprinter, SignatureDatabase, Signature, DEFAULT_PROBES
+)
+from backend.app.core.banner_grabber import BannerGrabber
+from backend.app.core.port_scanner import ServiceDetector
+
+
+class TestServiceFingerprint:
+    """服务指纹识别测试类"""
+
+    def test_signatures_extract_service_and_version(self):
+        """测试常见banner的服务与版本识别"""
+        database = SignatureDatabase()
+        cases = {
+            "SSH-2.0-OpenSSH_8.9p1 Ubuntu-3": ("ssh", "OpenSSH_8.9p1"),
+            "220 (vsFTPd 3.0.3)": ("ftp", "vsFTPd 3.0.3"),
+            "220 mail.example.com ESMTP Postfix": ("smtp", "Postfix"),
+            "HTTP/1.1 200 OK\r\nDate: x\r\nServer: nginx/1.18.0\r\n": ("http", "nginx/1.18.0"),
+            "HTTP/1.0 404 Not Found": ("http", "1.0"),
+            "+PONG": ("redis", None),
+            "RFB 003.008": ("vnc", "003.008"),
+            "\x16\x03\x03\x00\x4a\x02": ("tls", None),
+        }
+        for banner, (service, version) in cases.items():
+            fingerprint = database.match(banner)
+            assert fingerprint is not None, banner
+            assert (fingerprint.service, fingerprint.version) == (service, version)
+        assert database.match("random garbage") is None
+
+    def test_custom_signatures_keep_group_offsets(self):
+        """测试合并正则后各签名的捕获组编号正确"""
+        database = SignatureDatabase((
+            Signature("a", "alpha", r"A(\d)(\d)"),
+            Signature("b", "beta", r"B(\w+)"),
+        ))
+        assert database.match("B7x").version == "7x"
+        assert database.match("A12").version == "1"
+
+    def test_fingerprint_cache(self):
+        """测试按主机、端口与banner哈希缓存"""
+        fingerprinter = ServiceFingerprinter()
+        for _ in range(3):
+            assert fingerprinter.fingerprint("10.0.0.1", 22, "SSH-2.0-dropbear").service == "ssh"
+        fingerprinter.fingerprint("10.0.0.2", 22, "SSH-2.0-dropbear")
+        stats = fingerprinter.get_statistics()
+        assert stats["cache_hits"] == 2 and stats["cache_misses"] == 2
+
+    def test_probe_selection_and_detector(self):
+        """测试按端口选择探测载荷及banner优先的服务检测"""
+        fingerprinter = ServiceFingerprinter(probes=DEFAULT_PROBES)
+        assert fingerprinter.probes_for(6379)[0].name == "redis-ping"
+        assert fingerprinter.probes_for(12345)[0].name == "generic-lines"
+        assert ServiceDetector.detect_service(8080, "SSH-2.0-OpenSSH_9.0") == "ssh"
+        assert ServiceDetector.detect_service(22) == "ssh"
+
+    @pytest.mark.asyncio
+    async def test_active_probe_when_server_waits(self):
+        """测试服务端不主动发言时发送探测载荷"""
+        async def handle(reader, writer):
+            await reader.read(64)
+            writer.write(b"+PONG\r\n")
+            await writer.drain()
+            writer.close()
+
+        server = await asyncio.start_server(handle, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        try:
+            grabber = BannerGrabber(timeout=0.2, fingerprinter=ServiceFingerprinter())
+            assert await grabber.grab("127.0.0.1", port) == "+PONG"
+            assert grabber.probes_sent == 1
+        finally:
+            server.close()
+            await server.wait_closed()
@@ -0,0 +1,109 @@
+"""
+---------------------------------------------------------------
+File name:                  test_source_pool.py
+Author:                     Ignorant-lu
+Date created:               2026/10/19
+Description:                扫描源地址池测试用例
+----------------------------------------------------------------
+
+Changed history:
+                            2026/10/19: 初始创建;
+----
+"""
+
+import asyncio
+import errno
+import socket
+import struct
+
+import pytest
+
+from backend.app.core.port_scanner import PortScannerEngine
+from backend.app.core.source_pool import SourceAddressPool, set_reset_on_close
+
+
+async def start_server():
+    """启动本地监听服务，返回(服务, 端口)"""
+    async def handle(reader, writer):
+        writer.close()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    return server, server.sockets[0].getsockname()[1]
+
+
+class TestSourceAddressPool:
+    """扫描源地址池测试类"""
+
+    def test_select_least_loaded(self):
+        """测试选择占用最少的同地址族源地址"""
+        pool = SourceAddressPool(["127.0.0.1", "127.0.0.2", "::1"])
+        first, second, v6 = pool._sources
+        first.sockets.add(socket.socket())
+        try:
+            assert pool.select(socket.AF_INET) is second
+            assert pool.select(socket.AF_INET6) is v6
+            second.paused_until = float("inf")
+            assert pool.select(socket.AF_INET) is first
+        finally:
+            for sock in first.sockets:
+                sock.close()
+
+    @pytest.mark.asyncio
+    async def test_connections_tracked_per_source(self):
+        """测试连接从池中的源地址发起，关闭后不再计入端口占用"""
+        server, port = await start_server()
+        pool = SourceAddressPool(["127.0.0.2", "127.0.0.3"])
+        writers = []
+        for _ in range(4):
+            _, writer = await pool.open_connection("127.0.0.1", port)
+            writers.append(writer)
+
+        local_hosts = sorted(writer.get_extra_info("sockname")[0] for writer in writers)
+        assert local_hosts == ["127.0.0.2", "127.0.0.2", "127.0.0.3", "127.0.0.3"]
+        stats = pool.get_statistics()
+        assert [s["ports_in_use"] for s in stats["sources"]] == [2, 2]
+
+        for writer in writers:
+            assert set_reset_on_close(writer)
+            linger = writer.get_extra_info("socket").getsockopt(
+                socket.SOL_SOCKET, socket.SO_LINGER, struct.calcsize("ii")
+            )
+            assert struct.unpack("ii", linger) == (1, 0)
+            writer.close()
+            await writer.wait_closed()
+        stats = pool.get_statistics()
+        assert [s["ports_in_use"] for s in stats["sources"]] == [0, 0]
+        assert [s["peak_ports_in_use"] for s in stats["sources"]] == [2, 2]
+        assert sum(s["connections_opened"] for s in stats["sources"]) == 4
+        server.close()
+
+    @pytest.mark.asyncio
+    async def test_unusable_source_paused(self):
+        """测试无法绑定的源地址被暂停，连接改用其他源地址"""
+        server, port = await start_server()
+        pool = SourceAddressPool(["192.0.2.1", "127.0.0.1"], pause_seconds=60)
+        for _ in range(2):
+            _, writer = await pool.open_connection("127.0.0.1", port)
+            assert writer.get_extra_info("sockname")[0] == "127.0.0.1"
+            writer.close()
+
+        unusable = pool.get_statistics()["sources"][0]
+        assert unusable["exhausted"] == 1 and unusable["paused"]
+
+        pool.configure(["192.0.2.1"])
+        with pytest.raises(OSError) as exc_info:
+            await pool.open_connection("127.0.0.1", port)
+        assert exc_info.value.errno == errno.EADDRNOTAVAIL
+        server.close()
+
+    @pytest.mark.asyncio
+    async def test_scanner_uses_source_pool(self):
+        """测试扫描引擎通过源地址池探测端口"""
+        server, port = await start_server()
+        pool = SourceAddressPool(["127.0.0.4"])
+        scanner = PortScannerEngine(timeout=1.0, source_pool=pool, reset_on_close=True)
+        results = await scanner.scan_ports("127.0.0.1", [port])
+
+        assert results[0]["status"] == "open"
+        assert pool.get_statistics()["sources"][0]["connections_opened"] == 1
+        server.close()
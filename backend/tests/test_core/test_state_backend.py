@@ -0,0 +1,211 @@
+"""
+---------------------------------------------------------------
+File name:                  test_state_backend.py
+Author:                     Ignorant-lu
+Date created:               2026/10/19
+Description:                共享状态存储测试用例
+----------------------------------------------------------------
+
+Changed history:
+                            2026/10/19: 初始创建;
+                            2026/10/19: 添加跨进程取消排队中任务的测试;
+                            2026/10/19: 状态写入改为异步后等待写入完成再查询;
+                            2026/10/19: 添加共享状态存储写入不阻塞事件循环、多工作进程拒绝进程内功能的测试;
+----
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from fastapi import HTTPException
+
+from backend.app.api.routes import scan as scan_routes
+from backend.app.core.job_manager import JobManager
+from backend.app.core.state_backend import (
+    MemoryStateBackend, SQLiteStateBackend, RedisStateBackend, create_state_backend
+)
+
+
+class LocalRedis:
+    """本地Redis替代客户端（只实现状态存储用到的命令）"""
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, name):
+        value, expires_at = self.data.get(name, (None, None))
+        if expires_at is not None and expires_at <= time.time():
+            return None
+        return value
+
+    def set(self, name, value, px=None):
+        self.data[name] = (value, time.time() + px / 1000 if px else None)
+
+    def delete(self, name):
+        self.data.pop(name, None)
+
+    def exists(self, name):
+        return int(self.get(name) is not None)
+
+    def scan_iter(self, match):
+        prefix = match.rstrip("*")
+        return [name for name in list(self.data) if name.startswith(prefix) and self.get(name) is not None]
+
+
+class TestStateBackend:
+    """共享状态存储测试类"""
+
+    @pytest.mark.parametrize("factory", [
+        lambda tmp_path: MemoryStateBackend(),
+        lambda tmp_path: SQLiteStateBackend(str(tmp_path / "state.db")),
+        lambda tmp_path: RedisStateBackend(client=LocalRedis()),
+    ])
+    def test_backend_semantics(self, tmp_path, factory):
+        """测试各存储的读写、命名空间隔离与过期"""
+        backend = factory(tmp_path)
+        backend.set("state:scan", "a", {"status": "running", "progress": 0.5})
+        backend.set("state:scan", "b", {"status": "completed"}, ttl=0.05)
+        backend.set("state:ping", "c", {"status": "running"})
+
+        assert backend.get("state:scan", "a") == {"status": "running", "progress": 0.5}
+        assert sorted(backend.keys("state:scan")) == ["a", "b"]
+        assert backend.exists("state:scan", "b") and not backend.exists("state:ping", "a")
+        time.sleep(0.1)
+        assert backend.get("state:scan", "b") is None and not backend.exists("state:scan", "b")
+        assert backend.keys("state:scan") == ["a"]
+
+        backend.delete("state:scan", "a")
+        assert backend.get("state:scan", "a") is None and backend.keys("state:ping") == ["c"]
+        backend.close()
+
+    def test_create_from_url(self, tmp_path):
+        """测试按URL创建存储"""
+        assert isinstance(create_state_backend(None), MemoryStateBackend)
+        assert isinstance(create_state_backend(f"sqlite:///{tmp_path}/state.db"), SQLiteStateBackend)
+        with pytest.raises(ValueError):
+            create_state_backend("mysql://localhost/state")
+
+    @pytest.mark.asyncio
+    async def test_workers_share_jobs(self, tmp_path):
+        """测试一个工作进程的任务状态、结果可在另一个进程查询并取消"""
+        path = str(tmp_path / "state.db")
+        owner, other = JobManager(), JobManager()
+        owner.set_state_backend(SQLiteStateBackend(path), sync_interval=0.05)
+        other.set_state_backend(SQLiteStateBackend(path), sync_interval=0.05)
+        owner_tasks, owner_results = owner.tasks("scan"), owner.results("scan")
+        other_tasks, other_results = other.tasks("scan"), other.results("scan")
+
+        async def run(job_id, forever):
+            owner_tasks[job_id]["status"] = "running"
+            owner_tasks[job_id]["progress"] = 50.0
+            owner_results[job_id] = [{"port": 80, "status": "open"}]
+            try:
+                if forever:
+                    await asyncio.Event().wait()
+                owner_tasks[job_id]["status"] = "completed"
+            except asyncio.CancelledError:
+                owner_tasks[job_id]["status"] = "cancelled"
+                raise
+
+        for job_id, forever in [("done", False), ("long", True)]:
+            owner_tasks[job_id] = {"task_id": job_id, "status": "pending"}
+            owner.submit(job_id, lambda job_id=job_id, forever=forever: run(job_id, forever))
+        owner.start()
+
+        # 状态在线程中写入共享存储
+        await owner.flush_backend()
+        assert "long" in other_tasks and "missing" not in other_tasks
+        await asyncio.sleep(0.2)
+        assert other_tasks["long"]["progress"] == 50.0
+        assert other_tasks["done"]["status"] == "completed"
+        assert other_results["done"] == [{"port": 80, "status": "open"}]
+        assert sorted(other_tasks) == ["done", "long"]
+
+        assert await other.cancel("long", timeout=2.0)
+        assert owner.get("long").task.cancelled()
+        assert other_tasks["long"]["status"] == "cancelled"
+
+        owner.remove("done")
+        await owner.flush_backend()
+        assert "done" not in other_tasks
+        await owner.stop()
+        owner.state_backend.close()
+        other.state_backend.close()
+
+    @pytest.mark.asyncio
+    async def test_remote_cancel_of_queued_job(self, tmp_path):
+        """测试另一个进程取消排队中的任务时任务被移出队列且不再启动"""
+        path = str(tmp_path / "state.db")
+        owner, other = JobManager(max_running=1), JobManager()
+        owner.set_state_backend(SQLiteStateBackend(path), sync_interval=0.05)
+        other.set_state_backend(SQLiteStateBackend(path), sync_interval=0.05)
+        owner_tasks, other_tasks = owner.tasks("scan"), other.tasks("scan")
+        release = asyncio.Event()
+        started = []
+
+        async def run(job_id):
+            started.append(job_id)
+            await release.wait()
+            owner_tasks[job_id]["status"] = "completed"
+
+        for job_id in ("first", "queued"):
+            owner_tasks[job_id] = {"task_id": job_id, "status": "pending"}
+            owner.submit(job_id, lambda job_id=job_id: run(job_id))
+        owner.start()
+        await asyncio.sleep(0)
+        assert owner.queue_position("queued") == 0
+        await owner.flush_backend()
+
+        assert await other.cancel("queued", timeout=2.0)
+        assert owner.queue_position("queued") is None
+        assert other_tasks["queued"]["status"] == "cancelled"
+
+        release.set()
+        for _ in range(100):
+            if owner_tasks["first"]["status"] == "completed":
+                break
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(0.05)
+        assert started == ["first"]
+        assert owner_tasks["queued"]["status"] == "cancelled"
+        await owner.stop()
+        owner.state_backend.close()
+        other.state_backend.close()
+
+    @pytest.mark.asyncio
+    async def test_slow_backend_does_not_block_loop(self):
+        """测试共享状态存储写入较慢时发布状态不阻塞事件循环，且按提交顺序写入"""
+
+        class SlowBackend(MemoryStateBackend):
+            def set(self, kind, key, value, ttl=None):
+                time.sleep(0.2)
+                super().set(kind, key, value, ttl)
+
+        manager = JobManager()
+        manager.set_state_backend(SlowBackend(), sync_interval=60)
+        tasks = manager.tasks("scan")
+        tasks["job"] = {"task_id": "job", "status": "running", "progress": 10}
+        job = manager.get("job")
+
+        started = time.monotonic()
+        manager.publish(job)
+        tasks["job"]["progress"] = 50
+        manager.publish(job)
+        assert time.monotonic() - started < 0.1
+
+        await manager.flush_backend()
+        assert manager.state_backend.get("state:scan", "job")["progress"] == 50
+        await manager.stop()
+
+
+def test_per_process_features_require_single_worker(monkeypatch):
+    """测试多工作进程运行时资产清单和周期扫描接口返回409"""
+    monkeypatch.setattr(scan_routes.settings, "workers", 2)
+    with pytest.raises(HTTPException) as exc_info:
+        scan_routes._require_single_worker("周期扫描")
+    assert exc_info.value.status_code == 409
+
+    monkeypatch.setattr(scan_routes.settings, "workers", 1)
+    scan_routes._require_single_worker("周期扫描")
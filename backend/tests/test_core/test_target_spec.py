@@ -0,0 +1,67 @@
+"""
+---------------------------------------------------------------
+File name:                  test_target_spec.py
+Author:                     Ignorant-lu
+Date created:               2026/10/19
+Description:                扫描目标规格测试用例
+----------------------------------------------------------------
+
+Changed history:
+                            2026/10/19: 初始创建;
+----
+"""
+
+import ipaddress
+import itertools
+import pytest
+
+from backend.app.core.target_spec import TargetSpec
+from backend.app.core.network_utils import NetworkUtils
+
+
+class TestTargetSpec:
+    """扫描目标规格测试类"""
+
+    def test_parse_mixed_spec_with_exclusions(self):
+        """测试混合CIDR、范围、主机名与排除项"""
+        spec = TargetSpec.parse(
+            "192.168.1.0/29, 10.0.0.1-3, Example.com, !192.168.1.2",
+            exclude=["10.0.0.2"]
+        )
+        assert list(spec) == [
+            "10.0.0.1", "10.0.0.3",
+            "192.168.1.1", "192.168.1.3", "192.168.1.4", "192.168.1.5", "192.168.1.6",
+            "example.com"
+        ]
+        assert len(spec) == 8
+        assert "192.168.1.2" not in spec and "192.168.1.3" in spec
+
+    def test_large_network_is_lazy(self):
+        """测试/8网段不生成地址列表"""
+        spec = TargetSpec.parse("10.0.0.0/8", exclude="10.128.0.0/9")
+        assert len(spec) == 2 ** 23 - 1
+        assert list(itertools.islice(spec, 2)) == ["10.0.0.1", "10.0.0.2"]
+        assert "10.127.255.255" in spec and "10.128.0.1" not in spec
+
+    def test_random_permutation_covers_every_target_once(self):
+        """测试随机顺序不重复、不遗漏且可复现"""
+        spec = TargetSpec.parse("172.16.0.0/22, !172.16.1.0/24, host-a")
+        shuffled = list(spec.iter_random(seed=7))
+        assert sorted(shuffled) == sorted(spec)
+        assert shuffled != list(spec)
+        assert shuffled == list(spec.iter_random(seed=7))
+
+    def test_invalid_targets(self):
+        """测试无效目标"""
+        for bad in ["10.0.0.300", "10.0.0.9-10.0.0.1", "bad_host!"]:
+            with pytest.raises(ValueError):
+                TargetSpec.parse(bad)
+
+    def test_network_utils_delegates(self):
+        """测试NetworkUtils结果与ipaddress一致"""
+        assert NetworkUtils.calculate_subnet_range("192.168.0.0/28") == [
+            str(ip) for ip in ipaddress.ip_network("192.168.0.0/28").hosts()
+        ]
+        assert NetworkUtils.generate_ip_range("10.0.0.3", "10.0.0.1") == [
+            "10.0.0.1", "10.0.0.2", "10.0.0.3"
+        ]